@@ -0,0 +1,75 @@
+"""
+Change Aggregation for QoE-Guard.
+
+Folds the changes of a diff into groups after diffing: changes of the same
+type at paths that differ only in array indices become one group
+(``$.items[0].price`` ... ``$.items[9999].price`` -> ``$.items[*].price``)
+with a count, sample indices and numeric delta statistics.
+
+Scoring, storage and reports work on the groups, so their cost scales with
+the schema of a response rather than the length of its lists.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .model import Change, ChangeGroup, DiffResult
+from .paths import normalize_path, path_indices
+
+
+# Array indices kept per group
+MAX_SAMPLE_INDICES = 5
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+
+def aggregate_changes(changes: Iterable[Change], max_samples: int = MAX_SAMPLE_INDICES) -> List[ChangeGroup]:
+    """
+    Group changes by normalized path and change type.
+
+    Args:
+        changes: Changes from ``json_diff``
+        max_samples: Array indices kept per group
+
+    Returns:
+        Groups in order of their first change
+    """
+    groups: Dict[Tuple[str, str], ChangeGroup] = {}
+    for change in changes:
+        key = (normalize_path(change.path), change.change_type)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = ChangeGroup(
+                path=key[0],
+                change_type=change.change_type,
+                first_path=change.path,
+                old_value=change.old_value,
+                new_value=change.new_value,
+                old_type=change.old_type,
+                new_type=change.new_type,
+                is_breaking=change.is_breaking,
+                is_critical=change.is_critical,
+                criticality_score=change.criticality_score,
+            )
+        group.count += 1
+        if len(group.sample_indices) < max_samples and "[" in change.path:
+            group.sample_indices.append(path_indices(change.path))
+
+        if change.change_type == "value_changed" and _is_number(change.old_value) and _is_number(change.new_value):
+            delta = change.new_value - change.old_value
+            if group.min_delta is None:
+                group.min_delta = group.max_delta = delta
+            else:
+                group.min_delta = min(group.min_delta, delta)
+                group.max_delta = max(group.max_delta, delta)
+            group.abs_delta_sum += abs(delta)
+    return list(groups.values())
+
+
+def change_groups(diff_result: DiffResult) -> List[ChangeGroup]:
+    """Get the aggregated changes of a diff result (aggregated here if it has none)."""
+    if diff_result.change_groups or not diff_result.changes:
+        return diff_result.change_groups
+    return aggregate_changes(diff_result.changes)
@@ -7,18 +7,27 @@ Provides intelligent analysis capabilities:
 - Anomaly detection for runtime signals
 - NLP-based API documentation analysis
 - Explainable ML risk scoring
+- Shared, lazily loaded models
 """
+from .registry import ModelRegistry, model_registry, warmup_models
 from .llm_analyzer import LLMAnalyzer, analyze_diff_with_llm, generate_recommendations
+from .llm_cache import LLMResponseCache, llm_response_cache
 from .semantic_drift import SemanticDriftDetector, detect_semantic_changes
 from .anomaly_detector import AnomalyDetector, detect_runtime_anomalies
 from .nlp_analyzer import NLPAnalyzer, extract_api_intent, classify_endpoint_criticality
 from .ml_scorer import MLRiskScorer, train_risk_model, explain_prediction
 
 __all__ = [
+    # Models
+    "ModelRegistry",
+    "model_registry",
+    "warmup_models",
     # LLM
     "LLMAnalyzer",
     "analyze_diff_with_llm",
     "generate_recommendations",
+    "LLMResponseCache",
+    "llm_response_cache",
     # Semantic
     "SemanticDriftDetector",
     "detect_semantic_changes",
@@ -0,0 +1,278 @@
+"""
+Approximate Nearest-Neighbor Search for QoE-Guard AI.
+
+In-process HNSW (hierarchical navigable small world) index over normalized
+embeddings, using inner product as similarity:
+- Incremental inserts (the index grows with the field corpus)
+- Top-k queries in roughly logarithmic time
+- Exact search for small indexes, where a matrix multiply is faster
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import threading
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Indexes up to this size are searched exactly
+EXACT_SEARCH_THRESHOLD = 1024
+
+# One-off searches build a graph only above this size; building costs more
+# than a blocked matrix multiply for smaller candidate sets
+ONE_OFF_INDEX_THRESHOLD = 50_000
+
+# Queries scored per matrix multiply in exact search
+QUERY_BLOCK_SIZE = 1024
+
+
+def top_k_exact(queries: np.ndarray, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact top-k by inner product, in blocks of queries.
+
+    Returns:
+        (indices, scores), both shaped (len(queries), min(k, len(vectors))),
+        best match first
+    """
+    k = min(k, len(vectors))
+    if k == 0 or len(queries) == 0:
+        empty = np.zeros((len(queries), 0))
+        return empty.astype(int), empty
+
+    indices, scores = [], []
+    for start in range(0, len(queries), QUERY_BLOCK_SIZE):
+        block = queries[start:start + QUERY_BLOCK_SIZE] @ vectors.T
+        if k < len(vectors):
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(len(vectors)), (len(block), 1))
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        indices.append(np.take_along_axis(top, order, axis=1))
+        scores.append(np.take_along_axis(top_scores, order, axis=1))
+    return np.vstack(indices), np.vstack(scores)
+
+
+class HNSWIndex:
+    """
+    HNSW graph index over normalized vectors.
+
+    Each element gets a random top layer; upper layers are sparse and route
+    greedy searches towards the query, layer 0 holds every element.
+    """
+
+    def __init__(
+        self,
+        m: int = 16,
+        ef_construction: int = 64,
+        ef_search: int = 50,
+        exact_threshold: int = EXACT_SEARCH_THRESHOLD,
+        seed: int = 42,
+    ):
+        """
+        Initialize an empty index.
+
+        Args:
+            m: Links per element on upper layers (2*m on layer 0)
+            ef_construction: Candidate list size while inserting
+            ef_search: Candidate list size while searching (at least k)
+            exact_threshold: Search exactly while the index is this small
+            seed: Seed of the layer assignment
+        """
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.exact_threshold = exact_threshold
+        self.labels: List[Hashable] = []
+        self._label_ids: Dict[Hashable, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._layers: List[Dict[int, List[int]]] = []
+        self._entry_point: Optional[int] = None
+        self._level_mult = 1 / math.log(m)
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __contains__(self, label: Hashable) -> bool:
+        return label in self._label_ids
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Vectors in insertion order."""
+        if self._vectors is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._vectors[:len(self.labels)]
+
+    def add(self, vectors: np.ndarray, labels: Sequence[Hashable]) -> int:
+        """
+        Insert vectors; labels already in the index are skipped.
+
+        Returns:
+            Number of inserted vectors
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        added = 0
+        with self._lock:
+            for vector, label in zip(vectors, labels):
+                if label in self._label_ids:
+                    continue
+                self._insert(vector, label)
+                added += 1
+        return added
+
+    def _append(self, vector: np.ndarray, label: Hashable) -> int:
+        node = len(self.labels)
+        if self._vectors is None:
+            self._vectors = np.zeros((64, len(vector)), dtype=np.float32)
+        elif node == len(self._vectors):
+            grown = np.zeros((2 * node, self._vectors.shape[1]), dtype=np.float32)
+            grown[:node] = self._vectors
+            self._vectors = grown
+        self._vectors[node] = vector
+        self.labels.append(label)
+        self._label_ids[label] = node
+        return node
+
+    def _insert(self, vector: np.ndarray, label: Hashable) -> None:
+        node = self._append(vector, label)
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+        while len(self._layers) <= level:
+            self._layers.append({})
+        for layer in range(level + 1):
+            self._layers[layer][node] = []
+
+        if self._entry_point is None:
+            self._entry_point = node
+            return
+
+        entry = self._entry_point
+        top = self._node_level(entry)
+        for layer in range(top, level, -1):
+            entry = self._search_layer(vector, [entry], 1, layer)[0][1]
+
+        entries = [entry]
+        for layer in range(min(level, top), -1, -1):
+            candidates = self._search_layer(vector, entries, self.ef_construction, layer)
+            max_links = self.m0 if layer == 0 else self.m
+            neighbors = [n for _, n in candidates[:max_links]]
+            graph = self._layers[layer]
+            graph[node] = neighbors
+            for neighbor in neighbors:
+                links = graph[neighbor]
+                links.append(node)
+                if len(links) > max_links:
+                    graph[neighbor] = self._closest(self._vectors[neighbor], links, max_links)
+            entries = [n for _, n in candidates]
+
+        if level > top:
+            self._entry_point = node
+
+    def _node_level(self, node: int) -> int:
+        level = 0
+        while level + 1 < len(self._layers) and node in self._layers[level + 1]:
+            level += 1
+        return level
+
+    def _closest(self, vector: np.ndarray, nodes: List[int], count: int) -> List[int]:
+        scores = self._vectors[nodes] @ vector
+        order = np.argsort(-scores, kind="stable")[:count]
+        return [nodes[i] for i in order]
+
+    def _search_layer(
+        self,
+        query: np.ndarray,
+        entries: List[int],
+        ef: int,
+        layer: int,
+    ) -> List[Tuple[float, int]]:
+        """Best-first search of one layer; returns (similarity, node), best first."""
+        graph = self._layers[layer]
+        visited = set(entries)
+        entry_scores = self._vectors[entries] @ query
+        candidates = [(-float(s), n) for s, n in zip(entry_scores, entries)]  # max-heap
+        heapq.heapify(candidates)
+        results = [(float(s), n) for s, n in zip(entry_scores, entries)]  # min-heap
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_score, node = heapq.heappop(candidates)
+            if -neg_score < results[0][0] and len(results) >= ef:
+                break
+            unvisited = [n for n in graph.get(node, ()) if n not in visited]
+            if not unvisited:
+                continue
+            visited.update(unvisited)
+            for score, neighbor in zip((self._vectors[unvisited] @ query).tolist(), unvisited):
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, neighbor))
+                    heapq.heappush(results, (score, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted(results, reverse=True)
+
+    def search(self, query: np.ndarray, k: int = 5, ef: Optional[int] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Find the k most similar vectors.
+
+        Returns:
+            (label, similarity) pairs, most similar first
+        """
+        return self.search_many(np.asarray(query).reshape(1, -1), k, ef)[0]
+
+    def search_many(
+        self,
+        queries: np.ndarray,
+        k: int = 5,
+        ef: Optional[int] = None,
+    ) -> List[List[Tuple[Hashable, float]]]:
+        """Find the k most similar vectors for each query."""
+        queries = np.asarray(queries, dtype=np.float32)
+        if not self.labels or k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        if len(self.labels) <= self.exact_threshold:
+            indices, scores = top_k_exact(queries, self.vectors, k)
+            return [
+                [(self.labels[i], float(s)) for i, s in zip(row_idx, row_scores)]
+                for row_idx, row_scores in zip(indices.tolist(), scores.tolist())
+            ]
+
+        ef = max(ef or self.ef_search, k)
+        results = []
+        with self._lock:
+            top = len(self._layers) - 1
+            for query in queries:
+                entry = self._entry_point
+                for layer in range(top, 0, -1):
+                    entry = self._search_layer(query, [entry], 1, layer)[0][1]
+                found = self._search_layer(query, [entry], ef, 0)[:k]
+                results.append([(self.labels[n], score) for score, n in found])
+        return results
+
+
+def nearest_neighbors(
+    queries: np.ndarray,
+    vectors: np.ndarray,
+    k: int,
+    exact_threshold: int = ONE_OFF_INDEX_THRESHOLD,
+) -> List[List[Tuple[int, float]]]:
+    """
+    Top-k neighbors of each query among vectors, by row index.
+
+    Candidate sets up to ``exact_threshold`` are searched exactly; larger
+    ones through a temporary HNSW index.
+    """
+    if len(vectors) <= exact_threshold:
+        indices, scores = top_k_exact(queries, vectors, k)
+        return [list(zip(row_idx, row_scores)) for row_idx, row_scores in zip(indices.tolist(), scores.tolist())]
+    index = HNSWIndex()
+    index.add(vectors, range(len(vectors)))
+    return index.search_many(queries, k)
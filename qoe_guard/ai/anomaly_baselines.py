@@ -0,0 +1,336 @@
+"""
+Per-Endpoint Anomaly Baselines for QoE-Guard AI.
+
+Stores a trained runtime baseline per endpoint ("GET api.example.com/items/{id}")
+so detection does not refit on every request:
+- Trained from persisted OperationResult timings (most recent window)
+- Versioned rows in the database; a few old versions are kept
+- Compact: per-feature statistics (mean/std/min/max/quartiles) as JSON
+- Refreshed incrementally: only endpoints with results newer than their
+  latest baseline are retrained
+- Detectors are cached per version, so detection is a lookup plus predict
+- Concurrent refreshes (workers, API) retry on version conflicts
+
+Results that are not linked to an operation are not used.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..db.ingest import LOOKUP_CHUNK_SIZE
+from ..db.models import AnomalyBaseline, Operation, OperationResult
+from .anomaly_detector import AnomalyDetector, AnomalyReport, AnomalyScore, RuntimeMetrics
+
+
+# Most recent results per endpoint used for training
+BASELINE_WINDOW = 5000
+
+# Endpoints with fewer results get no baseline
+MIN_BASELINE_SAMPLES = 20
+
+# Versions kept per endpoint
+KEEP_VERSIONS = 3
+
+# Seconds between scheduled refreshes (0 disables the schedule)
+BASELINE_REFRESH_SEC = float(os.getenv("QOE_GUARD_ANOMALY_REFRESH_SEC", "3600"))
+
+# Attempts to store a new version when concurrent refreshes collide
+VERSION_RETRIES = 5
+
+
+def endpoint_key(method: Optional[str], path: str, server_url: Optional[str] = None) -> str:
+    """
+    Get the baseline key of an endpoint.
+
+    The server's host and base path are part of the key, so the same path
+    served by different APIs gets separate baselines; operations without
+    a server URL are keyed by method and path only.
+    """
+    prefix = ""
+    if server_url:
+        parsed = urlparse(server_url if "//" in server_url else f"//{server_url}")
+        prefix = f"{parsed.netloc}{parsed.path}".rstrip("/")
+    return f"{(method or 'GET').upper()} {prefix}{path}"
+
+
+def _content_length(headers: Optional[Dict[str, Any]]) -> int:
+    for name, value in (headers or {}).items():
+        if name.lower() == "content-length":
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return 0
+    return 0
+
+
+class AnomalyBaselineRegistry:
+    """Trains, stores and serves per-endpoint anomaly baselines."""
+
+    def __init__(
+        self,
+        window: int = BASELINE_WINDOW,
+        min_samples: int = MIN_BASELINE_SAMPLES,
+        keep_versions: int = KEEP_VERSIONS,
+    ):
+        self.window = window
+        self.min_samples = min_samples
+        self.keep_versions = keep_versions
+        self._detectors: Dict[str, Tuple[int, AnomalyDetector]] = {}
+        self._lock = threading.Lock()
+
+    def latest_versions(self, db: Session, keys: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Get the latest baseline version of endpoints (all if keys is None)."""
+        query = db.query(AnomalyBaseline.endpoint_key, func.max(AnomalyBaseline.version))
+        if keys is None:
+            return dict(query.group_by(AnomalyBaseline.endpoint_key).all())
+
+        keys = sorted(set(keys))
+        versions: Dict[str, int] = {}
+        for i in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[i:i + LOOKUP_CHUNK_SIZE]
+            versions.update(
+                query.filter(AnomalyBaseline.endpoint_key.in_(chunk))
+                .group_by(AnomalyBaseline.endpoint_key)
+                .all()
+            )
+        return versions
+
+    def get_detectors(self, db: Session, keys: Iterable[str]) -> Dict[str, AnomalyDetector]:
+        """
+        Get the detectors of the latest baselines of endpoints.
+
+        Detectors are cached per version; only baselines that changed since
+        the last call are read.
+
+        Returns:
+            Endpoint key -> detector (endpoints without a baseline are missing)
+        """
+        versions = self.latest_versions(db, keys)
+        detectors: Dict[str, AnomalyDetector] = {}
+        missing: List[Tuple[str, int]] = []
+        with self._lock:
+            for key, version in versions.items():
+                cached = self._detectors.get(key)
+                if cached is not None and cached[0] == version:
+                    detectors[key] = cached[1]
+                else:
+                    missing.append((key, version))
+
+        for key, version in missing:
+            baseline = (
+                db.query(AnomalyBaseline)
+                .filter(AnomalyBaseline.endpoint_key == key, AnomalyBaseline.version == version)
+                .one()
+            )
+            detector = AnomalyDetector.from_training_stats(baseline.stats)
+            with self._lock:
+                self._detectors[key] = (version, detector)
+            detectors[key] = detector
+        return detectors
+
+    def get_detector(self, db: Session, key: str) -> Optional[AnomalyDetector]:
+        """Get the detector of an endpoint's latest baseline."""
+        return self.get_detectors(db, [key]).get(key)
+
+    def detect(
+        self,
+        db: Session,
+        metrics: List[RuntimeMetrics],
+        fallback: Optional[AnomalyDetector] = None,
+    ) -> AnomalyReport:
+        """
+        Detect anomalies against the stored baselines of the metrics' endpoints.
+
+        Metrics are scored per endpoint in one batch each; endpoints without
+        a baseline are scored by the fallback detector (heuristics if None).
+        A metric's server is taken from ``extra["server_url"]``.
+        """
+        fallback = fallback or AnomalyDetector(algorithm="statistical")
+        groups: Dict[str, List[int]] = {}
+        for i, metric in enumerate(metrics):
+            key = endpoint_key(metric.method, metric.endpoint, metric.extra.get("server_url"))
+            groups.setdefault(key, []).append(i)
+
+        detectors = self.get_detectors(db, groups)
+        scores: List[Optional[AnomalyScore]] = [None] * len(metrics)
+        for key, indices in groups.items():
+            detector = detectors.get(key, fallback)
+            for i, score in zip(indices, detector.score_batch([metrics[i] for i in indices])):
+                scores[i] = score
+        return fallback.build_report(metrics, scores)
+
+    def _endpoint_operations(self, db: Session) -> Dict[str, Set[str]]:
+        operations: Dict[str, Set[str]] = {}
+        rows = db.query(Operation.id, Operation.method, Operation.path, Operation.server_url).all()
+        for op_id, method, path, server_url in rows:
+            operations.setdefault(endpoint_key(method, path, server_url), set()).add(op_id)
+        return operations
+
+    def stale_endpoints(self, db: Session) -> Dict[str, Tuple[Set[str], datetime]]:
+        """
+        Find endpoints with results newer than their latest baseline.
+
+        Returns:
+            Endpoint key -> (operation ids, newest result time)
+        """
+        newest_by_operation = dict(
+            db.query(OperationResult.operation_id, func.max(OperationResult.created_at))
+            .filter(OperationResult.operation_id.isnot(None), OperationResult.response_time_ms.isnot(None))
+            .group_by(OperationResult.operation_id)
+            .all()
+        )
+        if not newest_by_operation:
+            return {}
+
+        trained_through = dict(
+            db.query(AnomalyBaseline.endpoint_key, func.max(AnomalyBaseline.trained_through))
+            .group_by(AnomalyBaseline.endpoint_key)
+            .all()
+        )
+
+        stale: Dict[str, Tuple[Set[str], datetime]] = {}
+        for key, op_ids in self._endpoint_operations(db).items():
+            newest = max((newest_by_operation[op] for op in op_ids if op in newest_by_operation), default=None)
+            if newest is None:
+                continue
+            if key not in trained_through or newest > trained_through[key]:
+                stale[key] = (op_ids, newest)
+        return stale
+
+    def _training_metrics(self, db: Session, key: str, operation_ids: Set[str]) -> List[RuntimeMetrics]:
+        method, _, endpoint = key.partition(" ")
+        rows = (
+            db.query(
+                OperationResult.response_time_ms,
+                OperationResult.status_code,
+                OperationResult.response_headers,
+                OperationResult.created_at,
+            )
+            .filter(
+                OperationResult.operation_id.in_(sorted(operation_ids)),
+                OperationResult.response_time_ms.isnot(None),
+            )
+            .order_by(OperationResult.created_at.desc())
+            .limit(self.window)
+            .all()
+        )
+        return [
+            RuntimeMetrics(
+                latency_ms=latency,
+                status_code=status_code or 0,
+                response_size_bytes=_content_length(headers),
+                timestamp=created_at,
+                endpoint=endpoint,
+                method=method,
+            )
+            for latency, status_code, headers, created_at in rows
+        ]
+
+    def train(
+        self,
+        db: Session,
+        key: str,
+        operation_ids: Set[str],
+        trained_through: datetime,
+    ) -> Optional[AnomalyBaseline]:
+        """
+        Train a new baseline version of an endpoint.
+
+        The version is claimed in a savepoint; if a concurrent refresh
+        stored the same version first, the next one is tried.
+
+        Returns:
+            The stored baseline, or None if the endpoint has too few results
+        """
+        metrics = self._training_metrics(db, key, operation_ids)
+        if len(metrics) < self.min_samples:
+            return None
+
+        detector = AnomalyDetector(algorithm="statistical").fit(metrics)
+        for _ in range(VERSION_RETRIES):
+            version = (self.latest_versions(db, [key]).get(key) or 0) + 1
+            baseline = AnomalyBaseline(
+                endpoint_key=key,
+                version=version,
+                algorithm="statistical",
+                sample_count=len(metrics),
+                stats=detector.training_stats,
+                trained_through=trained_through,
+            )
+            try:
+                with db.begin_nested():
+                    db.add(baseline)
+            except IntegrityError:
+                # A concurrent refresh stored this version first
+                continue
+            db.query(AnomalyBaseline).filter(
+                AnomalyBaseline.endpoint_key == key,
+                AnomalyBaseline.version <= version - self.keep_versions,
+            ).delete(synchronize_session=False)
+            return baseline
+
+        print(f"Warning: Could not store anomaly baseline of {key}: version conflicts")
+        return None
+
+    def refresh(self, db: Session, keys: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Retrain the baselines of endpoints with new results.
+
+        Args:
+            db: Database session (committed here)
+            keys: Only consider these endpoints (all if None)
+
+        Returns:
+            Endpoint key -> new baseline version
+        """
+        stale = self.stale_endpoints(db)
+        if keys is not None:
+            wanted = set(keys)
+            stale = {key: value for key, value in stale.items() if key in wanted}
+
+        trained: Dict[str, int] = {}
+        for key, (operation_ids, newest) in sorted(stale.items()):
+            baseline = self.train(db, key, operation_ids, newest)
+            if baseline is not None:
+                trained[key] = baseline.version
+        db.commit()
+        return trained
+
+    def clear(self) -> None:
+        """Drop cached detectors (stored baselines are kept)."""
+        with self._lock:
+            self._detectors.clear()
+
+
+anomaly_baselines = AnomalyBaselineRegistry()
+
+
+def _refresh_with_new_session() -> Dict[str, int]:
+    from ..db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return anomaly_baselines.refresh(db)
+    finally:
+        db.close()
+
+
+async def refresh_baselines_periodically(interval_sec: float = BASELINE_REFRESH_SEC) -> None:
+    """Refresh stale baselines every ``interval_sec`` seconds (run as a background task)."""
+    while True:
+        await asyncio.sleep(interval_sec)
+        try:
+            trained = await asyncio.to_thread(_refresh_with_new_session)
+            if trained:
+                print(f"Refreshed anomaly baselines of {len(trained)} endpoints")
+        except Exception as e:
+            print(f"Warning: Anomaly baseline refresh failed: {e}")
@@ -20,6 +20,18 @@ from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+import numpy as np
+
+
+FEATURE_NAMES = (
+    "latency_ms",
+    "status_code",
+    "response_size_bytes",
+    "hour_of_day",
+    "is_error",
+    "latency_normalized",
+)
+
 
 @dataclass
 class AnomalyScore:
@@ -124,6 +136,14 @@ class AnomalyDetector:
             self.model = None
             self.algorithm = "statistical"
     
+    @classmethod
+    def from_training_stats(cls, training_stats: Dict[str, Dict[str, float]]) -> "AnomalyDetector":
+        """Create a statistical detector from stored per-feature statistics."""
+        detector = cls(algorithm="statistical")
+        detector.feature_names = [name for name in FEATURE_NAMES if name in training_stats]
+        detector.training_stats = {name: dict(training_stats[name]) for name in detector.feature_names}
+        return detector
+    
     @property
     def is_available(self) -> bool:
         """Check if ML-based detection is available."""
@@ -142,15 +162,13 @@ class AnomalyDetector:
         if not metrics:
             return self
         
-        features, self.feature_names = self._extract_features(metrics)
+        features = self._feature_matrix(metrics)
+        self.feature_names = list(FEATURE_NAMES)
         
         if self.algorithm == "statistical":
             self._fit_statistical(features)
         else:
-            import numpy as np
-            features_array = np.array(features)
-            self.scaler.fit(features_array)
-            scaled_features = self.scaler.transform(features_array)
+            scaled_features = self.scaler.fit_transform(features)
             self.model.fit(scaled_features)
         
         return self
@@ -165,42 +183,69 @@ class AnomalyDetector:
         Returns:
             AnomalyScore with detection result
         """
-        features, _ = self._extract_features([metric])
-        feature_vector = features[0]
+        return self.score_batch([metric])[0]
+    
+    def score_batch(self, metrics: List[RuntimeMetrics]) -> List[AnomalyScore]:
+        """
+        Score many metrics at once.
         
-        if self.algorithm == "statistical":
-            return self._detect_statistical(feature_vector, metric)
+        Builds one feature matrix, scores it with a single model call and
+        computes feature contributions for all rows together.
         
-        import numpy as np
-        feature_array = np.array([feature_vector])
+        Args:
+            metrics: Runtime metrics to check
+        
+        Returns:
+            One AnomalyScore per metric, in order
+        """
+        if not metrics:
+            return []
+        
+        features = self._feature_matrix(metrics)
+        
+        if self.algorithm == "statistical":
+            return self._detect_statistical_batch(features, metrics)
         
         try:
-            scaled = self.scaler.transform(feature_array)
-            
-            # Get prediction (-1 = anomaly, 1 = normal)
-            prediction = self.model.predict(scaled)[0]
-            
-            # Get anomaly score (higher = more anomalous)
-            if hasattr(self.model, "score_samples"):
-                raw_score = -self.model.score_samples(scaled)[0]
-            else:
-                raw_score = 0.5 if prediction == -1 else 0.0
-            
-            is_anomaly = prediction == -1
-            
-            # Compute feature contributions
-            contributions = self._compute_contributions(feature_vector)
-            
-            return AnomalyScore(
-                is_anomaly=is_anomaly,
-                score=min(1.0, max(-1.0, raw_score)),
-                confidence=0.8 if self.model else 0.5,
-                features_contribution=contributions,
-                explanation=self._generate_explanation(metric, contributions, is_anomaly),
+            is_anomaly, raw_scores = self._predict_matrix(self.scaler.transform(features))
+        except Exception:
+            # Fallback to statistical (e.g. model not fitted)
+            return self._detect_statistical_batch(features, metrics)
+        
+        contributions = self._contribution_matrix(features)
+        scores = np.clip(raw_scores, -1.0, 1.0)
+        confidence = 0.8 if self.model else 0.5
+        
+        return [
+            AnomalyScore(
+                is_anomaly=bool(anomalous),
+                score=float(score),
+                confidence=confidence,
+                features_contribution=row_contributions,
+                explanation=self._generate_explanation(metric, row_contributions, anomalous),
+            )
+            for metric, anomalous, score, row_contributions in zip(
+                metrics, is_anomaly.tolist(), scores.tolist(), contributions,
             )
-        except Exception as e:
-            # Fallback to statistical
-            return self._detect_statistical(feature_vector, metric)
+        ]
+    
+    def _predict_matrix(self, scaled: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predict anomalies for scaled feature rows.
+        
+        Returns:
+            (is_anomaly flags, raw anomaly scores where higher = more anomalous)
+        """
+        if self.algorithm in ("isolation_forest", "lof") and hasattr(self.model, "offset_"):
+            # predict() is score_samples() - offset_ < 0; score the trees once
+            samples = self.model.score_samples(scaled)
+            return samples - self.model.offset_ < 0, -samples
+        
+        # Prediction: -1 = anomaly, 1 = normal
+        is_anomaly = self.model.predict(scaled) == -1
+        if hasattr(self.model, "score_samples"):
+            return is_anomaly, -self.model.score_samples(scaled)
+        return is_anomaly, np.where(is_anomaly, 0.5, 0.0)
     
     def detect_batch(self, metrics: List[RuntimeMetrics]) -> AnomalyReport:
         """
@@ -209,6 +254,19 @@ class AnomalyDetector:
         Args:
             metrics: List of runtime metrics
         
+        Returns:
+            AnomalyReport with all findings
+        """
+        return self.build_report(metrics, self.score_batch(metrics))
+    
+    def build_report(self, metrics: List[RuntimeMetrics], scores: List[AnomalyScore]) -> AnomalyReport:
+        """
+        Summarize scored metrics into a report.
+        
+        Args:
+            metrics: Runtime metrics
+            scores: Their anomaly scores, in order
+        
         Returns:
             AnomalyReport with all findings
         """
@@ -222,9 +280,7 @@ class AnomalyDetector:
                 summary="No metrics to analyze.",
             )
         
-        results = [(m, self.detect(m)) for m in metrics]
-        
-        anomalies = [(m, s) for m, s in results if s.is_anomaly]
+        anomalies = [(m, s) for m, s in zip(metrics, scores) if s.is_anomaly]
         anomaly_count = len(anomalies)
         anomaly_rate = anomaly_count / len(metrics)
         
@@ -249,39 +305,28 @@ class AnomalyDetector:
         metrics: List[RuntimeMetrics],
     ) -> Tuple[List[List[float]], List[str]]:
         """Extract feature vectors from metrics."""
-        feature_names = [
-            "latency_ms",
-            "status_code",
-            "response_size_bytes",
-            "hour_of_day",
-            "is_error",
-            "latency_normalized",
-        ]
-        
-        features = []
-        for m in metrics:
-            hour = m.timestamp.hour if m.timestamp else 12
-            is_error = 1.0 if m.status_code >= 400 else 0.0
-            
-            # Normalize latency (log scale)
-            import math
-            latency_norm = math.log1p(m.latency_ms)
-            
-            features.append([
-                m.latency_ms,
-                float(m.status_code),
-                float(m.response_size_bytes),
-                float(hour),
-                is_error,
-                latency_norm,
-            ])
-        
-        return features, feature_names
+        return self._feature_matrix(metrics).tolist(), list(FEATURE_NAMES)
     
-    def _fit_statistical(self, features: List[List[float]]):
+    def _feature_matrix(self, metrics: List[RuntimeMetrics]) -> np.ndarray:
+        """Build the feature matrix of metrics (one row per metric, FEATURE_NAMES columns)."""
+        n = len(metrics)
+        latency = np.fromiter((m.latency_ms for m in metrics), dtype=float, count=n)
+        status = np.fromiter((m.status_code for m in metrics), dtype=float, count=n)
+        size = np.fromiter((m.response_size_bytes for m in metrics), dtype=float, count=n)
+        hour = np.fromiter((m.timestamp.hour if m.timestamp else 12 for m in metrics), dtype=float, count=n)
+        
+        return np.column_stack([
+            latency,
+            status,
+            size,
+            hour,
+            (status >= 400).astype(float),
+            np.log1p(latency),  # Normalize latency (log scale)
+        ])
+    
+    def _fit_statistical(self, features: np.ndarray):
         """Fit statistical model (mean, std for each feature)."""
-        import numpy as np
-        features_array = np.array(features)
+        features_array = np.asarray(features, dtype=float)
         
         for i, name in enumerate(self.feature_names):
             col = features_array[:, i]
@@ -339,6 +384,62 @@ class AnomalyDetector:
             explanation=self._generate_explanation(metric, contributions, is_anomaly),
         )
     
+    def _stat_columns(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Names, column indices and (mean, std) of the features with training stats."""
+        names = [name for name in self.feature_names if name in self.training_stats]
+        columns = np.array([self.feature_names.index(name) for name in names], dtype=int)
+        moments = np.array(
+            [[self.training_stats[name]["mean"], self.training_stats[name]["std"]] for name in names],
+            dtype=float,
+        ).reshape(-1, 2)
+        return names, columns, moments
+    
+    def _z_matrix(self, features: np.ndarray) -> Tuple[List[str], np.ndarray]:
+        """Absolute z-scores of the features with training stats."""
+        names, columns, moments = self._stat_columns()
+        return names, np.abs(features[:, columns] - moments[:, 0]) / moments[:, 1]
+    
+    def _detect_statistical_batch(
+        self,
+        features: np.ndarray,
+        metrics: List[RuntimeMetrics],
+    ) -> List[AnomalyScore]:
+        """Statistical anomaly detection of all rows at once."""
+        if not self.training_stats:
+            return [self._detect_statistical(row, m) for row, m in zip(features, metrics)]
+        
+        names, z = self._z_matrix(features)
+        contributions = np.minimum(1.0, z / 3)  # Normalize to 0-1
+        max_z = z.max(axis=1, initial=0.0)
+        
+        # Anomaly if Z > 3 (99.7% of normal distribution)
+        is_anomaly = max_z > 3
+        scores = np.minimum(1.0, max_z / 5)
+        
+        results = []
+        for metric, anomalous, score, row in zip(metrics, is_anomaly.tolist(), scores.tolist(), contributions.tolist()):
+            row_contributions = dict(zip(names, row))
+            results.append(AnomalyScore(
+                is_anomaly=anomalous,
+                score=score,
+                confidence=0.7,
+                features_contribution=row_contributions,
+                explanation=self._generate_explanation(metric, row_contributions, anomalous),
+            ))
+        return results
+    
+    def _contribution_matrix(self, features: np.ndarray) -> List[Dict[str, float]]:
+        """Feature contributions of all rows (see ``_compute_contributions``)."""
+        if not self.training_stats:
+            uniform = {name: 1.0 / len(self.feature_names) for name in self.feature_names}
+            return [dict(uniform) for _ in range(len(features))]
+        
+        names, z = self._z_matrix(features)
+        contributions = np.minimum(1.0, z / 3)
+        totals = contributions.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1
+        return [dict(zip(names, row)) for row in (contributions / totals).tolist()]
+    
     def _compute_contributions(
         self,
         feature_vector: List[float],
@@ -0,0 +1,237 @@
+"""
+Embedding Computation and Cache for QoE-Guard AI.
+
+Batched text embeddings with a persistent cache:
+- Unique texts are encoded in a few batched model calls
+- Embeddings are L2-normalized, so cosine similarity is a matrix multiply
+- Cache keyed by model name + text hash, in memory and on disk
+
+The on-disk cache is a directory per model holding append-only ``.npz``
+shards (text hashes and vectors); small shards are compacted on load and
+whenever a flush pushes the directory past ``MAX_SHARDS``.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..storage import DATA_DIR
+
+
+EMBEDDING_CACHE_DIR = Path(os.getenv("QOE_GUARD_EMBEDDING_CACHE_DIR") or DATA_DIR / "embeddings")
+
+# Texts per model.encode call
+DEFAULT_BATCH_SIZE = 256
+
+# Shards merged into one when a model directory holds more than this
+MAX_SHARDS = 16
+
+
+def text_hash(text: str) -> str:
+    """Compute the cache key of a text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize the rows of a matrix (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def similarity_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every row of ``a`` with every row of ``b`` (normalized inputs)."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    return a @ b.T
+
+
+class EmbeddingCache:
+    """
+    Embeddings of one model, keyed by text hash.
+
+    Lookups are served from memory; vectors added since the last flush are
+    written to disk as a new shard.
+    """
+
+    def __init__(self, model_name: str, cache_dir: Optional[Path] = EMBEDDING_CACHE_DIR):
+        """
+        Initialize the cache.
+
+        Args:
+            model_name: Embedding model the vectors belong to
+            cache_dir: Root cache directory (None keeps the cache in memory only)
+        """
+        self.model_name = model_name
+        self.directory = (
+            Path(cache_dir) / re.sub(r"[^0-9A-Za-z._-]+", "_", model_name)
+            if cache_dir is not None else None
+        )
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._pending: Dict[str, np.ndarray] = {}
+        self._seen_shards: set = set()  # Shards whose vectors are in memory
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._vectors)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            shards = self._shards()
+            for shard in shards:
+                self._vectors.update(self._read_shard(shard))
+            self._seen_shards.update(shards)
+            self._loaded = True
+            if len(shards) > MAX_SHARDS:
+                self._compact(shards)
+
+    def _shards(self) -> List[Path]:
+        if self.directory is None or not self.directory.is_dir():
+            return []
+        return sorted(self.directory.glob("*.npz"))
+
+    @staticmethod
+    def _read_shard(path: Path) -> Dict[str, np.ndarray]:
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return dict(zip(data["keys"].tolist(), data["vectors"]))
+        except (OSError, ValueError, KeyError) as e:
+            # Partially written or removed by a concurrent compaction
+            print(f"Warning: Skipping embedding cache shard {path.name}: {e}")
+            return {}
+
+    def _write_shard(self, vectors: Dict[str, np.ndarray]) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{uuid.uuid4().hex}.npz"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, keys=np.array(list(vectors)), vectors=np.stack(list(vectors.values())))
+        os.replace(tmp_path, path)
+        self._seen_shards.add(path)
+        return path
+
+    def _compact(self, shards: List[Path]) -> None:
+        # Keep vectors of shards written by other processes since loading
+        for shard in shards:
+            if shard not in self._seen_shards:
+                self._vectors.update(self._read_shard(shard))
+        merged = self._write_shard(self._vectors)
+        for shard in shards:
+            try:
+                shard.unlink()
+            except OSError:
+                pass
+        self._seen_shards = {merged}
+
+    def get_many(self, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Get the cached vectors of the given text hashes."""
+        self._ensure_loaded()
+        return {h: self._vectors[h] for h in hashes if h in self._vectors}
+
+    def put_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        """Add vectors; they are persisted on the next flush."""
+        self._ensure_loaded()
+        with self._lock:
+            self._vectors.update(vectors)
+            self._pending.update(vectors)
+
+    def flush(self) -> int:
+        """Write vectors added since the last flush to disk."""
+        with self._lock:
+            if not self._pending or self.directory is None:
+                self._pending = {}
+                return 0
+            pending, self._pending = self._pending, {}
+            try:
+                self._write_shard(pending)
+                shards = self._shards()
+                if len(shards) > MAX_SHARDS:
+                    self._compact(shards)
+            except OSError as e:
+                print(f"Warning: Could not persist embeddings: {e}")
+                return 0
+            return len(pending)
+
+    def clear(self, remove_files: bool = False) -> None:
+        """Drop cached vectors (and optionally the on-disk shards)."""
+        with self._lock:
+            if remove_files:
+                for shard in self._shards():
+                    shard.unlink()
+            self._vectors = {}
+            self._pending = {}
+            self._seen_shards = set()
+            self._loaded = remove_files
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: str) -> EmbeddingCache:
+    """Get the process-wide embedding cache of a model."""
+    with _caches_lock:
+        cache = _caches.get(model_name)
+        if cache is None:
+            cache = _caches[model_name] = EmbeddingCache(model_name)
+        return cache
+
+
+def embed_texts(
+    model: Any,
+    texts: Sequence[str],
+    cache: Optional[EmbeddingCache] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> np.ndarray:
+    """
+    Embed texts with batched model calls.
+
+    Each unique text not found in the cache is encoded exactly once; new
+    vectors are added to the cache and flushed to disk.
+
+    Args:
+        model: SentenceTransformer-compatible model (``encode(list) -> array``)
+        texts: Texts to embed (duplicates allowed)
+        cache: Embedding cache of the model
+        batch_size: Texts per encode call
+
+    Returns:
+        Normalized embeddings, one row per input text
+    """
+    texts = [t if isinstance(t, str) else str(t) for t in texts]
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    hashes = [text_hash(t) for t in texts]
+    unique: Dict[str, str] = dict(zip(hashes, texts))
+    vectors = cache.get_many(list(unique)) if cache is not None else {}
+
+    missing = [h for h in unique if h not in vectors]
+    if missing:
+        encoded: Dict[str, np.ndarray] = {}
+        for i in range(0, len(missing), batch_size):
+            chunk = missing[i:i + batch_size]
+            embeddings = normalize_rows(model.encode([unique[h] for h in chunk], batch_size=batch_size))
+            encoded.update(zip(chunk, embeddings))
+        vectors.update(encoded)
+        if cache is not None:
+            cache.put_many(encoded)
+            cache.flush()
+
+    return np.stack([vectors[h] for h in hashes])
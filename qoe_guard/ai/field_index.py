@@ -0,0 +1,160 @@
+"""
+Known Field Index for QoE-Guard AI.
+
+Indexes the field names of all stored specs for similarity search:
+- Dotted property paths of request and response schemas (arrays as ``[*]``)
+- Embedded once, searched through an HNSW index
+- Refreshed incrementally: only operation bodies (and legacy operations
+  with inline bodies) not seen before are read
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..db.ingest import LOOKUP_CHUNK_SIZE
+from ..db.models import Operation, OperationBody
+from .ann import HNSWIndex
+
+
+# Schemas nested deeper than this are not walked (guards recursive schemas)
+MAX_SCHEMA_DEPTH = 12
+
+
+def schema_field_paths(schema: Any, prefix: str = "", depth: int = 0) -> Iterator[str]:
+    """
+    Yield the property paths of a JSON schema.
+
+    Args:
+        schema: JSON schema (refs already resolved)
+        prefix: Path of the schema itself
+        depth: Current nesting depth
+
+    Yields:
+        Dotted paths such as "items[*].price"
+    """
+    if not isinstance(schema, dict) or depth > MAX_SCHEMA_DEPTH:
+        return
+    for key in ("allOf", "anyOf", "oneOf"):
+        for sub_schema in schema.get(key) or []:
+            yield from schema_field_paths(sub_schema, prefix, depth + 1)
+    for name, prop in (schema.get("properties") or {}).items():
+        path = f"{prefix}.{name}" if prefix else name
+        yield path
+        yield from schema_field_paths(prop, path, depth + 1)
+    if isinstance(schema.get("items"), dict):
+        yield from schema_field_paths(schema["items"], f"{prefix}[*]", depth + 1)
+
+
+def schemas_field_paths(request_body_schema: Any, response_schemas: Optional[Dict[str, Any]]) -> Set[str]:
+    """Get the field paths of a request schema and response schemas."""
+    paths = set(schema_field_paths(request_body_schema))
+    for schema in (response_schemas or {}).values():
+        paths.update(schema_field_paths(schema))
+    return paths
+
+
+def body_field_paths(body: OperationBody) -> Set[str]:
+    """Get the field paths of an operation body's request and response schemas."""
+    return schemas_field_paths(body.request_body_schema, body.response_schemas)
+
+
+class FieldIndex:
+    """Similarity index over the field names of stored specs, for one embedding model."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.index = HNSWIndex()
+        self._body_ids: Set[str] = set()
+        # Legacy operations stored before bodies were shared keep them inline
+        self._inline_operation_ids: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add_fields(self, names: List[str], embed: Callable[[List[str]], np.ndarray]) -> int:
+        """Embed and index field names not indexed yet."""
+        new_names = sorted({name for name in names if name not in self.index})
+        if not new_names:
+            return 0
+        return self.index.add(embed(new_names), new_names)
+
+    def refresh(self, db: Session, embed: Callable[[List[str]], np.ndarray]) -> int:
+        """
+        Index the fields of operation bodies stored since the last refresh.
+
+        Legacy operations without a body row are indexed from their inline
+        schemas.
+
+        Args:
+            db: Database session
+            embed: Computes normalized embeddings of texts
+
+        Returns:
+            Number of newly indexed field names
+        """
+        with self._lock:
+            stored_ids = {row[0] for row in db.query(OperationBody.id).all()}
+            new_ids = stored_ids - self._body_ids
+            inline_ids = {
+                row[0]
+                for row in db.query(Operation.id).filter(
+                    Operation.body_hash.is_(None),
+                    (Operation._request_body_schema.isnot(None)) | (Operation._response_schemas.isnot(None)),
+                ).all()
+            }
+            new_inline_ids = inline_ids - self._inline_operation_ids
+            if not new_ids and not new_inline_ids:
+                return 0
+
+            names: Set[str] = set()
+            new_id_list = sorted(new_ids)
+            for i in range(0, len(new_id_list), LOOKUP_CHUNK_SIZE):
+                bodies = (
+                    db.query(OperationBody)
+                    .filter(OperationBody.id.in_(new_id_list[i:i + LOOKUP_CHUNK_SIZE]))
+                    .all()
+                )
+                for body in bodies:
+                    names.update(body_field_paths(body))
+
+            new_inline_list = sorted(new_inline_ids)
+            for i in range(0, len(new_inline_list), LOOKUP_CHUNK_SIZE):
+                schemas = (
+                    db.query(Operation._request_body_schema, Operation._response_schemas)
+                    .filter(Operation.id.in_(new_inline_list[i:i + LOOKUP_CHUNK_SIZE]))
+                    .all()
+                )
+                for request_body_schema, response_schemas in schemas:
+                    names.update(schemas_field_paths(request_body_schema, response_schemas))
+
+            added = self.add_fields(list(names), embed)
+            self._body_ids |= new_ids
+            self._inline_operation_ids |= new_inline_ids
+            return added
+
+    def search(self, vectors: np.ndarray, k: int = 5) -> List[List[Tuple[str, float]]]:
+        """Find the k most similar known fields of each query embedding."""
+        return self.index.search_many(vectors, k)
+
+
+_field_indexes: Dict[str, FieldIndex] = {}
+_field_indexes_lock = threading.Lock()
+
+
+def get_field_index(model_name: str) -> FieldIndex:
+    """Get the process-wide field index of an embedding model."""
+    with _field_indexes_lock:
+        index = _field_indexes.get(model_name)
+        if index is None:
+            index = _field_indexes[model_name] = FieldIndex(model_name)
+        return index
+
+
+def clear_field_indexes() -> None:
+    with _field_indexes_lock:
+        _field_indexes.clear()
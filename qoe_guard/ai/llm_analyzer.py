@@ -5,27 +5,41 @@ Supports multiple providers:
 - Groq (fastest inference, Llama/Mixtral)
 - OpenAI (GPT-4)
 - Anthropic (Claude)
+- Fake (local canned responses, for tests and offline runs)
 
 Provides:
 - Intelligent diff analysis and explanations
 - Auto-generated fix recommendations
 - Breaking change classification
 - Impact prediction
+
+Each operation has an async variant (``a``-prefixed) for use from async
+handlers; it does not block the event loop and independent steps run
+concurrently. Responses are cached by provider, model and prompt (see
+llm_cache), so reruns on the same candidate reuse earlier completions.
 """
 from __future__ import annotations
 
+import asyncio
 import os
 import json
+import threading
+import time
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Sequence
 from enum import Enum
 
+from .llm_cache import LLMResponseCache, cache_key, llm_response_cache
+from .llm_client import AsyncLLMClient
+from .prompt_budget import ChangeSetSummary, PromptBudget, fit_prompt, rank_changes
+
 
 class LLMProvider(Enum):
     """Supported LLM providers."""
     GROQ = "groq"
     OPENAI = "openai"
     ANTHROPIC = "anthropic"
+    FAKE = "fake"
 
 
 @dataclass
@@ -66,8 +80,70 @@ DEFAULT_MODELS = {
     LLMProvider.GROQ: "llama-3.1-70b-versatile",  # Fast and capable
     LLMProvider.OPENAI: "gpt-4-turbo-preview",
     LLMProvider.ANTHROPIC: "claude-3-sonnet-20240229",
+    LLMProvider.FAKE: "fake",
 }
 
+SYSTEM_PROMPT = (
+    "You are an expert API analyst specializing in streaming services, QoE (Quality of Experience), "
+    "and API contract testing. Provide precise, actionable insights."
+)
+TEMPERATURE = 0.1
+MAX_TOKENS = 2000
+
+
+class FakeLLMClient:
+    """
+    Local stand-in for a provider client.
+
+    Returns canned responses without network access and counts calls, so
+    caching and coalescing can be tested.
+    """
+
+    def __init__(
+        self,
+        responses: Optional[Dict[str, str]] = None,
+        default: str = '{"summary": "Fake analysis", "confidence": 0.5}',
+        delay_sec: float = 0.0,
+    ):
+        """
+        Initialize the fake client.
+
+        Args:
+            responses: Prompt substring -> response (first match wins)
+            default: Response when no substring matches
+            delay_sec: Simulated latency per call
+        """
+        self.responses = responses or {}
+        self.default = default
+        self.delay_sec = delay_sec
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def complete(self, prompt: str, system: str = "", **kwargs: Any) -> str:
+        with self._lock:
+            self.calls += 1
+        if self.delay_sec:
+            time.sleep(self.delay_sec)
+        return self._response(prompt)
+    
+    async def acomplete(self, prompt: str, system: str = "", **kwargs: Any) -> str:
+        with self._lock:
+            self.calls += 1
+        if self.delay_sec:
+            await asyncio.sleep(self.delay_sec)
+        return self._response(prompt)
+    
+    async def astream(self, prompt: str, system: str = "", chunk_size: int = 16, **kwargs: Any) -> AsyncIterator[str]:
+        response = await self.acomplete(prompt, system)
+        for i in range(0, len(response), chunk_size):
+            yield response[i:i + chunk_size]
+    
+    def _response(self, prompt: str) -> str:
+        for fragment, response in self.responses.items():
+            if fragment in prompt:
+                return response
+        return self.default
+
 
 class LLMAnalyzer:
     """
@@ -81,17 +157,36 @@ class LLMAnalyzer:
         provider: Optional[LLMProvider] = None,
         api_key: Optional[str] = None,
         model: Optional[str] = None,
+        cache: Optional[LLMResponseCache] = llm_response_cache,
+        client: Optional[Any] = None,
+        budget: Optional[PromptBudget] = None,
     ):
         """
         Initialize LLM analyzer.
         
         Auto-detects available provider from environment if not specified.
         Priority: Groq > OpenAI > Anthropic
+        
+        Args:
+            provider: LLM provider
+            api_key: Provider API key
+            model: Model name (provider default if not given)
+            cache: Response cache (None disables caching)
+            client: Pre-built provider client (e.g. a FakeLLMClient)
+            budget: Size limits of analysis prompts
         """
         self.provider = provider
         self.api_key = api_key
         self.model = model
-        self.client = None
+        self.cache = cache
+        self.client = client
+        self.budget = budget or PromptBudget()
+        self._async_client: Optional[AsyncLLMClient] = None
+        
+        if client is not None:
+            self.provider = self.provider or LLMProvider.FAKE
+            self.model = self.model or DEFAULT_MODELS.get(self.provider)
+            return
         
         # Auto-detect provider
         if not self.provider:
@@ -128,6 +223,8 @@ class LLMAnalyzer:
             elif self.provider == LLMProvider.ANTHROPIC:
                 import anthropic
                 self.client = anthropic.Anthropic(api_key=self.api_key)
+            elif self.provider == LLMProvider.FAKE:
+                self.client = FakeLLMClient()
         except ImportError as e:
             print(f"Warning: Could not import {self.provider.value} client: {e}")
             self.client = None
@@ -215,27 +312,8 @@ class LLMAnalyzer:
         if not self.is_available:
             return analysis.summary
         
-        prompt = f"""
-        Given this API change analysis:
-        
-        Summary: {analysis.summary}
-        Breaking Changes: {json.dumps(analysis.breaking_changes)}
-        Risk Assessment: {analysis.risk_assessment}
-        
-        Generate a {audience}-friendly explanation that:
-        - Uses appropriate terminology for {audience} audience
-        - Highlights the most important points
-        - Is concise (2-3 paragraphs max)
-        - Includes actionable next steps
-        
-        Audience guidelines:
-        - technical: Use technical terms, include specific paths/types
-        - business: Focus on user/revenue impact, avoid jargon
-        - executive: High-level summary, risk/opportunity focus
-        """
-        
         try:
-            return self._call_llm(prompt)
+            return self._call_llm(self._build_explanation_prompt(analysis, audience))
         except Exception:
             return analysis.summary
     
@@ -250,66 +328,232 @@ class LLMAnalyzer:
         Returns detailed classification with reasoning.
         """
         if not self.is_available:
-            return {"is_breaking": change.get("change_type") in ["removed", "type_changed"]}
+            return self._fallback_classification(change)
         
-        prompt = f"""
-        Analyze this API change and determine if it's a breaking change:
+        try:
+            response = self._call_llm(self._build_classification_prompt(change, schema_context))
+            return json.loads(response)
+        except Exception:
+            return self._fallback_classification(change)
+    
+    # Async variants, for use from async handlers
+    
+    @property
+    def async_client(self) -> AsyncLLMClient:
+        """Async client of the provider (shares connections across analyzers)."""
+        if self._async_client is None:
+            self._async_client = AsyncLLMClient(
+                provider=self.provider.value,
+                model=self.model,
+                api_key=self.api_key,
+                client=self.client if self.provider == LLMProvider.FAKE else None,
+                system=SYSTEM_PROMPT,
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS,
+            )
+        return self._async_client
+    
+    async def aanalyze_diff(
+        self,
+        baseline: Dict[str, Any],
+        candidate: Dict[str, Any],
+        changes: List[Dict[str, Any]],
+        context: Optional[Dict[str, Any]] = None,
+    ) -> DiffAnalysis:
+        """Async variant of ``analyze_diff``."""
+        if not self.is_available:
+            return self._fallback_analysis(changes)
         
-        Change: {json.dumps(change)}
-        Schema Context: {json.dumps(schema_context) if schema_context else "Not provided"}
+        # Budgeting walks both payloads; keep it off the event loop
+        prompt = await asyncio.to_thread(self._build_analysis_prompt, baseline, candidate, changes, context)
         
-        Respond in JSON format:
-        {{
-            "is_breaking": true/false,
-            "confidence": 0.0-1.0,
-            "reasoning": "explanation",
-            "affected_clients": ["list of client types that might be affected"],
-            "mitigation": "suggested mitigation if breaking"
-        }}
+        try:
+            response = await self._acall_llm(prompt)
+            return self._parse_analysis_response(response)
+        except Exception as e:
+            print(f"LLM analysis failed: {e}")
+            return self._fallback_analysis(changes)
+    
+    async def agenerate_recommendations(
+        self,
+        analysis: DiffAnalysis,
+        brittleness_score: float,
+        qoe_risk_score: float,
+    ) -> List[FixRecommendation]:
+        """Async variant of ``generate_recommendations``."""
+        if not self.is_available:
+            return self._fallback_recommendations(analysis)
+        
+        prompt = self._build_recommendation_prompt(analysis, brittleness_score, qoe_risk_score)
+        
+        try:
+            response = await self._acall_llm(prompt)
+            return self._parse_recommendations_response(response)
+        except Exception as e:
+            print(f"LLM recommendations failed: {e}")
+            return self._fallback_recommendations(analysis)
+    
+    async def aexplain_for_stakeholders(
+        self,
+        analysis: DiffAnalysis,
+        audience: str = "technical",
+    ) -> str:
+        """Async variant of ``explain_for_stakeholders``."""
+        if not self.is_available:
+            return analysis.summary
+        
+        try:
+            return await self._acall_llm(self._build_explanation_prompt(analysis, audience))
+        except Exception:
+            return analysis.summary
+    
+    async def astream_explanation(
+        self,
+        analysis: DiffAnalysis,
+        audience: str = "technical",
+    ) -> AsyncIterator[str]:
         """
+        Stream a stakeholder explanation as it is generated.
+        
+        Cached explanations are yielded at once; streamed ones are cached
+        when complete.
+        """
+        if not self.is_available:
+            yield analysis.summary
+            return
         
+        prompt = self._build_explanation_prompt(analysis, audience)
+        key = self._cache_key(prompt)
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            yield cached
+            return
+        
+        parts: List[str] = []
         try:
-            response = self._call_llm(prompt)
+            async for chunk in self.async_client.stream(prompt):
+                parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            print(f"LLM explanation stream failed: {e}")
+            if not parts:
+                yield analysis.summary
+            return
+        
+        if self.cache is not None:
+            self.cache.put(key, "".join(parts), provider=self.provider.value, model=self.model)
+    
+    async def aclassify_breaking_change(
+        self,
+        change: Dict[str, Any],
+        schema_context: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Async variant of ``classify_breaking_change``."""
+        if not self.is_available:
+            return self._fallback_classification(change)
+        
+        try:
+            response = await self._acall_llm(self._build_classification_prompt(change, schema_context))
             return json.loads(response)
         except Exception:
-            return {"is_breaking": change.get("change_type") in ["removed", "type_changed"]}
+            return self._fallback_classification(change)
     
-    def _call_llm(self, prompt: str) -> str:
-        """Call the LLM with the given prompt."""
-        if self.provider == LLMProvider.GROQ:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert API analyst specializing in streaming services, QoE (Quality of Experience), and API contract testing. Provide precise, actionable insights."},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.1,
-                max_tokens=2000,
-            )
-            return response.choices[0].message.content
+    async def aanalyze_change_set(
+        self,
+        baseline: Dict[str, Any],
+        candidate: Dict[str, Any],
+        changes: List[Dict[str, Any]],
+        context: Optional[Dict[str, Any]] = None,
+        audiences: Sequence[str] = (),
+        classify_top: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Run the analysis steps of a change set concurrently.
+        
+        The diff analysis and the classification of the most critical
+        changes run in parallel; stakeholder explanations (which need the
+        analysis) then run in parallel with each other.
+        
+        Args:
+            baseline: Baseline JSON response
+            candidate: Candidate JSON response
+            changes: List of detected changes
+            context: Optional context (endpoint info, criticality, etc.)
+            audiences: Audiences to explain the analysis to
+            classify_top: Number of most critical changes to classify
         
-        elif self.provider == LLMProvider.OPENAI:
+        Returns:
+            {"analysis": DiffAnalysis, "classifications": [...], "explanations": {audience: text}}
+        """
+        to_classify = rank_changes(changes)[:classify_top] if classify_top > 0 else []
+        analysis, *classifications = await asyncio.gather(
+            self.aanalyze_diff(baseline, candidate, changes, context),
+            *(self.aclassify_breaking_change(change) for change in to_classify),
+        )
+        explanations = await asyncio.gather(
+            *(self.aexplain_for_stakeholders(analysis, audience) for audience in audiences)
+        )
+        return {
+            "analysis": analysis,
+            "classifications": [
+                {"path": change.get("path"), **classification}
+                for change, classification in zip(to_classify, classifications)
+            ],
+            "explanations": dict(zip(audiences, explanations)),
+        }
+    
+    def _call_llm(self, prompt: str) -> str:
+        """Call the LLM with the given prompt, through the response cache."""
+        if self.cache is None:
+            return self._call_provider(prompt)
+        return self.cache.get_or_call(
+            self._cache_key(prompt),
+            lambda: self._call_provider(prompt),
+            provider=self.provider.value,
+            model=self.model,
+        )
+    
+    async def _acall_llm(self, prompt: str) -> str:
+        """Call the LLM asynchronously, through the response cache."""
+        if self.cache is None:
+            return await self.async_client.complete(prompt)
+        return await self.cache.aget_or_call(
+            self._cache_key(prompt),
+            lambda: self.async_client.complete(prompt),
+            provider=self.provider.value,
+            model=self.model,
+        )
+    
+    def _cache_key(self, prompt: str) -> str:
+        return cache_key(self.provider.value, self.model, prompt, SYSTEM_PROMPT, TEMPERATURE, MAX_TOKENS)
+    
+    def _call_provider(self, prompt: str) -> str:
+        """Call the provider API with the given prompt."""
+        if self.provider in (LLMProvider.GROQ, LLMProvider.OPENAI):
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": "You are an expert API analyst specializing in streaming services, QoE (Quality of Experience), and API contract testing. Provide precise, actionable insights."},
+                    {"role": "system", "content": SYSTEM_PROMPT},
                     {"role": "user", "content": prompt},
                 ],
-                temperature=0.1,
-                max_tokens=2000,
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS,
             )
             return response.choices[0].message.content
         
         elif self.provider == LLMProvider.ANTHROPIC:
             response = self.client.messages.create(
                 model=self.model,
-                max_tokens=2000,
+                max_tokens=MAX_TOKENS,
                 messages=[
                     {"role": "user", "content": prompt},
                 ],
             )
             return response.content[0].text
         
+        elif self.provider == LLMProvider.FAKE:
+            return self.client.complete(prompt, system=SYSTEM_PROMPT)
+        
         raise ValueError(f"Unknown provider: {self.provider}")
     
     def _build_analysis_prompt(
@@ -319,21 +563,36 @@ class LLMAnalyzer:
         changes: List[Dict[str, Any]],
         context: Optional[Dict[str, Any]],
     ) -> str:
-        """Build prompt for diff analysis."""
-        return f"""
-        Analyze these API response changes for a streaming service:
+        """
+        Build prompt for diff analysis.
         
-        ## Changes Detected
-        {json.dumps(changes, indent=2)}
+        Large change sets and payloads are cut to the prompt budget: the
+        most critical changes are shown verbatim, the rest as per-prefix
+        counts, and payloads as excerpts around the changed paths.
+        """
+        context_json = json.dumps(context, indent=2) if context else "No additional context"
+        
+        def build(summary: ChangeSetSummary) -> str:
+            omitted = ""
+            if summary.omitted_changes:
+                omitted = f"""
+        ## Other Changes ({summary.omitted_changes} not shown, counted by path prefix)
+        {json.dumps(summary.omitted_by_prefix, indent=2)}
+        """
+            return f"""
+        Analyze these API response changes for a streaming service:
         
+        ## Changes Detected ({len(summary.top_changes)} most critical of {summary.total_changes})
+        {json.dumps(summary.top_changes, indent=2, default=str)}
+        {omitted}
         ## Context
-        {json.dumps(context, indent=2) if context else "No additional context"}
+        {context_json}
         
-        ## Baseline Response (truncated)
-        {json.dumps(baseline, indent=2)[:2000]}
+        ## Baseline Response (excerpts around changed paths)
+        {json.dumps(summary.baseline_excerpt, indent=2, default=str)}
         
-        ## Candidate Response (truncated)
-        {json.dumps(candidate, indent=2)[:2000]}
+        ## Candidate Response (excerpts around changed paths)
+        {json.dumps(summary.candidate_excerpt, indent=2, default=str)}
         
         Provide analysis in JSON format:
         {{
@@ -348,6 +607,8 @@ class LLMAnalyzer:
         
         Focus on QoE-critical paths: playback, DRM, entitlements, ads.
         """
+        
+        return fit_prompt(build, baseline, candidate, changes, self.budget)
     
     def _build_recommendation_prompt(
         self,
@@ -386,6 +647,49 @@ class LLMAnalyzer:
         Prioritize by: 1) User impact, 2) Revenue impact, 3) Ease of fix
         """
     
+    def _build_explanation_prompt(self, analysis: DiffAnalysis, audience: str) -> str:
+        """Build prompt for a stakeholder explanation."""
+        return f"""
+        Given this API change analysis:
+        
+        Summary: {analysis.summary}
+        Breaking Changes: {json.dumps(analysis.breaking_changes)}
+        Risk Assessment: {analysis.risk_assessment}
+        
+        Generate a {audience}-friendly explanation that:
+        - Uses appropriate terminology for {audience} audience
+        - Highlights the most important points
+        - Is concise (2-3 paragraphs max)
+        - Includes actionable next steps
+        
+        Audience guidelines:
+        - technical: Use technical terms, include specific paths/types
+        - business: Focus on user/revenue impact, avoid jargon
+        - executive: High-level summary, risk/opportunity focus
+        """
+    
+    def _build_classification_prompt(
+        self,
+        change: Dict[str, Any],
+        schema_context: Optional[Dict[str, Any]],
+    ) -> str:
+        """Build prompt for breaking-change classification."""
+        return f"""
+        Analyze this API change and determine if it's a breaking change:
+        
+        Change: {json.dumps(change, default=str)}
+        Schema Context: {json.dumps(schema_context) if schema_context else "Not provided"}
+        
+        Respond in JSON format:
+        {{
+            "is_breaking": true/false,
+            "confidence": 0.0-1.0,
+            "reasoning": "explanation",
+            "affected_clients": ["list of client types that might be affected"],
+            "mitigation": "suggested mitigation if breaking"
+        }}
+        """
+    
     def _parse_analysis_response(self, response: str) -> DiffAnalysis:
         """Parse LLM response into DiffAnalysis."""
         try:
@@ -450,6 +754,10 @@ class LLMAnalyzer:
             confidence=0.5,
         )
     
+    def _fallback_classification(self, change: Dict[str, Any]) -> Dict[str, Any]:
+        """Fallback classification when LLM is unavailable."""
+        return {"is_breaking": change.get("change_type") in ["removed", "type_changed"]}
+    
     def _fallback_recommendations(self, analysis: DiffAnalysis) -> List[FixRecommendation]:
         """Fallback recommendations when LLM is unavailable."""
         recs = []
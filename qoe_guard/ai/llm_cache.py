@@ -0,0 +1,278 @@
+"""
+LLM Response Cache for QoE-Guard AI.
+
+Caches provider responses so reruns on the same candidate do not pay for
+the same completion twice:
+- Keyed by provider + model + generation settings + normalized prompt hash
+- Entries expire after a TTL
+- Persisted on disk as one JSON file per entry (shared by workers)
+- Concurrent identical requests coalesce into a single provider call
+
+Failed calls are never cached; every waiter of a coalesced call sees the
+same exception.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ..storage import DATA_DIR
+
+
+LLM_CACHE_DIR = Path(os.getenv("QOE_GUARD_LLM_CACHE_DIR") or DATA_DIR / "llm_cache")
+DEFAULT_TTL_SEC = float(os.getenv("QOE_GUARD_LLM_CACHE_TTL_SEC", "86400"))
+
+# Entries kept in memory; older ones are still served from disk
+MAX_MEMORY_ENTRIES = 1024
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt for hashing.
+
+    Strips the indentation and trailing whitespace of each line and drops
+    blank lines, so prompts that differ only in layout share a key.
+    """
+    lines = (line.strip() for line in prompt.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def cache_key(
+    provider: str,
+    model: Optional[str],
+    prompt: str,
+    system: str = "",
+    temperature: float = 0.0,
+    max_tokens: int = 0,
+) -> str:
+    """Compute the cache key of a completion request."""
+    payload = json.dumps(
+        [provider, model or "", normalize_prompt(system), temperature, max_tokens, normalize_prompt(prompt)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    TTL cache of LLM responses, in memory and on disk.
+
+    ``get_or_call`` is the main entry point: it returns a fresh cached
+    response, joins an identical call already in flight, or makes the call
+    and caches its result.
+    """
+
+    def __init__(
+        self,
+        ttl_sec: float = DEFAULT_TTL_SEC,
+        cache_dir: Optional[Path] = LLM_CACHE_DIR,
+        max_memory_entries: int = MAX_MEMORY_ENTRIES,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_sec: Seconds a response stays valid (0 disables caching)
+            cache_dir: Directory of the on-disk entries (None keeps the cache in memory only)
+            max_memory_entries: Entries kept in memory
+        """
+        self.ttl_sec = ttl_sec
+        self.directory = Path(cache_dir) if cache_dir is not None else None
+        self.max_memory_entries = max_memory_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: Dict[str, Tuple[float, str]] = {}  # key -> (expires_at, response)
+        self._in_flight: Dict[str, Future] = {}
+        self._async_in_flight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[Tuple[float, str]]:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            return float(data["expires_at"]), data["response"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Skipping LLM cache entry {path.name}: {e}")
+            return None
+
+    def _write(self, key: str, expires_at: float, response: str, metadata: Dict[str, Any]) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({**metadata, "expires_at": expires_at, "response": response}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not persist LLM response: {e}")
+
+    def _remember(self, key: str, entry: Tuple[float, str]) -> None:
+        self._entries[key] = entry
+        if len(self._entries) > self.max_memory_entries:
+            # Dicts keep insertion order: drop the oldest entry
+            del self._entries[next(iter(self._entries))]
+
+    def _delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+        if self.directory is not None:
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached response that has not expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            entry = self._read(key)
+            if entry is None:
+                return None
+            with self._lock:
+                self._remember(key, entry)
+
+        expires_at, response = entry
+        if expires_at <= time.time():
+            with self._lock:
+                self._delete(key)
+            return None
+        return response
+
+    def put(self, key: str, response: str, **metadata: Any) -> None:
+        """Cache a response (metadata such as provider and model is stored on disk)."""
+        if self.ttl_sec <= 0:
+            return
+        expires_at = time.time() + self.ttl_sec
+        with self._lock:
+            self._remember(key, (expires_at, response))
+        self._write(key, expires_at, response, metadata)
+
+    def get_or_call(self, key: str, call: Callable[[], str], **metadata: Any) -> str:
+        """
+        Get a cached response, or make the call once for all concurrent callers.
+
+        Args:
+            key: Cache key of the request (see ``cache_key``)
+            call: Makes the provider call
+            metadata: Stored alongside the on-disk entry
+
+        Returns:
+            The response
+        """
+        response = self.get(key)
+        if response is not None:
+            with self._lock:
+                self.hits += 1
+            return response
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            # A call finishing between our lookup and registering would be missed
+            response = self.get(key)
+            if response is None:
+                response = call()
+                self.put(key, response, **metadata)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    async def aget_or_call(self, key: str, call: Callable[[], Awaitable[str]], **metadata: Any) -> str:
+        """
+        Async variant of ``get_or_call``: concurrent identical requests on
+        the same event loop share one awaited call.
+        """
+        response = self.get(key)
+        if response is not None:
+            with self._lock:
+                self.hits += 1
+            return response
+
+        loop = asyncio.get_running_loop()
+        future = self._async_in_flight.get(key)
+        if future is not None and future.get_loop() is loop:
+            with self._lock:
+                self.coalesced += 1
+            # Shielded so a cancelled waiter does not cancel the shared call
+            return await asyncio.shield(future)
+
+        future = self._async_in_flight[key] = loop.create_future()
+        with self._lock:
+            self.misses += 1
+        try:
+            response = await call()
+            self.put(key, response, **metadata)
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved here so an unawaited failure is not reported as lost
+            future.exception()
+            raise
+        finally:
+            if self._async_in_flight.get(key) is future:
+                del self._async_in_flight[key]
+
+    def clear(self, remove_files: bool = False) -> None:
+        """Drop cached responses (and optionally the on-disk entries)."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.coalesced = 0
+            if remove_files and self.directory is not None and self.directory.is_dir():
+                for path in self.directory.glob("*/*.json"):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters of the cache."""
+        with self._lock:
+            return {
+                "entries_in_memory": len(self._entries),
+                "in_flight": len(self._in_flight) + len(self._async_in_flight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "ttl_sec": self.ttl_sec,
+            }
+
+
+llm_response_cache = LLMResponseCache()
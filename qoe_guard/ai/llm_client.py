@@ -0,0 +1,182 @@
+"""
+Async LLM Client Layer for QoE-Guard AI.
+
+Non-blocking completions for the async API handlers:
+- One SDK client per provider + API key, shared so connections are reused
+- Per-provider concurrency limit (per event loop)
+- Timeouts on whole completions and between streamed chunks
+- Streaming of partial output
+
+Provider SDKs are imported lazily, so they stay optional.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+
+LLM_MAX_CONCURRENCY = int(os.getenv("QOE_GUARD_LLM_MAX_CONCURRENCY", "4"))
+LLM_TIMEOUT_SEC = float(os.getenv("QOE_GUARD_LLM_TIMEOUT_SEC", "60"))
+
+
+_sdk_clients: Dict[Tuple[str, Optional[str]], Any] = {}
+_sdk_clients_lock = threading.Lock()
+
+# Event loop -> provider -> semaphore (asyncio primitives belong to one loop)
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _create_sdk_client(provider: str, api_key: Optional[str]) -> Any:
+    if provider == "groq":
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=api_key)
+    if provider == "openai":
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=api_key)
+    if provider == "anthropic":
+        import anthropic
+        return anthropic.AsyncAnthropic(api_key=api_key)
+    raise ValueError(f"Unknown provider: {provider}")
+
+
+def get_sdk_client(provider: str, api_key: Optional[str]) -> Any:
+    """Get the shared async SDK client of a provider and API key."""
+    key = (provider, api_key)
+    with _sdk_clients_lock:
+        client = _sdk_clients.get(key)
+        if client is None:
+            client = _sdk_clients[key] = _create_sdk_client(provider, api_key)
+        return client
+
+
+def provider_semaphore(provider: str, limit: int = LLM_MAX_CONCURRENCY) -> asyncio.Semaphore:
+    """Get the semaphore limiting concurrent calls to a provider on the running loop."""
+    loop = asyncio.get_running_loop()
+    per_loop = _semaphores.setdefault(loop, {})
+    semaphore = per_loop.get(provider)
+    if semaphore is None:
+        semaphore = per_loop[provider] = asyncio.Semaphore(limit)
+    return semaphore
+
+
+class AsyncLLMClient:
+    """
+    Async completions against one provider and model.
+
+    ``client`` may be any object with ``acomplete(prompt, system)`` and
+    ``astream(prompt, system)`` (e.g. a FakeLLMClient); otherwise the shared
+    SDK client of the provider is used.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        model: Optional[str],
+        api_key: Optional[str] = None,
+        client: Optional[Any] = None,
+        system: str = "",
+        temperature: float = 0.1,
+        max_tokens: int = 2000,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        timeout_sec: float = LLM_TIMEOUT_SEC,
+    ):
+        self.provider = provider
+        self.model = model
+        self.api_key = api_key
+        self.system = system
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.max_concurrency = max_concurrency
+        self.timeout_sec = timeout_sec
+        self._client = client
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            self._client = get_sdk_client(self.provider, self.api_key)
+        return self._client
+
+    def _messages(self, prompt: str) -> list:
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": prompt},
+        ]
+
+    async def complete(self, prompt: str) -> str:
+        """
+        Get a completion.
+
+        Raises:
+            TimeoutError: The provider did not answer within the timeout
+        """
+        async with provider_semaphore(self.provider, self.max_concurrency):
+            return await asyncio.wait_for(self._complete(prompt), self.timeout_sec)
+
+    async def _complete(self, prompt: str) -> str:
+        if self.provider in ("groq", "openai"):
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt),
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+            )
+            return response.choices[0].message.content
+
+        if self.provider == "anthropic":
+            response = await self.client.messages.create(
+                model=self.model,
+                max_tokens=self.max_tokens,
+                messages=[{"role": "user", "content": prompt}],
+            )
+            return response.content[0].text
+
+        return await self.client.acomplete(prompt, system=self.system)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Stream a completion as text chunks.
+
+        The timeout applies to the wait for each chunk, so long answers are
+        not cut off while the provider keeps producing output.
+        """
+        async with provider_semaphore(self.provider, self.max_concurrency):
+            chunks = self._stream(prompt).__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout_sec)
+                except StopAsyncIteration:
+                    return
+                if chunk:
+                    yield chunk
+
+    async def _stream(self, prompt: str) -> AsyncIterator[str]:
+        if self.provider in ("groq", "openai"):
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt),
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                stream=True,
+            )
+            async for chunk in response:
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+            return
+
+        if self.provider == "anthropic":
+            async with self.client.messages.stream(
+                model=self.model,
+                max_tokens=self.max_tokens,
+                messages=[{"role": "user", "content": prompt}],
+            ) as response:
+                async for text in response.text_stream:
+                    yield text
+            return
+
+        async for text in self.client.astream(prompt, system=self.system):
+            yield text
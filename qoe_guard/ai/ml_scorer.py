@@ -14,11 +14,19 @@ Libraries:
 from __future__ import annotations
 
 import json
+import os
 import pickle
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Sequence, Tuple
 from pathlib import Path
 
+from ..scoring.criticality import CriticalityResolver
+
+
+# Artifact directory of the deployed risk model (see MLRiskScorer.save)
+ML_MODEL_PATH = os.getenv("QOE_GUARD_ML_MODEL_PATH")
+
 
 @dataclass
 class FeatureVector:
@@ -94,6 +102,14 @@ class SHAPExplanation:
     top_positive: List[Tuple[str, float]]  # Pushing toward high risk
     top_negative: List[Tuple[str, float]]  # Pushing toward low risk
     force_plot_html: Optional[str] = None
+    feature_values: List[float] = field(default_factory=list)  # Unscaled inputs, for rendering
+
+
+@lru_cache(maxsize=1)
+def _shap_js() -> str:
+    """SHAP's JavaScript bundle (large; rendered once per process)."""
+    import shap
+    return shap.getjs()
 
 
 class MLRiskScorer:
@@ -125,6 +141,9 @@ class MLRiskScorer:
         self.feature_names = list(FeatureVector().to_dict().keys())
         self.explainer = None
         self.thresholds = {"warn": 0.3, "fail": 0.7}
+        self.version: Optional[str] = None  # Artifact version of a loaded model
+        self._importances: Optional[Dict[str, float]] = None
+        self._shared_model = False  # Loaded artifacts are shared; train a copy
         
         if model_path:
             self.load(model_path)
@@ -189,9 +208,30 @@ class MLRiskScorer:
         Returns:
             Training metrics
         """
-        if not self.model:
+        return self.train_matrix(self._feature_matrix(features), labels, validation_split)
+    
+    def train_matrix(
+        self,
+        X: Any,
+        labels: Any,
+        validation_split: float = 0.2,
+    ) -> Dict[str, float]:
+        """
+        Train the model on a feature matrix (columns in ``feature_names`` order).
+        
+        Args:
+            X: (rows, features) array, e.g. from ``training_data.load_training_dataset``
+            labels: Binary labels (0 = OK, 1 = caused issue)
+            validation_split: Fraction for validation
+        
+        Returns:
+            Training metrics
+        """
+        if self.model is None or self._shared_model:
             self._init_model()
-            if not self.model:
+            self._shared_model = False
+            self.version = None
+            if self.model is None:
                 return {"error": "Model not available"}
         
         import numpy as np
@@ -199,8 +239,8 @@ class MLRiskScorer:
         from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
         
         # Prepare data
-        X = np.array([f.to_list() for f in features])
-        y = np.array(labels)
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(labels)
         
         # Split
         X_train, X_val, y_train, y_val = train_test_split(
@@ -214,6 +254,7 @@ class MLRiskScorer:
         
         # Train
         self.model.fit(X_train_scaled, y_train)
+        self._importances = None
         
         # Evaluate
         y_pred = self.model.predict(X_val_scaled)
@@ -234,6 +275,19 @@ class MLRiskScorer:
             "val_size": len(X_val),
         }
     
+    def _feature_matrix(self, features: Sequence[FeatureVector]) -> Any:
+        """Stack feature vectors into a (rows, features) matrix."""
+        import numpy as np
+        
+        return np.array([f.to_list() for f in features], dtype=float).reshape(len(features), len(self.feature_names))
+    
+    def _decision(self, prob: float) -> str:
+        if prob >= self.thresholds["fail"]:
+            return "FAIL"
+        if prob >= self.thresholds["warn"]:
+            return "WARN"
+        return "PASS"
+    
     def predict(self, features: FeatureVector) -> MLPrediction:
         """
         Predict risk score for given features.
@@ -244,120 +298,210 @@ class MLRiskScorer:
         Returns:
             MLPrediction with score and explanation
         """
-        if not self.is_trained:
-            return self._fallback_predict(features)
+        return self.predict_batch([features])[0]
+    
+    def predict_batch(self, features: Sequence[FeatureVector]) -> List[MLPrediction]:
+        """
+        Predict risk scores of many feature vectors with one model call.
         
-        import numpy as np
+        Args:
+            features: Feature vectors
         
-        X = np.array([features.to_list()])
-        X_scaled = self.scaler.transform(X)
+        Returns:
+            One MLPrediction per feature vector, in order
+        """
+        if not self.is_trained:
+            return [self._fallback_predict(f) for f in features]
+        if not features:
+            return []
         
-        # Get probability
-        prob = self.model.predict_proba(X_scaled)[0][1]
+        import numpy as np
         
-        # Get feature importances
+        X = self._feature_matrix(features)
+        probs = self.model.predict_proba(self.scaler.transform(X))[:, 1]
         importances = self._get_feature_importances()
         
-        # Determine decision
-        if prob >= self.thresholds["fail"]:
-            decision = "FAIL"
-        elif prob >= self.thresholds["warn"]:
-            decision = "WARN"
-        else:
-            decision = "PASS"
-        
-        # Get top contributors
-        contributors = self._get_top_contributors(features, importances)
-        
-        return MLPrediction(
-            risk_score=prob,
-            decision=decision,
-            confidence=abs(prob - 0.5) * 2,  # Higher confidence away from 0.5
-            feature_importances=importances,
-            top_contributors=contributors,
-            explanation=self._generate_explanation(features, prob, contributors),
-        )
-    
-    def explain(self, features: FeatureVector) -> SHAPExplanation:
+        # Contribution of each feature: value * importance (zero values do not contribute)
+        weights = np.array([importances.get(name, 0.0) for name in self.feature_names])
+        contributions = X * weights
+        order = np.argsort(-np.abs(contributions), axis=1, kind="stable")
+        
+        predictions = []
+        for f, prob, row, values, ranked in zip(features, probs.tolist(), contributions, X, order):
+            contributors = [
+                (self.feature_names[i], float(row[i]), "↑" if values[i] > 0 else "↓")
+                for i in ranked
+                if values[i] != 0
+            ][:5]
+            predictions.append(MLPrediction(
+                risk_score=prob,
+                decision=self._decision(prob),
+                confidence=abs(prob - 0.5) * 2,  # Higher confidence away from 0.5
+                feature_importances=importances,
+                top_contributors=contributors,
+                explanation=self._generate_explanation(f, prob, contributors),
+            ))
+        return predictions
+    
+    def _expected_value(self) -> float:
+        expected = self.explainer.expected_value
+        if isinstance(expected, (list, tuple)) or getattr(expected, "ndim", 0) > 0:
+            expected = expected[1] if len(expected) > 1 else expected[0]
+        return float(expected)
+    
+    def explain(self, features: FeatureVector, include_html: bool = False) -> SHAPExplanation:
         """
         Get SHAP explanation for prediction.
         
         Args:
             features: Feature vector
+            include_html: Also render the force plot (see ``render_force_plot``)
         
         Returns:
             SHAPExplanation with detailed breakdown
         """
+        return self.explain_batch([features], include_html=include_html)[0]
+    
+    def explain_batch(
+        self,
+        features: Sequence[FeatureVector],
+        include_html: bool = False,
+    ) -> List[SHAPExplanation]:
+        """
+        Get SHAP explanations of many feature vectors with one explainer call.
+        
+        Args:
+            features: Feature vectors
+            include_html: Also render force plots (slow; prefer rendering on demand)
+        
+        Returns:
+            One SHAPExplanation per feature vector, in order
+        """
         if not self.explainer:
-            return SHAPExplanation(
-                base_value=0.5,
-                shap_values={},
-                top_positive=[],
-                top_negative=[],
-            )
+            return [
+                SHAPExplanation(
+                    base_value=0.5,
+                    shap_values={},
+                    top_positive=[],
+                    top_negative=[],
+                    feature_values=f.to_list(),
+                )
+                for f in features
+            ]
+        if not features:
+            return []
         
         import numpy as np
         
-        X = np.array([features.to_list()])
-        X_scaled = self.scaler.transform(X)
-        
-        shap_values = self.explainer.shap_values(X_scaled)
+        X = self._feature_matrix(features)
+        shap_values = self.explainer.shap_values(self.scaler.transform(X))
         
         # Handle different SHAP output formats
         if isinstance(shap_values, list):
-            values = shap_values[1][0]  # Class 1 (issue)
+            values = np.asarray(shap_values[1])  # Class 1 (issue)
         else:
-            values = shap_values[0]
-        
-        # Create SHAP value dict
-        shap_dict = {
-            name: float(val) for name, val in zip(self.feature_names, values)
-        }
-        
-        # Sort by absolute value
-        sorted_shap = sorted(shap_dict.items(), key=lambda x: abs(x[1]), reverse=True)
+            values = np.asarray(shap_values)
+            if values.ndim == 3:
+                values = values[:, :, 1]
+        
+        base_value = self._expected_value()
+        explanations = []
+        for row, inputs in zip(values.tolist(), X.tolist()):
+            shap_dict = dict(zip(self.feature_names, row))
+            
+            # Sort by absolute value
+            sorted_shap = sorted(shap_dict.items(), key=lambda x: abs(x[1]), reverse=True)
+            
+            explanation = SHAPExplanation(
+                base_value=base_value,
+                shap_values=shap_dict,
+                top_positive=[(k, v) for k, v in sorted_shap if v > 0][:5],
+                top_negative=[(k, v) for k, v in sorted_shap if v < 0][:5],
+                feature_values=inputs,
+            )
+            if include_html:
+                explanation.force_plot_html = self.render_force_plot(explanation)
+            explanations.append(explanation)
+        return explanations
+    
+    def render_force_plot(self, explanation: SHAPExplanation, include_js: bool = True) -> Optional[str]:
+        """
+        Render the SHAP force plot of an explanation as HTML.
         
-        top_positive = [(k, v) for k, v in sorted_shap if v > 0][:5]
-        top_negative = [(k, v) for k, v in sorted_shap if v < 0][:5]
+        Args:
+            explanation: Explanation from ``explain``/``explain_batch``
+            include_js: Prepend SHAP's JavaScript bundle (needed once per page)
         
-        # Generate force plot HTML if possible
-        force_html = None
+        Returns:
+            HTML, or None if SHAP is unavailable or there are no SHAP values
+        """
+        if not explanation.shap_values:
+            return None
         try:
             import shap
             force_plot = shap.force_plot(
-                self.explainer.expected_value[1] if isinstance(self.explainer.expected_value, list) else self.explainer.expected_value,
-                values,
-                features.to_list(),
+                explanation.base_value,
+                [explanation.shap_values[name] for name in self.feature_names],
+                explanation.feature_values,
                 feature_names=self.feature_names,
             )
-            force_html = shap.getjs() + force_plot.html()
+            html = force_plot.html()
+            return _shap_js() + html if include_js else html
         except Exception:
-            pass
-        
-        return SHAPExplanation(
-            base_value=float(self.explainer.expected_value[1] if isinstance(self.explainer.expected_value, list) else self.explainer.expected_value),
-            shap_values=shap_dict,
-            top_positive=top_positive,
-            top_negative=top_negative,
-            force_plot_html=force_html,
+            return None
+    
+    def save(self, path: str) -> str:
+        """
+        Save the trained model as an artifact directory (see ``model_artifacts``).
+        
+        Returns:
+            The artifact version
+        """
+        from .model_artifacts import save_artifact
+        
+        if not self.is_trained:
+            raise ValueError("Only trained models can be saved")
+        
+        manifest = save_artifact(
+            path,
+            model_type=self.model_type,
+            model=self.model,
+            scaler=self.scaler,
+            feature_names=self.feature_names,
+            thresholds=self.thresholds,
         )
+        self.version = manifest["version"]
+        return self.version
     
-    def save(self, path: str):
-        """Save model to disk."""
-        path = Path(path)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(path, "wb") as f:
-            pickle.dump({
-                "model": self.model,
-                "scaler": self.scaler,
-                "thresholds": self.thresholds,
-                "feature_names": self.feature_names,
-                "model_type": self.model_type,
-            }, f)
-    
-    def load(self, path: str):
-        """Load model from disk."""
+    def load(self, path: str, allow_pickle: bool = False):
+        """
+        Load a model from disk.
+        
+        Artifact directories are loaded once per version and shared by all
+        scorers of the process. Legacy pickle files run code when loaded,
+        so they are only read with ``allow_pickle``.
+        """
+        from .model_artifacts import is_artifact, load_artifact
+        
+        if is_artifact(path):
+            artifact = load_artifact(path)
+            self.model = artifact.model
+            self.scaler = artifact.scaler
+            self.explainer = artifact.explainer
+            self.thresholds = dict(artifact.manifest["thresholds"])
+            self.feature_names = list(artifact.manifest["feature_names"])
+            self.model_type = artifact.manifest["model_type"]
+            self.version = artifact.version
+            self._importances = None
+            self._shared_model = True
+            return
+        
+        if not allow_pickle:
+            raise ValueError(
+                f"{path} is not a model artifact; re-save it with MLRiskScorer.save "
+                "or load it with allow_pickle=True if it comes from a trusted source"
+            )
+        
         with open(path, "rb") as f:
             data = pickle.load(f)
         
@@ -366,6 +510,9 @@ class MLRiskScorer:
         self.thresholds = data["thresholds"]
         self.feature_names = data["feature_names"]
         self.model_type = data["model_type"]
+        self.version = None
+        self._importances = None
+        self._shared_model = False
         
         # Re-init SHAP explainer
         try:
@@ -375,32 +522,16 @@ class MLRiskScorer:
             self.explainer = None
     
     def _get_feature_importances(self) -> Dict[str, float]:
-        """Get feature importances from model."""
-        if hasattr(self.model, "feature_importances_"):
-            importances = self.model.feature_importances_
-            return {
-                name: float(imp)
-                for name, imp in zip(self.feature_names, importances)
-            }
-        return {name: 1.0 / len(self.feature_names) for name in self.feature_names}
-    
-    def _get_top_contributors(
-        self,
-        features: FeatureVector,
-        importances: Dict[str, float],
-    ) -> List[Tuple[str, float, str]]:
-        """Get top contributing features."""
-        feature_dict = features.to_dict()
-        
-        contributions = []
-        for name, imp in importances.items():
-            value = feature_dict.get(name, 0)
-            if value != 0:
-                direction = "↑" if value > 0 else "↓"
-                contributions.append((name, value * imp, direction))
-        
-        contributions.sort(key=lambda x: abs(x[1]), reverse=True)
-        return contributions[:5]
+        """Get feature importances from model (computed once per trained model)."""
+        if self._importances is None:
+            if hasattr(self.model, "feature_importances_"):
+                self._importances = {
+                    name: float(imp)
+                    for name, imp in zip(self.feature_names, self.model.feature_importances_)
+                }
+            else:
+                self._importances = {name: 1.0 / len(self.feature_names) for name in self.feature_names}
+        return self._importances
     
     def _generate_explanation(
         self,
@@ -467,6 +598,21 @@ class MLRiskScorer:
         )
 
 
+def get_risk_scorer(model_path: Optional[str] = ML_MODEL_PATH) -> MLRiskScorer:
+    """
+    Get a scorer of the deployed model.
+    
+    The artifact is loaded once per version, so this is cheap per request;
+    without a deployed model the scorer is untrained (heuristic scores).
+    """
+    if model_path:
+        try:
+            return MLRiskScorer(model_path=model_path)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load ML risk model from {model_path}: {e}")
+    return MLRiskScorer()
+
+
 # Feature extraction from changes
 def extract_features_from_changes(
     changes: List[Dict[str, Any]],
@@ -485,36 +631,37 @@ def extract_features_from_changes(
         FeatureVector for ML scoring
     """
     features = FeatureVector()
-    criticality_profiles = criticality_profiles or {}
+    criticality = criticality_lookup(criticality_profiles)
     
     numeric_deltas = []
     
     for change in changes:
         change_type = change.get("change_type", "")
         path = change.get("path", "")
+        count = change.get("count", 1)  # Aggregated changes stand for count changes
         
         # Count by change type
         if change_type == "added":
-            features.added_fields += 1
+            features.added_fields += count
         elif change_type == "removed":
-            features.removed_fields += 1
+            features.removed_fields += count
         elif change_type == "type_changed":
-            features.type_changes += 1
+            features.type_changes += count
         elif change_type == "value_changed":
-            features.value_changes += 1
+            features.value_changes += count
         elif change_type == "array_length_changed":
-            features.array_length_changes += 1
+            features.array_length_changes += count
         
         # Count by criticality
-        criticality = _get_path_criticality(path, criticality_profiles)
-        if criticality >= 0.9:
-            features.critical_path_changes += 1
-        elif criticality >= 0.7:
-            features.high_criticality_changes += 1
-        elif criticality >= 0.4:
-            features.medium_criticality_changes += 1
+        score = criticality(path)
+        if score >= 0.9:
+            features.critical_path_changes += count
+        elif score >= 0.7:
+            features.high_criticality_changes += count
+        elif score >= 0.4:
+            features.medium_criticality_changes += count
         else:
-            features.low_criticality_changes += 1
+            features.low_criticality_changes += count
         
         # Track numeric deltas
         old_val = change.get("old_value")
@@ -562,6 +709,14 @@ def _get_path_criticality(path: str, profiles: Dict[str, float]) -> float:
     return 0.5
 
 
+_default_criticality = CriticalityResolver({}, score=_get_path_criticality)
+
+
+def criticality_lookup(profiles: Optional[Dict[str, float]] = None) -> CriticalityResolver:
+    """Get a memoized criticality resolver on the ML feature scale (shared for the default profiles)."""
+    return CriticalityResolver(dict(profiles), score=_get_path_criticality) if profiles else _default_criticality
+
+
 # Convenience functions
 def train_risk_model(
     training_data: List[Tuple[FeatureVector, int]],
@@ -0,0 +1,394 @@
+"""
+Model Artifacts for QoE-Guard ML Risk Scoring.
+
+Stores trained risk models without pickle, so artifacts on shared storage
+cannot run code when loaded:
+- xgboost/lightgbm: the native booster format
+- random_forest: tree node arrays in a NumPy ``.npz``
+- Scaler parameters in a NumPy ``.npz``
+- A JSON manifest with the model type, feature names, thresholds, the
+  scikit-learn version and a content version
+
+Forest node arrays are scikit-learn's internal tree layout, which can
+change between feature releases. Forests are therefore only loaded by
+the scikit-learn release (major.minor) that saved them; after upgrading
+scikit-learn, retrain the model (or load it with the old release and
+save it again with the new one).
+
+Model and scaler files are named after the version they belong to
+("forest-<version>.npz"), and the manifest is replaced last, so a reader
+only ever sees a complete model and scaler pair.
+
+Loaded artifacts are cached per path and version, so every scorer in a
+process shares one model (and SHAP explainer) until a new version is saved.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+ARTIFACT_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+SCALER_FILE = "scaler.npz"
+
+# Base names; stored files carry the version ("model-<version>.ubj")
+MODEL_FILES = {
+    "xgboost": "model.ubj",
+    "lightgbm": "model.txt",
+    "random_forest": "forest.npz",
+}
+
+_SCALER_ATTRIBUTES = ("mean_", "scale_", "var_", "n_samples_seen_")
+
+# Model types stored in scikit-learn's internal layout
+_SKLEARN_LAYOUT_TYPES = ("random_forest",)
+
+
+@dataclass
+class ModelArtifact:
+    """A loaded model artifact (shared; do not mutate)."""
+    manifest: Dict[str, Any]
+    model: Any
+    scaler: Any
+    explainer: Any = None
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+
+_artifacts: Dict[Tuple[str, str], ModelArtifact] = {}
+_artifacts_lock = threading.Lock()
+
+
+class BoosterClassifier:
+    """Binary classifier interface over a LightGBM booster loaded from its native format."""
+
+    classes_ = (0, 1)
+
+    def __init__(self, booster: Any):
+        self.booster = booster
+
+    @property
+    def feature_importances_(self) -> Any:
+        return self.booster.feature_importance()
+
+    def predict_proba(self, X: Any) -> Any:
+        import numpy as np
+
+        prob = np.asarray(self.booster.predict(X), dtype=float)
+        return np.column_stack([1 - prob, prob])
+
+    def predict(self, X: Any) -> Any:
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(int)
+
+
+def is_artifact(path: str) -> bool:
+    """Check whether a path is a model artifact directory."""
+    return (Path(path) / MANIFEST_FILE).is_file()
+
+
+def _write_atomic(path: Path, write) -> None:
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _save_forest(model: Any, path: Path) -> None:
+    import numpy as np
+
+    arrays = {
+        "classes": np.asarray(model.classes_),
+        "n_features": np.array(model.n_features_in_),
+        "max_depth": np.array([tree.tree_.max_depth for tree in model.estimators_]),
+    }
+    for i, tree in enumerate(model.estimators_):
+        state = tree.tree_.__getstate__()
+        arrays[f"nodes_{i}"] = state["nodes"]
+        arrays[f"values_{i}"] = state["values"]
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def _load_forest(path: Path) -> Any:
+    import numpy as np
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+    from sklearn.tree._tree import Tree
+
+    with np.load(path, allow_pickle=False) as data:
+        classes = data["classes"]
+        n_features = int(data["n_features"])
+        n_classes = np.array([len(classes)], dtype=np.intp)
+        estimators = []
+        for i, max_depth in enumerate(data["max_depth"].tolist()):
+            tree = DecisionTreeClassifier()
+            tree.tree_ = Tree(n_features, n_classes, 1)
+            tree.tree_.__setstate__({
+                "max_depth": max_depth,
+                "node_count": len(data[f"nodes_{i}"]),
+                "nodes": data[f"nodes_{i}"],
+                "values": data[f"values_{i}"],
+            })
+            tree.n_features_in_ = n_features
+            tree.n_outputs_ = 1
+            tree.classes_ = classes
+            tree.n_classes_ = len(classes)
+            tree.max_features_ = n_features
+            estimators.append(tree)
+
+    model = RandomForestClassifier(n_estimators=len(estimators))
+    model.estimator_ = DecisionTreeClassifier()
+    model.estimators_ = estimators
+    model.n_features_in_ = n_features
+    model.n_outputs_ = 1
+    model.classes_ = classes
+    model.n_classes_ = len(classes)
+    return model
+
+
+def _save_model(model_type: str, model: Any, path: Path) -> None:
+    if model_type == "xgboost":
+        model.save_model(str(path))
+    elif model_type == "lightgbm":
+        booster = model.booster if isinstance(model, BoosterClassifier) else model.booster_
+        booster.save_model(str(path))
+    else:
+        _save_forest(model, path)
+
+
+def _load_model(model_type: str, path: Path) -> Any:
+    if model_type == "xgboost":
+        import xgboost as xgb
+        model = xgb.XGBClassifier()
+        model.load_model(str(path))
+        return model
+    if model_type == "lightgbm":
+        import lightgbm as lgb
+        return BoosterClassifier(lgb.Booster(model_file=str(path)))
+    return _load_forest(path)
+
+
+def _save_scaler(scaler: Any, path: Path) -> None:
+    import numpy as np
+
+    with open(path, "wb") as f:
+        np.savez(f, **{name: np.asarray(getattr(scaler, name)) for name in _SCALER_ATTRIBUTES})
+
+
+def _load_scaler(path: Path) -> Any:
+    import numpy as np
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    with np.load(path, allow_pickle=False) as data:
+        for name in _SCALER_ATTRIBUTES:
+            setattr(scaler, name, data[name])
+    scaler.n_features_in_ = len(scaler.mean_)
+    return scaler
+
+
+def _sklearn_version() -> Optional[str]:
+    try:
+        import sklearn
+    except ImportError:
+        return None
+    return sklearn.__version__
+
+
+def _release(version: Optional[str]) -> Optional[Tuple[str, ...]]:
+    return tuple(version.split(".")[:2]) if version else None
+
+
+def check_compatible(manifest: Dict[str, Any]) -> None:
+    """
+    Check that the installed libraries can load an artifact's model.
+
+    Raises:
+        ValueError: If the model is stored in the tree layout of another
+            scikit-learn release
+    """
+    if manifest["model_type"] not in _SKLEARN_LAYOUT_TYPES:
+        return
+    saved, installed = manifest.get("sklearn_version"), _sklearn_version()
+    if _release(saved) != _release(installed):
+        raise ValueError(
+            f"Model artifact version {manifest['version']} stores {manifest['model_type']} trees "
+            f"in the layout of scikit-learn {saved or 'unknown'}, but scikit-learn "
+            f"{installed or '(not installed)'} is installed; retrain the model, or load it with "
+            f"scikit-learn {saved or 'of the saving release'} and save it again"
+        )
+
+
+def _file_digest(*paths: Path) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _versioned_name(name: str, version: str) -> str:
+    stem, suffix = os.path.splitext(name)
+    return f"{stem}-{version}{suffix}"
+
+
+def _remove_unreferenced(directory: Path) -> None:
+    """Delete model and scaler files the current manifest does not point to."""
+    try:
+        manifest = read_manifest(directory)
+    except (OSError, ValueError):
+        return
+    keep = {manifest["model_file"], manifest["scaler_file"]}
+    for file in directory.iterdir():
+        # Hidden files are staged by writers that have not finished yet
+        if file.name in keep or file.name.startswith(".") or not file.is_file():
+            continue
+        if not any(
+            file.suffix == Path(name).suffix and file.stem.split("-")[0] == Path(name).stem
+            for name in (*MODEL_FILES.values(), SCALER_FILE)
+        ):
+            continue
+        try:
+            file.unlink()
+        except OSError:
+            pass
+
+
+def save_artifact(
+    path: str,
+    model_type: str,
+    model: Any,
+    scaler: Any,
+    feature_names: List[str],
+    thresholds: Dict[str, float],
+) -> Dict[str, Any]:
+    """
+    Save a trained model as an artifact directory.
+
+    The model and scaler are written to files named after the new version,
+    then the manifest is replaced to point at them; files of older versions
+    are deleted only after that, so readers never see a partial artifact.
+
+    Returns:
+        The manifest
+    """
+    directory = Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    model_type = model_type if model_type in MODEL_FILES else "random_forest"
+
+    # Staged under hidden names (keeping the extension the savers rely on)
+    staging = uuid.uuid4().hex
+    staged_model = directory / f".{staging}.{MODEL_FILES[model_type]}"
+    staged_scaler = directory / f".{staging}.{SCALER_FILE}"
+    try:
+        _save_model(model_type, model, staged_model)
+        _save_scaler(scaler, staged_scaler)
+        version = _file_digest(staged_model, staged_scaler)
+        model_path = directory / _versioned_name(MODEL_FILES[model_type], version)
+        scaler_path = directory / _versioned_name(SCALER_FILE, version)
+        os.replace(staged_model, model_path)
+        os.replace(staged_scaler, scaler_path)
+    finally:
+        for staged in (staged_model, staged_scaler):
+            if staged.exists():
+                staged.unlink()
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "version": version,
+        "model_type": model_type,
+        "model_file": model_path.name,
+        "scaler_file": scaler_path.name,
+        "feature_names": list(feature_names),
+        "thresholds": dict(thresholds),
+        "sklearn_version": _sklearn_version(),
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+    def write_manifest(p: Path) -> None:
+        with open(p, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    _write_atomic(directory / MANIFEST_FILE, write_manifest)
+    _remove_unreferenced(directory)
+    return manifest
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """Read the manifest of an artifact directory."""
+    with open(Path(path) / MANIFEST_FILE, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported model artifact format: {manifest.get('format')}")
+    return manifest
+
+
+def load_artifact(path: str) -> ModelArtifact:
+    """
+    Load an artifact directory (cached per path and version).
+
+    Only the manifest is read when the version is already loaded. If a new
+    version is saved while loading (and the old files are deleted), the
+    new manifest is read and loaded instead.
+
+    Raises:
+        OSError: If the artifact files cannot be read
+        ValueError: If the artifact is incompatible (see ``check_compatible``)
+            or its files are malformed
+    """
+    directory = Path(path).resolve()
+    manifest = read_manifest(directory)
+    while True:
+        key = (str(directory), manifest["version"])
+        with _artifacts_lock:
+            artifact = _artifacts.get(key)
+        if artifact is not None:
+            return artifact
+
+        check_compatible(manifest)
+        try:
+            artifact = ModelArtifact(
+                manifest=manifest,
+                model=_load_model(manifest["model_type"], directory / manifest["model_file"]),
+                scaler=_load_scaler(directory / manifest["scaler_file"]),
+            )
+            break
+        except OSError:
+            latest = read_manifest(directory)
+            if latest["version"] == manifest["version"]:
+                raise
+            manifest = latest
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Malformed model artifact {directory} (version {manifest['version']}): {e}") from e
+
+    try:
+        import shap
+        artifact.explainer = shap.TreeExplainer(getattr(artifact.model, "booster", artifact.model))
+    except Exception:
+        artifact.explainer = None
+
+    with _artifacts_lock:
+        # Older versions of this path are no longer served
+        for cached in [k for k in _artifacts if k[0] == key[0]]:
+            del _artifacts[cached]
+        return _artifacts.setdefault(key, artifact)
+
+
+def clear_artifact_cache() -> None:
+    """Drop all loaded artifacts."""
+    with _artifacts_lock:
+        _artifacts.clear()
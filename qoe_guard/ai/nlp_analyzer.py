@@ -7,6 +7,11 @@ Analyzes API documentation and descriptions using NLP:
 - Detect documentation drift
 - Extract keywords and entities
 
+Batch APIs run each model once per batch (spaCy ``nlp.pipe``, batched
+zero-shot and KeyBERT), and results are cached by endpoint content (in
+memory and on disk) so endpoints seen in earlier spec imports, also by
+other workers or before a restart, are not classified again.
+
 Libraries:
 - spacy: NLP pipeline
 - transformers: Zero-shot classification
@@ -14,10 +19,24 @@ Libraries:
 """
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import re
-from dataclasses import dataclass, field
+import threading
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+
+from ..storage import DATA_DIR
+from .registry import spacy_model, zero_shot_classifier, keybert_model
+
+try:
+    import ahocorasick
+except ImportError:  # Keyword matching falls back to one search per keyword
+    ahocorasick = None
 
 
 @dataclass
@@ -73,6 +92,211 @@ CRITICAL_KEYWORDS = {
 }
 
 
+class KeywordMatcher:
+    """
+    Finds the keywords of one fixed keyword table that occur in a text.
+    
+    The keywords are compiled into one Aho-Corasick automaton
+    (pyahocorasick), so a text is scanned once however many keywords the
+    table has. Each keyword is a bit of a mask, and the per-category
+    results of each mask are computed once. Without pyahocorasick every
+    keyword is searched separately (same results).
+    """
+    
+    # Masks whose results are remembered before the memo is reset
+    MAX_MASKS = 4096
+    
+    def __init__(self, table: Dict[str, List[str]]):
+        self.table: Tuple[Tuple[str, Tuple[str, ...]], ...] = tuple(
+            (category, tuple(keywords)) for category, keywords in table.items()
+        )
+        keywords = dict.fromkeys(keyword for _, words in self.table for keyword in words)
+        self._bits: Dict[str, int] = {keyword: 1 << i for i, keyword in enumerate(keywords)}
+        self._results: Dict[int, Tuple[Dict[str, int], Dict[str, List[str]]]] = {}
+        self._automaton = None
+        if ahocorasick is not None and all(self._bits):
+            automaton = ahocorasick.Automaton()
+            for keyword, bit in self._bits.items():
+                automaton.add_word(keyword, bit)
+            automaton.make_automaton()
+            self._automaton = automaton
+    
+    def mask(self, text: str) -> int:
+        """Get the bits of the keywords contained in a text (as substrings)."""
+        mask = 0
+        if self._automaton is not None:
+            for _, bit in self._automaton.iter(text):
+                mask |= bit
+        else:
+            for keyword, bit in self._bits.items():
+                if keyword in text:
+                    mask |= bit
+        return mask
+    
+    def _result(self, mask: int) -> Tuple[Dict[str, int], Dict[str, List[str]]]:
+        result = self._results.get(mask)
+        if result is None:
+            matches = {}
+            for category, keywords in self.table:
+                found = [keyword for keyword in keywords if mask & self._bits[keyword]]
+                if found:
+                    matches[category] = found
+            if len(self._results) >= self.MAX_MASKS:
+                self._results.clear()
+            result = self._results[mask] = ({c: len(found) for c, found in matches.items()}, matches)
+        return result
+    
+    def counts(self, text: str) -> Dict[str, int]:
+        """Get the number of keywords of each category contained in a text (as substrings)."""
+        return dict(self._result(self.mask(text))[0])
+    
+    def matches(self, text: str) -> Dict[str, List[str]]:
+        """Get the keywords of each category contained in a text, in table order."""
+        return {category: list(found) for category, found in self._result(self.mask(text))[1].items()}
+
+
+# Built once; the keyword tables above are fixed
+_INTENT_MATCHER = KeywordMatcher(STREAMING_INTENTS)
+_CRITICALITY_MATCHER = KeywordMatcher(CRITICAL_KEYWORDS)
+
+_PATH_PARAM_RE = re.compile(r"\{(\w+)\}")
+_VERSION_RE = re.compile(r"v\d+")
+_WORD_RE = re.compile(r"\b\w{3,}\b")
+_NAMING_PATTERNS = {
+    "camelCase": re.compile(r"^[a-z]+[A-Z]"),
+    "snake_case": re.compile(r"^[a-z]+_[a-z]"),
+    "kebab-case": re.compile(r"^[a-z]+-[a-z]"),
+}
+
+
+# Texts per model call in batch APIs
+NLP_BATCH_SIZE = 64
+
+
+CLASSIFICATION_CACHE_DIR = Path(os.getenv("QOE_GUARD_CLASSIFICATION_CACHE_DIR") or DATA_DIR / "classifications")
+
+# Bump when the rules or result fields change, so stored results are not reused
+CLASSIFICATION_CACHE_VERSION = 1
+
+
+def _decode_result(data: Dict[str, Any]) -> Any:
+    """Rebuild a cached analysis from its stored form."""
+    value = dict(data["value"])
+    if data["type"] == "EndpointIntent":
+        value["secondary_intents"] = [tuple(item) for item in value["secondary_intents"]]
+        return EndpointIntent(**value)
+    if data["type"] == "CriticalityClassification":
+        return CriticalityClassification(**value)
+    raise ValueError(f"Unknown result type {data['type']!r}")
+
+
+class ClassificationCache:
+    """
+    LRU cache of endpoint analyses, keyed by content hash.
+
+    Entries are also persisted on disk as one JSON file per key (shared by
+    workers and kept across restarts); entries evicted from memory are read
+    back from disk. Cached results are shared between callers and must not
+    be modified.
+    """
+    
+    def __init__(self, max_entries: int = 50_000, cache_dir: Optional[Path] = CLASSIFICATION_CACHE_DIR):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Entries kept in memory
+            cache_dir: Directory of the on-disk entries (None keeps the cache in memory only)
+        """
+        self.max_entries = max_entries
+        self.directory = (
+            Path(cache_dir) / f"v{CLASSIFICATION_CACHE_VERSION}" if cache_dir is not None else None
+        )
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+    
+    def _read(self, key: str) -> Any:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                return _decode_result(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Skipping classification cache entry {path.name}: {e}")
+            return None
+    
+    def _write(self, key: str, value: Any) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"type": type(value).__name__, "value": asdict(value)}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Warning: Could not persist classification: {e}")
+    
+    def _remember(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def get(self, key: str) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        value = self._read(key)
+        if value is not None:
+            with self._lock:
+                # Keep the instance another thread may have cached meanwhile
+                value = self._entries.get(key, value)
+                self._remember(key, value)
+        return value
+    
+    def put(self, key: str, value: Any) -> Any:
+        with self._lock:
+            self._remember(key, value)
+        self._write(key, value)
+        return value
+    
+    def clear(self, remove_files: bool = False) -> None:
+        """Drop cached analyses (and optionally the on-disk entries)."""
+        with self._lock:
+            self._entries.clear()
+            if remove_files and self.directory is not None and self.directory.is_dir():
+                for path in self.directory.glob("*/*.json"):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+
+
+classification_cache = ClassificationCache()
+
+
+def _content_hash(*parts: Any) -> str:
+    """Hash the content an analysis depends on."""
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def _endpoint_path(endpoint: Dict[str, Any]) -> str:
+    return endpoint.get("endpoint_path") or endpoint.get("path") or ""
+
+
 class NLPAnalyzer:
     """
     NLP-based analyzer for API documentation.
@@ -84,6 +308,7 @@ class NLPAnalyzer:
         self,
         spacy_model: str = "en_core_web_sm",
         use_transformers: bool = True,
+        cache: Optional[ClassificationCache] = None,
     ):
         """
         Initialize NLP analyzer.
@@ -91,9 +316,11 @@ class NLPAnalyzer:
         Args:
             spacy_model: spaCy model to use
             use_transformers: Whether to use transformers for classification
+            cache: Cache of analyses (defaults to the process-wide cache)
         """
         self.spacy_model = spacy_model
         self.use_transformers = use_transformers
+        self.cache = cache if cache is not None else classification_cache
         self.nlp = None
         self.classifier = None
         self.keyword_extractor = None
@@ -101,45 +328,33 @@ class NLPAnalyzer:
         self._init_models()
     
     def _init_models(self):
-        """Initialize NLP models."""
-        # Try spaCy
-        try:
-            import spacy
-            try:
-                self.nlp = spacy.load(self.spacy_model)
-            except OSError:
-                # Model not installed, try downloading
-                print(f"Downloading spaCy model {self.spacy_model}...")
-                spacy.cli.download(self.spacy_model)
-                self.nlp = spacy.load(self.spacy_model)
-        except ImportError:
-            print("Warning: spaCy not installed. Some NLP features disabled.")
-        
-        # Try transformers for zero-shot classification
+        """Get the shared NLP models (loaded once per process)."""
+        self.nlp = spacy_model(self.spacy_model)
+        
+        # Zero-shot classification
         if self.use_transformers:
             try:
-                from transformers import pipeline
-                self.classifier = pipeline(
-                    "zero-shot-classification",
-                    model="facebook/bart-large-mnli",
-                )
-            except ImportError:
-                print("Warning: transformers not installed. Zero-shot classification disabled.")
+                self.classifier = zero_shot_classifier()
             except Exception as e:
                 print(f"Warning: Could not load classifier: {e}")
         
-        # Try KeyBERT
-        try:
-            from keybert import KeyBERT
-            self.keyword_extractor = KeyBERT()
-        except ImportError:
-            print("Warning: keybert not installed. Keyword extraction uses fallback.")
+        # KeyBERT (falls back to word frequency when unavailable)
+        self.keyword_extractor = keybert_model()
     
     @property
     def is_available(self) -> bool:
         """Check if basic NLP is available."""
         return self.nlp is not None
     
+    @property
+    def _model_signature(self) -> Tuple:
+        """Models that shape the results (part of the cache key)."""
+        return (
+            self.spacy_model if self.nlp is not None else None,
+            self.classifier is not None,
+            self.keyword_extractor is not None,
+        )
+    
     def extract_intent(
         self,
         endpoint_path: str,
@@ -159,44 +374,84 @@ class NLPAnalyzer:
         Returns:
             EndpointIntent with analysis
         """
-        text = " ".join(filter(None, [endpoint_path, description, summary]))
-        text = text.lower()
-        
-        # Rule-based intent detection
-        intent_scores = self._compute_intent_scores(text)
-        
-        # Use zero-shot if available
-        if self.classifier and description:
-            try:
-                labels = list(STREAMING_INTENTS.keys())
-                result = self.classifier(description, labels)
-                for label, score in zip(result["labels"], result["scores"]):
-                    intent_scores[label] = max(intent_scores.get(label, 0), score)
-            except Exception:
-                pass
+        return self.extract_intents([{
+            "endpoint_path": endpoint_path,
+            "method": method,
+            "description": description,
+            "summary": summary,
+        }])[0]
+    
+    def extract_intents(
+        self,
+        endpoints: List[Dict[str, Any]],
+        batch_size: int = NLP_BATCH_SIZE,
+    ) -> List[EndpointIntent]:
+        """
+        Extract the intents of many endpoints.
         
-        # Sort by score
-        sorted_intents = sorted(intent_scores.items(), key=lambda x: x[1], reverse=True)
-        primary = sorted_intents[0] if sorted_intents else ("unknown", 0.0)
-        secondary = sorted_intents[1:4] if len(sorted_intents) > 1 else []
+        Runs spaCy, zero-shot classification and KeyBERT once per batch
+        over the endpoints not analyzed before.
         
-        # Extract entities
-        entities = self._extract_entities(text)
+        Args:
+            endpoints: Dicts with endpoint_path (or path), method, and
+                optional description and summary
+            batch_size: Texts per model call
         
-        # Extract keywords
-        keywords = self._extract_keywords(text)
+        Returns:
+            EndpointIntent per endpoint, in input order
+        """
+        signature = self._model_signature
+        results: List[Optional[EndpointIntent]] = [None] * len(endpoints)
+        pending: Dict[str, List[int]] = {}
+        
+        for i, ep in enumerate(endpoints):
+            key = _content_hash(
+                "intent", signature, _endpoint_path(ep), ep.get("method"),
+                ep.get("description"), ep.get("summary"),
+            )
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(key, []).append(i)
         
-        # Determine business domain
-        domain = self._classify_domain(primary[0])
+        if not pending:
+            return results
         
-        return EndpointIntent(
-            primary_intent=primary[0],
-            confidence=primary[1],
-            secondary_intents=secondary,
-            extracted_entities=entities,
-            business_domain=domain,
-            keywords=keywords,
-        )
+        keys = list(pending)
+        first = [endpoints[pending[key][0]] for key in keys]
+        texts = [
+            " ".join(filter(None, [_endpoint_path(ep), ep.get("description"), ep.get("summary")])).lower()
+            for ep in first
+        ]
+        zero_shot = self._zero_shot_batch([ep.get("description") for ep in first], batch_size)
+        entities = self._extract_entities_batch(texts, batch_size)
+        keywords = self._extract_keywords_batch(texts, batch_size=batch_size)
+        
+        for j, key in enumerate(keys):
+            # Rule-based intent detection, raised by zero-shot scores
+            intent_scores = self._compute_intent_scores(texts[j])
+            if zero_shot[j] is not None:
+                for label, score in zip(zero_shot[j]["labels"], zero_shot[j]["scores"]):
+                    intent_scores[label] = max(intent_scores.get(label, 0), score)
+            
+            # Sort by score
+            sorted_intents = sorted(intent_scores.items(), key=lambda x: x[1], reverse=True)
+            primary = sorted_intents[0] if sorted_intents else ("unknown", 0.0)
+            secondary = sorted_intents[1:4] if len(sorted_intents) > 1 else []
+            
+            intent = self.cache.put(key, EndpointIntent(
+                primary_intent=primary[0],
+                confidence=primary[1],
+                secondary_intents=secondary,
+                extracted_entities=entities[j],
+                business_domain=self._classify_domain(primary[0]),
+                keywords=keywords[j],
+            ))
+            for i in pending[key]:
+                results[i] = intent
+        
+        return results
     
     def classify_criticality(
         self,
@@ -217,18 +472,58 @@ class NLPAnalyzer:
         Returns:
             CriticalityClassification with analysis
         """
-        text = " ".join(filter(None, [endpoint_path, description] + (tags or [])))
+        return self.classify_criticalities([{
+            "endpoint_path": endpoint_path,
+            "method": method,
+            "description": description,
+            "tags": tags,
+        }])[0]
+    
+    def classify_criticalities(
+        self,
+        endpoints: List[Dict[str, Any]],
+    ) -> List[CriticalityClassification]:
+        """
+        Classify the criticality of many endpoints.
+        
+        Args:
+            endpoints: Dicts with endpoint_path (or path), method, and
+                optional description and tags
+        
+        Returns:
+            CriticalityClassification per endpoint, in input order
+        """
+        results = []
+        for ep in endpoints:
+            path, method = _endpoint_path(ep), ep.get("method") or "GET"
+            description, tags = ep.get("description"), list(ep.get("tags") or [])
+            key = _content_hash("criticality", path, method, description, tags)
+            classification = self.cache.get(key)
+            if classification is None:
+                classification = self.cache.put(
+                    key, self._classify_criticality(path, method, description, tags)
+                )
+            results.append(classification)
+        return results
+    
+    def _classify_criticality(
+        self,
+        endpoint_path: str,
+        method: str,
+        description: Optional[str],
+        tags: List[str],
+    ) -> CriticalityClassification:
+        text = " ".join(filter(None, [endpoint_path, description] + tags))
         text = text.lower()
         
         # Score for each criticality level
         level_scores = {level: 0.0 for level in CRITICAL_KEYWORDS}
         reasons = []
         
-        for level, keywords in CRITICAL_KEYWORDS.items():
+        for level, keywords in _CRITICALITY_MATCHER.matches(text).items():
             for keyword in keywords:
-                if keyword in text:
-                    level_scores[level] += 0.3
-                    reasons.append(f"Contains '{keyword}' -> {level}")
+                level_scores[level] += 0.3
+                reasons.append(f"Contains '{keyword}' -> {level}")
         
         # Method-based adjustments
         if method.upper() in ["POST", "PUT", "DELETE", "PATCH"]:
@@ -338,34 +633,66 @@ class NLPAnalyzer:
     
     def _compute_intent_scores(self, text: str) -> Dict[str, float]:
         """Compute intent scores using keyword matching."""
-        scores = defaultdict(float)
-        
-        for intent, keywords in STREAMING_INTENTS.items():
-            for keyword in keywords:
-                if keyword in text:
-                    scores[intent] += 0.25
+        scores = {intent: count * 0.25 for intent, count in _INTENT_MATCHER.counts(text).items()}
         
         # Normalize
         max_score = max(scores.values()) if scores else 1
         return {k: min(1.0, v / max_score) for k, v in scores.items()}
     
-    def _extract_entities(self, text: str) -> Dict[str, List[str]]:
-        """Extract named entities from text."""
+    def _zero_shot_batch(
+        self,
+        descriptions: List[Optional[str]],
+        batch_size: int = NLP_BATCH_SIZE,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Zero-shot intent scores of each description (None without one)."""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(descriptions)
+        if not self.classifier:
+            return results
+        
+        indices = [i for i, d in enumerate(descriptions) if d]
+        labels = list(STREAMING_INTENTS.keys())
+        for start in range(0, len(indices), batch_size):
+            chunk = indices[start:start + batch_size]
+            try:
+                outputs = self.classifier([descriptions[i] for i in chunk], labels, batch_size=batch_size)
+            except Exception:
+                continue
+            # Pipelines unwrap single-item batches
+            if isinstance(outputs, dict):
+                outputs = [outputs]
+            for i, output in zip(chunk, outputs):
+                results[i] = output
+        return results
+    
+    def _extract_entities_batch(
+        self,
+        texts: List[str],
+        batch_size: int = NLP_BATCH_SIZE,
+    ) -> List[Dict[str, List[str]]]:
+        """Extract named entities from many texts with one spaCy pipe."""
+        if not self.nlp:
+            return [self._extract_entities(text) for text in texts]
+        docs = self.nlp.pipe(texts, batch_size=batch_size)
+        return [self._extract_entities(text, doc) for text, doc in zip(texts, docs)]
+    
+    def _extract_entities(self, text: str, doc: Any = None) -> Dict[str, List[str]]:
+        """Extract named entities from text (or its already parsed spaCy doc)."""
         entities: Dict[str, List[str]] = defaultdict(list)
         
-        if self.nlp:
+        if doc is None and self.nlp:
             doc = self.nlp(text)
+        if doc is not None:
             for ent in doc.ents:
                 entities[ent.label_].append(ent.text)
         
         # Custom entity extraction for API-specific patterns
         # Extract path parameters
-        path_params = re.findall(r"\{(\w+)\}", text)
+        path_params = _PATH_PARAM_RE.findall(text)
         if path_params:
             entities["PATH_PARAM"] = path_params
         
         # Extract version numbers
-        versions = re.findall(r"v\d+", text)
+        versions = _VERSION_RE.findall(text)
         if versions:
             entities["VERSION"] = versions
         
@@ -373,20 +700,43 @@ class NLPAnalyzer:
     
     def _extract_keywords(self, text: str, top_k: int = 5) -> List[str]:
         """Extract keywords from text."""
-        if self.keyword_extractor:
-            try:
-                keywords = self.keyword_extractor.extract_keywords(
-                    text,
-                    keyphrase_ngram_range=(1, 2),
-                    stop_words="english",
-                    top_n=top_k,
-                )
-                return [kw[0] for kw in keywords]
-            except Exception:
-                pass
+        return self._extract_keywords_batch([text], top_k)[0]
+    
+    def _extract_keywords_batch(
+        self,
+        texts: List[str],
+        top_k: int = 5,
+        batch_size: int = NLP_BATCH_SIZE,
+    ) -> List[List[str]]:
+        """Extract keywords from many texts with batched KeyBERT calls."""
+        results: List[Optional[List[str]]] = [None] * len(texts)
         
-        # Fallback: simple word frequency
-        words = re.findall(r"\b\w{3,}\b", text.lower())
+        if self.keyword_extractor:
+            for start in range(0, len(texts), batch_size):
+                chunk = texts[start:start + batch_size]
+                try:
+                    keywords = self.keyword_extractor.extract_keywords(
+                        chunk,
+                        keyphrase_ngram_range=(1, 2),
+                        stop_words="english",
+                        top_n=top_k,
+                    )
+                except Exception:
+                    continue
+                # KeyBERT unwraps single-document batches
+                if len(chunk) == 1 and (not keywords or isinstance(keywords[0], tuple)):
+                    keywords = [keywords]
+                for offset, doc_keywords in enumerate(keywords):
+                    results[start + offset] = [kw[0] for kw in doc_keywords]
+        
+        return [
+            keywords if keywords is not None else self._keyword_frequency(text, top_k)
+            for text, keywords in zip(texts, results)
+        ]
+    
+    def _keyword_frequency(self, text: str, top_k: int = 5) -> List[str]:
+        """Fallback keywords: most frequent words."""
+        words = _WORD_RE.findall(text.lower())
         stop_words = {"the", "and", "for", "with", "this", "that", "from", "are", "was"}
         words = [w for w in words if w not in stop_words]
         
@@ -423,11 +773,7 @@ class NLPAnalyzer:
     
     def _suggest_tags(self, text: str) -> List[str]:
         """Suggest OpenAPI tags based on text analysis."""
-        tags = []
-        
-        for intent, keywords in STREAMING_INTENTS.items():
-            if any(kw in text for kw in keywords):
-                tags.append(intent)
+        tags = list(_INTENT_MATCHER.counts(text))
         
         return tags[:3]  # Max 3 tags
     
@@ -437,15 +783,9 @@ class NLPAnalyzer:
             return 1.0
         
         # Check for common patterns
-        patterns = {
-            "camelCase": re.compile(r"^[a-z]+[A-Z]"),
-            "snake_case": re.compile(r"^[a-z]+_[a-z]"),
-            "kebab-case": re.compile(r"^[a-z]+-[a-z]"),
-        }
-        
         pattern_counts = defaultdict(int)
         for op_id in operation_ids:
-            for pattern_name, pattern in patterns.items():
+            for pattern_name, pattern in _NAMING_PATTERNS.items():
                 if pattern.search(op_id):
                     pattern_counts[pattern_name] += 1
                     break
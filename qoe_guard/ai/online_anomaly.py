@@ -0,0 +1,578 @@
+"""
+Online Latency Anomaly Detection for QoE-Guard AI.
+
+Scores each endpoint's latency as results arrive, without keeping the
+history in memory:
+- Welford running moments (count/mean/variance/min/max)
+- P² quantile sketches for q1, q3 and p99
+- Fast and slow EWMAs of the latency level
+- A bounded rolling window of the most recent latencies for trend checks
+
+State is O(1) per endpoint and stored as JSON in the database, so drift
+is tracked over months of history. Each observation is scored against the
+state before it is added.
+"""
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..db.ingest import LOOKUP_CHUNK_SIZE
+from ..db.models import LatencySketch, Operation, OperationResult
+
+
+# Observations before an endpoint is scored
+MIN_SAMPLES = 20
+
+# Recent latencies kept per endpoint for trend checks
+WINDOW_SIZE = 50
+
+# Smoothing of the fast (recent level) and slow (long-run level) EWMAs
+FAST_ALPHA = 0.2
+SLOW_ALPHA = 0.01
+
+# Fast EWMA this many times the slow one is drift
+DRIFT_RATIO = 1.5
+
+Z_THRESHOLD = 3.0
+
+# Multiples of the IQR above q3 that are anomalous
+IQR_FENCE = 3.0
+
+
+class RunningMoments:
+    """Welford's running count, mean and variance, plus min and max."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    @property
+    def variance(self) -> float:
+        """Population variance (as ``np.var``)."""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningMoments":
+        moments = cls()
+        moments.count = data["count"]
+        moments.mean = data["mean"]
+        moments.m2 = data["m2"]
+        if moments.count:
+            moments.min = data["min"]
+            moments.max = data["max"]
+        return moments
+
+
+class P2Quantile:
+    """
+    Streaming estimate of one quantile (Jain & Chlamtac's P² algorithm).
+
+    Keeps five markers whose heights track the minimum, the quantile, the
+    maximum and two points in between; exact for fewer than five values.
+    """
+
+    def __init__(self, p: float):
+        if not 0 < p < 1:
+            raise ValueError(f"Quantile must be in (0, 1): {p}")
+        self.p = p
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1.0, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5.0]
+        self.increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def update(self, x: float) -> None:
+        self.count += 1
+        q = self.heights
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(1, 5) if x < q[i]) - 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                height = self._parabolic(i, step)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = height
+                n[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> float:
+        """Current estimate (linear interpolation while there are fewer than five values)."""
+        if not self.heights:
+            return 0.0
+        if self.count > 5:
+            return self.heights[2]
+        rank = self.p * (len(self.heights) - 1)
+        low = int(rank)
+        high = min(low + 1, len(self.heights) - 1)
+        return self.heights[low] + (rank - low) * (self.heights[high] - self.heights[low])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "p": self.p,
+            "count": self.count,
+            "heights": list(self.heights),
+            "positions": list(self.positions),
+            "desired": list(self.desired),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "P2Quantile":
+        sketch = cls(data["p"])
+        sketch.count = data["count"]
+        sketch.heights = list(data["heights"])
+        sketch.positions = list(data["positions"])
+        sketch.desired = list(data["desired"])
+        return sketch
+
+
+class EWMA:
+    """Exponentially weighted moving mean and variance."""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.count = 0
+        self.mean = 0.0
+        self.variance = 0.0
+
+    def update(self, x: float) -> None:
+        self.count += 1
+        if self.count == 1:
+            self.mean = x
+            return
+        delta = x - self.mean
+        increment = self.alpha * delta
+        self.mean += increment
+        self.variance = (1 - self.alpha) * (self.variance + delta * increment)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"alpha": self.alpha, "count": self.count, "mean": self.mean, "variance": self.variance}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EWMA":
+        ewma = cls(data["alpha"])
+        ewma.count = data["count"]
+        ewma.mean = data["mean"]
+        ewma.variance = data["variance"]
+        return ewma
+
+
+class RollingWindow:
+    """The most recent values, with a running sum."""
+
+    def __init__(self, size: int, values: Iterable[float] = ()):
+        self.size = size
+        self.values: Deque[float] = deque(maxlen=size)
+        self.total = 0.0
+        for value in values:
+            self.update(value)
+
+    def update(self, x: float) -> None:
+        if len(self.values) == self.size:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    @property
+    def mean(self) -> float:
+        return self.total / len(self.values) if self.values else 0.0
+
+    def slope(self) -> Tuple[float, float]:
+        """Least-squares slope per observation and R² of the window."""
+        n = len(self.values)
+        if n < 2:
+            return 0.0, 0.0
+        x_mean = (n - 1) / 2
+        y_mean = self.mean
+        sxx = sxy = syy = 0.0
+        for i, y in enumerate(self.values):
+            dx, dy = i - x_mean, y - y_mean
+            sxx += dx * dx
+            sxy += dx * dy
+            syy += dy * dy
+        slope = sxy / sxx
+        r_squared = sxy * sxy / (sxx * syy) if syy > 0 else 0.0
+        return slope, r_squared
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"size": self.size, "values": list(self.values)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RollingWindow":
+        return cls(data["size"], data["values"])
+
+
+@dataclass
+class LatencyObservation:
+    """Score of one latency against its endpoint's running state."""
+    endpoint_key: str
+    latency_ms: float
+    is_anomaly: bool
+    is_drift: bool
+    z_score: float
+    drift_ratio: float  # Fast EWMA / slow EWMA
+    explanation: str
+    timestamp: Optional[datetime] = None
+
+
+@dataclass
+class EndpointLatencyState:
+    """Running latency statistics of one endpoint."""
+    moments: RunningMoments = field(default_factory=RunningMoments)
+    q1: P2Quantile = field(default_factory=lambda: P2Quantile(0.25))
+    q3: P2Quantile = field(default_factory=lambda: P2Quantile(0.75))
+    p99: P2Quantile = field(default_factory=lambda: P2Quantile(0.99))
+    fast: EWMA = field(default_factory=lambda: EWMA(FAST_ALPHA))
+    slow: EWMA = field(default_factory=lambda: EWMA(SLOW_ALPHA))
+    window: RollingWindow = field(default_factory=lambda: RollingWindow(WINDOW_SIZE))
+    last_observed_at: Optional[datetime] = None
+
+    @property
+    def count(self) -> int:
+        return self.moments.count
+
+    def drift_ratio(self) -> float:
+        return self.fast.mean / self.slow.mean if self.slow.mean > 0 else 1.0
+
+    def score(self, endpoint_key: str, latency_ms: float, min_samples: int = MIN_SAMPLES) -> LatencyObservation:
+        """Score a latency against the current state (the state is not changed)."""
+        if self.count < min_samples:
+            return LatencyObservation(
+                endpoint_key=endpoint_key,
+                latency_ms=latency_ms,
+                is_anomaly=False,
+                is_drift=False,
+                z_score=0.0,
+                drift_ratio=1.0,
+                explanation=f"Insufficient history ({self.count} observations)",
+            )
+
+        std = self.moments.std
+        z_score = (latency_ms - self.moments.mean) / std if std > 0 else 0.0
+        fence = self.q3.value + IQR_FENCE * (self.q3.value - self.q1.value)
+        is_anomaly = z_score > Z_THRESHOLD or (fence > 0 and latency_ms > fence)
+
+        # Level after this observation, compared with the long-run level
+        fast_mean = self.fast.mean + self.fast.alpha * (latency_ms - self.fast.mean)
+        drift_ratio = fast_mean / self.slow.mean if self.slow.mean > 0 else 1.0
+        is_drift = drift_ratio >= DRIFT_RATIO
+
+        reasons = []
+        if is_anomaly:
+            reasons.append(
+                f"Latency {latency_ms:.0f}ms is unusual (z={z_score:.1f}, p99={self.p99.value:.0f}ms)"
+            )
+        if is_drift:
+            reasons.append(f"Latency level drifted to {drift_ratio:.1f}x its long-run average")
+        return LatencyObservation(
+            endpoint_key=endpoint_key,
+            latency_ms=latency_ms,
+            is_anomaly=is_anomaly,
+            is_drift=is_drift,
+            z_score=z_score,
+            drift_ratio=drift_ratio,
+            explanation="; ".join(reasons) or "Within normal range",
+        )
+
+    def update(self, latency_ms: float, timestamp: Optional[datetime] = None) -> None:
+        for stat in (self.moments, self.q1, self.q3, self.p99, self.fast, self.slow, self.window):
+            stat.update(latency_ms)
+        if timestamp is not None and (self.last_observed_at is None or timestamp > self.last_observed_at):
+            self.last_observed_at = timestamp
+
+    def observe(
+        self,
+        endpoint_key: str,
+        latency_ms: float,
+        timestamp: Optional[datetime] = None,
+        min_samples: int = MIN_SAMPLES,
+    ) -> LatencyObservation:
+        """Score a latency, then add it to the state."""
+        observation = self.score(endpoint_key, latency_ms, min_samples)
+        observation.timestamp = timestamp
+        self.update(latency_ms, timestamp)
+        return observation
+
+    def trend(self, z_threshold: float = Z_THRESHOLD) -> Dict[str, Any]:
+        """
+        Latency trend of the recent window against the long-run statistics.
+
+        Same keys as ``TimeSeriesAnomalyDetector.detect_latency_trend``, plus
+        the sketched quantiles and EWMA levels.
+        """
+        if not self.window.full:
+            return {"trend": "insufficient_data", "confidence": 0.0}
+
+        slope, r_squared = self.window.slope()
+        if abs(slope) < 1:
+            trend = "stable"
+        elif slope > 0:
+            trend = "increasing"
+        else:
+            trend = "decreasing"
+
+        std = self.moments.std
+        z_score = (self.window.mean - self.moments.mean) / std if std > 0 else 0.0
+        return {
+            "trend": trend,
+            "slope": slope,
+            "r_squared": r_squared,
+            "recent_mean": self.window.mean,
+            "overall_mean": self.moments.mean,
+            "z_score": z_score,
+            "is_anomalous": abs(z_score) > z_threshold,
+            "confidence": min(1.0, abs(r_squared)),
+            "q1": self.q1.value,
+            "q3": self.q3.value,
+            "p99": self.p99.value,
+            "ewma_fast": self.fast.mean,
+            "ewma_slow": self.slow.mean,
+            "drift_ratio": self.drift_ratio(),
+            "count": self.count,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "moments": self.moments.to_dict(),
+            "q1": self.q1.to_dict(),
+            "q3": self.q3.to_dict(),
+            "p99": self.p99.to_dict(),
+            "fast": self.fast.to_dict(),
+            "slow": self.slow.to_dict(),
+            "window": self.window.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], last_observed_at: Optional[datetime] = None) -> "EndpointLatencyState":
+        return cls(
+            moments=RunningMoments.from_dict(data["moments"]),
+            q1=P2Quantile.from_dict(data["q1"]),
+            q3=P2Quantile.from_dict(data["q3"]),
+            p99=P2Quantile.from_dict(data["p99"]),
+            fast=EWMA.from_dict(data["fast"]),
+            slow=EWMA.from_dict(data["slow"]),
+            window=RollingWindow.from_dict(data["window"]),
+            last_observed_at=last_observed_at,
+        )
+
+
+class OnlineLatencyMonitor:
+    """
+    Keeps the running latency state of each endpoint in the database.
+
+    ``observe`` is called with the latencies of a finished run; states are
+    read, updated and written back in the caller's session (not committed).
+    Rows are locked until that session commits (on backends with
+    ``SELECT ... FOR UPDATE``), so concurrent workers don't lose updates.
+    """
+
+    def __init__(self, min_samples: int = MIN_SAMPLES):
+        self.min_samples = min_samples
+        # Serializes read-update-write within a process
+        self._lock = threading.Lock()
+
+    def load(
+        self,
+        db: Session,
+        keys: Optional[Iterable[str]] = None,
+        for_update: bool = False,
+    ) -> Dict[str, LatencySketch]:
+        """
+        Get the stored sketch rows of endpoints (all if keys is None).
+
+        With ``for_update`` the rows are locked in key order and re-read,
+        so states changed by other sessions since the last read are seen.
+        """
+        query = db.query(LatencySketch)
+        if for_update:
+            query = query.order_by(LatencySketch.endpoint_key).with_for_update().populate_existing()
+        if keys is None:
+            return {row.endpoint_key: row for row in query.all()}
+
+        keys = sorted(set(keys))
+        rows: Dict[str, LatencySketch] = {}
+        for i in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[i:i + LOOKUP_CHUNK_SIZE]
+            for row in query.filter(LatencySketch.endpoint_key.in_(chunk)).all():
+                rows[row.endpoint_key] = row
+        return rows
+
+    def _create_missing(self, db: Session, keys: Iterable[str]) -> None:
+        """Store empty rows for endpoints seen for the first time."""
+        missing = set(keys) - set(self.load(db, keys))
+        for key in sorted(missing):
+            try:
+                # Savepoint: another worker may store the same endpoint first,
+                # which must not roll back the caller's pending rows
+                with db.begin_nested():
+                    db.add(LatencySketch(
+                        endpoint_key=key,
+                        sample_count=0,
+                        state=EndpointLatencyState().to_dict(),
+                    ))
+            except IntegrityError:
+                continue
+
+    def states(self, db: Session, keys: Optional[Iterable[str]] = None) -> Dict[str, EndpointLatencyState]:
+        """Get the running states of endpoints (all if keys is None)."""
+        return {
+            key: EndpointLatencyState.from_dict(row.state, row.last_observed_at)
+            for key, row in self.load(db, keys).items()
+        }
+
+    def observe(
+        self,
+        db: Session,
+        observations: Iterable[Tuple[str, float, Optional[datetime]]],
+    ) -> List[LatencyObservation]:
+        """
+        Score latencies and add them to their endpoints' states.
+
+        Args:
+            db: Database session (flushed, not committed)
+            observations: (endpoint key, latency in ms, timestamp), oldest first
+
+        Returns:
+            One scored observation per input, in order
+        """
+        observations = list(observations)
+        if not observations:
+            return []
+
+        with self._lock:
+            keys = {key for key, _, _ in observations}
+            self._create_missing(db, keys)
+            rows = self.load(db, keys, for_update=True)
+            states = {
+                key: EndpointLatencyState.from_dict(row.state, row.last_observed_at)
+                for key, row in rows.items()
+            }
+
+            scored = []
+            for key, latency, timestamp in observations:
+                scored.append(states[key].observe(key, float(latency), timestamp, self.min_samples))
+
+            for key, state in states.items():
+                row = rows[key]
+                row.sample_count = state.count
+                row.state = state.to_dict()
+                row.last_observed_at = state.last_observed_at
+                row.updated_at = datetime.utcnow()
+            db.flush()
+        return scored
+
+    def rebuild(self, db: Session, batch_size: int = LOOKUP_CHUNK_SIZE) -> Dict[str, int]:
+        """
+        Rebuild all states from the stored operation results (oldest first).
+
+        Results are streamed, so history of any length fits in memory.
+
+        Returns:
+            Endpoint key -> observation count (committed)
+        """
+        from .anomaly_baselines import endpoint_key
+
+        keys_by_operation = {
+            op_id: endpoint_key(method, path, server_url)
+            for op_id, method, path, server_url in db.query(
+                Operation.id, Operation.method, Operation.path, Operation.server_url
+            ).all()
+        }
+        rows = (
+            db.query(OperationResult.operation_id, OperationResult.response_time_ms, OperationResult.created_at)
+            .filter(OperationResult.operation_id.isnot(None), OperationResult.response_time_ms.isnot(None))
+            .order_by(OperationResult.created_at)
+            .yield_per(batch_size)
+        )
+        states: Dict[str, EndpointLatencyState] = {}
+        for op_id, latency, created_at in rows:
+            key = keys_by_operation.get(op_id)
+            if key is None:
+                continue
+            state = states.get(key)
+            if state is None:
+                state = states[key] = EndpointLatencyState()
+            state.update(float(latency), created_at)
+
+        with self._lock:
+            db.query(LatencySketch).delete(synchronize_session=False)
+            now = datetime.utcnow()
+            for key, state in states.items():
+                db.add(LatencySketch(
+                    endpoint_key=key,
+                    sample_count=state.count,
+                    state=state.to_dict(),
+                    last_observed_at=state.last_observed_at,
+                    updated_at=now,
+                ))
+            db.commit()
+        return {key: state.count for key, state in states.items()}
+
+
+latency_monitor = OnlineLatencyMonitor()
@@ -0,0 +1,288 @@
+"""
+Prompt Budgeting for QoE-Guard LLM Analysis.
+
+Keeps analysis prompts within a size budget regardless of payload size:
+- Changes ranked by criticality; the top-k are kept verbatim
+- Remaining changes aggregated into per-prefix statistics
+- Payload excerpts limited to the containers around changed paths
+- Sizes measured in estimated tokens; the budget is tightened until the
+  prompt fits
+"""
+from __future__ import annotations
+
+import json
+import math
+import re
+from dataclasses import asdict, dataclass, field, is_dataclass, replace
+from typing import Any, Callable, Dict, List, Optional
+
+from ..paths import flatten, normalize_path
+from ..scoring.criticality import criticality_resolver
+
+
+# Rough characters per token of JSON-heavy English text
+CHARS_PER_TOKEN = 4
+
+BREAKING_CHANGE_TYPES = ("removed", "type_changed")
+
+# Change fields holding payload values (truncated in prompts)
+VALUE_KEYS = ("old_value", "new_value", "before", "after")
+
+_LAST_SEGMENT_RE = re.compile(r"(\.[^.\[\]]+|\[\d+\])$")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class PromptBudget:
+    """Size limits of an analysis prompt."""
+    max_prompt_tokens: int = 6000
+    top_k_changes: int = 25
+    excerpt_chars: int = 2000  # per payload
+    value_chars: int = 200  # per value shown
+    prefix_depth: int = 2  # path segments of aggregation prefixes
+    max_prefix_groups: int = 50
+
+
+@dataclass
+class ChangeSetSummary:
+    """Changes and payload excerpts that fit a prompt budget."""
+    total_changes: int
+    top_changes: List[Dict[str, Any]]
+    omitted_by_prefix: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    baseline_excerpt: Dict[str, Any] = field(default_factory=dict)
+    candidate_excerpt: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def omitted_changes(self) -> int:
+        return self.total_changes - len(self.top_changes)
+
+
+def _as_dict(change: Any) -> Dict[str, Any]:
+    return asdict(change) if is_dataclass(change) else dict(change)
+
+
+def change_criticality(change: Dict[str, Any]) -> float:
+    """Get the criticality of a change (computed from its path if not given)."""
+    score = change.get("criticality_score")
+    if score is None:
+        score = criticality_resolver()(change.get("path") or "$")
+    return float(score)
+
+
+def rank_changes(changes: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Sort changes by importance.
+
+    Most critical first; breaking changes before others of equal
+    criticality, otherwise in their original order.
+    """
+    ranked = []
+    for change in changes:
+        change = _as_dict(change)
+        change.setdefault("criticality_score", change_criticality(change))
+        ranked.append(change)
+    ranked.sort(key=lambda c: (
+        -c["criticality_score"],
+        c.get("change_type") not in BREAKING_CHANGE_TYPES,
+    ))
+    return ranked
+
+
+def path_prefix(path: str, depth: int) -> str:
+    """Get the first ``depth`` segments of a path, with array indices as ``[*]``."""
+    segments = normalize_path(path).split(".")
+    if segments and segments[0] == "$":
+        return ".".join(segments[:depth + 1])
+    return ".".join(segments[:depth])
+
+
+def _add_to_group(groups: Dict[str, Dict[str, Any]], prefix: str, count: int, by_type: Dict[str, int], criticality: float) -> None:
+    group = groups.setdefault(prefix, {"count": 0, "by_type": {}, "max_criticality": 0.0})
+    group["count"] += count
+    for change_type, type_count in by_type.items():
+        group["by_type"][change_type] = group["by_type"].get(change_type, 0) + type_count
+    group["max_criticality"] = max(group["max_criticality"], criticality)
+
+
+def aggregate_changes(
+    changes: List[Dict[str, Any]],
+    depth: int = 2,
+    max_groups: Optional[int] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Aggregate changes into statistics per path prefix.
+
+    Args:
+        changes: Changes with paths
+        depth: Path segments of a prefix
+        max_groups: Groups beyond this many (smallest first) are merged into "*"
+
+    Returns:
+        Prefix -> {"count", "by_type", "max_criticality"}, largest groups first
+    """
+    groups: Dict[str, Dict[str, Any]] = {}
+    for change in changes:
+        _add_to_group(
+            groups,
+            path_prefix(str(change.get("path", "$")), depth),
+            1,
+            {change.get("change_type", "unknown"): 1},
+            change_criticality(change),
+        )
+    ordered = sorted(groups.items(), key=lambda item: (-item[1]["count"], item[0]))
+    if max_groups is None or len(ordered) <= max_groups:
+        return dict(ordered)
+
+    kept = dict(ordered[:max_groups - 1])
+    for _, group in ordered[max_groups - 1:]:
+        _add_to_group(kept, "*", group["count"], group["by_type"], group["max_criticality"])
+    return kept
+
+
+def truncate_value(value: Any, max_chars: int) -> Any:
+    """Shorten a JSON value to at most ``max_chars`` characters of JSON."""
+    if isinstance(value, (bool, int, float)) or value is None:
+        return value
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    if len(text) <= max_chars:
+        return value
+    return text[:max_chars] + f"... [{len(text) - max_chars} chars truncated]"
+
+
+def parent_path(path: str) -> str:
+    """Get the path of the container holding a path."""
+    parent = _LAST_SEGMENT_RE.sub("", path)
+    return parent if parent != path else "$"
+
+
+def excerpt_around(
+    flat: Dict[str, Any],
+    paths: List[str],
+    max_chars: int,
+    value_chars: int,
+) -> Dict[str, Any]:
+    """
+    Excerpt a payload around changed paths.
+
+    Collects the container of each changed path (in the given order, each
+    container once) until ``max_chars`` of JSON are used.
+
+    Args:
+        flat: Flattened payload (``flatten(document, "$")`` plus ``"$"`` itself)
+        paths: Changed paths, most important first
+        max_chars: Size limit of the excerpt
+        value_chars: Size limit of each container
+
+    Returns:
+        Container path -> truncated container value
+    """
+    excerpt: Dict[str, Any] = {}
+    used = 0
+    for path in paths:
+        container = parent_path(path)
+        while container not in flat and container != "$":
+            container = parent_path(container)
+        if container in excerpt or container not in flat:
+            continue
+        value = truncate_value(flat[container], value_chars)
+        size = len(container) + len(json.dumps(value, default=str))
+        if used + size > max_chars:
+            break
+        excerpt[container] = value
+        used += size
+    return excerpt
+
+
+def _flatten_payload(document: Any) -> Dict[str, Any]:
+    flat = flatten(document, "$")
+    flat["$"] = document
+    return flat
+
+
+def _summarize(
+    ranked: List[Dict[str, Any]],
+    baseline_flat: Dict[str, Any],
+    candidate_flat: Dict[str, Any],
+    budget: PromptBudget,
+) -> ChangeSetSummary:
+    top = ranked[:budget.top_k_changes]
+    paths = [str(c.get("path", "$")) for c in top]
+    return ChangeSetSummary(
+        total_changes=len(ranked),
+        top_changes=[
+            {
+                key: truncate_value(value, budget.value_chars) if key in VALUE_KEYS else value
+                for key, value in c.items()
+            }
+            for c in top
+        ],
+        omitted_by_prefix=aggregate_changes(
+            ranked[budget.top_k_changes:], budget.prefix_depth, budget.max_prefix_groups,
+        ),
+        baseline_excerpt=excerpt_around(baseline_flat, paths, budget.excerpt_chars, budget.value_chars),
+        candidate_excerpt=excerpt_around(candidate_flat, paths, budget.excerpt_chars, budget.value_chars),
+    )
+
+
+def summarize_change_set(
+    baseline: Any,
+    candidate: Any,
+    changes: List[Any],
+    budget: Optional[PromptBudget] = None,
+) -> ChangeSetSummary:
+    """Rank, cut and aggregate a change set and excerpt its payloads."""
+    return _summarize(
+        rank_changes(changes),
+        _flatten_payload(baseline),
+        _flatten_payload(candidate),
+        budget or PromptBudget(),
+    )
+
+
+def fit_prompt(
+    build: Callable[[ChangeSetSummary], str],
+    baseline: Any,
+    candidate: Any,
+    changes: List[Any],
+    budget: Optional[PromptBudget] = None,
+) -> str:
+    """
+    Build a prompt that fits the budget.
+
+    Changes are ranked and payloads flattened once; the number of verbatim
+    changes, the excerpt sizes and the aggregation groups are halved until
+    the prompt is within ``max_prompt_tokens`` (or cannot shrink further).
+
+    Args:
+        build: Renders a prompt from a change-set summary
+        baseline: Baseline payload
+        candidate: Candidate payload
+        changes: Detected changes (dicts or Change objects)
+        budget: Size limits
+
+    Returns:
+        The prompt
+    """
+    budget = budget or PromptBudget()
+    ranked = rank_changes(changes)
+    baseline_flat = _flatten_payload(baseline)
+    candidate_flat = _flatten_payload(candidate)
+
+    while True:
+        prompt = build(_summarize(ranked, baseline_flat, candidate_flat, budget))
+        if estimate_tokens(prompt) <= budget.max_prompt_tokens:
+            return prompt
+        smaller = replace(
+            budget,
+            top_k_changes=max(1, budget.top_k_changes // 2),
+            excerpt_chars=max(200, budget.excerpt_chars // 2),
+            value_chars=max(40, budget.value_chars // 2),
+            max_prefix_groups=max(4, budget.max_prefix_groups // 2),
+        )
+        if smaller == budget:
+            return prompt
+        budget = smaller
@@ -0,0 +1,233 @@
+"""
+Shared Model Registry for QoE-Guard AI.
+
+Loads heavy models (sentence-transformers, spaCy, zero-shot pipelines,
+KeyBERT) lazily, once per worker process, and shares them across requests:
+- Thread-safe: each model is loaded by exactly one thread
+- Warmup at startup for latency-sensitive deployments
+- Memory accounting (RSS growth while loading)
+- Idle eviction of models that have not been used for a while (checked
+  on access, at most once per check interval)
+
+Missing optional libraries are cached as unavailable so they are only
+probed once.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+DEFAULT_IDLE_TTL_SEC = float(os.getenv("AI_MODEL_IDLE_TTL_SEC", "1800"))
+IDLE_CHECK_INTERVAL_SEC = float(os.getenv("AI_MODEL_IDLE_CHECK_SEC", "60"))
+
+
+@dataclass
+class ModelEntry:
+    """A loaded (or unavailable) model."""
+    key: str
+    model: Any
+    load_time_sec: float
+    memory_bytes: int
+    loaded_at: float
+    last_used: float
+    hits: int = 0
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+
+def _rss_bytes() -> int:
+    """Current resident set size of the process (0 if unknown)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of lazily loaded models.
+
+    Models are identified by a key (e.g. "sentence-transformers/all-MiniLM-L6-v2")
+    and created by a loader callable on first use.
+    """
+
+    def __init__(
+        self,
+        idle_ttl_sec: Optional[float] = DEFAULT_IDLE_TTL_SEC,
+        idle_check_interval_sec: float = IDLE_CHECK_INTERVAL_SEC,
+    ):
+        self.idle_ttl_sec = idle_ttl_sec
+        self.idle_check_interval_sec = idle_check_interval_sec
+        self._last_idle_check = time.monotonic()
+        self._entries: Dict[str, ModelEntry] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Get a model, loading it on first use.
+
+        Args:
+            key: Model key
+            loader: Creates the model if the key is not loaded
+
+        Returns:
+            The model, or None if its libraries are not installed
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._load(key, loader)
+        now = time.monotonic()
+        entry.last_used = now
+        entry.hits += 1
+        if now - self._last_idle_check >= self.idle_check_interval_sec:
+            self._last_idle_check = now
+            self.evict_idle()
+        return entry.model
+
+    def _load(self, key: str, loader: Callable[[], Any]) -> ModelEntry:
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have finished loading while we waited
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+
+            rss_before = _rss_bytes()
+            start = time.monotonic()
+            try:
+                model = loader()
+            except ImportError as e:
+                print(f"Warning: {key} unavailable: {e}")
+                model = None
+            now = time.monotonic()
+
+            entry = ModelEntry(
+                key=key,
+                model=model,
+                load_time_sec=now - start,
+                memory_bytes=max(0, _rss_bytes() - rss_before),
+                loaded_at=now,
+                last_used=now,
+            )
+            self._entries[key] = entry
+
+        return entry
+
+    def evict(self, key: str) -> bool:
+        """Drop a loaded model; it is reloaded on next use."""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def evict_idle(self, idle_ttl_sec: Optional[float] = None) -> List[str]:
+        """Drop models not used within the idle TTL."""
+        ttl = self.idle_ttl_sec if idle_ttl_sec is None else idle_ttl_sec
+        if ttl is None:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                key for key, entry in self._entries.items()
+                if entry.available and now - entry.last_used > ttl
+            ]
+            for key in idle:
+                del self._entries[key]
+        return idle
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Get load time, memory and usage of loaded models."""
+        now = time.monotonic()
+        return [
+            {
+                "key": entry.key,
+                "available": entry.available,
+                "load_time_sec": round(entry.load_time_sec, 3),
+                "memory_mb": round(entry.memory_bytes / (1024 * 1024), 1),
+                "idle_sec": round(now - entry.last_used, 1),
+                "hits": entry.hits,
+            }
+            for entry in list(self._entries.values())
+        ]
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(entry.memory_bytes for entry in list(self._entries.values()))
+
+
+model_registry = ModelRegistry()
+
+
+# Model loaders (imports are local so the libraries stay optional)
+
+def sentence_transformer(model_name: str = "all-MiniLM-L6-v2") -> Any:
+    """Get the shared SentenceTransformer model."""
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    return model_registry.get(f"sentence-transformers/{model_name}", load)
+
+
+def spacy_model(model_name: str = "en_core_web_sm") -> Any:
+    """Get the shared spaCy pipeline."""
+    def load():
+        import spacy
+        try:
+            return spacy.load(model_name)
+        except OSError:
+            # Model not installed, try downloading
+            print(f"Downloading spaCy model {model_name}...")
+            spacy.cli.download(model_name)
+            return spacy.load(model_name)
+    return model_registry.get(f"spacy/{model_name}", load)
+
+
+def zero_shot_classifier(model_name: str = "facebook/bart-large-mnli") -> Any:
+    """Get the shared zero-shot classification pipeline."""
+    def load():
+        from transformers import pipeline
+        return pipeline("zero-shot-classification", model=model_name)
+    return model_registry.get(f"zero-shot/{model_name}", load)
+
+
+def keybert_model(model_name: str = "all-MiniLM-L6-v2") -> Any:
+    """Get the shared KeyBERT extractor (reusing the shared embedding model)."""
+    def load():
+        from keybert import KeyBERT
+        embedder = sentence_transformer(model_name)
+        return KeyBERT(model=embedder) if embedder is not None else KeyBERT()
+    return model_registry.get(f"keybert/{model_name}", load)
+
+
+DEFAULT_MODELS = {
+    "sentence-transformers/all-MiniLM-L6-v2": lambda: sentence_transformer(),
+    "spacy/en_core_web_sm": lambda: spacy_model(),
+    "zero-shot/facebook/bart-large-mnli": lambda: zero_shot_classifier(),
+    "keybert/all-MiniLM-L6-v2": lambda: keybert_model(),
+}
+
+
+def warmup_models(keys: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+    """
+    Warm up the default models.
+
+    Args:
+        keys: Keys from DEFAULT_MODELS to load (all if None)
+
+    Returns:
+        Key -> whether the model is available
+    """
+    keys = list(keys) if keys is not None else list(DEFAULT_MODELS)
+    return {key: DEFAULT_MODELS[key]() is not None for key in keys if key in DEFAULT_MODELS}
@@ -7,6 +7,10 @@ Examples:
 - Value semantic shift: "HD" → "1080p" (equivalent)
 - Enum mapping: "PREMIUM" → "tier_3" (semantic equivalence)
 
+All texts of a comparison are embedded in batched calls; renames are found
+with top-k nearest-neighbor queries, and embeddings are cached on disk per
+model.
+
 Libraries:
 - sentence-transformers: State-of-the-art embeddings
 - numpy: Vector operations
@@ -19,6 +23,14 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Any, Tuple
 from functools import lru_cache
 
+import numpy as np
+
+from ..paths import flatten, is_leaf
+from .ann import nearest_neighbors
+from .embeddings import EmbeddingCache, embed_texts, get_embedding_cache, similarity_matrix
+from .field_index import FieldIndex
+from .registry import sentence_transformer
+
 
 @dataclass
 class SemanticMatch:
@@ -56,6 +68,8 @@ class SemanticDriftDetector:
         model_name: str = "all-MiniLM-L6-v2",  # Fast and effective
         similarity_threshold: float = 0.75,
         use_cache: bool = True,
+        rename_top_k: int = 5,
+        field_index: Optional[FieldIndex] = None,
     ):
         """
         Initialize semantic drift detector.
@@ -63,30 +77,35 @@ class SemanticDriftDetector:
         Args:
             model_name: Sentence transformer model to use
             similarity_threshold: Minimum similarity for a match
-            use_cache: Whether to cache embeddings
+            use_cache: Whether to use the persistent embedding cache
+            rename_top_k: Rename candidates considered per removed key
+            field_index: Index of known field names for find_similar_fields
         """
         self.model_name = model_name
         self.similarity_threshold = similarity_threshold
         self.use_cache = use_cache
+        self.rename_top_k = rename_top_k
+        self.field_index = field_index
         self.model = None
-        self._embedding_cache: Dict[str, List[float]] = {}
+        self._embedding_cache: Optional[EmbeddingCache] = (
+            get_embedding_cache(model_name) if use_cache else None
+        )
         
         self._init_model()
     
     def _init_model(self):
-        """Initialize the embedding model."""
-        try:
-            from sentence_transformers import SentenceTransformer
-            self.model = SentenceTransformer(self.model_name)
-        except ImportError:
-            print("Warning: sentence-transformers not installed. Semantic drift detection disabled.")
-            self.model = None
+        """Get the shared embedding model (loaded once per process)."""
+        self.model = sentence_transformer(self.model_name)
     
     @property
     def is_available(self) -> bool:
         """Check if model is available."""
         return self.model is not None
     
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Get normalized embeddings of texts (batched, cached)."""
+        return embed_texts(self.model, texts, cache=self._embedding_cache)
+    
     def detect_drift(
         self,
         baseline: Dict[str, Any],
@@ -112,55 +131,82 @@ class SemanticDriftDetector:
         candidate_items = self._extract_items(candidate, "")
         
         # Find removed keys (potential renames)
-        removed_keys = set(baseline_items.keys()) - set(candidate_items.keys())
-        added_keys = set(candidate_items.keys()) - set(candidate_items.keys())
+        removed_keys = sorted(set(baseline_items.keys()) - set(candidate_items.keys()))
+        added_keys = sorted(set(candidate_items.keys()) - set(baseline_items.keys()))
+        
+        # Changed values of common keys (changed objects/arrays are
+        # covered by their changed children)
+        common_keys = sorted(set(baseline_items.keys()) & set(candidate_items.keys()))
+        changed = [
+            (key, baseline_items[key], candidate_items[key])
+            for key in common_keys
+            if (is_leaf(baseline_items[key]) or is_leaf(candidate_items[key]))
+            and baseline_items[key] != candidate_items[key]
+        ]
+        value_similarities = {}
+        text_pairs = []
+        for key, baseline_val, candidate_val in changed:
+            similarity = self._scalar_similarity(baseline_val, candidate_val)
+            if similarity is None:
+                text_pairs.append((key, str(baseline_val), str(candidate_val)))
+            else:
+                value_similarities[key] = similarity
+        
+        # Embed every key and value text at once
+        texts = removed_keys + added_keys
+        for _, baseline_text, candidate_text in text_pairs:
+            texts.extend((baseline_text, candidate_text))
+        embeddings = self.embed(texts)
+        
+        n_removed, n_added = len(removed_keys), len(added_keys)
+        rename_candidates = nearest_neighbors(
+            embeddings[:n_removed], embeddings[n_removed:n_removed + n_added], self.rename_top_k
+        ) if n_removed and n_added else []
+        value_embeddings = embeddings[n_removed + n_added:]
+        for i, (key, _, _) in enumerate(text_pairs):
+            value_similarities[key] = float(value_embeddings[2 * i] @ value_embeddings[2 * i + 1])
         
         matches = []
         
         # Check for potential key renames
-        for removed in removed_keys:
-            for added in added_keys:
-                similarity = self._compute_similarity(removed, added)
-                if similarity >= self.similarity_threshold:
-                    matches.append(SemanticMatch(
-                        source_key=removed,
-                        source_value=baseline_items.get(removed),
-                        target_key=added,
-                        target_value=candidate_items.get(added),
-                        similarity=similarity,
-                        match_type="key_rename",
-                        confidence=similarity,
-                    ))
+        for removed, candidates in zip(removed_keys, rename_candidates):
+            for j, similarity in candidates:
+                if similarity < self.similarity_threshold:
+                    break
+                added = added_keys[j]
+                matches.append(SemanticMatch(
+                    source_key=removed,
+                    source_value=baseline_items.get(removed),
+                    target_key=added,
+                    target_value=candidate_items.get(added),
+                    similarity=float(similarity),
+                    match_type="key_rename",
+                    confidence=float(similarity),
+                ))
         
         # Check for value semantic equivalence
-        common_keys = set(baseline_items.keys()) & set(candidate_items.keys())
-        for key in common_keys:
-            baseline_val = baseline_items[key]
-            candidate_val = candidate_items[key]
-            
-            if baseline_val != candidate_val:
-                # Different values - check semantic equivalence
-                similarity = self._compute_value_similarity(baseline_val, candidate_val)
-                if similarity >= self.similarity_threshold:
-                    matches.append(SemanticMatch(
-                        source_key=key,
-                        source_value=baseline_val,
-                        target_key=key,
-                        target_value=candidate_val,
-                        similarity=similarity,
-                        match_type="value_equivalent",
-                        confidence=similarity,
-                    ))
-                elif similarity >= 0.5:
-                    matches.append(SemanticMatch(
-                        source_key=key,
-                        source_value=baseline_val,
-                        target_key=key,
-                        target_value=candidate_val,
-                        similarity=similarity,
-                        match_type="semantic_drift",
-                        confidence=similarity,
-                    ))
+        for key, baseline_val, candidate_val in changed:
+            similarity = value_similarities[key]
+            if similarity >= self.similarity_threshold:
+                matches.append(SemanticMatch(
+                    source_key=key,
+                    source_value=baseline_val,
+                    target_key=key,
+                    target_value=candidate_val,
+                    similarity=similarity,
+                    match_type="value_equivalent",
+                    confidence=similarity,
+                ))
+            elif similarity >= 0.5:
+                matches.append(SemanticMatch(
+                    source_key=key,
+                    source_value=baseline_val,
+                    target_key=key,
+                    target_value=candidate_val,
+                    similarity=similarity,
+                    match_type="semantic_drift",
+                    confidence=similarity,
+                ))
         
         # Categorize matches
         high_similarity = [m for m in matches if m.similarity >= 0.9]
@@ -180,26 +226,32 @@ class SemanticDriftDetector:
     def find_similar_fields(
         self,
         field_name: str,
-        schema: Dict[str, Any],
+        schema: Optional[Dict[str, Any]] = None,
         top_k: int = 5,
     ) -> List[Tuple[str, float]]:
         """
         Find fields in schema similar to given field name.
         
+        Without a schema, searches the known field names of all stored
+        specs (``field_index``).
+        
         Useful for detecting potential migrations/renames.
         """
         if not self.is_available:
             return []
         
-        schema_fields = list(self._extract_items(schema, "").keys())
+        if schema is None:
+            if self.field_index is None or not len(self.field_index):
+                return []
+            return self.field_index.search(self.embed([field_name]), top_k)[0]
         
-        similarities = []
-        for schema_field in schema_fields:
-            sim = self._compute_similarity(field_name, schema_field)
-            similarities.append((schema_field, sim))
+        schema_fields = list(self._extract_items(schema, "").keys())
+        if not schema_fields:
+            return []
         
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return similarities[:top_k]
+        embeddings = self.embed([field_name] + schema_fields)
+        neighbors = nearest_neighbors(embeddings[:1], embeddings[1:], top_k)[0]
+        return [(schema_fields[i], float(sim)) for i, sim in neighbors]
     
     def compute_batch_similarity(
         self,
@@ -214,60 +266,28 @@ class SemanticDriftDetector:
         if not self.is_available:
             return [[0.0] * len(texts2) for _ in texts1]
         
-        from sentence_transformers import util
-        
-        embeddings1 = self.model.encode(texts1)
-        embeddings2 = self.model.encode(texts2)
-        
-        similarity_matrix = util.cos_sim(embeddings1, embeddings2)
-        return similarity_matrix.tolist()
+        embeddings = self.embed(list(texts1) + list(texts2))
+        matrix = similarity_matrix(embeddings[:len(texts1)], embeddings[len(texts1):])
+        return matrix.tolist()
     
     def _extract_items(
         self,
         obj: Any,
         prefix: str,
     ) -> Dict[str, Any]:
-        """Recursively extract all key-value pairs with paths."""
-        items = {}
-        
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                path = f"{prefix}.{key}" if prefix else key
-                items[path] = value
-                items.update(self._extract_items(value, path))
-        elif isinstance(obj, list):
-            for i, item in enumerate(obj):
-                path = f"{prefix}[{i}]"
-                items.update(self._extract_items(item, path))
-        
-        return items
+        """Extract all key-value pairs with paths (single pass, values not copied)."""
+        return flatten(obj, prefix, intern=True)
     
     def _compute_similarity(self, text1: str, text2: str) -> float:
         """Compute cosine similarity between two texts."""
         if not self.is_available:
             return 0.0
         
-        # Check cache
-        cache_key = f"{text1}||{text2}"
-        if self.use_cache and cache_key in self._embedding_cache:
-            return self._embedding_cache[cache_key]
-        
-        from sentence_transformers import util
-        
-        embeddings = self.model.encode([text1, text2])
-        similarity = float(util.cos_sim(embeddings[0], embeddings[1])[0][0])
-        
-        if self.use_cache:
-            self._embedding_cache[cache_key] = similarity
-        
-        return similarity
+        embeddings = self.embed([text1, text2])
+        return float(embeddings[0] @ embeddings[1])
     
-    def _compute_value_similarity(self, val1: Any, val2: Any) -> float:
-        """Compute similarity between two values."""
-        # Convert to strings for embedding
-        str1 = str(val1) if not isinstance(val1, str) else val1
-        str2 = str(val2) if not isinstance(val2, str) else val2
-        
+    def _scalar_similarity(self, val1: Any, val2: Any) -> Optional[float]:
+        """Similarity of numeric/boolean values; None if the values need embedding."""
         # Handle numeric comparisons
         if isinstance(val1, (int, float)) and isinstance(val2, (int, float)):
             # Normalize numeric difference
@@ -279,8 +299,16 @@ class SemanticDriftDetector:
         if isinstance(val1, bool) and isinstance(val2, bool):
             return 1.0 if val1 == val2 else 0.0
         
+        return None
+    
+    def _compute_value_similarity(self, val1: Any, val2: Any) -> float:
+        """Compute similarity between two values."""
+        similarity = self._scalar_similarity(val1, val2)
+        if similarity is not None:
+            return similarity
+        
         # Use semantic similarity for strings
-        return self._compute_similarity(str1, str2)
+        return self._compute_similarity(str(val1), str(val2))
     
     def _generate_summary(self, matches: List[SemanticMatch]) -> str:
         """Generate human-readable summary."""
@@ -0,0 +1,299 @@
+"""
+Training Data Pipeline for QoE-Guard ML Risk Scoring.
+
+Builds ML training sets from stored history in bulk:
+- Streams ValidationRun/OperationResult rows in chunks (or legacy runs.json)
+- Computes features for a whole chunk at once: change counts and numeric
+  deltas with NumPy, criticality resolved once per unique path
+- Writes a columnar dataset: one ``.npz`` part per chunk (one array per
+  feature column) plus a JSON manifest
+
+Features match ``extract_features_from_changes``, so models trained here
+score requests the same way. Runs are labeled by their decision (FAIL = 1).
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..db.ingest import LOOKUP_CHUNK_SIZE
+from ..db.models import DecisionType, OperationResult, ValidationRun
+from ..storage import RUNS_FILE
+from .ml_scorer import FeatureVector, criticality_lookup
+
+
+DATASET_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+
+# Examples per dataset part
+PART_SIZE = 50_000
+
+FEATURE_NAMES = list(FeatureVector().to_dict())
+
+# Change types counted by extract_features_from_changes, in column order
+_CHANGE_TYPE_COLUMNS = {
+    "added": "added_fields",
+    "removed": "removed_fields",
+    "type_changed": "type_changes",
+    "value_changed": "value_changes",
+    "array_length_changed": "array_length_changes",
+}
+
+# Criticality levels: (lower bound, column), highest first
+_CRITICALITY_COLUMNS = (
+    (0.9, "critical_path_changes"),
+    (0.7, "high_criticality_changes"),
+    (0.4, "medium_criticality_changes"),
+    (-math.inf, "low_criticality_changes"),
+)
+
+
+@dataclass
+class TrainingExample:
+    """Changes, runtime metrics and label of one historical run."""
+    run_id: str
+    changes: List[Dict[str, Any]]
+    label: int  # 1 = caused issue
+    runtime_metrics: Optional[Dict[str, float]] = None
+
+
+def _numeric_delta(old: Any, new: Any) -> float:
+    if isinstance(old, (int, float)) and isinstance(new, (int, float)) and old != 0:
+        return abs(new - old) / abs(old)
+    return math.nan
+
+
+def feature_matrix(
+    examples: Sequence[TrainingExample],
+    criticality_profiles: Optional[Dict[str, float]] = None,
+) -> np.ndarray:
+    """
+    Compute the feature matrix of many examples at once.
+
+    Returns:
+        (examples, features) array; columns in ``FEATURE_NAMES`` order
+    """
+    columns = {name: i for i, name in enumerate(FEATURE_NAMES)}
+    n = len(examples)
+    X = np.zeros((n, len(FEATURE_NAMES)))
+
+    rows: List[int] = []
+    counts: List[int] = []
+    type_columns: List[int] = []
+    paths: List[str] = []
+    deltas: List[float] = []
+    for row, example in enumerate(examples):
+        for change in example.changes:
+            rows.append(row)
+            counts.append(change.get("count", 1))  # Aggregated changes stand for count changes
+            column = _CHANGE_TYPE_COLUMNS.get(change.get("change_type", ""))
+            type_columns.append(columns[column] if column else -1)
+            paths.append(change.get("path", ""))
+            deltas.append(_numeric_delta(change.get("old_value"), change.get("new_value")))
+        if example.runtime_metrics:
+            X[row, columns["latency_delta_pct"]] = example.runtime_metrics.get("latency_delta_pct", 0)
+            X[row, columns["error_rate"]] = example.runtime_metrics.get("error_rate", 0)
+    if not rows:
+        return X
+
+    rows_array = np.asarray(rows, dtype=np.intp)
+    count_array = np.asarray(counts, dtype=float)
+    width = len(FEATURE_NAMES)
+
+    # Change type counts (unknown types are only counted by criticality)
+    type_array = np.asarray(type_columns, dtype=np.intp)
+    known = type_array >= 0
+    X += np.bincount(
+        rows_array[known] * width + type_array[known], weights=count_array[known], minlength=n * width
+    ).reshape(n, width)
+
+    # Criticality counts
+    scores = criticality_lookup(criticality_profiles).many(paths)
+    levels = np.select(
+        [scores >= bound for bound, _ in _CRITICALITY_COLUMNS],
+        [columns[column] for _, column in _CRITICALITY_COLUMNS],
+    )
+    X += np.bincount(rows_array * width + levels, weights=count_array, minlength=n * width).reshape(n, width)
+
+    # Numeric deltas
+    delta_array = np.asarray(deltas)
+    numeric = ~np.isnan(delta_array)
+    if numeric.any():
+        delta_rows = rows_array[numeric]
+        values = delta_array[numeric]
+        counts = np.bincount(delta_rows, minlength=n)
+        has_delta = counts > 0
+        maxima = np.full(n, -np.inf)
+        np.maximum.at(maxima, delta_rows, values)
+        sums = np.bincount(delta_rows, weights=values, minlength=n)
+        X[has_delta, columns["max_numeric_delta_pct"]] = maxima[has_delta]
+        X[has_delta, columns["avg_numeric_delta_pct"]] = sums[has_delta] / counts[has_delta]
+    return X
+
+
+def iter_legacy_examples(path: Path = RUNS_FILE) -> Iterator[TrainingExample]:
+    """Yield the runs of a legacy ``runs.json`` file as examples."""
+    with open(path, encoding="utf-8") as f:
+        runs = json.load(f)
+    for run in runs:
+        yield TrainingExample(
+            run_id=str(run.get("run_id", "")),
+            changes=run.get("changes") or [],
+            label=int(run.get("action") == "FAIL"),
+        )
+
+
+def _run_example(
+    run_id: str,
+    decision: DecisionType,
+    results: List[Tuple[Optional[int], Optional[str], Optional[List[Dict[str, Any]]]]],
+    positive_decisions: Sequence[DecisionType],
+) -> TrainingExample:
+    changes = []
+    errors = 0
+    for status_code, error_message, mismatches in results:
+        # Schema mismatches are the run's changes (as scored by the orchestrator)
+        for mismatch in mismatches or []:
+            changes.append({"path": mismatch.get("path", ""), "change_type": "value_changed"})
+        if error_message or status_code is None or status_code >= 500:
+            errors += 1
+    return TrainingExample(
+        run_id=run_id,
+        changes=changes,
+        label=int(decision in positive_decisions),
+        runtime_metrics={"error_rate": errors / len(results) if results else 0.0},
+    )
+
+
+def iter_db_examples(
+    db: Session,
+    chunk_size: int = LOOKUP_CHUNK_SIZE,
+    positive_decisions: Sequence[DecisionType] = (DecisionType.FAIL,),
+) -> Iterator[TrainingExample]:
+    """
+    Yield the decided validation runs in the database as examples.
+
+    Runs are paged by id and their operation results read per page, so
+    memory use is bounded by the chunk size.
+    """
+    last_id = None
+    while True:
+        query = db.query(ValidationRun.id, ValidationRun.decision).filter(ValidationRun.decision.isnot(None))
+        if last_id is not None:
+            query = query.filter(ValidationRun.id > last_id)
+        runs = query.order_by(ValidationRun.id).limit(chunk_size).all()
+        if not runs:
+            return
+
+        results: Dict[str, List[Tuple[Any, Any, Any]]] = {run_id: [] for run_id, _ in runs}
+        rows = db.query(
+            OperationResult.run_id,
+            OperationResult.status_code,
+            OperationResult.error_message,
+            OperationResult.schema_mismatches,
+        ).filter(OperationResult.run_id.in_(list(results)))
+        for run_id, status_code, error_message, mismatches in rows:
+            results[run_id].append((status_code, error_message, mismatches))
+
+        for run_id, decision in runs:
+            yield _run_example(run_id, decision, results[run_id], positive_decisions)
+        last_id = runs[-1][0]
+
+
+def _chunks(examples: Iterable[TrainingExample], size: int) -> Iterator[List[TrainingExample]]:
+    chunk: List[TrainingExample] = []
+    for example in examples:
+        chunk.append(example)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build_training_dataset(
+    examples: Iterable[TrainingExample],
+    out_dir: str,
+    criticality_profiles: Optional[Dict[str, float]] = None,
+    part_size: int = PART_SIZE,
+) -> Dict[str, Any]:
+    """
+    Compute features of examples and write them as a columnar dataset.
+
+    Args:
+        examples: Examples (consumed as a stream)
+        out_dir: Dataset directory (existing parts are replaced)
+        criticality_profiles: Path -> criticality overrides
+        part_size: Examples per part file
+
+    Returns:
+        The dataset manifest
+    """
+    directory = Path(out_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    for old_part in directory.glob("part-*.npz"):
+        old_part.unlink()
+
+    parts = []
+    rows = positives = 0
+    for index, chunk in enumerate(_chunks(examples, part_size)):
+        X = feature_matrix(chunk, criticality_profiles)
+        labels = np.fromiter((e.label for e in chunk), dtype=np.int8, count=len(chunk))
+        name = f"part-{index:05d}.npz"
+        with open(directory / name, "wb") as f:
+            np.savez(
+                f,
+                run_id=np.array([e.run_id for e in chunk], dtype=str),
+                label=labels,
+                **{column: X[:, i] for i, column in enumerate(FEATURE_NAMES)},
+            )
+        parts.append(name)
+        rows += len(chunk)
+        positives += int(labels.sum())
+
+    manifest = {
+        "format": DATASET_FORMAT,
+        "columns": FEATURE_NAMES,
+        "label": "label",
+        "rows": rows,
+        "positives": positives,
+        "parts": parts,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    tmp_path = directory / f".{MANIFEST_FILE}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, directory / MANIFEST_FILE)
+    return manifest
+
+
+def load_training_dataset(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Load a dataset written by ``build_training_dataset``.
+
+    Returns:
+        (features, labels); feature columns in ``FEATURE_NAMES`` order
+    """
+    directory = Path(path)
+    with open(directory / MANIFEST_FILE, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != DATASET_FORMAT:
+        raise ValueError(f"Unsupported training dataset format: {manifest.get('format')}")
+
+    blocks, labels = [], []
+    for name in manifest["parts"]:
+        with np.load(directory / name, allow_pickle=False) as part:
+            blocks.append(np.column_stack([part[column] for column in FEATURE_NAMES]))
+            labels.append(part["label"])
+    if not blocks:
+        return np.zeros((0, len(FEATURE_NAMES))), np.zeros(0, dtype=np.int8)
+    return np.concatenate(blocks), np.concatenate(labels)
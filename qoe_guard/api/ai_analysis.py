@@ -9,10 +9,14 @@ Provides REST endpoints for AI-powered features:
 - ML risk scoring
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+from ..db.database import get_db
+
 router = APIRouter(prefix="/ai", tags=["AI Analysis"])
 
 
@@ -24,6 +28,8 @@ class DiffAnalysisRequest(BaseModel):
     changes: List[Dict[str, Any]] = Field(default=[], description="Pre-computed changes")
     context: Optional[Dict[str, Any]] = Field(default=None, description="Additional context")
     llm_provider: Optional[str] = Field(default=None, description="LLM provider: groq, openai, anthropic")
+    audiences: List[str] = Field(default=[], description="Stakeholder audiences to explain the analysis to")
+    classify_top: int = Field(default=0, ge=0, le=20, description="Most critical changes to classify individually")
 
 
 class DiffAnalysisResponse(BaseModel):
@@ -36,6 +42,8 @@ class DiffAnalysisResponse(BaseModel):
     impact_prediction: str
     confidence: float
     provider_used: Optional[str]
+    explanations: Dict[str, str] = {}
+    classifications: List[Dict[str, Any]] = []
 
 
 class SemanticDriftRequest(BaseModel):
@@ -54,11 +62,25 @@ class SemanticDriftResponse(BaseModel):
     summary: str
 
 
+class SimilarFieldsRequest(BaseModel):
+    """Request for similar known fields."""
+    field_name: str
+    top_k: int = Field(default=5, ge=1, le=100)
+
+
+class SimilarFieldsResponse(BaseModel):
+    """Known fields similar to a field name."""
+    field_name: str
+    indexed_fields: int
+    matches: List[Dict[str, Any]]
+
+
 class AnomalyDetectionRequest(BaseModel):
     """Request for anomaly detection."""
     metrics: List[Dict[str, Any]] = Field(..., description="Runtime metrics to analyze")
     historical_metrics: Optional[List[Dict[str, Any]]] = Field(default=None, description="Historical data for training")
     algorithm: str = Field(default="isolation_forest", description="Algorithm: isolation_forest, one_class_svm, lof, statistical")
+    use_baselines: bool = Field(default=True, description="Use stored per-endpoint baselines when no history is sent")
 
 
 class AnomalyDetectionResponse(BaseModel):
@@ -71,6 +93,26 @@ class AnomalyDetectionResponse(BaseModel):
     summary: str
 
 
+class AnomalyBaselineInfo(BaseModel):
+    """Latest stored anomaly baseline of an endpoint."""
+    endpoint_key: str
+    version: int
+    sample_count: int
+    trained_through: datetime
+
+
+class AnomalyBaselinesResponse(BaseModel):
+    """Stored anomaly baselines."""
+    baselines: List[AnomalyBaselineInfo]
+    trained: Dict[str, int] = {}
+
+
+class LatencyTrendsResponse(BaseModel):
+    """Running latency trends of endpoints."""
+    trends: Dict[str, Dict[str, Any]]
+    drifting: List[str]
+
+
 class EndpointClassificationRequest(BaseModel):
     """Request for endpoint classification."""
     endpoint_path: str
@@ -92,6 +134,7 @@ class MLScoringRequest(BaseModel):
     changes: List[Dict[str, Any]]
     criticality_profiles: Optional[Dict[str, float]] = None
     runtime_metrics: Optional[Dict[str, float]] = None
+    include_force_plot: bool = Field(default=False, description="Render the SHAP force plot as HTML")
 
 
 class MLScoringResponse(BaseModel):
@@ -104,6 +147,17 @@ class MLScoringResponse(BaseModel):
     shap_explanation: Optional[Dict[str, Any]] = None
 
 
+class MLBatchScoringRequest(BaseModel):
+    """Request for ML risk scoring of many change sets."""
+    items: List[MLScoringRequest]
+    include_shap: bool = Field(default=True, description="Include SHAP explanations")
+
+
+class MLBatchScoringResponse(BaseModel):
+    """Response from batch ML risk scoring (one result per item, in order)."""
+    results: List[MLScoringResponse]
+
+
 class RecommendationsRequest(BaseModel):
     """Request for AI-generated recommendations."""
     analysis_summary: str
@@ -127,6 +181,12 @@ class AIStatusResponse(BaseModel):
     ml_scoring_available: bool
 
 
+class ModelStatsResponse(BaseModel):
+    """Models loaded by the shared model registry."""
+    models: List[Dict[str, Any]]
+    memory_mb: float
+
+
 # Endpoints
 @router.get("/status", response_model=AIStatusResponse)
 async def get_ai_status():
@@ -189,6 +249,36 @@ async def get_ai_status():
     return status
 
 
+@router.get("/models", response_model=ModelStatsResponse)
+async def get_loaded_models():
+    """
+    List models loaded in this worker process.
+    
+    Returns load time, memory growth and usage of each shared model.
+    """
+    from qoe_guard.ai.registry import model_registry
+    
+    return ModelStatsResponse(
+        models=model_registry.stats(),
+        memory_mb=round(model_registry.memory_bytes / (1024 * 1024), 1),
+    )
+
+
+@router.delete("/models/{model_key:path}")
+async def evict_model(model_key: str):
+    """
+    Unload a shared model; it is reloaded on next use.
+    """
+    from qoe_guard.ai.registry import model_registry
+    
+    if not model_registry.evict(model_key):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model not loaded: {model_key}",
+        )
+    return {"evicted": model_key}
+
+
 @router.post("/analyze-diff", response_model=DiffAnalysisResponse)
 async def analyze_diff_with_ai(request: DiffAnalysisRequest):
     """
@@ -210,12 +300,16 @@ async def analyze_diff_with_ai(request: DiffAnalysisRequest):
         
         analyzer = LLMAnalyzer(provider=provider)
         
-        result = analyzer.analyze_diff(
+        # Analysis, classifications and explanations run concurrently
+        steps = await analyzer.aanalyze_change_set(
             baseline=request.baseline,
             candidate=request.candidate,
             changes=request.changes,
             context=request.context,
+            audiences=request.audiences,
+            classify_top=request.classify_top,
         )
+        result = steps["analysis"]
         
         return DiffAnalysisResponse(
             summary=result.summary,
@@ -226,6 +320,8 @@ async def analyze_diff_with_ai(request: DiffAnalysisRequest):
             impact_prediction=result.impact_prediction,
             confidence=result.confidence,
             provider_used=analyzer.provider.value if analyzer.provider else None,
+            explanations=steps["explanations"],
+            classifications=steps["classifications"],
         )
     except ImportError:
         raise HTTPException(
@@ -298,8 +394,41 @@ async def detect_semantic_drift(request: SemanticDriftRequest):
         )
 
 
+@router.post("/similar-fields", response_model=SimilarFieldsResponse)
+def find_similar_fields(request: SimilarFieldsRequest, db: Session = Depends(get_db)):
+    """
+    Find known fields similar to a field name.
+    
+    Searches the field names of all stored specs, e.g. to find where a
+    removed field may have moved. A plain function, so refreshing the
+    index (queries and embeddings) runs in the thread pool.
+    """
+    from qoe_guard.ai.field_index import get_field_index
+    from qoe_guard.ai.semantic_drift import SemanticDriftDetector
+    
+    detector = SemanticDriftDetector()
+    if not detector.is_available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Semantic analysis libraries not installed. Run: pip install sentence-transformers",
+        )
+    
+    field_index = get_field_index(detector.model_name)
+    field_index.refresh(db, detector.embed)
+    detector.field_index = field_index
+    
+    return SimilarFieldsResponse(
+        field_name=request.field_name,
+        indexed_fields=len(field_index),
+        matches=[
+            {"field": name, "similarity": similarity}
+            for name, similarity in detector.find_similar_fields(request.field_name, top_k=request.top_k)
+        ],
+    )
+
+
 @router.post("/detect-anomalies", response_model=AnomalyDetectionResponse)
-async def detect_anomalies(request: AnomalyDetectionRequest):
+async def detect_anomalies(request: AnomalyDetectionRequest, db: Session = Depends(get_db)):
     """
     Detect anomalies in runtime metrics.
     
@@ -307,6 +436,10 @@ async def detect_anomalies(request: AnomalyDetectionRequest):
     - Latency spikes
     - Error bursts
     - Unusual patterns
+    
+    Without historical metrics, each metric is scored against the stored
+    baseline of its endpoint (see /ai/anomaly-baselines); give a metric's
+    "server_url" to match the baselines of that server.
     """
     try:
         from qoe_guard.ai.anomaly_detector import AnomalyDetector, RuntimeMetrics
@@ -323,6 +456,7 @@ async def detect_anomalies(request: AnomalyDetectionRequest):
                 timestamp=datetime.fromisoformat(m["timestamp"]) if "timestamp" in m else datetime.now(),
                 endpoint=m.get("endpoint", "unknown"),
                 method=m.get("method", "GET"),
+                extra={"server_url": m["server_url"]} if m.get("server_url") else {},
             )
             for m in request.metrics
         ]
@@ -341,8 +475,12 @@ async def detect_anomalies(request: AnomalyDetectionRequest):
                 for m in request.historical_metrics
             ]
             detector.fit(historical)
-        
-        result = detector.detect_batch(metrics)
+            result = detector.detect_batch(metrics)
+        elif request.use_baselines:
+            from qoe_guard.ai.anomaly_baselines import anomaly_baselines
+            result = anomaly_baselines.detect(db, metrics, fallback=detector)
+        else:
+            result = detector.detect_batch(metrics)
         
         return AnomalyDetectionResponse(
             total_observations=result.total_observations,
@@ -368,6 +506,82 @@ async def detect_anomalies(request: AnomalyDetectionRequest):
         )
 
 
+def _baseline_infos(db: Session) -> List[AnomalyBaselineInfo]:
+    from qoe_guard.db.models import AnomalyBaseline
+    from qoe_guard.ai.anomaly_baselines import anomaly_baselines
+    
+    # Only a few versions are kept per endpoint, so reading all rows is cheap
+    latest = anomaly_baselines.latest_versions(db)
+    return [
+        AnomalyBaselineInfo(
+            endpoint_key=row.endpoint_key,
+            version=row.version,
+            sample_count=row.sample_count,
+            trained_through=row.trained_through,
+        )
+        for row in db.query(AnomalyBaseline).order_by(AnomalyBaseline.endpoint_key).all()
+        if latest.get(row.endpoint_key) == row.version
+    ]
+
+
+@router.get("/anomaly-baselines", response_model=AnomalyBaselinesResponse)
+async def list_anomaly_baselines(db: Session = Depends(get_db)):
+    """List the latest stored anomaly baseline of each endpoint."""
+    return AnomalyBaselinesResponse(baselines=_baseline_infos(db))
+
+
+@router.post("/anomaly-baselines/refresh", response_model=AnomalyBaselinesResponse)
+def refresh_anomaly_baselines(db: Session = Depends(get_db)):
+    """
+    Retrain the baselines of endpoints with results newer than their baseline.
+    
+    A plain function, so the refit runs in the thread pool instead of
+    blocking the event loop.
+    """
+    from qoe_guard.ai.anomaly_baselines import anomaly_baselines
+    
+    trained = anomaly_baselines.refresh(db)
+    return AnomalyBaselinesResponse(baselines=_baseline_infos(db), trained=trained)
+
+
+def _latency_trends(db: Session, endpoint: Optional[str]) -> LatencyTrendsResponse:
+    from qoe_guard.ai.online_anomaly import DRIFT_RATIO, latency_monitor
+    
+    states = latency_monitor.states(db, [endpoint] if endpoint else None)
+    trends = {key: states[key].trend() for key in sorted(states)}
+    return LatencyTrendsResponse(
+        trends=trends,
+        drifting=[
+            key for key, trend in trends.items()
+            if trend.get("is_anomalous") or trend.get("drift_ratio", 1.0) >= DRIFT_RATIO
+        ],
+    )
+
+
+@router.get("/latency-trends", response_model=LatencyTrendsResponse)
+async def get_latency_trends(endpoint: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Get the running latency trend of each endpoint (or of one, e.g. "GET api.example.com/items").
+    
+    Trends are maintained incrementally as validation runs complete.
+    """
+    return _latency_trends(db, endpoint)
+
+
+@router.post("/latency-trends/rebuild", response_model=LatencyTrendsResponse)
+def rebuild_latency_trends(db: Session = Depends(get_db)):
+    """
+    Rebuild the running latency state of all endpoints from stored results.
+    
+    A plain function, so streaming the result history runs in the thread
+    pool instead of blocking the event loop.
+    """
+    from qoe_guard.ai.online_anomaly import latency_monitor
+    
+    latency_monitor.rebuild(db)
+    return _latency_trends(db, None)
+
+
 @router.post("/classify-endpoint", response_model=EndpointClassificationResponse)
 async def classify_endpoint(request: EndpointClassificationRequest):
     """
@@ -420,41 +634,46 @@ async def classify_endpoint(request: EndpointClassificationRequest):
         )
 
 
-@router.post("/ml-score", response_model=MLScoringResponse)
-async def ml_risk_score(request: MLScoringRequest):
-    """
-    Get ML-based risk score for changes.
+def _score_change_sets(items: List[MLScoringRequest], include_shap: bool) -> List[MLScoringResponse]:
+    """Score change sets with one model call (and one SHAP call) for all of them."""
+    from qoe_guard.ai.ml_scorer import extract_features_from_changes, get_risk_scorer
     
-    Uses trained model to predict risk and provides SHAP explanation.
-    """
-    try:
-        from qoe_guard.ai.ml_scorer import MLRiskScorer, extract_features_from_changes
-        
-        scorer = MLRiskScorer()
-        
-        features = extract_features_from_changes(
-            changes=request.changes,
-            criticality_profiles=request.criticality_profiles,
-            runtime_metrics=request.runtime_metrics,
+    scorer = get_risk_scorer()
+    
+    features = [
+        extract_features_from_changes(
+            changes=item.changes,
+            criticality_profiles=item.criticality_profiles,
+            runtime_metrics=item.runtime_metrics,
         )
-        
-        prediction = scorer.predict(features)
-        
-        # Try to get SHAP explanation
-        shap_explanation = None
-        if scorer.is_trained:
-            try:
-                shap_result = scorer.explain(features)
-                shap_explanation = {
+        for item in items
+    ]
+    
+    predictions = scorer.predict_batch(features)
+    
+    # Try to get SHAP explanations
+    shap_explanations: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    if include_shap and scorer.is_trained:
+        try:
+            js_included = False
+            for i, (item, shap_result) in enumerate(zip(items, scorer.explain_batch(features))):
+                shap_explanations[i] = {
                     "base_value": shap_result.base_value,
                     "shap_values": shap_result.shap_values,
                     "top_positive": shap_result.top_positive,
                     "top_negative": shap_result.top_negative,
                 }
-            except Exception:
-                pass
-        
-        return MLScoringResponse(
+                if item.include_force_plot:
+                    # The JavaScript bundle is sent once per response
+                    shap_explanations[i]["force_plot_html"] = scorer.render_force_plot(
+                        shap_result, include_js=not js_included,
+                    )
+                    js_included = True
+        except Exception:
+            pass
+    
+    return [
+        MLScoringResponse(
             risk_score=prediction.risk_score,
             decision=prediction.decision,
             confidence=prediction.confidence,
@@ -465,6 +684,37 @@ async def ml_risk_score(request: MLScoringRequest):
             explanation=prediction.explanation,
             shap_explanation=shap_explanation,
         )
+        for prediction, shap_explanation in zip(predictions, shap_explanations)
+    ]
+
+
+@router.post("/ml-score", response_model=MLScoringResponse)
+async def ml_risk_score(request: MLScoringRequest):
+    """
+    Get ML-based risk score for changes.
+    
+    Uses trained model to predict risk and provides SHAP explanation
+    (with the force plot HTML only if include_force_plot is set).
+    """
+    try:
+        return _score_change_sets([request], include_shap=True)[0]
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="ML libraries not installed. Run: pip install xgboost shap scikit-learn",
+        )
+
+
+@router.post("/ml-score/batch", response_model=MLBatchScoringResponse)
+async def ml_risk_score_batch(request: MLBatchScoringRequest):
+    """
+    Get ML-based risk scores of many change sets.
+    
+    All items are scored with one model call, so a backlog of runs costs
+    about as much as its inference.
+    """
+    try:
+        return MLBatchScoringResponse(results=_score_change_sets(request.items, request.include_shap))
     except ImportError:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -494,7 +744,7 @@ async def get_ai_recommendations(request: RecommendationsRequest):
             confidence=0.5,
         )
         
-        recommendations = analyzer.generate_recommendations(
+        recommendations = await analyzer.agenerate_recommendations(
             analysis=analysis,
             brittleness_score=request.brittleness_score,
             qoe_risk_score=request.qoe_risk_score,
@@ -550,7 +800,7 @@ async def explain_for_stakeholder(
             confidence=0.5,
         )
         
-        explanation = analyzer.explain_for_stakeholders(
+        explanation = await analyzer.aexplain_for_stakeholders(
             analysis=analysis,
             audience=audience,
         )
@@ -563,6 +813,43 @@ async def explain_for_stakeholder(
         )
 
 
+@router.post("/explain-for-stakeholder/stream")
+async def stream_explanation_for_stakeholder(
+    analysis_summary: str = Body(...),
+    breaking_changes: List[str] = Body(default=[]),
+    risk_assessment: str = Body(default=""),
+    audience: str = Body(default="technical"),
+):
+    """
+    Stream a stakeholder-appropriate explanation as plain text while the
+    LLM generates it.
+    """
+    try:
+        from qoe_guard.ai.llm_analyzer import LLMAnalyzer, DiffAnalysis
+        
+        analyzer = LLMAnalyzer()
+        
+        analysis = DiffAnalysis(
+            summary=analysis_summary,
+            breaking_changes=breaking_changes,
+            non_breaking_changes=[],
+            risk_assessment=risk_assessment,
+            recommendations=[],
+            impact_prediction="",
+            confidence=0.5,
+        )
+        
+        return StreamingResponse(
+            analyzer.astream_explanation(analysis=analysis, audience=audience),
+            media_type="text/plain",
+        )
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="LLM libraries not installed",
+        )
+
+
 @router.post("/batch-classify")
 async def batch_classify_endpoints(
     endpoints: List[EndpointClassificationRequest] = Body(...),
@@ -570,29 +857,19 @@ async def batch_classify_endpoints(
     """
     Batch classify multiple endpoints.
     
-    Efficiently classifies multiple endpoints in one request.
+    Efficiently classifies multiple endpoints in one request: models run
+    once per batch, and endpoints classified before are served from cache.
     """
     try:
         from qoe_guard.ai.nlp_analyzer import NLPAnalyzer
         
         analyzer = NLPAnalyzer()
+        items = [ep.model_dump() for ep in endpoints]
+        intents = analyzer.extract_intents(items)
+        criticalities = analyzer.classify_criticalities(items)
         results = []
         
-        for ep in endpoints:
-            intent = analyzer.extract_intent(
-                endpoint_path=ep.endpoint_path,
-                method=ep.method,
-                description=ep.description,
-                summary=ep.summary,
-            )
-            
-            criticality = analyzer.classify_criticality(
-                endpoint_path=ep.endpoint_path,
-                method=ep.method,
-                description=ep.description,
-                tags=ep.tags,
-            )
-            
+        for ep, intent, criticality in zip(endpoints, intents, criticalities):
             results.append({
                 "endpoint": ep.endpoint_path,
                 "method": ep.method,
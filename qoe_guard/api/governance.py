@@ -3,7 +3,8 @@ Governance API routes - Baseline promotion and approvals.
 """
 from __future__ import annotations
 
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
@@ -16,6 +17,7 @@ from ..db.models import (
 )
 from ..auth.service import get_current_active_user
 from ..auth.middleware import require_role
+from ..policy.config import DEFAULT_POLICY, PolicyConfig as PolicySettings
 
 router = APIRouter(prefix="/governance", tags=["Governance"])
 
@@ -92,6 +94,39 @@ class PolicyConfigUpdate(BaseModel):
     skip_operations: Optional[List[str]] = None
 
 
+class PolicySimulationRequest(PolicyConfigUpdate):
+    """Candidate policy (changes to the active policy) to replay over stored runs."""
+    compare_to: str = "stored"  # "stored" run decisions or the "active" policy
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    max_flipped: int = 100
+
+
+class FlippedRunResponse(BaseModel):
+    """A run whose decision would change."""
+    run_id: str
+    before: str
+    after: str
+    started_at: Optional[str]
+    rules: List[str]
+
+
+class PolicySimulationResponse(BaseModel):
+    """What-if policy simulation report."""
+    policy_version: str
+    compared_to: str
+    total_runs: int
+    approximated_runs: int
+    skipped_runs: int
+    before: Dict[str, int]
+    after: Dict[str, int]
+    deltas: Dict[str, int]
+    transitions: Dict[str, int]
+    flipped_total: int
+    flipped: List[FlippedRunResponse]
+    duration_ms: int
+
+
 class CriticalityProfileResponse(BaseModel):
     """Criticality profile response."""
     id: str
@@ -494,6 +529,49 @@ def update_policy(
     )
 
 
+@router.post("/policy/simulate", response_model=PolicySimulationResponse)
+def simulate_policy_change(
+    request: PolicySimulationRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Replay a candidate policy over stored validation runs.
+    
+    The candidate is the active policy with the requested changes; nothing
+    is saved. Reports how many runs would change decision, and which.
+    """
+    from ..policy.simulation import simulate_policy
+    
+    if request.compare_to not in ("stored", "active"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="compare_to must be 'stored' or 'active'",
+        )
+    
+    record = db.query(PolicyConfig).filter(PolicyConfig.is_active == True).first()
+    active = PolicySettings.from_record(record) if record else DEFAULT_POLICY
+    changes = request.model_dump(
+        exclude_none=True,
+        include=set(PolicyConfigUpdate.model_fields) - {"name", "description"},
+    )
+    candidate = PolicySettings.from_dict({
+        **active.to_dict(),
+        **changes,
+        "version": f"{active.version}-simulated",
+    })
+    
+    simulation = simulate_policy(
+        db,
+        candidate,
+        baseline=active if request.compare_to == "active" else None,
+        since=request.since,
+        until=request.until,
+        max_flipped=max(0, request.max_flipped),
+    )
+    return PolicySimulationResponse(**simulation.to_dict())
+
+
 # -------------------- Criticality Profiles --------------------
 
 @router.get("/criticality", response_model=List[CriticalityProfileResponse])
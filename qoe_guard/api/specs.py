@@ -11,10 +11,13 @@ from pydantic import BaseModel, HttpUrl
 
 from ..db.database import get_db
 from ..db.models import User, SpecSnapshot, Operation
+from ..db.ingest import ingest_operations
 from ..auth.service import get_current_active_user, get_current_user
 from ..swagger.discovery import discover_openapi_spec
 from ..swagger.normalizer import normalize_spec
 from ..swagger.inventory import extract_operations
+from ..swagger.search import IndexedOperation, OperationIndex, operation_indexes
+from ..validation.plan import validation_plans
 
 router = APIRouter(prefix="/specs", tags=["Specifications"])
 
@@ -124,28 +127,13 @@ def discover_spec(
         db.add(spec_snapshot)
         db.flush()
         
-        # Extract and store operations
+        # Extract and store operations (bodies deduped across snapshots)
         operations = extract_operations(normalized.spec, spec_snapshot.id)
-        for op in operations:
-            db.add(Operation(
-                spec_id=spec_snapshot.id,
-                operation_id=op.operation_id,
-                method=op.method,
-                path=op.path,
-                tags=op.tags,
-                summary=op.summary,
-                description=op.description,
-                server_url=op.server_url,
-                security_profile=op.security,
-                parameters=op.parameters,
-                request_body_schema=op.request_body_schema,
-                response_schemas=op.response_schemas,
-                examples=op.examples,
-                deprecated=op.deprecated,
-            ))
+        ingest = ingest_operations(db, spec_snapshot, operations)
         
         db.commit()
         db.refresh(spec_snapshot)
+        ingest.build_index(spec_snapshot.id)
         
         return SpecResponse(
             id=spec_snapshot.id,
@@ -224,6 +212,26 @@ def get_spec(
     )
 
 
+def _operation_index(db: Session, spec_id: str) -> OperationIndex:
+    """Get the cached search index of a spec, building it from the stored rows if needed."""
+    index = operation_indexes.get(spec_id)
+    if index is None:
+        rows = db.query(
+            Operation.id,
+            Operation.operation_id,
+            Operation.method,
+            Operation.path,
+            Operation.tags,
+            Operation.summary,
+            Operation.deprecated,
+        ).filter(Operation.spec_id == spec_id).order_by(Operation.path, Operation.method).all()
+        index = operation_indexes.put(
+            spec_id,
+            OperationIndex(IndexedOperation.from_object(row._asdict()) for row in rows),
+        )
+    return index
+
+
 @router.get("/{spec_id}/operations", response_model=OperationListResponse)
 def list_spec_operations(
     spec_id: str,
@@ -231,6 +239,7 @@ def list_spec_operations(
     method: Optional[str] = None,
     deprecated: Optional[bool] = None,
     search: Optional[str] = None,
+    fuzzy: bool = False,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
@@ -238,11 +247,15 @@ def list_spec_operations(
     """
     List operations for a spec with filtering.
     
+    Served from the spec's in-memory operation index.
+    
     Filters:
     - tag: Filter by tag name
     - method: Filter by HTTP method (GET, POST, etc.)
     - deprecated: Filter by deprecated status
-    - search: Search in path, summary, operation_id
+    - search: Prefix search over path, summary, operation_id and tags
+      (every word must match)
+    - fuzzy: Also match words one typo away
     """
     spec = db.query(SpecSnapshot).filter(SpecSnapshot.id == spec_id).first()
     if not spec:
@@ -251,29 +264,15 @@ def list_spec_operations(
             detail="Spec not found",
         )
     
-    query = db.query(Operation).filter(Operation.spec_id == spec_id)
-    
-    if method:
-        query = query.filter(Operation.method == method.upper())
-    
-    if deprecated is not None:
-        query = query.filter(Operation.deprecated == deprecated)
-    
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Operation.path.ilike(search_term)) |
-            (Operation.summary.ilike(search_term)) |
-            (Operation.operation_id.ilike(search_term))
-        )
-    
-    # Tag filtering requires JSON query (handled in Python for SQLite compatibility)
-    operations = query.offset(skip).limit(limit).all()
-    
-    if tag:
-        operations = [op for op in operations if op.tags and tag in op.tags]
-    
-    total = query.count()
+    result = _operation_index(db, spec_id).search(
+        query=search,
+        tags=[tag] if tag else None,
+        methods=[method] if method else None,
+        deprecated=deprecated,
+        fuzzy=fuzzy,
+        offset=skip,
+        limit=limit,
+    )
     
     return OperationListResponse(
         operations=[
@@ -282,13 +281,13 @@ def list_spec_operations(
                 operation_id=op.operation_id,
                 method=op.method,
                 path=op.path,
-                tags=op.tags,
+                tags=list(op.tags),
                 summary=op.summary,
                 deprecated=op.deprecated,
             )
-            for op in operations
+            for op in result.operations
         ],
-        total=total,
+        total=result.total,
     )
 
 
@@ -308,5 +307,7 @@ def delete_spec(
     
     db.delete(spec)
     db.commit()
+    operation_indexes.evict(spec_id)
+    validation_plans.evict(spec_id)
     
     return {"status": "deleted", "id": spec_id}
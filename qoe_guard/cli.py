@@ -19,6 +19,12 @@ Usage:
   qoe-guard validate ... --format json
   qoe-guard validate ... --format summary
   qoe-guard validate ... --format github  # GitHub Actions annotation format
+
+  # Build an ML training set from stored runs (and optionally train a model)
+  qoe-guard build-training-data --out data/training --database --train-model data/risk_model
+
+  # Replay a candidate policy over stored runs (what-if)
+  qoe-guard simulate-policy --policy candidate_policy.json --since 2025-01-01
 """
 from __future__ import annotations
 
@@ -133,6 +139,94 @@ def format_github(result: Dict[str, Any]) -> str:
     return "\n".join(lines)
 
 
+def build_training_data(args: argparse.Namespace) -> int:
+    """Build a training dataset from stored runs and optionally train a model."""
+    from .ai.training_data import (
+        build_training_dataset,
+        iter_db_examples,
+        iter_legacy_examples,
+        load_training_dataset,
+    )
+    
+    def examples():
+        if args.runs_file:
+            yield from iter_legacy_examples(Path(args.runs_file))
+        if args.database:
+            from .db.database import SessionLocal, init_db
+            init_db()  # Existing databases may predate the current schema
+            db = SessionLocal()
+            try:
+                yield from iter_db_examples(db)
+            finally:
+                db.close()
+    
+    if not args.runs_file and not args.database:
+        print("Error: Must provide --runs-file or --database", file=sys.stderr)
+        return EXIT_ERROR
+    
+    manifest = build_training_dataset(examples(), args.out)
+    print(f"Wrote {manifest['rows']} examples ({manifest['positives']} positive) to {args.out}")
+    
+    if args.train_model:
+        from .ai.ml_scorer import MLRiskScorer
+        
+        X, y = load_training_dataset(args.out)
+        scorer = MLRiskScorer(model_type=args.model_type)
+        metrics = scorer.train_matrix(X, y)
+        if "error" in metrics:
+            print(f"Error: {metrics['error']}", file=sys.stderr)
+            return EXIT_ERROR
+        version = scorer.save(args.train_model)
+        print(f"Trained model {version} saved to {args.train_model}: {json.dumps(metrics)}")
+    return EXIT_PASS
+
+
+def simulate_policy_command(args: argparse.Namespace) -> int:
+    """Replay a candidate policy over stored runs and report decision changes."""
+    from datetime import datetime
+    from .db.database import SessionLocal, init_db
+    from .db.models import PolicyConfig as PolicyRecord
+    from .policy.config import DEFAULT_POLICY, PolicyConfig
+    from .policy.simulation import simulate_policy
+    
+    candidate = PolicyConfig.from_dict(load_json_file(args.policy))
+    since = datetime.fromisoformat(args.since) if args.since else None
+    until = datetime.fromisoformat(args.until) if args.until else None
+    
+    init_db()  # Existing databases may predate the current schema
+    db = SessionLocal()
+    try:
+        baseline = None
+        if args.compare_to == "active":
+            record = db.query(PolicyRecord).filter(PolicyRecord.is_active == True).first()
+            baseline = PolicyConfig.from_record(record) if record else DEFAULT_POLICY
+        simulation = simulate_policy(
+            db, candidate, baseline=baseline, since=since, until=until, max_flipped=args.max_flipped,
+        )
+    finally:
+        db.close()
+    
+    if args.format == "json":
+        print(json.dumps(simulation.to_dict(), indent=2))
+        return EXIT_PASS
+    
+    print(f"Policy {simulation.policy_version} vs {simulation.compared_to}: "
+          f"{simulation.total_runs} runs in {simulation.duration_ms}ms")
+    if simulation.approximated_runs:
+        print(f"  Approximated {simulation.approximated_runs} runs from run-level scores (no stored policy inputs)")
+    if simulation.skipped_runs:
+        print(f"  Skipped {simulation.skipped_runs} runs without policy inputs or scores")
+    for label, delta in simulation.deltas.items():
+        print(f"  {label}: {simulation.before[label]} -> {simulation.after[label]} ({delta:+d})")
+    print(f"Flipped runs: {simulation.flipped_total}")
+    for transition, count in sorted(simulation.transitions.items()):
+        print(f"  {transition}: {count}")
+    for flipped in simulation.flipped:
+        rules = ", ".join(flipped.rules) or "-"
+        print(f"  {flipped.run_id}  {flipped.before} -> {flipped.after}  [{rules}]")
+    return EXIT_PASS
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="QoE-Guard CLI — Validate API responses for QoE risk",
@@ -172,8 +266,48 @@ Examples:
         help="Exit with code 2 (FAIL) on WARN results"
     )
     
+    # Training data command
+    training_parser = subparsers.add_parser("build-training-data", help="Build an ML training set from stored runs")
+    training_parser.add_argument("-o", "--out", required=True, help="Dataset directory")
+    training_parser.add_argument("--runs-file", help="Legacy runs.json to read")
+    training_parser.add_argument("--database", action="store_true", help="Read validation runs from the database")
+    training_parser.add_argument("--train-model", help="Train a risk model on the dataset and save it here")
+    training_parser.add_argument(
+        "--model-type",
+        choices=["xgboost", "lightgbm", "random_forest"],
+        default="xgboost",
+        help="Model type to train (default: xgboost)"
+    )
+    
+    # Policy simulation command
+    simulate_parser = subparsers.add_parser("simulate-policy", help="Replay a candidate policy over stored runs")
+    simulate_parser.add_argument("-p", "--policy", required=True, help="Candidate policy JSON file")
+    simulate_parser.add_argument(
+        "--compare-to",
+        choices=["stored", "active"],
+        default="stored",
+        help="Compare with stored run decisions or the active policy (default: stored)"
+    )
+    simulate_parser.add_argument("--since", help="Only runs started at or after this ISO date")
+    simulate_parser.add_argument("--until", help="Only runs started before this ISO date")
+    simulate_parser.add_argument("--max-flipped", type=int, default=20, help="Flipped runs to list (default: 20)")
+    simulate_parser.add_argument(
+        "-f", "--format",
+        choices=["json", "summary"],
+        default="summary",
+        help="Output format (default: summary)"
+    )
+    
     args = parser.parse_args()
     
+    if args.command in ("build-training-data", "simulate-policy"):
+        command = build_training_data if args.command == "build-training-data" else simulate_policy_command
+        try:
+            sys.exit(command(args))
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(EXIT_ERROR)
+    
     if args.command != "validate":
         parser.print_help()
         sys.exit(EXIT_ERROR)
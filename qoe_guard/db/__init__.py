@@ -5,11 +5,15 @@ from .models import (
     Role,
     SpecSnapshot,
     Operation,
+    OperationBody,
+    ValidationPlanRecord,
     Scenario,
     ValidationRun,
     OperationResult,
     BaselinePromotion,
     PromotionRequest,
+    AnomalyBaseline,
+    LatencySketch,
 )
 
 __all__ = [
@@ -21,9 +25,13 @@ __all__ = [
     "Role",
     "SpecSnapshot",
     "Operation",
+    "OperationBody",
+    "ValidationPlanRecord",
     "Scenario",
     "ValidationRun",
     "OperationResult",
     "BaselinePromotion",
     "PromotionRequest",
+    "AnomalyBaseline",
+    "LatencySketch",
 ]
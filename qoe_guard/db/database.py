@@ -7,9 +7,10 @@ from __future__ import annotations
 
 import os
 from contextlib import contextmanager
-from typing import Generator
+from typing import Generator, List
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
 
 # Database URL from environment or default to SQLite for demo
@@ -62,9 +63,40 @@ def get_db_context() -> Generator[Session, None, None]:
         db.close()
 
 
+def upgrade_schema(bind: Engine = engine) -> List[str]:
+    """
+    Add columns that were introduced after a table was first created.
+
+    There are no migrations; create_all only creates missing tables, so
+    nullable columns added to existing tables are added here (idempotent).
+
+    Returns:
+        Added columns as "table.column"
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            new_columns = [col for col in table.columns if col.name not in existing and col.nullable]
+            for column in new_columns:
+                column_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                added.append(f"{table.name}.{column.name}")
+            new_names = {col.name for col in new_columns}
+            for index in table.indexes:
+                if new_names & {col.name for col in index.columns}:
+                    index.create(conn, checkfirst=True)
+    return added
+
+
 def init_db() -> None:
-    """Initialize database tables."""
+    """Initialize database tables and upgrade existing ones."""
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
 
 
 def drop_db() -> None:
@@ -0,0 +1,155 @@
+"""
+Bulk Operation Inventory Ingestion.
+
+Stores the operations of a spec snapshot with:
+- One bulk insert for operation rows per spec
+- Content-addressed operation bodies (parameters, schemas, examples)
+- Dedup of unchanged bodies across spec versions
+- Index entries for the spec's operation search index (built by the
+  caller once the transaction has committed)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Iterable
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models import Operation, OperationBody, SpecSnapshot, generate_uuid
+from ..swagger.inventory import NormalizedOperation
+from ..swagger.search import IndexedOperation, operation_indexes
+
+
+# Keep IN (...) lists below SQLite's bound parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+
+@dataclass
+class IngestResult:
+    """Result of ingesting the operations of a spec snapshot."""
+    operation_count: int
+    new_bodies: int
+    reused_bodies: int
+    indexed_operations: List[IndexedOperation] = field(default_factory=list)
+
+    def build_index(self, spec_id: str):
+        """Cache the search index of the ingested snapshot (call after commit)."""
+        return operation_indexes.build(spec_id, self.indexed_operations)
+
+
+def operation_body(op: NormalizedOperation) -> Dict[str, Any]:
+    """Get the shareable body fields of an operation."""
+    return {
+        "description": op.description,
+        "security_profile": op.security,
+        "parameters": op.parameters,
+        "request_body_schema": op.request_body_schema,
+        "response_schemas": op.response_schemas,
+        "examples": op.examples,
+    }
+
+
+def compute_body_hash(body: Dict[str, Any]) -> str:
+    """Compute a deterministic content hash of an operation body."""
+    json_str = json.dumps(body, sort_keys=True, default=str)
+    return hashlib.sha256(json_str.encode()).hexdigest()
+
+
+def _existing_body_hashes(db: Session, hashes: Iterable[str]) -> set:
+    """Find which body hashes are already stored."""
+    hashes = list(hashes)
+    existing = set()
+    for i in range(0, len(hashes), LOOKUP_CHUNK_SIZE):
+        chunk = hashes[i:i + LOOKUP_CHUNK_SIZE]
+        rows = db.query(OperationBody.id).filter(OperationBody.id.in_(chunk)).all()
+        existing.update(row[0] for row in rows)
+    return existing
+
+
+def _insert_bodies(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Insert operation bodies, skipping any stored by a concurrent ingest."""
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        db.execute(dialect_insert(OperationBody).on_conflict_do_nothing(index_elements=["id"]), rows)
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(OperationBody), rows)
+    except IntegrityError:
+        # Another ingest stored some of the same bodies first
+        existing = _existing_body_hashes(db, (row["id"] for row in rows))
+        remaining = [row for row in rows if row["id"] not in existing]
+        if remaining:
+            db.execute(insert(OperationBody), remaining)
+
+
+def ingest_operations(
+    db: Session,
+    spec_snapshot: SpecSnapshot,
+    operations: List[NormalizedOperation],
+) -> IngestResult:
+    """
+    Store the operations of a spec snapshot in bulk.
+
+    Operation bodies are deduplicated by content hash, so re-importing a
+    spec only writes bodies for operations that actually changed. Does not
+    commit; the caller owns the transaction and builds the search index
+    with ``IngestResult.build_index`` once it has committed.
+
+    Args:
+        db: Database session
+        spec_snapshot: Flushed SpecSnapshot the operations belong to
+        operations: Operations extracted from the snapshot's spec
+
+    Returns:
+        IngestResult with operation and body counts
+    """
+    bodies: Dict[str, Dict[str, Any]] = {}
+    operation_rows = []
+
+    for op in operations:
+        body = operation_body(op)
+        body_hash = compute_body_hash(body)
+        bodies.setdefault(body_hash, body)
+
+        operation_rows.append({
+            "id": generate_uuid(),
+            "spec_id": spec_snapshot.id,
+            "body_hash": body_hash,
+            "operation_id": op.operation_id,
+            "method": op.method,
+            "path": op.path,
+            "tags": op.tags,
+            "summary": op.summary,
+            "server_url": op.server_url,
+            "deprecated": op.deprecated,
+        })
+
+    existing = _existing_body_hashes(db, bodies.keys())
+    new_body_rows = [
+        {"id": body_hash, **body}
+        for body_hash, body in bodies.items()
+        if body_hash not in existing
+    ]
+
+    if new_body_rows:
+        _insert_bodies(db, new_body_rows)
+    if operation_rows:
+        db.execute(insert(Operation), operation_rows)
+
+    return IngestResult(
+        operation_count=len(operation_rows),
+        new_bodies=len(new_body_rows),
+        reused_bodies=len(bodies) - len(new_body_rows),
+        # Same order as an index loaded from the stored rows
+        indexed_operations=[
+            IndexedOperation.from_object(row)
+            for row in sorted(operation_rows, key=lambda r: (r["path"], r["method"]))
+        ],
+    )
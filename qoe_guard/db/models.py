@@ -4,10 +4,12 @@ SQLAlchemy models for QoE-Guard Enterprise.
 Core entities:
 - User, Role: Authentication and authorization
 - SpecSnapshot: OpenAPI spec versions
-- Operation: Extracted API operations
+- Operation, OperationBody: Extracted API operations (bodies shared by content hash)
+- ValidationPlanRecord: Compiled validation plan per spec snapshot
 - Scenario: Generated test scenarios
 - ValidationRun, OperationResult: Validation execution
 - BaselinePromotion, PromotionRequest: Governance workflow
+- AnomalyBaseline: Trained per-endpoint runtime anomaly baselines
 """
 from __future__ import annotations
 
@@ -107,35 +109,63 @@ class SpecSnapshot(Base):
 
     # Relationships
     operations = relationship("Operation", back_populates="spec", cascade="all, delete-orphan")
+    validation_plan = relationship("ValidationPlanRecord", uselist=False, cascade="all, delete-orphan")
 
     __table_args__ = (
         Index("ix_spec_snapshots_source_hash", "source_url", "spec_hash"),
     )
 
 
+class OperationBody(Base):
+    """
+    Content-addressed operation body shared across spec snapshots.
+
+    Holds the heavy parts of an operation (parameters, schemas, examples).
+    Keyed by content hash, so an operation that is unchanged between spec
+    versions references the same row instead of storing a new copy.
+    """
+    __tablename__ = "operation_bodies"
+
+    id = Column(String(64), primary_key=True)  # SHA-256 of the body content
+    description = Column(Text, nullable=True)
+    security_profile = Column(JSON, nullable=True)
+    parameters = Column(JSON, nullable=True)  # List of parameters
+    request_body_schema = Column(JSON, nullable=True)
+    response_schemas = Column(JSON, nullable=True)  # Dict of status_code -> schema
+    examples = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relationships
+    operations = relationship("Operation", back_populates="body")
+
+
 class Operation(Base):
     """Extracted API operation from a spec."""
     __tablename__ = "operations"
 
     id = Column(String(36), primary_key=True, default=generate_uuid)
     spec_id = Column(String(36), ForeignKey("spec_snapshots.id", ondelete="CASCADE"), nullable=False, index=True)
+    body_hash = Column(String(64), ForeignKey("operation_bodies.id"), nullable=True, index=True)
     operation_id = Column(String(255), nullable=True)  # operationId from spec
     method = Column(String(10), nullable=False)  # GET, POST, etc.
     path = Column(String(2048), nullable=False)
     tags = Column(JSON, nullable=True)  # List of tags
     summary = Column(String(500), nullable=True)
-    description = Column(Text, nullable=True)
     server_url = Column(String(2048), nullable=True)
-    security_profile = Column(JSON, nullable=True)
-    parameters = Column(JSON, nullable=True)  # List of parameters
-    request_body_schema = Column(JSON, nullable=True)
-    response_schemas = Column(JSON, nullable=True)  # Dict of status_code -> schema
-    examples = Column(JSON, nullable=True)
     deprecated = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    # Inline body columns (rows created before operation bodies were shared)
+    _description = Column("description", Text, nullable=True)
+    _security_profile = Column("security_profile", JSON, nullable=True)
+    _parameters = Column("parameters", JSON, nullable=True)
+    _request_body_schema = Column("request_body_schema", JSON, nullable=True)
+    _response_schemas = Column("response_schemas", JSON, nullable=True)
+    _examples = Column("examples", JSON, nullable=True)
+
     # Relationships
     spec = relationship("SpecSnapshot", back_populates="operations")
+    body = relationship("OperationBody", back_populates="operations", lazy="joined")
     scenarios = relationship("Scenario", back_populates="operation", cascade="all, delete-orphan")
     results = relationship("OperationResult", back_populates="operation")
 
@@ -143,6 +173,76 @@ class Operation(Base):
         Index("ix_operations_spec_method_path", "spec_id", "method", "path"),
     )
 
+    def _body_field(self, name: str) -> Any:
+        """Read a body field from the shared body, falling back to inline columns."""
+        if self.body is not None:
+            return getattr(self.body, name)
+        return getattr(self, f"_{name}")
+
+    @property
+    def description(self) -> Optional[str]:
+        return self._body_field("description")
+
+    @description.setter
+    def description(self, value: Optional[str]) -> None:
+        self._description = value
+
+    @property
+    def security_profile(self) -> Optional[List[Dict[str, Any]]]:
+        return self._body_field("security_profile")
+
+    @security_profile.setter
+    def security_profile(self, value: Optional[List[Dict[str, Any]]]) -> None:
+        self._security_profile = value
+
+    @property
+    def parameters(self) -> Optional[List[Dict[str, Any]]]:
+        return self._body_field("parameters")
+
+    @parameters.setter
+    def parameters(self, value: Optional[List[Dict[str, Any]]]) -> None:
+        self._parameters = value
+
+    @property
+    def request_body_schema(self) -> Optional[Dict[str, Any]]:
+        return self._body_field("request_body_schema")
+
+    @request_body_schema.setter
+    def request_body_schema(self, value: Optional[Dict[str, Any]]) -> None:
+        self._request_body_schema = value
+
+    @property
+    def response_schemas(self) -> Optional[Dict[str, Any]]:
+        return self._body_field("response_schemas")
+
+    @response_schemas.setter
+    def response_schemas(self, value: Optional[Dict[str, Any]]) -> None:
+        self._response_schemas = value
+
+    @property
+    def examples(self) -> Optional[Dict[str, Any]]:
+        return self._body_field("examples")
+
+    @examples.setter
+    def examples(self, value: Optional[Dict[str, Any]]) -> None:
+        self._examples = value
+
+
+class ValidationPlanRecord(Base):
+    """
+    Compiled validation plan of a spec snapshot.
+
+    Stores the resolved request and schema selection for every operation,
+    so validation runs against the snapshot skip all per-operation setup.
+    """
+    __tablename__ = "validation_plans"
+
+    spec_id = Column(String(36), ForeignKey("spec_snapshots.id", ondelete="CASCADE"), primary_key=True)
+    spec_hash = Column(String(64), nullable=True)
+    plan_version = Column(Integer, nullable=False)
+    plan = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
 
 class Scenario(Base):
     """Generated test scenario for an operation."""
@@ -192,6 +292,7 @@ class ValidationRun(Base):
     model_version = Column(String(50), nullable=True)
     reasons = Column(JSON, nullable=True)
     recommendations = Column(JSON, nullable=True)
+    policy_inputs = Column(JSON, nullable=True)  # Per-operation policy input columns (for replays)
     
     # Metadata
     created_by_id = Column(String(36), ForeignKey("users.id"), nullable=True)
@@ -354,6 +455,36 @@ class CriticalityProfile(Base):
     )
 
 
+class AnomalyBaseline(Base):
+    """Versioned runtime anomaly baseline of one endpoint, trained from operation results."""
+    __tablename__ = "anomaly_baselines"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    endpoint_key = Column(String(2100), nullable=False)  # "GET api.example.com/items/{id}"
+    version = Column(Integer, nullable=False)
+    algorithm = Column(String(50), nullable=False, default="statistical")
+    sample_count = Column(Integer, nullable=False)
+    stats = Column(JSON, nullable=False)  # Feature -> mean/std/min/max/q1/q3
+    trained_through = Column(DateTime, nullable=False)  # Newest result included
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_anomaly_baselines_endpoint_version", "endpoint_key", "version", unique=True),
+    )
+
+
+class LatencySketch(Base):
+    """Running latency statistics of one endpoint, updated as results arrive."""
+    __tablename__ = "latency_sketches"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    endpoint_key = Column(String(2100), nullable=False, unique=True)  # "GET api.example.com/items/{id}"
+    sample_count = Column(Integer, nullable=False, default=0)
+    state = Column(JSON, nullable=False)  # Moments, quantile sketches, EWMAs, recent window
+    last_observed_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
 class AuditLog(Base):
     """Audit trail for all significant actions."""
     __tablename__ = "audit_logs"
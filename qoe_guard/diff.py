@@ -8,9 +8,10 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Dict, List, Tuple, Optional
 
+from .aggregate import aggregate_changes, change_groups
 from .model import Change, DiffResult, FeatureVector, Features
-from .scoring.criticality import get_criticality_for_path
-from .scoring.qoe_risk import compute_qoe_risk, compute_qoe_action
+from .scoring.criticality import CriticalityResolver, criticality_resolver
+from .scoring.qoe_risk import CHANGE_TYPE_WEIGHTS, compute_qoe_risk, compute_qoe_action
 
 JSON = Any
 
@@ -138,51 +139,59 @@ def diff_json(baseline: JSON, candidate: JSON) -> List[InternalChange]:
     return [c for c in changes if c.path != "$"]
 
 
-def json_diff(baseline: JSON, candidate: JSON) -> DiffResult:
+# Criticality from which a changed path counts as critical
+CRITICAL_THRESHOLD = 0.8
+
+
+def make_change(
+    path: str,
+    change_type: str,
+    before: Any,
+    after: Any,
+    criticality_score: float,
+) -> Change:
+    """Build a Change from a resolved path criticality (sets the breaking/critical flags)."""
+    return Change(
+        path=path,
+        change_type=change_type,
+        old_value=before,
+        new_value=after,
+        old_type=_type_name(before) if change_type == "type_changed" else None,
+        new_type=_type_name(after) if change_type == "type_changed" else None,
+        is_breaking=change_type in ("type_changed", "removed"),
+        is_critical=criticality_score >= CRITICAL_THRESHOLD,
+        criticality_score=criticality_score,
+    )
+
+
+def score_changes(changes: List[Change]) -> DiffResult:
     """
-    Compare two JSON objects and return a DiffResult with scoring.
+    Score changes whose criticality is already resolved.
     
-    This is the main entry point for JSON comparison.
+    Computes the QoE risk, decision and the critical type changes (the
+    policy's override input) on the aggregated changes.
     
     Args:
-        baseline: The original/expected JSON
-        candidate: The new/actual JSON
+        changes: Changes built with ``make_change``
         
     Returns:
         DiffResult with changes, risk score, and decision
     """
-    internal_changes = diff_json(baseline, candidate)
-    
-    # Convert to model Change objects
-    changes: List[Change] = []
-    for ic in internal_changes:
-        criticality = get_criticality_for_path(ic.path)
-        is_breaking = ic.change_type in ("type_changed", "removed")
-        is_critical = criticality >= 0.8
-        
-        change = Change(
-            path=ic.path,
-            change_type=ic.change_type,
-            old_value=ic.before,
-            new_value=ic.after,
-            old_type=_type_name(ic.before) if ic.change_type == "type_changed" else None,
-            new_type=_type_name(ic.after) if ic.change_type == "type_changed" else None,
-            is_breaking=is_breaking,
-            is_critical=is_critical,
-            criticality_score=criticality,
-        )
-        changes.append(change)
+    weighted_sum = sum(CHANGE_TYPE_WEIGHTS.get(c.change_type, 0.1) * c.criticality_score for c in changes)
     
-    # Calculate scores
-    critical_changes = sum(1 for c in changes if c.is_critical)
-    type_changes = sum(1 for c in changes if c.change_type == "type_changed")
-    removed_fields = sum(1 for c in changes if c.change_type == "removed")
+    # Calculate scores on the aggregated changes
+    groups = aggregate_changes(changes)
+    critical_changes = sum(g.count for g in groups if g.is_critical)
+    type_changes = sum(g.count for g in groups if g.change_type == "type_changed")
+    removed_fields = sum(g.count for g in groups if g.change_type == "removed")
+    critical_type_changes = sum(g.count for g in groups if g.is_critical and g.change_type == "type_changed")
     
     qoe_risk = compute_qoe_risk(
         changes_count=len(changes),
         critical_changes=critical_changes,
         type_changes=type_changes,
         removed_fields=removed_fields,
+        criticality_weighted_sum=weighted_sum,
     )
     
     decision = compute_qoe_action(qoe_risk)
@@ -191,10 +200,39 @@ def json_diff(baseline: JSON, candidate: JSON) -> DiffResult:
         changes=changes,
         decision=decision,
         qoe_risk_score=qoe_risk,
-        summary=f"{len(changes)} changes detected ({critical_changes} critical)"
+        summary=f"{len(changes)} changes detected ({critical_changes} critical)",
+        criticality_weighted_sum=weighted_sum,
+        critical_type_changes=critical_type_changes,
+        change_groups=groups,
     )
 
 
+def json_diff(
+    baseline: JSON,
+    candidate: JSON,
+    criticality: Optional[CriticalityResolver] = None,
+) -> DiffResult:
+    """
+    Compare two JSON objects and return a DiffResult with scoring.
+    
+    This is the main entry point for JSON comparison.
+    
+    Args:
+        baseline: The original/expected JSON
+        candidate: The new/actual JSON
+        criticality: Path criticality resolver (shared default profiles if None);
+            pass one resolver for all operations of a run
+        
+    Returns:
+        DiffResult with changes, risk score, and decision
+    """
+    resolve = criticality if criticality is not None else criticality_resolver()
+    return score_changes([
+        make_change(ic.path, ic.change_type, ic.before, ic.after, resolve(ic.path))
+        for ic in diff_json(baseline, candidate)
+    ])
+
+
 def extract_features(diff_result: DiffResult) -> FeatureVector:
     """
     Extract numeric features from a diff result.
@@ -205,37 +243,27 @@ def extract_features(diff_result: DiffResult) -> FeatureVector:
     Returns:
         FeatureVector with numeric features for scoring
     """
-    changes = diff_result.changes
+    groups = change_groups(diff_result)
     
     # Count by type
-    added = sum(1 for c in changes if c.change_type == "added")
-    removed = sum(1 for c in changes if c.change_type == "removed")
-    value_changed = sum(1 for c in changes if c.change_type == "value_changed")
-    type_changed = sum(1 for c in changes if c.change_type == "type_changed")
+    added = sum(g.count for g in groups if g.change_type == "added")
+    removed = sum(g.count for g in groups if g.change_type == "removed")
+    value_changed = sum(g.count for g in groups if g.change_type == "value_changed")
+    type_changed = sum(g.count for g in groups if g.change_type == "type_changed")
     
     # Count special categories
-    critical = sum(1 for c in changes if getattr(c, 'is_critical', False))
-    breaking = sum(1 for c in changes if getattr(c, 'is_breaking', False))
+    critical = sum(g.count for g in groups if g.is_critical)
+    breaking = sum(g.count for g in groups if g.is_breaking)
     
     # Calculate array changes
-    array_changes = sum(1 for c in changes if '[' in c.path)
+    array_changes = sum(g.count for g in groups if '[' in g.path)
     
     # Calculate numeric deltas
-    numeric_deltas = []
-    for c in changes:
-        if c.change_type == "value_changed":
-            try:
-                if isinstance(c.old_value, (int, float)) and isinstance(c.new_value, (int, float)):
-                    delta = abs(c.new_value - c.old_value)
-                    numeric_deltas.append(delta)
-            except (TypeError, AttributeError):
-                pass
-    
-    max_numeric_delta = max(numeric_deltas) if numeric_deltas else 0
-    numeric_delta_sum = sum(numeric_deltas)
+    max_numeric_delta = max((g.max_abs_delta for g in groups if g.min_delta is not None), default=0)
+    numeric_delta_sum = sum(g.abs_delta_sum for g in groups)
     
     return FeatureVector(
-        total_changes=len(changes),
+        total_changes=sum(g.count for g in groups),
         added_fields=added,
         removed_fields=removed,
         value_changes=value_changed,
@@ -4,6 +4,7 @@ Feature Extraction Module.
 Extracts numeric feature vectors from diff results for scoring and ML models.
 """
 from typing import Optional
+from .aggregate import change_groups
 from .model import DiffResult, FeatureVector, Change
 
 
@@ -17,36 +18,26 @@ def extract_features(diff_result: DiffResult) -> FeatureVector:
     Returns:
         FeatureVector with numeric features suitable for scoring.
     """
-    changes = diff_result.changes
+    groups = change_groups(diff_result)
     
     # Count by type
-    added = sum(1 for c in changes if c.change_type == "added")
-    removed = sum(1 for c in changes if c.change_type == "removed")
-    value_changed = sum(1 for c in changes if c.change_type == "value_changed")
-    type_changed = sum(1 for c in changes if c.change_type == "type_changed")
+    added = sum(g.count for g in groups if g.change_type == "added")
+    removed = sum(g.count for g in groups if g.change_type == "removed")
+    value_changed = sum(g.count for g in groups if g.change_type == "value_changed")
+    type_changed = sum(g.count for g in groups if g.change_type == "type_changed")
     
     # Count special categories
-    critical = sum(1 for c in changes if getattr(c, 'is_critical', False))
-    breaking = sum(1 for c in changes if getattr(c, 'is_breaking', False))
+    critical = sum(g.count for g in groups if g.is_critical)
+    breaking = sum(g.count for g in groups if g.is_breaking)
     
     # Calculate array changes
-    array_changes = sum(1 for c in changes if '[' in c.path)
+    array_changes = sum(g.count for g in groups if '[' in g.path)
     
-    # Calculate numeric deltas (for value changes with numeric values)
-    numeric_deltas = []
-    for c in changes:
-        if c.change_type == "value_changed":
-            try:
-                if isinstance(c.old_value, (int, float)) and isinstance(c.new_value, (int, float)):
-                    delta = abs(c.new_value - c.old_value)
-                    numeric_deltas.append(delta)
-            except (TypeError, AttributeError):
-                pass
-    
-    max_numeric_delta = max(numeric_deltas) if numeric_deltas else 0
+    # Largest numeric delta (for value changes with numeric values)
+    max_numeric_delta = max((g.max_abs_delta for g in groups if g.min_delta is not None), default=0)
     
     return FeatureVector(
-        total_changes=len(changes),
+        total_changes=sum(g.count for g in groups),
         added_fields=added,
         removed_fields=removed,
         value_changes=value_changed,
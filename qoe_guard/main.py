@@ -10,6 +10,7 @@ A comprehensive Swagger-to-Scenario validation system with:
 """
 from __future__ import annotations
 
+import asyncio
 import os
 from contextlib import asynccontextmanager
 from typing import Optional
@@ -37,10 +38,27 @@ from .api.test_data import router as test_data_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
-    # Startup: create database tables
-    Base.metadata.create_all(bind=engine)
+    # Startup: create database tables (and add columns missing from existing ones)
+    init_db()
+    # Startup: optionally preload AI models ("all" or comma-separated keys)
+    warmup = os.getenv("AI_WARMUP_MODELS", "").strip()
+    if warmup:
+        from .ai.registry import warmup_models
+        keys = None if warmup == "all" else [k.strip() for k in warmup.split(",") if k.strip()]
+        warmup_models(keys)
+    # Startup: load the deployed ML risk model once (shared by all scorers)
+    from .ai.ml_scorer import ML_MODEL_PATH, get_risk_scorer
+    if ML_MODEL_PATH:
+        get_risk_scorer()
+    # Startup: schedule incremental refits of per-endpoint anomaly baselines
+    from .ai.anomaly_baselines import BASELINE_REFRESH_SEC, refresh_baselines_periodically
+    refresh_task = None
+    if BASELINE_REFRESH_SEC > 0:
+        refresh_task = asyncio.create_task(refresh_baselines_periodically(BASELINE_REFRESH_SEC))
     yield
-    # Shutdown: nothing to do
+    # Shutdown: stop the baseline refresh schedule
+    if refresh_task is not None:
+        refresh_task.cancel()
 
 
 # Create FastAPI app
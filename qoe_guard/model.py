@@ -26,6 +26,37 @@ class Change:
     criticality_score: float = 0.0
 
 
+@dataclass
+class ChangeGroup:
+    """Changes of one type at the same normalized path (array items folded into ``[*]``)."""
+    path: str  # Normalized path, e.g. "$.items[*].price"
+    change_type: str
+    first_path: str  # Path of the first change
+    count: int = 0
+    sample_indices: List[List[int]] = field(default_factory=list)  # Array indices of the first changes
+    old_value: Any = None  # Values of the first change
+    new_value: Any = None
+    old_type: str = None
+    new_type: str = None
+    is_breaking: bool = False
+    is_critical: bool = False
+    criticality_score: float = 0.0
+    min_delta: Optional[float] = None  # Numeric value changes (new - old)
+    max_delta: Optional[float] = None
+    abs_delta_sum: float = 0.0
+
+    @property
+    def display_path(self) -> str:
+        """Concrete path of a single change, normalized path of a group."""
+        return self.first_path if self.count == 1 else self.path
+
+    @property
+    def max_abs_delta(self) -> float:
+        if self.min_delta is None:
+            return 0.0
+        return max(abs(self.min_delta), abs(self.max_delta))
+
+
 @dataclass
 class SchemaMismatch:
     """Represents a schema validation mismatch."""
@@ -49,6 +80,9 @@ class DiffResult:
     qoe_risk_score: float = 0.0
     brittleness_score: float = 0.0
     summary: str = ""
+    criticality_weighted_sum: float = 0.0
+    critical_type_changes: int = 0  # Type changes on critical paths (policy override input)
+    change_groups: List[ChangeGroup] = field(default_factory=list)
     
 
 # =============================================================================
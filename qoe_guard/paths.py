@@ -0,0 +1,92 @@
+"""
+JSON Path Flattening for QoE-Guard.
+
+Walks a JSON document once and yields (path, value) pairs:
+- Object members as "a.b", array items as "a[0]"
+- Optional root prefix ("$" gives the paths used by the diff engine)
+- Optionally only leaves (scalars and empty containers)
+- Optionally interned path strings, for documents whose paths repeat
+
+Values are yielded by reference; nothing is copied. ``normalize_path``
+gives the index-free form of a path ("$.items[*].price"), shared by all
+items of an array.
+"""
+from __future__ import annotations
+
+import re
+import sys
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+_INDEX_RE = re.compile(r"\[(\d+)\]")
+
+
+def normalize_path(path: str) -> str:
+    """Replace the array indices of a path with ``[*]``."""
+    return _INDEX_RE.sub("[*]", path) if "[" in path else path
+
+
+def path_indices(path: str) -> List[int]:
+    """Get the array indices of a path ("$.a[2].b[0]" -> [2, 0])."""
+    return [int(i) for i in _INDEX_RE.findall(path)] if "[" in path else []
+
+
+def is_leaf(value: Any) -> bool:
+    """Check whether a JSON value has no children."""
+    return not isinstance(value, (dict, list)) or not value
+
+
+def _children(path: str, value: Any) -> List[Tuple[str, Any]]:
+    if isinstance(value, dict):
+        return [(f"{path}.{key}" if path else str(key), child) for key, child in value.items()]
+    if isinstance(value, list):
+        return [(f"{path}[{i}]", child) for i, child in enumerate(value)]
+    return []
+
+
+def iter_paths(
+    obj: Any,
+    root: str = "",
+    leaves_only: bool = False,
+    intern: bool = False,
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield the (path, value) pairs of a JSON document in document order.
+
+    A parent is yielded before its children; the document itself is not
+    yielded. Uses an explicit stack, so deep documents do not hit the
+    recursion limit.
+
+    Args:
+        obj: JSON document
+        root: Path of the document ("" or "$")
+        leaves_only: Skip values that have children
+        intern: Intern path strings
+
+    Yields:
+        (path, value) pairs
+    """
+    stack = _children(root, obj)
+    stack.reverse()
+    while stack:
+        path, value = stack.pop()
+        if intern:
+            path = sys.intern(path)
+        if is_leaf(value):
+            yield path, value
+            continue
+        if not leaves_only:
+            yield path, value
+        children = _children(path, value)
+        children.reverse()
+        stack.extend(children)
+
+
+def flatten(
+    obj: Any,
+    root: str = "",
+    leaves_only: bool = False,
+    intern: bool = False,
+) -> Dict[str, Any]:
+    """Collect the (path, value) pairs of a JSON document into a dict."""
+    return dict(iter_paths(obj, root, leaves_only, intern))
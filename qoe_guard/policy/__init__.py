@@ -1,10 +1,13 @@
 """Policy engine module."""
 from .engine import evaluate_policy, PolicyDecision
 from .config import PolicyConfig, DEFAULT_POLICY
+from .compiled import CompiledPolicy, compile_policy
 
 __all__ = [
     "evaluate_policy",
     "PolicyDecision",
     "PolicyConfig",
     "DEFAULT_POLICY",
+    "CompiledPolicy",
+    "compile_policy",
 ]
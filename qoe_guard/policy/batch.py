@@ -0,0 +1,259 @@
+"""
+Batch Policy Evaluation.
+
+Evaluates a policy over all operations of a run in one vectorized pass:
+- Inputs are per-operation score columns (brittleness, QoE risk, critical
+  type changes, drift type, drift severity); NaN/None means "not evaluated"
+- Every rule is applied to a whole column at once
+- Produces per-operation decisions, per-rule outcomes and the aggregate
+  decision of the run (skipped operations are excluded)
+
+Decisions match ``evaluate_policy`` called once per operation. The input
+columns of a run are stored with it (``ValidationRun.policy_inputs``, keyed
+by ``POLICY_INPUT_COLUMNS``) so its decision can be replayed later.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .config import PolicyConfig, DEFAULT_POLICY
+from .compiled import CompiledPolicy, compile_policy
+from ..scoring.drift import DriftType
+
+
+# Decision codes (ordered by severity, so the worst decision is the maximum)
+PASS, WARN, FAIL = 0, 1, 2
+DECISIONS = ("PASS", "WARN", "FAIL")
+
+# Drift severity labels -> score (as reported by evaluate_policy)
+DRIFT_SEVERITY_SCORES = {"critical": 1.0, "high": 0.75, "medium": 0.5, "low": 0.25}
+
+# Recommendations of violated rules (as given by evaluate_policy); undocumented
+# drift carries its own recommendations in its drift classification
+THRESHOLD_RECOMMENDATIONS = {
+    "brittleness": {
+        FAIL: "Reduce schema complexity or address top brittleness contributors",
+        WARN: "Consider simplifying API contract",
+    },
+    "qoe_risk": {
+        FAIL: "Review changes to critical paths",
+        WARN: "Verify QoE-impacting changes are intentional",
+    },
+}
+CRITICAL_TYPE_CHANGE_RECOMMENDATION = "Type changes on critical paths are high-risk; ensure backward compatibility"
+DRIFT_RECOMMENDATIONS = {
+    DriftType.SPEC_DRIFT.value: "Update baselines to reflect spec changes",
+    DriftType.RUNTIME_DRIFT.value: "Investigate runtime behavior changes",
+}
+
+# Stored per-operation input columns (evaluate_policy_batch arguments)
+POLICY_INPUT_COLUMNS = (
+    "operation_ids", "brittleness", "qoe_risk", "critical_type_changes", "drift_types", "drift_severity",
+)
+
+
+def _column(values: Optional[Sequence[Any]], n: int) -> np.ndarray:
+    if values is None:
+        return np.full(n, np.nan)
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _drift_column(values: Optional[Sequence[Any]], n: int) -> np.ndarray:
+    if values is None:
+        return np.full(n, "", dtype=object)
+    return np.array([getattr(v, "value", v) or "" for v in values], dtype=object)
+
+
+def _severity_column(values: Optional[Sequence[Any]], n: int) -> np.ndarray:
+    if values is None:
+        return np.full(n, np.nan)
+    return np.array([
+        np.nan if v is None else DRIFT_SEVERITY_SCORES.get(v, 0.0) if isinstance(v, str) else float(v)
+        for v in values
+    ])
+
+
+def _threshold_codes(scores: np.ndarray, fail_threshold: float, warn_threshold: float) -> np.ndarray:
+    # NaN compares False, so operations that were not scored pass
+    return np.where(scores >= fail_threshold, FAIL, np.where(scores >= warn_threshold, WARN, PASS)).astype(np.int8)
+
+
+@dataclass
+class BatchPolicyDecision:
+    """Per-operation and aggregate results of a batch policy evaluation."""
+    decisions: np.ndarray  # Per-operation decision codes (PASS/WARN/FAIL)
+    ci_gate_block: np.ndarray  # Per-operation CI gate block flags
+    skipped: np.ndarray  # Operations in the policy's skip list
+    brittleness: np.ndarray  # Decision code of the brittleness threshold rule
+    qoe_risk: np.ndarray  # Decision code of the QoE risk threshold rule
+    critical_type_changes: np.ndarray  # Critical type change override triggered
+    drift: np.ndarray  # Decision code of the drift rules
+    drift_types: np.ndarray  # Input drift type values ("" = not evaluated)
+    decision: str  # Aggregate decision (worst non-skipped operation)
+    aggregate_ci_gate_block: bool
+    counts: Dict[str, int]
+    scores: Dict[str, np.ndarray]  # Input score columns (NaN = not evaluated)
+    policy_version: str
+    operation_ids: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.decisions)
+
+    @property
+    def labels(self) -> List[str]:
+        """Per-operation decisions as PASS/WARN/FAIL."""
+        return [DECISIONS[code] for code in self.decisions.tolist()]
+
+    def rules(self, index: int) -> List[str]:
+        """Names of the rules an operation violated."""
+        rules = []
+        if self.brittleness[index]:
+            rules.append("brittleness_threshold")
+        if self.qoe_risk[index]:
+            rules.append("qoe_risk_threshold")
+        if self.critical_type_changes[index]:
+            rules.append("critical_type_changes")
+        if self.drift[index]:
+            rules.append("drift")
+        return rules
+
+    def recommendations(self) -> List[str]:
+        """Recommendations for the rules violated by non-skipped operations (deduped, in rule order)."""
+        evaluated = ~self.skipped
+        recommendations = []
+        for rule, hints in THRESHOLD_RECOMMENDATIONS.items():
+            codes = set(np.unique(getattr(self, rule)[evaluated]).tolist())
+            recommendations.extend(hints[code] for code in (FAIL, WARN) if code in codes)
+        if self.critical_type_changes[evaluated].any():
+            recommendations.append(CRITICAL_TYPE_CHANGE_RECOMMENDATION)
+        drifted = set(self.drift_types[evaluated & (self.drift > PASS)].tolist())
+        recommendations.extend(hint for drift_type, hint in DRIFT_RECOMMENDATIONS.items() if drift_type in drifted)
+        return recommendations
+
+    def failing(self) -> List[int]:
+        """Indices of operations that failed."""
+        return np.flatnonzero(self.decisions == FAIL).tolist()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary (per-operation decisions keyed by operation id if given)."""
+        keys = self.operation_ids or [str(i) for i in range(len(self))]
+        return {
+            "decision": self.decision,
+            "ci_gate_block": self.aggregate_ci_gate_block,
+            "counts": self.counts,
+            "policy_version": self.policy_version,
+            "recommendations": self.recommendations(),
+            "operations": {
+                key: {"decision": label, "skipped": bool(skipped), "rules": self.rules(i)}
+                for i, (key, label, skipped) in enumerate(zip(keys, self.labels, self.skipped.tolist()))
+            },
+        }
+
+
+def evaluate_policy_batch(
+    brittleness: Optional[Sequence[Optional[float]]] = None,
+    qoe_risk: Optional[Sequence[Optional[float]]] = None,
+    drift_types: Optional[Sequence[Union[DriftType, str, None]]] = None,
+    policy: Optional[Union[PolicyConfig, CompiledPolicy]] = None,
+    operation_ids: Optional[Sequence[Optional[str]]] = None,
+    critical_type_changes: Optional[Sequence[Optional[int]]] = None,
+    drift_severity: Optional[Sequence[Union[float, str, None]]] = None,
+) -> BatchPolicyDecision:
+    """
+    Evaluate a policy over many operations at once.
+
+    All columns have one entry per operation; a column left out (or a
+    None/NaN entry) means that score was not evaluated for the operation.
+
+    Args:
+        brittleness: Brittleness scores (0-100)
+        qoe_risk: QoE risk scores (0.0-1.0)
+        drift_types: Drift types (DriftType or its value)
+        policy: Policy configuration, stored policy row or compiled policy (uses default if None)
+        operation_ids: Operation IDs (for skip checks)
+        critical_type_changes: Type changes on critical paths (counted with QoE risk)
+        drift_severity: Drift severities (score or low/medium/high/critical)
+
+    Returns:
+        BatchPolicyDecision with per-operation and aggregate decisions
+    """
+    compiled = compile_policy(policy if policy is not None else DEFAULT_POLICY)
+    policy = compiled.policy
+
+    columns = (brittleness, qoe_risk, drift_types, operation_ids, critical_type_changes, drift_severity)
+    lengths = {len(c) for c in columns if c is not None}
+    if len(lengths) > 1:
+        raise ValueError(f"Policy batch columns have different lengths: {sorted(lengths)}")
+    n = lengths.pop() if lengths else 0
+
+    brittleness_scores = _column(brittleness, n)
+    qoe_scores = _column(qoe_risk, n)
+    drift = _drift_column(drift_types, n)
+
+    # 1. Thresholds
+    brittleness_codes = _threshold_codes(
+        brittleness_scores, compiled.brittleness_fail_threshold, compiled.brittleness_warn_threshold
+    )
+    qoe_codes = _threshold_codes(qoe_scores, compiled.qoe_fail_threshold, compiled.qoe_warn_threshold)
+
+    # 2. Critical type change override (only where QoE risk was evaluated)
+    critical_override = np.zeros(n, dtype=bool)
+    if policy.fail_on_critical_type_changes and critical_type_changes is not None:
+        counts = np.nan_to_num(_column(critical_type_changes, n))
+        critical_override = ~np.isnan(qoe_scores) & (counts >= policy.critical_type_change_threshold)
+
+    # 3. Drift
+    drift_codes = np.zeros(n, dtype=np.int8)
+    if policy.fail_on_undocumented_drift:
+        drift_codes[drift == DriftType.UNDOCUMENTED.value] = FAIL
+    if policy.warn_on_spec_drift:
+        drift_codes[drift == DriftType.SPEC_DRIFT.value] = WARN
+    drift_codes[drift == DriftType.RUNTIME_DRIFT.value] = WARN
+
+    decisions = np.maximum.reduce([brittleness_codes, qoe_codes, drift_codes])
+    decisions[critical_override] = FAIL
+
+    # Skipped operations pass
+    skipped = np.zeros(n, dtype=bool)
+    if operation_ids is not None and compiled.skip_operations:
+        skipped = np.fromiter(
+            (bool(op) and compiled.is_skipped(op) for op in operation_ids), dtype=bool, count=n
+        )
+        decisions[skipped] = PASS
+
+    ci_gate_block = np.zeros(n, dtype=bool)
+    if policy.ci_hard_gate:
+        ci_gate_block |= decisions == FAIL
+    if policy.require_approval_on_warn:
+        ci_gate_block |= decisions == WARN
+
+    evaluated = decisions[~skipped]
+    aggregate = int(evaluated.max()) if evaluated.size else PASS
+    tallies = np.bincount(evaluated, minlength=len(DECISIONS)).tolist()
+
+    return BatchPolicyDecision(
+        decisions=decisions,
+        ci_gate_block=ci_gate_block,
+        skipped=skipped,
+        brittleness=brittleness_codes,
+        qoe_risk=qoe_codes,
+        critical_type_changes=critical_override,
+        drift=drift_codes,
+        drift_types=drift,
+        decision=DECISIONS[aggregate],
+        aggregate_ci_gate_block=bool(ci_gate_block[~skipped].any()),
+        counts={
+            **{label.lower(): count for label, count in zip(DECISIONS, tallies)},
+            "skipped": int(skipped.sum()),
+        },
+        scores={
+            "brittleness": brittleness_scores,
+            "qoe_risk": qoe_scores,
+            "drift_severity": _severity_column(drift_severity, n),
+        },
+        policy_version=policy.version,
+        operation_ids=list(operation_ids) if operation_ids is not None else None,
+    )
@@ -0,0 +1,170 @@
+"""
+Compiled Policies.
+
+Precomputes everything per-operation evaluation needs from a policy:
+- Allowed drift paths compiled into one matcher (exact paths in a set,
+  wildcard patterns in one regular expression)
+- Skipped operations as a set
+- Thresholds as plain floats
+
+Compiled policies are cached by policy name and version (and recompiled if
+a policy of the same version has different settings).
+
+Allow-list patterns:
+- ``$.ads.tracking``: exactly this path
+- ``$.ads*`` / ``*.beacon``: any path with this prefix / suffix
+- ``$.items[*].price``: ``[*]`` matches any array index
+- ``$.ads.*.url``: ``*`` inside a pattern matches one path segment
+- ``$.ads.**``: ``**`` matches any number of segments
+"""
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Pattern, Tuple
+
+from .config import PolicyConfig
+
+
+# Paths remembered per compiled policy before the memo is reset
+MAX_MEMO_PATHS = 100_000
+
+_TOKEN_RE = re.compile(r"\*\*|\[\*\]|\*")
+
+
+def _pattern_regex(pattern: str) -> str:
+    """Translate an allow-list pattern into a regular expression."""
+    # A single leading or trailing "*" matches any remainder (prefix/suffix patterns)
+    leading = pattern.startswith("*") and not pattern.startswith("**")
+    trailing = pattern.endswith("*") and not pattern.endswith("**") and not pattern.endswith("[*]")
+    body = pattern[1 if leading else 0:len(pattern) - 1 if trailing else len(pattern)]
+
+    parts = []
+    position = 0
+    for match in _TOKEN_RE.finditer(body):
+        parts.append(re.escape(body[position:match.start()]))
+        token = match.group()
+        if token == "**":
+            parts.append(r".*")
+        elif token == "[*]":
+            parts.append(r"\[\d+\]")
+        else:
+            parts.append(r"[^.\[\]]*")
+        position = match.end()
+    parts.append(re.escape(body[position:]))
+
+    return (".*" if leading else "") + "".join(parts) + (".*" if trailing else "")
+
+
+@dataclass
+class CompiledPolicy:
+    """A policy prepared for fast repeated evaluation."""
+    policy: PolicyConfig
+    fingerprint: Tuple[Any, ...]  # Field values at compile time (see _fingerprint)
+    skip_operations: FrozenSet[str]
+    exact_allowed_paths: FrozenSet[str]
+    allowed_path_regex: Optional[Pattern[str]]
+    brittleness_fail_threshold: float
+    brittleness_warn_threshold: float
+    qoe_fail_threshold: float
+    qoe_warn_threshold: float
+    _memo: Dict[str, bool] = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def version(self) -> str:
+        return self.policy.version
+
+    @property
+    def has_allow_list(self) -> bool:
+        return bool(self.exact_allowed_paths) or self.allowed_path_regex is not None
+
+    def is_skipped(self, operation_id: Optional[str]) -> bool:
+        """Check whether an operation is in the skip list."""
+        return operation_id is not None and operation_id in self.skip_operations
+
+    def is_allowed(self, path: str) -> bool:
+        """Check whether a path matches the allowed drift paths."""
+        if path in self.exact_allowed_paths:
+            return True
+        if self.allowed_path_regex is None:
+            return False
+        allowed = self._memo.get(path)
+        if allowed is None:
+            if len(self._memo) >= MAX_MEMO_PATHS:
+                self._memo.clear()
+            allowed = self._memo[path] = self.allowed_path_regex.fullmatch(path) is not None
+        return allowed
+
+    def filter_paths(self, paths: Iterable[str]) -> List[str]:
+        """Drop the allowed drift paths from changed paths."""
+        if not self.has_allow_list:
+            return list(paths)
+        return [p for p in paths if not self.is_allowed(p)]
+
+
+def _fingerprint(policy: PolicyConfig) -> Tuple[Any, ...]:
+    """
+    Field values of a policy, in declaration order.
+
+    Much cheaper than ``to_dict``; equal values give equal fingerprints
+    whether or not the policy object is the same.
+    """
+    return tuple(vars(policy).values())
+
+
+def _compile(policy: PolicyConfig, fingerprint: Tuple[Any, ...]) -> CompiledPolicy:
+    exact = []
+    patterns = []
+    for pattern in policy.allowed_drift_paths or []:
+        if "*" in pattern:
+            patterns.append(f"(?:{_pattern_regex(pattern)})")
+        else:
+            exact.append(pattern)
+    return CompiledPolicy(
+        policy=policy,
+        fingerprint=fingerprint,
+        skip_operations=frozenset(policy.skip_operations or []),
+        exact_allowed_paths=frozenset(exact),
+        allowed_path_regex=re.compile("|".join(patterns)) if patterns else None,
+        brittleness_fail_threshold=float(policy.brittleness_fail_threshold),
+        brittleness_warn_threshold=float(policy.brittleness_warn_threshold),
+        qoe_fail_threshold=float(policy.qoe_fail_threshold),
+        qoe_warn_threshold=float(policy.qoe_warn_threshold),
+    )
+
+
+_compiled: Dict[Tuple[str, str], CompiledPolicy] = {}
+_compiled_lock = threading.Lock()
+
+
+def compile_policy(policy: Any) -> CompiledPolicy:
+    """
+    Get the compiled form of a policy (cached by name and version).
+
+    Args:
+        policy: PolicyConfig, a stored PolicyConfig row, or an already compiled policy
+    """
+    if isinstance(policy, CompiledPolicy):
+        return policy
+    if not isinstance(policy, PolicyConfig):
+        policy = PolicyConfig.from_record(policy)
+
+    fingerprint = _fingerprint(policy)
+    key = (policy.name, policy.version)
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is not None and compiled.fingerprint == fingerprint:
+            return compiled
+
+    # Lists are copied, so changing them in place later is detected
+    compiled = _compile(policy, tuple(list(v) if isinstance(v, list) else v for v in fingerprint))
+    with _compiled_lock:
+        _compiled[key] = compiled
+    return compiled
+
+
+def clear_compiled_policies() -> None:
+    """Drop all cached compiled policies."""
+    with _compiled_lock:
+        _compiled.clear()
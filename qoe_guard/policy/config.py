@@ -99,6 +99,22 @@ class PolicyConfig:
             max_qoe_degradation_for_promotion=data.get("max_qoe_degradation_for_promotion", 0.05),
         )
 
+    @classmethod
+    def from_record(cls, record: Any) -> "PolicyConfig":
+        """Create from a stored policy (``db.models.PolicyConfig`` row); unset columns keep their defaults."""
+        columns = (
+            "name", "version", "description",
+            "brittleness_fail_threshold", "brittleness_warn_threshold",
+            "qoe_fail_threshold", "qoe_warn_threshold",
+            "fail_on_critical_type_changes", "fail_on_undocumented_drift", "warn_on_spec_drift",
+            "allowed_drift_paths", "skip_operations",
+        )
+        return cls.from_dict({
+            name: getattr(record, name)
+            for name in columns
+            if getattr(record, name, None) is not None
+        })
+
 
 # Default policy instance
 DEFAULT_POLICY = PolicyConfig()
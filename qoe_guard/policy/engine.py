@@ -7,9 +7,10 @@ PASS/WARN/FAIL decisions with explanations and recommendations.
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 
 from .config import PolicyConfig, DEFAULT_POLICY
+from .compiled import CompiledPolicy, compile_policy
 from ..scoring.brittleness import BrittlenessResult
 from ..scoring.qoe_risk import QoERiskResult
 from ..scoring.drift import DriftClassification, DriftType
@@ -40,7 +41,7 @@ def evaluate_policy(
     brittleness: Optional[BrittlenessResult] = None,
     qoe_risk: Optional[QoERiskResult] = None,
     drift: Optional[DriftClassification] = None,
-    policy: Optional[PolicyConfig] = None,
+    policy: Optional[Union[PolicyConfig, CompiledPolicy]] = None,
     operation_id: Optional[str] = None,
     changed_paths: Optional[List[str]] = None,
 ) -> PolicyDecision:
@@ -51,22 +52,22 @@ def evaluate_policy(
         brittleness: Brittleness scoring result
         qoe_risk: QoE risk scoring result
         drift: Drift classification result
-        policy: Policy configuration (uses default if None)
+        policy: Policy configuration, stored policy row or compiled policy (uses default if None)
         operation_id: Operation ID (for skip checks)
         changed_paths: List of changed JSON paths (for allow-list checks)
     
     Returns:
         PolicyDecision with PASS/WARN/FAIL and explanations
     """
-    if policy is None:
-        policy = DEFAULT_POLICY
+    compiled = compile_policy(policy if policy is not None else DEFAULT_POLICY)
+    policy = compiled.policy
     
     violations: List[PolicyViolation] = []
     recommendations: List[str] = []
     scores: Dict[str, float] = {}
     
     # Check if operation should be skipped
-    if operation_id and operation_id in policy.skip_operations:
+    if operation_id and compiled.is_skipped(operation_id):
         return PolicyDecision(
             decision="PASS",
             ci_gate_block=False,
@@ -78,18 +79,13 @@ def evaluate_policy(
         )
     
     # Filter allowed drift paths
-    filtered_paths = changed_paths or []
-    if policy.allowed_drift_paths:
-        filtered_paths = [
-            p for p in filtered_paths
-            if not _path_in_allow_list(p, policy.allowed_drift_paths)
-        ]
+    filtered_paths = compiled.filter_paths(changed_paths or [])
     
     # 1. Evaluate Brittleness
     if brittleness:
         scores["brittleness"] = brittleness.score
         
-        if brittleness.score >= policy.brittleness_fail_threshold:
+        if brittleness.score >= compiled.brittleness_fail_threshold:
             violations.append(PolicyViolation(
                 rule="brittleness_threshold",
                 severity="error",
@@ -105,7 +101,7 @@ def evaluate_policy(
             ))
             recommendations.append("Reduce schema complexity or address top brittleness contributors")
         
-        elif brittleness.score >= policy.brittleness_warn_threshold:
+        elif brittleness.score >= compiled.brittleness_warn_threshold:
             violations.append(PolicyViolation(
                 rule="brittleness_threshold",
                 severity="warning",
@@ -118,7 +114,7 @@ def evaluate_policy(
     if qoe_risk:
         scores["qoe_risk"] = qoe_risk.risk_score
         
-        if qoe_risk.risk_score >= policy.qoe_fail_threshold:
+        if qoe_risk.risk_score >= compiled.qoe_fail_threshold:
             violations.append(PolicyViolation(
                 rule="qoe_risk_threshold",
                 severity="error",
@@ -134,7 +130,7 @@ def evaluate_policy(
             ))
             recommendations.append("Review changes to critical paths")
         
-        elif qoe_risk.risk_score >= policy.qoe_warn_threshold:
+        elif qoe_risk.risk_score >= compiled.qoe_warn_threshold:
             violations.append(PolicyViolation(
                 rule="qoe_risk_threshold",
                 severity="warning",
@@ -231,18 +227,6 @@ def _compute_decision(violations: List[PolicyViolation]) -> str:
         return "PASS"
 
 
-def _path_in_allow_list(path: str, allow_list: List[str]) -> bool:
-    """Check if a path matches any pattern in the allow list."""
-    for pattern in allow_list:
-        if pattern == path:
-            return True
-        if pattern.endswith("*") and path.startswith(pattern[:-1]):
-            return True
-        if pattern.startswith("*") and path.endswith(pattern[1:]):
-            return True
-    return False
-
-
 def format_decision_for_ci(decision: PolicyDecision) -> str:
     """Format decision for CI output (e.g., GitHub Actions)."""
     lines = []
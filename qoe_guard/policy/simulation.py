@@ -0,0 +1,280 @@
+"""
+What-If Policy Simulation.
+
+Replays a candidate policy over stored validation runs to show how their
+decisions would change, without re-running any validation:
+- Runs are streamed from the database in chunks (paged by id); only the
+  per-operation policy inputs stored with each run are read, never the
+  responses
+- The operations of a chunk are evaluated in one pass with
+  ``evaluate_policy_batch`` and aggregated per run (worst non-skipped
+  operation), exactly as the run was gated
+- Candidate decisions are compared with the stored decisions, or with a
+  replay of a baseline policy (e.g. the active one)
+
+Runs without a decision (still running or failed to complete) are ignored.
+Decided runs stored without policy inputs (scored before inputs were kept)
+are replayed as one operation with the run's own scores, drift type and
+reasons, and counted as approximated; runs without any scores are counted
+as skipped, not treated as zero scores.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..db.ingest import LOOKUP_CHUNK_SIZE
+from ..db.models import ValidationRun
+from .batch import DECISIONS, POLICY_INPUT_COLUMNS, BatchPolicyDecision, evaluate_policy_batch
+from .compiled import CompiledPolicy, compile_policy
+from .config import PolicyConfig
+
+
+# Flipped runs listed in a simulation report (all are counted)
+MAX_FLIPPED_RUNS = 100
+
+_DECISION_CODES = {label: code for code, label in enumerate(DECISIONS)}
+
+
+@dataclass
+class FlippedRun:
+    """A run whose decision would change under the candidate policy."""
+    run_id: str
+    before: str
+    after: str
+    started_at: Optional[datetime]
+    rules: List[str]  # Rules the run violates under the candidate policy
+
+
+@dataclass
+class PolicySimulation:
+    """Outcome of replaying a candidate policy over stored runs."""
+    policy_version: str
+    compared_to: str  # "stored" or the version of the baseline policy
+    total_runs: int = 0  # Replayed runs
+    approximated_runs: int = 0  # Replayed from run-level scores (no stored policy inputs)
+    skipped_runs: int = 0  # Decided runs without policy inputs or scores (not replayed)
+    before: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(DECISIONS, 0))
+    after: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(DECISIONS, 0))
+    transitions: Dict[str, int] = field(default_factory=dict)  # "PASS->FAIL" -> runs
+    flipped_total: int = 0
+    flipped: List[FlippedRun] = field(default_factory=list)
+    duration_ms: int = 0
+
+    @property
+    def deltas(self) -> Dict[str, int]:
+        """Change in runs per decision (after - before)."""
+        return {label: self.after[label] - self.before[label] for label in DECISIONS}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            "policy_version": self.policy_version,
+            "compared_to": self.compared_to,
+            "total_runs": self.total_runs,
+            "approximated_runs": self.approximated_runs,
+            "skipped_runs": self.skipped_runs,
+            "before": self.before,
+            "after": self.after,
+            "deltas": self.deltas,
+            "transitions": self.transitions,
+            "flipped_total": self.flipped_total,
+            "flipped": [
+                {
+                    "run_id": f.run_id,
+                    "before": f.before,
+                    "after": f.after,
+                    "started_at": f.started_at.isoformat() if f.started_at else None,
+                    "rules": f.rules,
+                }
+                for f in self.flipped
+            ],
+            "duration_ms": self.duration_ms,
+        }
+
+
+def _reason(reasons: Any, section: str, key: str) -> Any:
+    value = reasons.get(section) if isinstance(reasons, dict) else None
+    return value.get(key) if isinstance(value, dict) else None
+
+
+def _run_level_inputs(row: Tuple[Any, ...]) -> Optional[Dict[str, List[Any]]]:
+    """One-operation inputs from the run-level columns (None if the run has no scores)."""
+    _, _, _, _, brittleness, qoe_risk, drift_type, reasons = row
+    if brittleness is None and qoe_risk is None:
+        return None
+    return {
+        "operation_ids": [None],
+        "brittleness": [brittleness],
+        "qoe_risk": [qoe_risk],
+        "critical_type_changes": [_reason(reasons, "qoe_risk", "critical_type_changes")],
+        "drift_types": [drift_type.value if drift_type is not None else None],
+        "drift_severity": [_reason(reasons, "drift", "severity")],
+    }
+
+
+def _replayable(inputs: Any) -> bool:
+    if not isinstance(inputs, dict) or not isinstance(inputs.get("operation_ids"), list):
+        return False
+    n = len(inputs["operation_ids"])
+    return all(isinstance(inputs.get(c), list) and len(inputs[c]) == n for c in POLICY_INPUT_COLUMNS)
+
+
+def iter_run_chunks(
+    db: Session,
+    chunk_size: int = LOOKUP_CHUNK_SIZE,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Iterator[List[Tuple[Any, ...]]]:
+    """
+    Yield the decided validation runs in chunks, paged by id.
+
+    Rows are (id, started_at, decision, policy_inputs, brittleness_score,
+    qoe_risk_score, drift_type, reasons); the run-level columns are only
+    used for runs stored without policy inputs.
+    """
+    last_id = None
+    while True:
+        query = db.query(
+            ValidationRun.id,
+            ValidationRun.started_at,
+            ValidationRun.decision,
+            ValidationRun.policy_inputs,
+            ValidationRun.brittleness_score,
+            ValidationRun.qoe_risk_score,
+            ValidationRun.drift_type,
+            ValidationRun.reasons,
+        ).filter(ValidationRun.decision.isnot(None))
+        if since is not None:
+            query = query.filter(ValidationRun.started_at >= since)
+        if until is not None:
+            query = query.filter(ValidationRun.started_at < until)
+        if last_id is not None:
+            query = query.filter(ValidationRun.id > last_id)
+        rows = query.order_by(ValidationRun.id).limit(chunk_size).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def _evaluate_chunk(
+    inputs: List[Dict[str, List[Any]]],
+    policy: CompiledPolicy,
+) -> Tuple[np.ndarray, BatchPolicyDecision, np.ndarray]:
+    """
+    Replay a policy over the operations of several runs in one batch.
+
+    Returns:
+        (decision code per run, batch decision per operation, run index per operation)
+    """
+    run_index = np.repeat(np.arange(len(inputs)), [len(i["operation_ids"]) for i in inputs])
+    batch = evaluate_policy_batch(
+        policy=policy,
+        **{column: [value for i in inputs for value in i[column]] for column in POLICY_INPUT_COLUMNS},
+    )
+    # Runs without evaluated operations pass
+    decisions = np.zeros(len(inputs), dtype=np.int8)
+    evaluated = ~batch.skipped
+    np.maximum.at(decisions, run_index[evaluated], batch.decisions[evaluated])
+    return decisions, batch, run_index
+
+
+def _run_rules(batch: BatchPolicyDecision, run_index: np.ndarray, run: int) -> List[str]:
+    """Rules violated by the non-skipped operations of a run."""
+    return list(dict.fromkeys(
+        rule
+        for i in np.flatnonzero((run_index == run) & ~batch.skipped).tolist()
+        for rule in batch.rules(i)
+    ))
+
+
+def simulate_policy(
+    db: Session,
+    candidate: Union[PolicyConfig, CompiledPolicy, Any],
+    baseline: Optional[Union[PolicyConfig, CompiledPolicy, Any]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    chunk_size: int = LOOKUP_CHUNK_SIZE,
+    max_flipped: int = MAX_FLIPPED_RUNS,
+) -> PolicySimulation:
+    """
+    Replay a candidate policy over stored validation runs.
+
+    Args:
+        db: Database session
+        candidate: Policy to simulate (config, stored policy row or compiled policy)
+        baseline: Policy to compare with (stored run decisions if None)
+        since: Only runs started at or after this time
+        until: Only runs started before this time
+        chunk_size: Runs read and evaluated per batch
+        max_flipped: Flipped runs listed in the report
+
+    Returns:
+        PolicySimulation with decision counts, transitions and flipped runs
+    """
+    start_time = time.time()
+    candidate = compile_policy(candidate)
+    baseline = compile_policy(baseline) if baseline is not None else None
+    simulation = PolicySimulation(
+        policy_version=candidate.version,
+        compared_to=baseline.version if baseline is not None else "stored",
+    )
+
+    for rows in iter_run_chunks(db, chunk_size, since, until):
+        replayed, inputs = [], []
+        for row in rows:
+            if _replayable(row[3]):
+                run_inputs = row[3]
+            else:
+                run_inputs = _run_level_inputs(row)
+                if run_inputs is None:
+                    simulation.skipped_runs += 1
+                    continue
+                simulation.approximated_runs += 1
+            replayed.append(row)
+            inputs.append(run_inputs)
+        rows = replayed
+        if not rows:
+            continue
+
+        after, result, run_index = _evaluate_chunk(inputs, candidate)
+        if baseline is not None:
+            before = _evaluate_chunk(inputs, baseline)[0]
+        else:
+            before = np.fromiter(
+                (_DECISION_CODES[row[2].value.upper()] for row in rows), dtype=np.int8, count=len(rows)
+            )
+
+        simulation.total_runs += len(rows)
+        for label, count in zip(DECISIONS, np.bincount(before, minlength=len(DECISIONS)).tolist()):
+            simulation.before[label] += count
+        for label, count in zip(DECISIONS, np.bincount(after, minlength=len(DECISIONS)).tolist()):
+            simulation.after[label] += count
+
+        changed = np.flatnonzero(before != after)
+        if not changed.size:
+            continue
+        pairs = before[changed].astype(np.intp) * len(DECISIONS) + after[changed]
+        for pair, count in enumerate(np.bincount(pairs, minlength=len(DECISIONS) ** 2).tolist()):
+            if count:
+                key = f"{DECISIONS[pair // len(DECISIONS)]}->{DECISIONS[pair % len(DECISIONS)]}"
+                simulation.transitions[key] = simulation.transitions.get(key, 0) + count
+        simulation.flipped_total += len(changed)
+
+        for i in changed[:max(0, max_flipped - len(simulation.flipped))].tolist():
+            simulation.flipped.append(FlippedRun(
+                run_id=rows[i][0],
+                before=DECISIONS[before[i]],
+                after=DECISIONS[after[i]],
+                started_at=rows[i][1],
+                rules=_run_rules(result, run_index, i),
+            ))
+
+    simulation.duration_ms = int((time.time() - start_time) * 1000)
+    return simulation
@@ -3,10 +3,16 @@ Criticality Profiles Module.
 
 Defines criticality scores for different API endpoints and JSON paths.
 These profiles determine how much a change impacts QoE.
+
+Criticality does not depend on array indices, so a ``CriticalityResolver``
+resolves each normalized path ("$.items[*].price") once and serves every
+item of an array from its memo.
 """
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
 import re
 
+from ..paths import normalize_path
+
 
 # Default criticality profiles for streaming services
 DEFAULT_CRITICALITY_PROFILES: Dict[str, float] = {
@@ -91,7 +97,7 @@ def get_criticality_for_path(
     # Check exact matches first
     for part in reversed(path_parts):
         # Remove array indices
-        clean_part = re.sub(r'\[\d+\]', '', part)
+        clean_part = re.sub(r'\[(?:\d+|\*)\]', '', part)
         if clean_part in p:
             return p[clean_part]
     
@@ -128,6 +134,65 @@ def get_criticality_for_path(
     return 0.35
 
 
+class CriticalityResolver:
+    """
+    Path criticality under one set of profiles, resolved once per normalized path.
+    
+    Paths are scored with ``get_criticality_for_path`` unless another
+    scoring function (path, profiles) -> score is given, e.g. for the
+    criticality scale of the ML features.
+    """
+    
+    # Normalized paths remembered before the memo is reset
+    MAX_PATHS = 100_000
+    
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, float]] = None,
+        score: Optional[Callable[[str, Optional[Dict[str, float]]], float]] = None,
+    ):
+        self.profiles = profiles
+        self.score = score
+        self._scores: Dict[str, float] = {}
+    
+    def __call__(self, path: str) -> float:
+        key = normalize_path(path)
+        score = self._scores.get(key)
+        if score is None:
+            if len(self._scores) >= self.MAX_PATHS:
+                self._scores.clear()
+            score_path = self.score or get_criticality_for_path
+            score = self._scores[key] = score_path(key, self.profiles)
+        return score
+    
+    def resolve(self, paths: Iterable[str]) -> Dict[str, float]:
+        """Get the criticality of the unique normalized paths among paths."""
+        return {normalize_path(path): self(path) for path in paths}
+    
+    def many(self, paths: Sequence[str]) -> Any:
+        """Criticality of many paths as a NumPy array (each unique path resolved once)."""
+        import numpy as np
+        
+        return np.fromiter((self(path) for path in paths), dtype=float, count=len(paths))
+    
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+_default_resolver = CriticalityResolver()
+
+
+def criticality_resolver(profiles: Optional[Dict[str, float]] = None) -> CriticalityResolver:
+    """
+    Get a criticality resolver.
+    
+    The resolver of the default profiles is shared by the process; one for
+    custom profiles should be created once per run and reused across its
+    operations.
+    """
+    return CriticalityResolver(profiles) if profiles else _default_resolver
+
+
 def get_criticality_for_tags(
     tags: List[str],
     profiles: Optional[Dict[str, float]] = None
@@ -182,7 +247,5 @@ def calculate_criticality_weighted_changes(
     Returns:
         Sum of criticality scores for all changed paths
     """
-    total = 0.0
-    for path in changed_paths:
-        total += get_criticality_for_path(path, profiles)
-    return total
+    resolver = criticality_resolver(profiles)
+    return sum(resolver(path) for path in changed_paths)
@@ -23,6 +23,14 @@ QOE_THRESHOLDS = {
     "warn": 0.45,
 }
 
+# Weight of a change by type in the criticality-weighted sum
+CHANGE_TYPE_WEIGHTS = {
+    "type_changed": 0.4,
+    "removed": 0.3,
+    "added": 0.1,
+    "value_changed": 0.1,
+}
+
 
 def compute_qoe_risk(
     changes_count: int = 0,
@@ -10,15 +10,22 @@ from typing import Any, Dict, List, Optional, Tuple
 import requests
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 
 from .diff import json_diff
 from .features import extract_features, to_dict
-from .model import score, Features
+from .model import score, DiffResult, Features
 from .storage import upsert_scenario, list_scenarios, list_runs, add_run, get_run, get_scenario, delete_scenarios
 from .webhooks import notify_from_env, ValidationResult
-from .swagger_analyzer import analyze_swagger, to_dict as swagger_analysis_to_dict
+from .swagger_analyzer import (
+    analyze_swagger,
+    extract_endpoints,
+    iter_endpoint_tests,
+    stream_swagger_analysis,
+    summarize_analysis,
+    to_dict as swagger_analysis_to_dict,
+)
 
 templates = Jinja2Templates(directory=str(__import__("pathlib").Path(__file__).resolve().parent / "templates"))
 
@@ -117,6 +124,26 @@ def _fetch_json(url: str, *, method: str = "GET", params: Dict[str, Any] | None
 def _human(ts: int) -> str:
     return datetime.fromtimestamp(ts, tz=timezone.utc).astimezone().strftime("%Y-%m-%d %H:%M:%S %Z")
 
+def _format_change_value(value: Any, keep_null: bool = False) -> Any:
+    if value is None and keep_null:
+        return None
+    return json.dumps(value, ensure_ascii=False, indent=2) if isinstance(value, (dict, list)) else str(value)
+
+def _change_records(diff_result: DiffResult, keep_null: bool = False) -> List[Dict[str, Any]]:
+    """Stored form of a diff's changes: one record per change group (array items folded into [*])."""
+    records = []
+    for g in diff_result.change_groups:
+        record = {
+            "path": g.display_path,
+            "change_type": g.change_type,
+            "before": _format_change_value(g.old_value, keep_null),
+            "after": _format_change_value(g.new_value, keep_null),
+        }
+        if g.count > 1:
+            record.update(count=g.count, sample_indices=g.sample_indices, min_delta=g.min_delta, max_delta=g.max_delta)
+        records.append(record)
+    return records
+
 @app.get(
     "/",
     response_class=HTMLResponse,
@@ -200,15 +227,8 @@ def run_validation(v: int = 2):
         "action": decision.action,
         "reasons": decision.reasons,
         "features": to_dict(feats_vector),
-        "changes": [
-            {
-                "path": c.path,
-                "change_type": c.change_type,
-                "before": json.dumps(c.old_value, ensure_ascii=False, indent=2) if isinstance(c.old_value, (dict, list)) else str(c.old_value),
-                "after": json.dumps(c.new_value, ensure_ascii=False, indent=2) if isinstance(c.new_value, (dict, list)) else str(c.new_value),
-            }
-            for c in diff_result.changes
-        ],
+        "changes": _change_records(diff_result),
+        "change_count": len(diff_result.changes),
         "baseline": baseline,
         "candidate": candidate,
     }
@@ -487,15 +507,8 @@ def run_custom(
             "action": decision.action,
             "reasons": decision.reasons,
             "features": to_dict(feats_vector),
-            "changes": [
-                {
-                    "path": c.path,
-                    "change_type": c.change_type,
-                    "before": json.dumps(c.old_value, ensure_ascii=False, indent=2) if isinstance(c.old_value, (dict, list)) else str(c.old_value),
-                    "after": json.dumps(c.new_value, ensure_ascii=False, indent=2) if isinstance(c.new_value, (dict, list)) else str(c.new_value),
-                }
-                for c in diff_result.changes
-            ],
+            "changes": _change_records(diff_result),
+            "change_count": len(diff_result.changes),
             "baseline": baseline,
             "candidate": candidate,
         }
@@ -553,6 +566,10 @@ def run_custom(
     - Timeout issues
     - Invalid responses
     
+    Endpoints are tested concurrently (`concurrency` workers sharing a
+    keep-alive session, `rate_limit_per_host` requests/sec per host) within
+    an optional total `time_budget_sec` (0 = no budget).
+    
     Returns analysis with endpoint health status and recommendations.
     """,
 )
@@ -563,6 +580,9 @@ def analyze_swagger_endpoint(
     headers_json: str = Form(""),
     timeout: int = Form(10),
     test_all: bool = Form(False),
+    concurrency: int = Form(8),
+    rate_limit_per_host: float = Form(10),
+    time_budget_sec: float = Form(0),
 ):
     """Analyze Swagger/OpenAPI spec and test endpoints."""
     try:
@@ -578,11 +598,6 @@ def analyze_swagger_endpoint(
             except json.JSONDecodeError as e:
                 raise ValueError(f"Invalid JSON: {e}")
             
-            # Import the analysis function components
-            from .swagger_analyzer import (
-                extract_endpoints, test_endpoint, EndpointStatus, 
-                SwaggerAnalysis, EndpointTest
-            )
             from .swagger.discovery import _is_openapi_spec
             
             if not _is_openapi_spec(spec_data):
@@ -599,65 +614,30 @@ def analyze_swagger_endpoint(
             if not spec_base_url:
                 spec_base_url = "https://api.example.com"  # Default fallback
             
+            start_time = time.time()
             endpoints = extract_endpoints(spec_data, spec_base_url)
             
-            # Test endpoints
-            endpoint_tests = []
-            for endpoint in endpoints:
-                method = endpoint.get("method", "GET")
-                path = endpoint.get("path", "")
-                full_url = endpoint.get("full_url", endpoint.get("url", ""))
-                
-                # Skip non-GET methods unless test_all is True
-                if not test_all and method.upper() != "GET":
-                    continue
-                
-                try:
-                    test_result = test_endpoint(
-                        method=method,
-                        url=full_url,
-                        headers=headers,
-                        timeout=timeout,
-                    )
-                    endpoint_tests.append(test_result)
-                except Exception as e:
-                    endpoint_tests.append(EndpointTest(
-                        method=method,
-                        path=path,
-                        url=full_url,
-                        status=EndpointStatus.UNKNOWN,
-                        error_message=str(e),
-                    ))
+            # Skip non-GET methods unless test_all is True
+            tested = endpoints if test_all else [e for e in endpoints if e["method"].upper() == "GET"]
             
-            # Calculate statistics
-            healthy_count = sum(1 for t in endpoint_tests if t.status == EndpointStatus.HEALTHY)
-            broken_count = sum(1 for t in endpoint_tests if t.status == EndpointStatus.BROKEN)
-            auth_required_count = sum(1 for t in endpoint_tests if t.status == EndpointStatus.AUTH_REQUIRED)
-            
-            # Generate recommendations
-            recommendations = []
-            if broken_count > 0:
-                recommendations.append(f"{broken_count} endpoint(s) returned error status codes. Check server logs and endpoint implementations.")
-            if auth_required_count > 0:
-                recommendations.append(f"{auth_required_count} endpoint(s) require authentication. Ensure headers are properly configured.")
-            if len(endpoint_tests) == 0:
-                recommendations.append("No endpoints were tested. Check that your OpenAPI spec contains valid path definitions.")
-            
-            start_time = time.time()
-            timeout_count = sum(1 for t in endpoint_tests if t.status == EndpointStatus.TIMEOUT)
+            # Test endpoints concurrently, keeping spec order in the report
+            endpoint_tests = [None] * len(tested)
+            for index, test_result in iter_endpoint_tests(
+                tested,
+                headers=headers,
+                timeout=timeout,
+                max_workers=concurrency,
+                rate_limit_per_host=rate_limit_per_host,
+                time_budget_sec=time_budget_sec or None,
+            ):
+                endpoint_tests[index] = test_result
             
-            analysis = SwaggerAnalysis(
+            analysis = summarize_analysis(
                 swagger_url="(provided as JSON)",
                 base_url=spec_base_url or "",
                 total_endpoints=len(endpoints),
-                tested_endpoints=len(endpoint_tests),
-                healthy_count=healthy_count,
-                broken_count=broken_count,
-                auth_required_count=auth_required_count,
-                timeout_count=timeout_count,
                 endpoint_tests=endpoint_tests,
-                analysis_time_sec=time.time() - start_time,
-                recommendations=recommendations,
+                start_time=start_time,
             )
         elif swagger_url and swagger_url.strip():
             analysis = analyze_swagger(
@@ -666,6 +646,9 @@ def analyze_swagger_endpoint(
                 headers=headers,
                 timeout=timeout,
                 test_all=test_all,
+                max_workers=concurrency,
+                rate_limit_per_host=rate_limit_per_host,
+                time_budget_sec=time_budget_sec or None,
             )
         else:
             raise ValueError("Either swagger_url or swagger_json must be provided")
@@ -675,6 +658,65 @@ def analyze_swagger_endpoint(
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=400)
 
+@app.post(
+    "/api/swagger/analyze/stream",
+    tags=["Swagger Analyzer"],
+    summary="Analyze Swagger/OpenAPI specification with live progress",
+    description="""
+    Same analysis as `/api/swagger/analyze`, streamed as NDJSON
+    (`application/x-ndjson`): a `start` event, one `endpoint` event per
+    endpoint as soon as it finishes, then a `summary` event with the full
+    analysis (or an `error` event).
+    """,
+)
+def analyze_swagger_stream_endpoint(
+    swagger_url: str = Form(""),
+    swagger_json: str = Form(""),
+    base_url: str = Form(""),
+    headers_json: str = Form(""),
+    timeout: int = Form(10),
+    test_all: bool = Form(False),
+    concurrency: int = Form(8),
+    rate_limit_per_host: float = Form(10),
+    time_budget_sec: float = Form(0),
+):
+    """Analyze Swagger/OpenAPI spec and stream endpoint results as they finish."""
+    try:
+        headers = _parse_json_maybe(headers_json, default={})
+        if not isinstance(headers, dict):
+            raise ValueError("headers_json must be a JSON object")
+        
+        spec_data = None
+        if swagger_json and swagger_json.strip():
+            try:
+                spec_data = json.loads(swagger_json.strip())
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON: {e}")
+            
+            from .swagger.discovery import _is_openapi_spec
+            if not _is_openapi_spec(spec_data):
+                raise ValueError("Provided JSON is not a valid OpenAPI/Swagger specification")
+        elif not (swagger_url and swagger_url.strip()):
+            raise ValueError("Either swagger_url or swagger_json must be provided")
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    
+    events = stream_swagger_analysis(
+        swagger_url=swagger_url.strip() or None,
+        spec=spec_data,
+        base_url=base_url.strip() or None,
+        headers=headers,
+        timeout=timeout,
+        test_all=test_all,
+        max_workers=concurrency,
+        rate_limit_per_host=rate_limit_per_host,
+        time_budget_sec=time_budget_sec or None,
+    )
+    return StreamingResponse(
+        (json.dumps(event, ensure_ascii=False) + "\n" for event in events),
+        media_type="application/x-ndjson",
+    )
+
 @app.get("/swagger-analyzer", response_class=HTMLResponse)
 def swagger_analyzer_page(request: Request):
     """Swagger analyzer UI page."""
@@ -1034,15 +1076,7 @@ def dry_run_validation(
         decision = score(feats)
         
         # Format changes for display
-        changes = [
-            {
-                "path": c.path,
-                "change_type": c.change_type,
-                "before": json.dumps(c.old_value, ensure_ascii=False, indent=2) if isinstance(c.old_value, (dict, list)) else str(c.old_value) if c.old_value is not None else None,
-                "after": json.dumps(c.new_value, ensure_ascii=False, indent=2) if isinstance(c.new_value, (dict, list)) else str(c.new_value) if c.new_value is not None else None,
-            }
-            for c in diff_result.changes
-        ]
+        changes = _change_records(diff_result, keep_null=True)
         
         return JSONResponse({
             "success": True,
@@ -1060,7 +1094,7 @@ def dry_run_validation(
                 "reasons": decision.reasons,
                 "features": to_dict(feats_vector),
                 "changes": changes,
-                "change_count": len(changes),
+                "change_count": len(diff_result.changes),
             }
         })
         
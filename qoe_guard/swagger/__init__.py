@@ -2,6 +2,8 @@
 from .discovery import discover_openapi_spec, DiscoveryResult
 from .normalizer import normalize_spec, NormalizedSpec
 from .inventory import extract_operations, NormalizedOperation
+from .spec_diff import diff_specs, index_spec, SpecDiff, SpecChange
+from .search import OperationIndex, IndexedOperation, SearchResult
 
 __all__ = [
     "discover_openapi_spec",
@@ -10,4 +12,11 @@ __all__ = [
     "NormalizedSpec",
     "extract_operations",
     "NormalizedOperation",
+    "diff_specs",
+    "index_spec",
+    "SpecDiff",
+    "SpecChange",
+    "OperationIndex",
+    "IndexedOperation",
+    "SearchResult",
 ]
@@ -15,6 +15,8 @@ import json
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Any, Set
 
+from .spec_diff import diff_specs, index_spec, SpecIndex, spec_change_to_dict
+
 
 @dataclass
 class NormalizedSpec:
@@ -224,64 +226,59 @@ def compare_specs(
     """
     Compare two specs and return differences.
     
+    Unchanged operations are skipped by content hash; changed operations
+    are deep-diffed down to field level (see `spec_diff.diff_specs`).
+    Accepts raw spec dicts or prebuilt `SpecIndex` objects, so callers
+    comparing many versions can index each spec once.
+    
     Returns:
-        Dictionary with added, removed, and changed paths
+        Dictionary with added, removed, and changed paths plus
+        field-level breaking changes
     """
-    paths1 = set(spec1.get("paths", {}).keys())
-    paths2 = set(spec2.get("paths", {}).keys())
+    index1 = spec1 if isinstance(spec1, SpecIndex) else index_spec(spec1)
+    index2 = spec2 if isinstance(spec2, SpecIndex) else index_spec(spec2)
+    
+    paths1 = set(index1.paths)
+    paths2 = set(index2.paths)
     
     added = paths2 - paths1
     removed = paths1 - paths2
     common = paths1 & paths2
     
+    diff = diff_specs(index1, index2)
+    
     changed = []
-    for path in common:
-        p1 = spec1["paths"][path]
-        p2 = spec2["paths"][path]
-        
-        # Check methods
-        methods1 = set(k for k in p1.keys() if k in ["get", "post", "put", "patch", "delete", "head", "options"])
-        methods2 = set(k for k in p2.keys() if k in ["get", "post", "put", "patch", "delete", "head", "options"])
+    for path in sorted(common):
+        methods1 = index1.paths[path]
+        methods2 = index2.paths[path]
         
         if methods1 != methods2:
             changed.append({
                 "path": path,
                 "type": "methods_changed",
-                "before": list(methods1),
-                "after": list(methods2),
+                "before": sorted(methods1),
+                "after": sorted(methods2),
             })
-        else:
-            # Check each method for schema changes
-            for method in methods1:
-                if _method_changed(p1.get(method, {}), p2.get(method, {})):
-                    changed.append({
-                        "path": path,
-                        "method": method,
-                        "type": "schema_changed",
-                    })
+        
+        # Check each shared method for schema changes
+        for method in sorted(methods1 & methods2):
+            field_changes = diff.changed_operations.get(f"{method.upper()} {path}")
+            if field_changes:
+                changed.append({
+                    "path": path,
+                    "method": method,
+                    "type": "schema_changed",
+                    "is_breaking": any(c.is_breaking for c in field_changes),
+                    "changes": [spec_change_to_dict(c) for c in field_changes],
+                })
     
     return {
-        "added_paths": list(added),
-        "removed_paths": list(removed),
+        "added_paths": sorted(added),
+        "removed_paths": sorted(removed),
         "changed": changed,
-        "is_breaking": len(removed) > 0 or any(c.get("type") == "schema_changed" for c in changed),
+        "added_operations": diff.added_operations,
+        "removed_operations": diff.removed_operations,
+        "unchanged_operations": diff.unchanged_operations,
+        "breaking_changes": [spec_change_to_dict(c) for c in diff.breaking_changes],
+        "is_breaking": diff.is_breaking,
     }
-
-
-def _method_changed(method1: Dict, method2: Dict) -> bool:
-    """Check if a method definition has changed significantly."""
-    # Compare parameters
-    params1 = {p.get("name"): p for p in method1.get("parameters", [])}
-    params2 = {p.get("name"): p for p in method2.get("parameters", [])}
-    
-    if set(params1.keys()) != set(params2.keys()):
-        return True
-    
-    # Compare responses
-    resp1 = set(method1.get("responses", {}).keys())
-    resp2 = set(method2.get("responses", {}).keys())
-    
-    if resp1 != resp2:
-        return True
-    
-    return False
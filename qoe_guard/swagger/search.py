@@ -0,0 +1,359 @@
+"""
+Indexed Operation Search.
+
+Per-spec operation index for large inventories:
+- Inverted index over path tokens, tags, operationId and summary
+- Method, tag and deprecated bitsets (Python ints, one bit per operation)
+- Prefix search via a sorted vocabulary, fuzzy search via delete neighbourhoods
+- Incremental rebuilds that reuse token analysis of unchanged operations
+"""
+from __future__ import annotations
+
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Tuple, FrozenSet
+
+
+_SPLIT_RE = re.compile(r"[^0-9a-zA-Z]+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+# Tokens shorter than this are only matched exactly or by prefix
+FUZZY_MIN_LENGTH = 4
+
+
+@dataclass(frozen=True)
+class IndexedOperation:
+    """Lightweight operation fields kept in the search index."""
+    id: str
+    operation_id: Optional[str]
+    method: str
+    path: str
+    tags: Tuple[str, ...]
+    summary: Optional[str]
+    deprecated: bool
+
+    @classmethod
+    def from_object(cls, op: Any, id: Optional[str] = None) -> "IndexedOperation":
+        """Build from an Operation row, NormalizedOperation or dict."""
+        get = op.get if isinstance(op, dict) else lambda name, default=None: getattr(op, name, default)
+        return cls(
+            id=id if id is not None else get("id") or f"{get('method')} {get('path')}",
+            operation_id=get("operation_id"),
+            method=(get("method") or "").upper(),
+            path=get("path") or "",
+            tags=tuple(get("tags") or ()),
+            summary=get("summary"),
+            deprecated=bool(get("deprecated", False)),
+        )
+
+    @property
+    def signature(self) -> Tuple:
+        """Searchable content; operations with equal signatures tokenize identically."""
+        return (self.operation_id, self.path, self.tags, self.summary)
+
+
+@dataclass
+class SearchResult:
+    """A page of matching operations."""
+    operations: List[IndexedOperation]
+    total: int
+    offset: int
+    limit: int
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into lowercase search tokens.
+
+    Splits on punctuation and camelCase boundaries, and keeps each compound
+    word as well ("userId" -> "userid", "user", "id").
+    """
+    if not text:
+        return []
+    tokens = []
+    for word in _SPLIT_RE.split(text):
+        if not word:
+            continue
+        lower = word.lower()
+        tokens.append(lower)
+        parts = _CAMEL_RE.findall(word)
+        if len(parts) > 1:
+            tokens.extend(p.lower() for p in parts)
+    return tokens
+
+
+def operation_tokens(op: IndexedOperation) -> FrozenSet[str]:
+    """Get the search tokens of an operation."""
+    tokens = set(tokenize(op.path))
+    tokens.update(tokenize(op.operation_id))
+    tokens.update(tokenize(op.summary))
+    for tag in op.tags:
+        tokens.add(tag.lower())
+        tokens.update(tokenize(tag))
+    return frozenset(tokens)
+
+
+def _deletes(token: str) -> Iterator[str]:
+    """Single-character deletions of a token."""
+    for i in range(len(token)):
+        yield token[:i] + token[i + 1:]
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Check whether two strings are at most one insert/delete/substitution/transposition apart."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        return (
+            i + 1 < len(a)
+            and a[i] == b[i + 1]
+            and a[i + 1] == b[i]
+            and a[i + 2:] == b[i + 2:]
+        )
+    return a[i:] == b[i + 1:]
+
+
+def _iter_bits(bits: int) -> Iterator[int]:
+    """Iterate set bit positions in ascending order."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class OperationIndex:
+    """
+    Search index over the operations of one spec.
+
+    Operations keep their inventory order; bit ``i`` of every bitset refers
+    to ``operations[i]``.
+    """
+
+    def __init__(
+        self,
+        operations: Iterable[IndexedOperation],
+        previous: Optional["OperationIndex"] = None,
+    ):
+        """
+        Build the index.
+
+        Args:
+            operations: Operations in inventory order
+            previous: Index of an earlier snapshot; token sets of operations
+                whose searchable content is unchanged are reused from it
+        """
+        self.operations: List[IndexedOperation] = list(operations)
+        self.all_bits = (1 << len(self.operations)) - 1
+        self.method_bits: Dict[str, int] = {}
+        self.tag_bits: Dict[str, int] = {}
+        self.deprecated_bits = 0
+        self.token_bits: Dict[str, int] = {}
+        self._token_sets: Dict[Tuple, FrozenSet[str]] = {}
+        self.reused = 0
+
+        reusable = previous._token_sets if previous is not None else {}
+
+        for i, op in enumerate(self.operations):
+            bit = 1 << i
+            self.method_bits[op.method] = self.method_bits.get(op.method, 0) | bit
+            for tag in op.tags:
+                self.tag_bits[tag] = self.tag_bits.get(tag, 0) | bit
+            if op.deprecated:
+                self.deprecated_bits |= bit
+
+            signature = op.signature
+            tokens = self._token_sets.get(signature)
+            if tokens is None:
+                tokens = reusable.get(signature)
+                if tokens is None:
+                    tokens = operation_tokens(op)
+                else:
+                    self.reused += 1
+                self._token_sets[signature] = tokens
+            for token in tokens:
+                self.token_bits[token] = self.token_bits.get(token, 0) | bit
+
+        self.vocabulary: List[str] = sorted(self.token_bits)
+        self._delete_map: Dict[str, List[str]] = {}
+        for token in self.vocabulary:
+            if len(token) >= FUZZY_MIN_LENGTH:
+                for variant in _deletes(token):
+                    self._delete_map.setdefault(variant, []).append(token)
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def _prefix_bits(self, prefix: str) -> int:
+        bits = 0
+        i = bisect_left(self.vocabulary, prefix)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(prefix):
+            bits |= self.token_bits[self.vocabulary[i]]
+            i += 1
+        return bits
+
+    def _fuzzy_bits(self, term: str) -> int:
+        if len(term) < FUZZY_MIN_LENGTH:
+            return 0
+        candidates = set(self._delete_map.get(term, ()))
+        for variant in _deletes(term):
+            if variant in self.token_bits:
+                candidates.add(variant)
+            candidates.update(self._delete_map.get(variant, ()))
+        bits = 0
+        for token in candidates:
+            if _within_one_edit(term, token):
+                bits |= self.token_bits[token]
+        return bits
+
+    def match(self, query: Optional[str], fuzzy: bool = False) -> int:
+        """
+        Get the bitset of operations matching every term of a query.
+
+        Each term matches tokens it is a prefix of; with ``fuzzy``, a term
+        with no prefix match also matches tokens one edit away.
+        """
+        bits = self.all_bits
+        for term in set(tokenize(query)):
+            term_bits = self._prefix_bits(term)
+            if not term_bits and fuzzy:
+                term_bits = self._fuzzy_bits(term)
+            bits &= term_bits
+            if not bits:
+                break
+        return bits
+
+    def filter_bits(
+        self,
+        tags: Optional[List[str]] = None,
+        methods: Optional[List[str]] = None,
+        deprecated: Optional[bool] = None,
+    ) -> int:
+        """Get the bitset of operations matching the filters."""
+        bits = self.all_bits
+        if tags:
+            tag_bits = 0
+            for tag in tags:
+                tag_bits |= self.tag_bits.get(tag, 0)
+            bits &= tag_bits
+        if methods:
+            method_bits = 0
+            for method in methods:
+                method_bits |= self.method_bits.get(method.upper(), 0)
+            bits &= method_bits
+        if deprecated is True:
+            bits &= self.deprecated_bits
+        elif deprecated is False:
+            bits &= ~self.deprecated_bits
+        return bits
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        methods: Optional[List[str]] = None,
+        deprecated: Optional[bool] = None,
+        fuzzy: bool = False,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> SearchResult:
+        """
+        Search and filter operations.
+
+        Args:
+            query: Free-text query over path, operationId, summary and tags
+            tags: Filter by tag names (any of)
+            methods: Filter by HTTP methods (any of)
+            deprecated: Filter by deprecated status
+            fuzzy: Allow one typo per query term
+            offset: Number of matches to skip
+            limit: Maximum number of operations to return
+
+        Returns:
+            SearchResult with the requested page, in inventory order
+        """
+        bits = self.filter_bits(tags, methods, deprecated)
+        if bits and query:
+            bits &= self.match(query, fuzzy=fuzzy)
+
+        page = []
+        for position, i in enumerate(_iter_bits(bits)):
+            if position < offset:
+                continue
+            if len(page) >= limit:
+                break
+            page.append(self.operations[i])
+
+        return SearchResult(operations=page, total=bin(bits).count("1"), offset=offset, limit=limit)
+
+    def group_by_tag(self) -> Dict[str, List[IndexedOperation]]:
+        """Group operations by their tags."""
+        groups = {
+            tag: [self.operations[i] for i in _iter_bits(bits)]
+            for tag, bits in self.tag_bits.items()
+        }
+        untagged = self.all_bits
+        for bits in self.tag_bits.values():
+            untagged &= ~bits
+        if untagged:
+            groups["untagged"] = [self.operations[i] for i in _iter_bits(untagged)]
+        return groups
+
+
+class OperationIndexCache:
+    """
+    Process-wide LRU cache of operation indexes, keyed by spec snapshot ID.
+
+    Snapshots are immutable, so an index only has to be built once per
+    snapshot; new snapshots are built on top of the most recent index.
+    """
+
+    def __init__(self, max_specs: int = 32):
+        self.max_specs = max_specs
+        self._indexes: "OrderedDict[str, OperationIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, spec_id: str) -> Optional[OperationIndex]:
+        with self._lock:
+            index = self._indexes.get(spec_id)
+            if index is not None:
+                self._indexes.move_to_end(spec_id)
+            return index
+
+    def put(self, spec_id: str, index: OperationIndex) -> OperationIndex:
+        with self._lock:
+            self._indexes[spec_id] = index
+            self._indexes.move_to_end(spec_id)
+            while len(self._indexes) > self.max_specs:
+                self._indexes.popitem(last=False)
+        return index
+
+    def latest(self) -> Optional[OperationIndex]:
+        with self._lock:
+            return next(reversed(self._indexes.values()), None)
+
+    def build(self, spec_id: str, operations: Iterable[IndexedOperation]) -> OperationIndex:
+        """Build and cache the index of a newly ingested snapshot."""
+        return self.put(spec_id, OperationIndex(operations, previous=self.latest()))
+
+    def evict(self, spec_id: str) -> None:
+        with self._lock:
+            self._indexes.pop(spec_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+
+operation_indexes = OperationIndexCache()
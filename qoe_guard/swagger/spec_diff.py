@@ -0,0 +1,610 @@
+"""
+OpenAPI Spec Diff Engine.
+
+Compares two normalized OpenAPI specs at field level:
+- Merkle-style content hashes for every operation and schema node
+- Unchanged operations/schemas are skipped by hash comparison
+- Changed operations are deep-diffed (parameters, request body, responses)
+- Breaking changes are classified per direction (request vs response)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+from .inventory import _merge_parameters
+
+
+HTTP_METHODS = ["get", "post", "put", "patch", "delete", "head", "options", "trace"]
+
+# Schema keywords that are recursed into rather than compared as a whole
+_COMPOSITION_KEYWORDS = ("allOf", "oneOf", "anyOf")
+
+
+@dataclass
+class SpecChange:
+    """A single field-level change between two spec versions."""
+    operation: str  # e.g. "GET /pets/{id}"
+    location: str  # e.g. "response.200", "request.body", "parameter.query.limit"
+    path: str  # JSON path inside the schema, e.g. "$.items[].price"
+    change_type: str
+    before: Any = None
+    after: Any = None
+    is_breaking: bool = False
+
+
+@dataclass
+class OperationFingerprint:
+    """Content hashes for a single operation and its schemas."""
+    key: str
+    operation_hash: str
+    schema_hashes: Dict[str, str]
+    operation: Dict[str, Any]
+    parameters: Dict[Tuple[str, str], Dict[str, Any]]
+    request_body: Optional[Dict[str, Any]]
+    response_schemas: Dict[str, Optional[Dict[str, Any]]]
+
+
+@dataclass
+class SpecIndex:
+    """
+    Hash index over a spec.
+
+    Build once per spec version with `index_spec` and reuse it across
+    comparisons; node hashes are memoized by object identity.
+    """
+    spec: Dict[str, Any]
+    operations: Dict[str, OperationFingerprint]
+    paths: Dict[str, Set[str]]
+    node_hashes: Dict[int, str] = field(default_factory=dict, repr=False)
+
+    def hash_of(self, node: Any) -> str:
+        """Get the memoized content hash of a node from this spec."""
+        cached = self.node_hashes.get(id(node))
+        if cached is not None:
+            return cached
+        # Transient nodes (not part of the indexed spec) must not be memoized
+        # by identity, as their ids can be reused once they are freed
+        return _hash_node(node, {})
+
+
+@dataclass
+class SpecDiff:
+    """Result of a fine-grained spec comparison."""
+    added_operations: List[str] = field(default_factory=list)
+    removed_operations: List[str] = field(default_factory=list)
+    changed_operations: Dict[str, List[SpecChange]] = field(default_factory=dict)
+    unchanged_operations: int = 0
+
+    @property
+    def changes(self) -> List[SpecChange]:
+        """All field-level changes across operations."""
+        return [c for changes in self.changed_operations.values() for c in changes]
+
+    @property
+    def breaking_changes(self) -> List[SpecChange]:
+        """Field-level changes that break existing clients."""
+        return [c for c in self.changes if c.is_breaking]
+
+    @property
+    def is_breaking(self) -> bool:
+        """Whether the new spec is not backward compatible."""
+        return bool(self.removed_operations) or any(c.is_breaking for c in self.changes)
+
+
+def _hash_node(node: Any, memo: Dict[int, str]) -> str:
+    """
+    Compute a Merkle content hash for a JSON node.
+
+    Container hashes are built from child hashes, so every subtree is hashed
+    exactly once and its hash is memoized for later O(1) comparisons.
+    """
+    if isinstance(node, dict):
+        cached = memo.get(id(node))
+        if cached is not None:
+            return cached
+        h = hashlib.sha256(b"{")
+        for key in sorted(node):
+            h.update(json.dumps(key).encode())
+            h.update(b":")
+            h.update(_hash_node(node[key], memo).encode())
+            h.update(b",")
+        digest = h.hexdigest()
+        memo[id(node)] = digest
+        return digest
+
+    if isinstance(node, list):
+        cached = memo.get(id(node))
+        if cached is not None:
+            return cached
+        h = hashlib.sha256(b"[")
+        for item in node:
+            h.update(_hash_node(item, memo).encode())
+            h.update(b",")
+        digest = h.hexdigest()
+        memo[id(node)] = digest
+        return digest
+
+    return hashlib.sha256(json.dumps(node, default=str).encode()).hexdigest()
+
+
+def _pick_schema(content: Dict[str, Any], preferred: List[str]) -> Optional[Dict[str, Any]]:
+    """Pick a schema from a content map, preferring the given media types."""
+    for mime in preferred:
+        if mime in content:
+            return content[mime].get("schema")
+    if content:
+        first_mime = next(iter(content))
+        return content[first_mime].get("schema")
+    return None
+
+
+def _fingerprint_operation(
+    key: str,
+    operation: Dict[str, Any],
+    path_params: List[Dict[str, Any]],
+    memo: Dict[int, str],
+) -> OperationFingerprint:
+    """Hash an operation and extract the parts used for deep comparison."""
+    params = _merge_parameters(path_params, operation.get("parameters", []))
+
+    parameters: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    request_body = None
+    for param in params:
+        if param.get("in") == "body":
+            # Swagger 2.0 body parameter
+            request_body = {
+                "required": param.get("required", False),
+                "schema": param.get("schema"),
+            }
+        else:
+            parameters[(param.get("in", ""), param.get("name", ""))] = param
+
+    body = operation.get("requestBody")
+    if body:
+        request_body = {
+            "required": body.get("required", False),
+            "schema": _pick_schema(body.get("content", {}), ["application/json", "application/xml", "multipart/form-data"]),
+        }
+
+    response_schemas: Dict[str, Optional[Dict[str, Any]]] = {}
+    for status_code, response in operation.get("responses", {}).items():
+        if not isinstance(response, dict):
+            continue
+        schema = _pick_schema(response.get("content", {}), ["application/json", "application/xml"])
+        if schema is None:
+            schema = response.get("schema")
+        response_schemas[str(status_code)] = schema
+
+    schema_hashes: Dict[str, str] = {}
+    for (location, name), param in parameters.items():
+        schema_hashes[f"parameter.{location}.{name}"] = _hash_node(param, memo)
+    if request_body is not None:
+        schema_hashes["request.body"] = _hash_node(request_body, memo)
+    for status_code, schema in response_schemas.items():
+        schema_hashes[f"response.{status_code}"] = _hash_node(schema, memo)
+
+    # Path-level parameters are part of the operation contract
+    operation_hash = _hash_node(operation, memo)
+    if path_params:
+        operation_hash = hashlib.sha256(
+            (operation_hash + _hash_node(path_params, memo)).encode()
+        ).hexdigest()
+
+    return OperationFingerprint(
+        key=key,
+        operation_hash=operation_hash,
+        schema_hashes=schema_hashes,
+        operation=operation,
+        parameters=parameters,
+        request_body=request_body,
+        response_schemas=response_schemas,
+    )
+
+
+def index_spec(spec: Dict[str, Any]) -> SpecIndex:
+    """
+    Build a hash index for a spec.
+
+    Args:
+        spec: Normalized (dereferenced) OpenAPI spec
+
+    Returns:
+        SpecIndex with per-operation and per-schema content hashes
+    """
+    memo: Dict[int, str] = {}
+    operations: Dict[str, OperationFingerprint] = {}
+    paths: Dict[str, Set[str]] = {}
+
+    for path, path_item in spec.get("paths", {}).items():
+        if not isinstance(path_item, dict):
+            continue
+        path_params = path_item.get("parameters", [])
+        methods = set()
+        for method in HTTP_METHODS:
+            if method not in path_item:
+                continue
+            methods.add(method)
+            key = f"{method.upper()} {path}"
+            operations[key] = _fingerprint_operation(key, path_item[method], path_params, memo)
+        paths[path] = methods
+
+    return SpecIndex(spec=spec, operations=operations, paths=paths, node_hashes=memo)
+
+
+def diff_specs(
+    old: Any,
+    new: Any,
+) -> SpecDiff:
+    """
+    Compare two specs operation by operation.
+
+    Operations whose content hash is unchanged are skipped without
+    inspection; only changed operations are deep-diffed.
+
+    Args:
+        old: Previous spec (dict or SpecIndex)
+        new: Candidate spec (dict or SpecIndex)
+
+    Returns:
+        SpecDiff with field-level changes and breaking classification
+    """
+    old_index = old if isinstance(old, SpecIndex) else index_spec(old)
+    new_index = new if isinstance(new, SpecIndex) else index_spec(new)
+
+    result = SpecDiff()
+    old_keys = set(old_index.operations)
+    new_keys = set(new_index.operations)
+
+    result.added_operations = sorted(new_keys - old_keys)
+    result.removed_operations = sorted(old_keys - new_keys)
+
+    for key in sorted(old_keys & new_keys):
+        old_op = old_index.operations[key]
+        new_op = new_index.operations[key]
+
+        if old_op.operation_hash == new_op.operation_hash:
+            result.unchanged_operations += 1
+            continue
+
+        changes = _diff_operation(old_op, new_op, old_index, new_index)
+        if changes:
+            result.changed_operations[key] = changes
+        else:
+            # Documentation-only change (summary, description, examples)
+            result.unchanged_operations += 1
+
+    return result
+
+
+def _diff_operation(
+    old_op: OperationFingerprint,
+    new_op: OperationFingerprint,
+    old_index: SpecIndex,
+    new_index: SpecIndex,
+) -> List[SpecChange]:
+    """Deep-diff a changed operation, skipping schemas with equal hashes."""
+    changes: List[SpecChange] = []
+    key = old_op.key
+
+    # Parameters
+    for param_key in sorted(set(old_op.parameters) | set(new_op.parameters)):
+        location = f"parameter.{param_key[0]}.{param_key[1]}"
+        before = old_op.parameters.get(param_key)
+        after = new_op.parameters.get(param_key)
+
+        if before is None:
+            changes.append(SpecChange(
+                operation=key,
+                location=location,
+                path="$",
+                change_type="parameter_added",
+                after=after.get("required", False),
+                is_breaking=bool(after.get("required", False)),
+            ))
+            continue
+        if after is None:
+            changes.append(SpecChange(
+                operation=key,
+                location=location,
+                path="$",
+                change_type="parameter_removed",
+                before=before.get("required", False),
+                is_breaking=param_key[0] == "path",
+            ))
+            continue
+        if old_op.schema_hashes.get(location) == new_op.schema_hashes.get(location):
+            continue
+
+        was_required = bool(before.get("required", False))
+        is_required = bool(after.get("required", False))
+        if was_required != is_required:
+            changes.append(SpecChange(
+                operation=key,
+                location=location,
+                path="$",
+                change_type="parameter_required" if is_required else "parameter_optional",
+                before=was_required,
+                after=is_required,
+                is_breaking=is_required,
+            ))
+
+        _diff_schema(
+            _parameter_schema(before),
+            _parameter_schema(after),
+            "$",
+            "request",
+            key,
+            location,
+            changes,
+            old_index,
+            new_index,
+        )
+
+    # Request body
+    location = "request.body"
+    if old_op.schema_hashes.get(location) != new_op.schema_hashes.get(location):
+        before = old_op.request_body
+        after = new_op.request_body
+        if before is None:
+            changes.append(SpecChange(
+                operation=key,
+                location=location,
+                path="$",
+                change_type="request_body_added",
+                after=after.get("required", False),
+                is_breaking=bool(after.get("required", False)),
+            ))
+        elif after is None:
+            changes.append(SpecChange(
+                operation=key,
+                location=location,
+                path="$",
+                change_type="request_body_removed",
+                is_breaking=False,
+            ))
+        else:
+            was_required = bool(before.get("required", False))
+            is_required = bool(after.get("required", False))
+            if was_required != is_required:
+                changes.append(SpecChange(
+                    operation=key,
+                    location=location,
+                    path="$",
+                    change_type="request_body_required" if is_required else "request_body_optional",
+                    before=was_required,
+                    after=is_required,
+                    is_breaking=is_required,
+                ))
+            _diff_schema(
+                before.get("schema"),
+                after.get("schema"),
+                "$",
+                "request",
+                key,
+                location,
+                changes,
+                old_index,
+                new_index,
+            )
+
+    # Responses
+    for status_code in sorted(set(old_op.response_schemas) | set(new_op.response_schemas)):
+        location = f"response.{status_code}"
+        if status_code not in new_op.response_schemas:
+            changes.append(SpecChange(
+                operation=key,
+                location=location,
+                path="$",
+                change_type="response_removed",
+                before=status_code,
+                is_breaking=True,
+            ))
+            continue
+        if status_code not in old_op.response_schemas:
+            changes.append(SpecChange(
+                operation=key,
+                location=location,
+                path="$",
+                change_type="response_added",
+                after=status_code,
+                is_breaking=False,
+            ))
+            continue
+        if old_op.schema_hashes.get(location) == new_op.schema_hashes.get(location):
+            continue
+        _diff_schema(
+            old_op.response_schemas[status_code],
+            new_op.response_schemas[status_code],
+            "$",
+            "response",
+            key,
+            location,
+            changes,
+            old_index,
+            new_index,
+        )
+
+    return changes
+
+
+def _parameter_schema(param: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the schema of a parameter (OpenAPI 3 or Swagger 2.0 inline)."""
+    if "schema" in param:
+        return param["schema"]
+    return {k: v for k, v in param.items() if k in ("type", "format", "enum", "items")}
+
+
+def _type_set(schema: Dict[str, Any]) -> Optional[Set[str]]:
+    """Get the set of allowed types of a schema (None if unconstrained)."""
+    schema_type = schema.get("type")
+    if schema_type is None:
+        return None
+    types = set(schema_type) if isinstance(schema_type, list) else {schema_type}
+    if schema.get("nullable"):
+        types.add("null")
+    # integer is a subset of number
+    if "number" in types:
+        types.add("integer")
+    return types
+
+
+def _enum_set(schema: Dict[str, Any]) -> Optional[Set[str]]:
+    """Get the enum values of a schema as a hashable set."""
+    if "enum" not in schema or schema["enum"] is None:
+        return None
+    return {json.dumps(v, sort_keys=True, default=str) for v in schema["enum"]}
+
+
+def _diff_schema(
+    before: Any,
+    after: Any,
+    path: str,
+    direction: str,
+    operation: str,
+    location: str,
+    changes: List[SpecChange],
+    old_index: SpecIndex,
+    new_index: SpecIndex,
+) -> None:
+    """
+    Recursively diff two schemas.
+
+    `direction` is "request" (client sends data) or "response" (client
+    receives data) and decides which changes break existing clients:
+    narrowing what is accepted breaks requests, widening what is returned
+    breaks responses.
+    """
+    if not isinstance(before, dict) or not isinstance(after, dict):
+        if before != after:
+            changes.append(SpecChange(
+                operation=operation,
+                location=location,
+                path=path,
+                change_type="schema_changed",
+                before=before,
+                after=after,
+                is_breaking=True,
+            ))
+        return
+
+    # Equal subtrees are skipped in O(1)
+    if old_index.hash_of(before) == new_index.hash_of(after):
+        return
+
+    is_request = direction == "request"
+
+    def add(change_type: str, breaking: bool, before_value: Any = None, after_value: Any = None, at: str = path):
+        changes.append(SpecChange(
+            operation=operation,
+            location=location,
+            path=at,
+            change_type=change_type,
+            before=before_value,
+            after=after_value,
+            is_breaking=breaking,
+        ))
+
+    # Unresolved or circular references can only be compared by target
+    for ref_key in ("$ref", "$circular_ref"):
+        if ref_key in before or ref_key in after:
+            if before.get(ref_key) != after.get(ref_key):
+                add("ref_changed", True, before.get(ref_key), after.get(ref_key))
+            return
+
+    # Type
+    old_types = _type_set(before)
+    new_types = _type_set(after)
+    if old_types != new_types:
+        if old_types is None:
+            widened = False
+        elif new_types is None:
+            widened = True
+        else:
+            widened = old_types <= new_types
+        narrowed = new_types is not None and (old_types is None or new_types <= old_types)
+        breaking = not widened if is_request else not narrowed
+        add("type_changed", breaking, before.get("type"), after.get("type"))
+        shared = (old_types or set()) & (new_types or set())
+        if not shared & {"object", "array"}:
+            return
+
+    # Enum
+    old_enum = _enum_set(before)
+    new_enum = _enum_set(after)
+    if old_enum != new_enum:
+        removed_values = (old_enum - new_enum) if old_enum is not None and new_enum is not None else set()
+        added_values = (new_enum - old_enum) if old_enum is not None and new_enum is not None else set()
+        if new_enum is not None and (old_enum is None or removed_values):
+            add(
+                "enum_narrowed",
+                is_request,
+                sorted(json.loads(v) for v in removed_values) if removed_values else None,
+                after.get("enum"),
+            )
+        if old_enum is not None and (new_enum is None or added_values):
+            add(
+                "enum_widened",
+                not is_request,
+                before.get("enum"),
+                sorted(json.loads(v) for v in added_values) if added_values else None,
+            )
+
+    # Required fields
+    old_required = set(before.get("required", []) or [])
+    new_required = set(after.get("required", []) or [])
+    for name in sorted(new_required - old_required):
+        add("required_added", is_request, after_value=name, at=f"{path}.{name}")
+    for name in sorted(old_required - new_required):
+        add("required_removed", not is_request, before_value=name, at=f"{path}.{name}")
+
+    # Properties
+    old_props = before.get("properties", {}) or {}
+    new_props = after.get("properties", {}) or {}
+    for name in sorted(set(old_props) | set(new_props)):
+        prop_path = f"{path}.{name}"
+        if name not in new_props:
+            add("property_removed", not is_request, before_value=old_props[name], at=prop_path)
+        elif name not in old_props:
+            add("property_added", False, after_value=new_props[name], at=prop_path)
+        else:
+            _diff_schema(
+                old_props[name], new_props[name], prop_path, direction,
+                operation, location, changes, old_index, new_index,
+            )
+
+    # Array items
+    if "items" in before or "items" in after:
+        _diff_schema(
+            before.get("items"), after.get("items"), f"{path}[]", direction,
+            operation, location, changes, old_index, new_index,
+        )
+
+    # Composition
+    for keyword in _COMPOSITION_KEYWORDS:
+        old_parts = before.get(keyword) or []
+        new_parts = after.get(keyword) or []
+        if not old_parts and not new_parts:
+            continue
+        if len(old_parts) != len(new_parts):
+            add(f"{keyword}_changed", True, len(old_parts), len(new_parts))
+        for i in range(min(len(old_parts), len(new_parts))):
+            _diff_schema(
+                old_parts[i], new_parts[i], f"{path}.{keyword}[{i}]", direction,
+                operation, location, changes, old_index, new_index,
+            )
+
+
+def spec_change_to_dict(change: SpecChange) -> Dict[str, Any]:
+    """Convert a SpecChange to a dictionary for JSON serialization."""
+    return {
+        "operation": change.operation,
+        "location": change.location,
+        "path": change.path,
+        "change_type": change.change_type,
+        "before": change.before,
+        "after": change.after,
+        "is_breaking": change.is_breaking,
+    }
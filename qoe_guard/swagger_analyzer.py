@@ -11,14 +11,17 @@ Analyzes OpenAPI/Swagger specifications and tests endpoints for:
 from __future__ import annotations
 
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
 
 from .swagger.discovery import discover_openapi_spec, DiscoveryError
 
@@ -30,6 +33,7 @@ class EndpointStatus(Enum):
     TIMEOUT = "timeout"
     INVALID_RESPONSE = "invalid_response"
     MISSING_PARAMS = "missing_params"
+    SKIPPED = "skipped"  # Not tested within the analysis time budget
     UNKNOWN = "unknown"
 
 
@@ -128,8 +132,9 @@ def test_endpoint(
     params: Optional[Dict[str, Any]] = None,
     timeout: int = 10,
     skip_auth: bool = False,
+    session: Optional[requests.Session] = None,
 ) -> EndpointTest:
-    """Test a single endpoint."""
+    """Test a single endpoint (optionally over a shared keep-alive session)."""
     start_time = time.time()
     test = EndpointTest(method=method, path=urlparse(url).path, full_url=url)
     
@@ -146,7 +151,8 @@ def test_endpoint(
             req_kwargs["json"] = params or {}
         
         # Make request
-        resp = requests.request(method.upper(), url, **req_kwargs)
+        http = session if session is not None else requests
+        resp = http.request(method.upper(), url, **req_kwargs)
         
         test.response_time_ms = (time.time() - start_time) * 1000
         test.status_code = resp.status_code
@@ -182,12 +188,238 @@ def test_endpoint(
     return test
 
 
+class HostRateLimiter:
+    """Thread-safe token bucket rate limiter per host."""
+    
+    def __init__(self, rate: float = 10):
+        self.rate = rate
+        self._tokens: Dict[str, float] = {}
+        self._last_update: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def acquire(self, host: str, deadline: Optional[float] = None) -> bool:
+        """
+        Block until a request can be made to the host.
+        
+        Returns False if the deadline would pass before a token is available.
+        """
+        if self.rate <= 0:
+            return True
+        
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = now - self._last_update.get(host, now)
+                tokens = min(self.rate, self._tokens.get(host, self.rate) + elapsed * self.rate)
+                self._last_update[host] = now
+                
+                if tokens >= 1:
+                    self._tokens[host] = tokens - 1
+                    return True
+                
+                self._tokens[host] = tokens
+                wait = (1 - tokens) / self.rate
+            
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+def create_session(max_workers: int = 8) -> requests.Session:
+    """Create a keep-alive session with a connection pool sized for the workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def iter_endpoint_tests(
+    endpoints: List[Dict[str, Any]],
+    headers: Optional[Dict[str, str]] = None,
+    timeout: int = 10,
+    max_workers: int = 8,
+    rate_limit_per_host: float = 10,
+    time_budget_sec: Optional[float] = None,
+    session: Optional[requests.Session] = None,
+) -> Iterator[Tuple[int, EndpointTest]]:
+    """
+    Test endpoints concurrently and yield results as they finish.
+    
+    Args:
+        endpoints: Endpoints from extract_endpoints
+        headers: Headers to use for testing
+        timeout: Per-request timeout in seconds
+        max_workers: Number of concurrent workers
+        rate_limit_per_host: Max requests per second per host (0 disables)
+        time_budget_sec: Total time budget; endpoints not started in time
+            are reported as SKIPPED
+        session: Shared session (a pooled keep-alive session is created if None)
+    
+    Yields:
+        (index into endpoints, EndpointTest) in completion order
+    """
+    if not endpoints:
+        return
+    
+    max_workers = max(1, min(max_workers, len(endpoints)))
+    deadline = time.monotonic() + time_budget_sec if time_budget_sec else None
+    limiter = HostRateLimiter(rate_limit_per_host)
+    owns_session = session is None
+    http = session if session is not None else create_session(max_workers)
+    
+    def skipped(endpoint: Dict[str, Any]) -> EndpointTest:
+        return EndpointTest(
+            method=endpoint["method"],
+            path=endpoint["path"],
+            full_url=endpoint["full_url"],
+            status=EndpointStatus.SKIPPED,
+            error_message="Not tested: analysis time budget exceeded",
+        )
+    
+    def run(endpoint: Dict[str, Any]) -> EndpointTest:
+        host = urlparse(endpoint["full_url"]).netloc
+        if not limiter.acquire(host, deadline):
+            return skipped(endpoint)
+        
+        request_timeout = timeout
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return skipped(endpoint)
+            request_timeout = min(timeout, remaining)
+        
+        return test_endpoint(
+            method=endpoint["method"],
+            url=endpoint["full_url"],
+            headers=headers,
+            timeout=request_timeout,
+            session=http,
+        )
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {executor.submit(run, endpoint): i for i, endpoint in enumerate(endpoints)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                yield index, future.result()
+            except Exception as e:
+                endpoint = endpoints[index]
+                yield index, EndpointTest(
+                    method=endpoint["method"],
+                    path=endpoint["path"],
+                    full_url=endpoint["full_url"],
+                    status=EndpointStatus.UNKNOWN,
+                    error_message=f"Error: {str(e)[:200]}",
+                )
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if owns_session:
+            http.close()
+
+
+def summarize_analysis(
+    swagger_url: str,
+    base_url: str,
+    total_endpoints: int,
+    endpoint_tests: List[EndpointTest],
+    start_time: float,
+) -> SwaggerAnalysis:
+    """Count endpoint statuses and build recommendations."""
+    healthy_count = sum(1 for t in endpoint_tests if t.status == EndpointStatus.HEALTHY)
+    broken_count = sum(1 for t in endpoint_tests if t.status == EndpointStatus.BROKEN)
+    auth_required_count = sum(1 for t in endpoint_tests if t.status == EndpointStatus.AUTH_REQUIRED)
+    timeout_count = sum(1 for t in endpoint_tests if t.status == EndpointStatus.TIMEOUT)
+    skipped_count = sum(1 for t in endpoint_tests if t.status == EndpointStatus.SKIPPED)
+    
+    # Generate recommendations
+    recommendations = []
+    if broken_count > 0:
+        recommendations.append(f"⚠️ {broken_count} endpoint(s) returned errors (4xx/5xx)")
+    if auth_required_count > 0:
+        recommendations.append(f"🔐 {auth_required_count} endpoint(s) require authentication")
+    if timeout_count > 0:
+        recommendations.append(f"⏱️ {timeout_count} endpoint(s) timed out")
+    if skipped_count > 0:
+        recommendations.append(f"⏭️ {skipped_count} endpoint(s) not tested within the time budget")
+    if healthy_count == len(endpoint_tests) and len(endpoint_tests) > 0:
+        recommendations.append("✅ All tested endpoints are healthy")
+    elif healthy_count == 0 and len(endpoint_tests) > 0:
+        recommendations.append("❌ No healthy endpoints found - check base URL and authentication")
+    
+    return SwaggerAnalysis(
+        swagger_url=swagger_url,
+        base_url=base_url,
+        total_endpoints=total_endpoints,
+        tested_endpoints=len(endpoint_tests) - skipped_count,
+        healthy_count=healthy_count,
+        broken_count=broken_count,
+        auth_required_count=auth_required_count,
+        timeout_count=timeout_count,
+        endpoint_tests=endpoint_tests,
+        analysis_time_sec=time.time() - start_time,
+        recommendations=recommendations,
+    )
+
+
+def load_swagger_spec(
+    swagger_url: str,
+    headers: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Discover and fetch a spec (direct JSON/YAML URLs and Swagger UI pages).
+    
+    Raises:
+        Exception with suggestions if neither discovery nor direct fetch works
+    """
+    try:
+        # Try discovery first (handles Swagger UI pages, FastAPI docs, ReDoc, etc.)
+        discovery_result = discover_openapi_spec(swagger_url, headers, timeout=30)
+        return discovery_result.spec
+    except DiscoveryError as de:
+        # Fallback to direct fetch for backward compatibility
+        try:
+            return fetch_openapi_spec(swagger_url, headers, timeout=30)
+        except Exception as fe:
+            # Provide helpful error message with suggestions
+            error_msg = str(de)
+            if "Could not discover" in error_msg:
+                # Suggest common paths for Spring Boot/SpringDoc
+                parsed = urlparse(swagger_url)
+                if "swagger-ui" in parsed.path:
+                    parent = "/".join([p for p in parsed.path.split("/") if p and "swagger-ui" not in p])
+                    if parent:
+                        suggestions = [
+                            f"{parent}/v3/api-docs",
+                            f"{parent}/api/v3/api-docs",
+                            f"{parent}/openapi.json",
+                        ]
+                        base = f"{parsed.scheme}://{parsed.netloc}"
+                        suggested_urls = [urljoin(base, s) for s in suggestions]
+                        error_msg += f". Try these direct URLs: {', '.join(suggested_urls)}"
+            raise Exception(f"Discovery failed: {error_msg}. Direct fetch also failed: {fe}")
+
+
+def _spec_base_url(spec: Dict[str, Any], base_url: Optional[str]) -> str:
+    """Get the base URL override or the spec's servers[0].url."""
+    if base_url:
+        return base_url
+    servers = spec.get("servers", [])
+    if servers and isinstance(servers, list) and len(servers) > 0:
+        return servers[0].get("url", "")
+    return ""
+
+
 def analyze_swagger(
     swagger_url: str,
     base_url: Optional[str] = None,
     headers: Optional[Dict[str, str]] = None,
     timeout: int = 10,
     test_all: bool = False,
+    max_workers: int = 8,
+    rate_limit_per_host: float = 10,
+    time_budget_sec: Optional[float] = None,
 ) -> SwaggerAnalysis:
     """
     Analyze a Swagger/OpenAPI specification and test endpoints.
@@ -198,44 +430,17 @@ def analyze_swagger(
         headers: Headers to use for testing (optional)
         timeout: Request timeout in seconds
         test_all: If False, only test GET endpoints. If True, test all methods.
+        max_workers: Number of endpoints tested concurrently
+        rate_limit_per_host: Max requests per second per host (0 disables)
+        time_budget_sec: Total time budget for endpoint testing (optional)
     
     Returns:
         SwaggerAnalysis with test results and recommendations
     """
     start_time = time.time()
     
-    # Discover and fetch spec (supports direct JSON/YAML URLs and Swagger UI pages)
     try:
-        # Try discovery first (handles Swagger UI pages, FastAPI docs, ReDoc, etc.)
-        try:
-            discovery_result = discover_openapi_spec(swagger_url, headers, timeout=30)
-            spec = discovery_result.spec
-            # Use discovered spec URL for reporting
-            actual_spec_url = discovery_result.doc_url
-        except DiscoveryError as de:
-            # Fallback to direct fetch for backward compatibility
-            try:
-                spec = fetch_openapi_spec(swagger_url, headers, timeout=30)
-                actual_spec_url = swagger_url
-            except Exception as fe:
-                # Provide helpful error message with suggestions
-                error_msg = str(de)
-                if "Could not discover" in error_msg:
-                    # Suggest common paths for Spring Boot/SpringDoc
-                    from urllib.parse import urlparse, urljoin
-                    parsed = urlparse(swagger_url)
-                    if "swagger-ui" in parsed.path:
-                        parent = "/".join([p for p in parsed.path.split("/") if p and "swagger-ui" not in p])
-                        if parent:
-                            suggestions = [
-                                f"{parent}/v3/api-docs",
-                                f"{parent}/api/v3/api-docs",
-                                f"{parent}/openapi.json",
-                            ]
-                            base = f"{parsed.scheme}://{parsed.netloc}"
-                            suggested_urls = [urljoin(base, s) for s in suggestions]
-                            error_msg += f". Try these direct URLs: {', '.join(suggested_urls)}"
-                raise Exception(f"Discovery failed: {error_msg}. Direct fetch also failed: {fe}")
+        spec = load_swagger_spec(swagger_url, headers)
     except Exception as e:
         return SwaggerAnalysis(
             swagger_url=swagger_url,
@@ -251,13 +456,7 @@ def analyze_swagger(
             recommendations=[f"Failed to fetch/parse OpenAPI spec: {e}"],
         )
     
-    # Extract base URL
-    if not base_url:
-        servers = spec.get("servers", [])
-        if servers and isinstance(servers, list) and len(servers) > 0:
-            base_url = servers[0].get("url", "")
-        else:
-            base_url = ""
+    base_url = _spec_base_url(spec, base_url)
     
     # Extract endpoints
     endpoints = extract_endpoints(spec, base_url)
@@ -266,49 +465,91 @@ def analyze_swagger(
     if not test_all:
         endpoints = [e for e in endpoints if e["method"] == "GET"]
     
-    # Test endpoints
-    endpoint_tests = []
-    for endpoint in endpoints:
-        test = test_endpoint(
-            method=endpoint["method"],
-            url=endpoint["full_url"],
-            headers=headers,
-            timeout=timeout,
-        )
-        endpoint_tests.append(test)
+    # Test endpoints concurrently, keeping spec order in the report
+    endpoint_tests: List[Optional[EndpointTest]] = [None] * len(endpoints)
+    for index, test in iter_endpoint_tests(
+        endpoints,
+        headers=headers,
+        timeout=timeout,
+        max_workers=max_workers,
+        rate_limit_per_host=rate_limit_per_host,
+        time_budget_sec=time_budget_sec,
+    ):
+        endpoint_tests[index] = test
     
-    # Count statuses
-    healthy_count = sum(1 for t in endpoint_tests if t.status == EndpointStatus.HEALTHY)
-    broken_count = sum(1 for t in endpoint_tests if t.status == EndpointStatus.BROKEN)
-    auth_required_count = sum(1 for t in endpoint_tests if t.status == EndpointStatus.AUTH_REQUIRED)
-    timeout_count = sum(1 for t in endpoint_tests if t.status == EndpointStatus.TIMEOUT)
+    return summarize_analysis(
+        swagger_url=swagger_url,
+        base_url=base_url,
+        total_endpoints=len(endpoints),
+        endpoint_tests=endpoint_tests,
+        start_time=start_time,
+    )
+
+
+def stream_swagger_analysis(
+    swagger_url: Optional[str] = None,
+    spec: Optional[Dict[str, Any]] = None,
+    base_url: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: int = 10,
+    test_all: bool = False,
+    max_workers: int = 8,
+    rate_limit_per_host: float = 10,
+    time_budget_sec: Optional[float] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Analyze a spec and yield progress events as endpoints finish.
     
-    # Generate recommendations
-    recommendations = []
-    if broken_count > 0:
-        recommendations.append(f"⚠️ {broken_count} endpoint(s) returned errors (4xx/5xx)")
-    if auth_required_count > 0:
-        recommendations.append(f"🔐 {auth_required_count} endpoint(s) require authentication")
-    if timeout_count > 0:
-        recommendations.append(f"⏱️ {timeout_count} endpoint(s) timed out")
-    if healthy_count == len(endpoint_tests) and len(endpoint_tests) > 0:
-        recommendations.append("✅ All tested endpoints are healthy")
-    elif healthy_count == 0 and len(endpoint_tests) > 0:
-        recommendations.append("❌ No healthy endpoints found - check base URL and authentication")
+    Events (one JSON object each, suitable for NDJSON):
+    - {"event": "start", "total_endpoints", "base_url"}
+    - {"event": "endpoint", "index", "completed", "total", "result"}
+    - {"event": "summary", "analysis"}
+    - {"event": "error", "error"}
+    """
+    start_time = time.time()
     
-    return SwaggerAnalysis(
-        swagger_url=swagger_url,
+    if spec is None:
+        try:
+            spec = load_swagger_spec(swagger_url, headers)
+        except Exception as e:
+            yield {"event": "error", "error": f"Failed to fetch/parse OpenAPI spec: {e}"}
+            return
+    
+    base_url = _spec_base_url(spec, base_url)
+    endpoints = extract_endpoints(spec, base_url)
+    if not test_all:
+        endpoints = [e for e in endpoints if e["method"] == "GET"]
+    
+    yield {"event": "start", "total_endpoints": len(endpoints), "base_url": base_url}
+    
+    endpoint_tests: List[Optional[EndpointTest]] = [None] * len(endpoints)
+    completed = 0
+    for index, test in iter_endpoint_tests(
+        endpoints,
+        headers=headers,
+        timeout=timeout,
+        max_workers=max_workers,
+        rate_limit_per_host=rate_limit_per_host,
+        time_budget_sec=time_budget_sec,
+    ):
+        endpoint_tests[index] = test
+        completed += 1
+        yield {
+            "event": "endpoint",
+            "index": index,
+            "completed": completed,
+            "total": len(endpoints),
+            "result": endpoint_test_to_dict(test),
+        }
+    
+    analysis = summarize_analysis(
+        swagger_url=swagger_url or "(provided as JSON)",
         base_url=base_url,
         total_endpoints=len(endpoints),
-        tested_endpoints=len(endpoint_tests),
-        healthy_count=healthy_count,
-        broken_count=broken_count,
-        auth_required_count=auth_required_count,
-        timeout_count=timeout_count,
         endpoint_tests=endpoint_tests,
-        analysis_time_sec=time.time() - start_time,
-        recommendations=recommendations,
+        start_time=start_time,
     )
+    yield {"event": "summary", "analysis": to_dict(analysis)}
 
 
 def to_dict(analysis: SwaggerAnalysis) -> Dict[str, Any]:
@@ -322,20 +563,22 @@ def to_dict(analysis: SwaggerAnalysis) -> Dict[str, Any]:
         "broken_count": analysis.broken_count,
         "auth_required_count": analysis.auth_required_count,
         "timeout_count": analysis.timeout_count,
-        "endpoint_tests": [
-            {
-                "method": t.method,
-                "path": t.path,
-                "full_url": t.full_url,
-                "status_code": t.status_code,
-                "status": t.status.value,
-                "response_time_ms": round(t.response_time_ms, 2) if t.response_time_ms else None,
-                "error_message": t.error_message,
-                "requires_auth": t.requires_auth,
-                "response_size_bytes": t.response_size_bytes,
-            }
-            for t in analysis.endpoint_tests
-        ],
+        "endpoint_tests": [endpoint_test_to_dict(t) for t in analysis.endpoint_tests],
         "analysis_time_sec": round(analysis.analysis_time_sec, 2),
         "recommendations": analysis.recommendations,
     }
+
+
+def endpoint_test_to_dict(test: EndpointTest) -> Dict[str, Any]:
+    """Convert EndpointTest to dictionary for JSON serialization."""
+    return {
+        "method": test.method,
+        "path": test.path,
+        "full_url": test.full_url,
+        "status_code": test.status_code,
+        "status": test.status.value,
+        "response_time_ms": round(test.response_time_ms, 2) if test.response_time_ms else None,
+        "error_message": test.error_message,
+        "requires_auth": test.requires_auth,
+        "response_size_bytes": test.response_size_bytes,
+    }
@@ -2,6 +2,7 @@
 from .orchestrator import ValidationOrchestrator
 from .runner import RuntimeRunner, RuntimeResult
 from .conformance import SchemaValidator, validate_response
+from .plan import ValidationPlan, OperationPlan, compile_plan, get_validation_plan
 
 __all__ = [
     "ValidationOrchestrator",
@@ -9,4 +10,8 @@ __all__ = [
     "RuntimeResult",
     "SchemaValidator",
     "validate_response",
+    "ValidationPlan",
+    "OperationPlan",
+    "compile_plan",
+    "get_validation_plan",
 ]
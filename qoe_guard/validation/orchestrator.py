@@ -23,13 +23,29 @@ from ..db.models import (
     DecisionType, DriftType,
 )
 from .runner import RuntimeRunner, RuntimeResult, redact_headers
-from .conformance import validate_response, ConformanceResult
-from ..scoring.brittleness import compute_brittleness_score, BrittlenessResult
-from ..scoring.qoe_risk import compute_qoe_risk, QoERiskResult
+from .conformance import ConformanceResult
+from .plan import OperationPlan, ValidationPlan, compile_plan, get_validation_plan
+from ..scoring.brittleness import (
+    compute_brittleness_score, compute_contract_complexity, compute_change_sensitivity,
+    compute_runtime_fragility, compute_blast_radius,
+)
+from ..diff import extract_features, make_change, score_changes
 from ..scoring.drift import classify_drift, DriftClassification
-from ..scoring.criticality import DEFAULT_CRITICALITY_PROFILES, get_criticality_for_path
-from ..policy.engine import evaluate_policy, PolicyDecision
+from ..scoring.criticality import CriticalityResolver, criticality_resolver
+from ..policy.batch import POLICY_INPUT_COLUMNS, evaluate_policy_batch
 from ..policy.config import DEFAULT_POLICY
+from ..ai.online_anomaly import latency_monitor
+
+
+# Blast radius weight of a run's environment (others count as production)
+ENVIRONMENT_WEIGHTS = {
+    "prod": 1.0, "production": 1.0,
+    "stage": 0.5, "staging": 0.5,
+    "dev": 0.2, "development": 0.2,
+}
+
+# Drift types from least to most severe
+DRIFT_ORDER = [DriftType.NONE.value, DriftType.SPEC_DRIFT.value, DriftType.RUNTIME_DRIFT.value, DriftType.UNDOCUMENTED.value]
 
 
 @dataclass
@@ -108,32 +124,30 @@ class ValidationOrchestrator:
         if not run:
             return
         
-        # Get operations to validate
+        # Load the compiled plan of the spec (compiled once per snapshot)
         operation_ids = run.selected_operations or []
-        operations = self.db.query(Operation).filter(
-            Operation.id.in_(operation_ids)
-        ).all()
+        plan = self._load_plan(run, operation_ids)
+        
+        # Apply config overrides
+        concurrency = concurrency or self.config.concurrency
+        safe_methods = safe_methods_only if safe_methods_only is not None else self.config.safe_methods_only
+        
+        # Filter to safe methods if required
+        operations = plan.select(operation_ids, safe_methods_only=safe_methods)
         
         if not operations:
             run.completed_at = datetime.utcnow()
             run.decision = DecisionType.PASS
+            run.policy_inputs = {column: [] for column in POLICY_INPUT_COLUMNS}
             run.duration_ms = int((time.time() - start_time) * 1000)
             self.db.commit()
             return
         
-        # Apply config overrides
-        concurrency = concurrency or self.config.concurrency
-        safe_methods = safe_methods_only if safe_methods_only is not None else self.config.safe_methods_only
-        
-        # Filter to safe methods if required
-        if safe_methods:
-            operations = [op for op in operations if op.method in ["GET", "HEAD", "OPTIONS"]]
-        
         # Execute operations with concurrency control
         semaphore = asyncio.Semaphore(concurrency)
         results = []
         
-        async def run_operation(operation: Operation):
+        async def run_operation(operation: OperationPlan):
             async with semaphore:
                 result = await self._execute_operation(
                     operation,
@@ -146,104 +160,110 @@ class ValidationOrchestrator:
         tasks = [run_operation(op) for op in operations]
         await asyncio.gather(*tasks)
         
-        # Process results
-        all_changes = []
-        brittleness_scores = []
-        runtime_results = []
-        
+        # Store operation results
         for operation, result in results:
-            # Store operation result
-            op_result = self._create_operation_result(run, operation, result)
-            self.db.add(op_result)
-            
-            # Collect data for scoring
-            if result.conformance:
-                for mismatch in result.conformance.mismatches:
-                    all_changes.append({
-                        "path": mismatch.path,
-                        "change_type": "value_changed",
-                        "before": None,
-                        "after": mismatch.value,
-                    })
-            
-            runtime_results.append({
-                "status_code": result.runtime.status_code if result.runtime else None,
-                "response_time_ms": result.runtime.response_time_ms if result.runtime else None,
-                "error": result.runtime.error if result.runtime else None,
-                "schema_mismatches": result.conformance.mismatches if result.conformance else [],
-            })
+            self.db.add(self._create_operation_result(run, operation, result))
         
-        # Compute aggregate scores
-        brittleness = compute_brittleness_score(
-            runtime_results=runtime_results,
-            tag_criticality=0.5,
-            environment=run.environment,
-        )
+        # Update the running latency state of each endpoint
+        latency_observations = latency_monitor.observe(self.db, [
+            (operation.endpoint_key, result.runtime.response_time_ms, datetime.utcnow())
+            for operation, result in results
+            if result.runtime and result.runtime.response_time_ms is not None
+        ])
         
-        qoe_risk = compute_qoe_risk(
-            changes=all_changes,
-            profiles=DEFAULT_CRITICALITY_PROFILES,
-        )
+        # Persist results and latency states before scoring, so they are
+        # kept even if the run cannot be scored
+        self.db.commit()
         
-        drift = classify_drift(
-            current_spec_hash=run.spec_hash,
-            previous_spec_hash=None,  # TODO: Get previous spec hash
-            schema_mismatches=[
-                {"path": m.path, "message": m.message}
-                for r in results
-                if r[1].conformance
-                for m in r[1].conformance.mismatches
-            ],
-        )
+        # Score each operation and gate the run on all of them at once
+        resolve = criticality_resolver()
+        environment_weight = ENVIRONMENT_WEIGHTS.get((run.environment or "").lower(), 1.0)
+        scores = [
+            _score_operation(operation, result, resolve, environment_weight)
+            for operation, result in results
+        ]
+        policy_inputs = {
+            "operation_ids": [s.operation_id for s in scores],
+            "brittleness": [s.brittleness for s in scores],
+            "qoe_risk": [s.qoe_risk for s in scores],
+            "critical_type_changes": [s.critical_type_changes for s in scores],
+            "drift_types": [s.drift.drift_type.value for s in scores],
+            "drift_severity": [s.drift.severity for s in scores],
+        }
+        batch = evaluate_policy_batch(**policy_inputs, policy=DEFAULT_POLICY)
         
-        # Evaluate policy
-        policy_decision = evaluate_policy(
-            brittleness=brittleness,
-            qoe_risk=qoe_risk,
-            drift=drift,
-            policy=DEFAULT_POLICY,
-        )
+        # Run-level scores are those of the worst operation
+        drift = max((s.drift for s in scores), key=lambda d: DRIFT_ORDER.index(d.drift_type.value))
+        recommendations = list(dict.fromkeys(batch.recommendations() + [
+            r for s, skipped in zip(scores, batch.skipped.tolist()) if not skipped
+            for r in s.drift.recommendations
+        ]))
         
         # Update run record
-        run.brittleness_score = brittleness.score
-        run.qoe_risk_score = qoe_risk.risk_score
+        run.spec_hash = run.spec_hash or plan.spec_hash
+        run.brittleness_score = max(s.brittleness for s in scores)
+        run.qoe_risk_score = max(s.qoe_risk for s in scores)
         run.drift_type = DriftType(drift.drift_type.value)
-        run.decision = DecisionType(policy_decision.decision.lower())
+        run.decision = DecisionType(batch.decision.lower())
+        run.policy_inputs = policy_inputs  # Replayed by policy simulations
         run.reasons = {
-            "brittleness": brittleness.signals,
-            "qoe_risk": qoe_risk.reasons,
+            "brittleness": {s.operation_id: s.brittleness for s in scores},
+            "qoe_risk": {
+                "operations": {s.operation_id: s.qoe_risk for s in scores},
+                "critical_type_changes": sum(s.critical_type_changes for s in scores),
+            },
             "drift": {
                 "type": drift.drift_type.value,
                 "severity": drift.severity,
+                "affected_paths": drift.affected_paths,
             },
-            "policy": policy_decision.details,
+            "policy": batch.to_dict(),
+            "latency": [
+                {
+                    "endpoint": o.endpoint_key,
+                    "latency_ms": o.latency_ms,
+                    "z_score": o.z_score,
+                    "drift_ratio": o.drift_ratio,
+                    "explanation": o.explanation,
+                }
+                for o in latency_observations
+                if o.is_anomaly or o.is_drift
+            ],
         }
-        run.recommendations = policy_decision.recommendations
-        run.policy_version = DEFAULT_POLICY.version
+        run.recommendations = recommendations
+        run.policy_version = batch.policy_version
         run.completed_at = datetime.utcnow()
         run.duration_ms = int((time.time() - start_time) * 1000)
         
         self.db.commit()
     
+    def _load_plan(self, run: ValidationRun, operation_ids: List[str]) -> ValidationPlan:
+        """Load the spec's compiled plan, or compile one for runs without a spec."""
+        if run.spec_id:
+            plan = get_validation_plan(self.db, run.spec_id)
+            if plan is not None:
+                return plan
+        
+        operations = self.db.query(Operation).filter(
+            Operation.id.in_(operation_ids)
+        ).all()
+        return compile_plan(operations)
+    
     async def _execute_operation(
         self,
-        operation: Operation,
+        operation: OperationPlan,
         auth_config: Optional[Dict[str, str]],
         environment: str,
     ) -> "OperationExecutionResult":
         """Execute a single operation."""
         from urllib.parse import urlparse
         
-        # Build request URL
-        base_url = operation.server_url or "http://localhost"
-        url = f"{base_url.rstrip('/')}{operation.path}"
-        
         # Parse host for rate limiting
-        host = urlparse(url).netloc
+        host = urlparse(operation.url).netloc
         await self.rate_limiter.acquire(host)
         
         # Build headers
-        headers = {}
+        headers = dict(operation.headers)
         if auth_config:
             headers.update(auth_config)
         
@@ -252,8 +272,9 @@ class ValidationOrchestrator:
         try:
             runtime_result = runner.execute(
                 method=operation.method,
-                url=url,
+                url=operation.url,
                 headers=headers,
+                body=operation.body,
             )
         finally:
             runner.close()
@@ -261,13 +282,7 @@ class ValidationOrchestrator:
         # Validate response
         conformance_result = None
         if runtime_result.success and runtime_result.body is not None:
-            if operation.response_schemas:
-                conformance_result = validate_response(
-                    response_body=runtime_result.body,
-                    schema={},
-                    status_code=runtime_result.status_code,
-                    response_schemas=operation.response_schemas,
-                )
+            conformance_result = operation.validate(runtime_result.status_code, runtime_result.body)
         
         return OperationExecutionResult(
             runtime=runtime_result,
@@ -277,7 +292,7 @@ class ValidationOrchestrator:
     def _create_operation_result(
         self,
         run: ValidationRun,
-        operation: Operation,
+        operation: OperationPlan,
         result: "OperationExecutionResult",
     ) -> OperationResult:
         """Create an OperationResult record."""
@@ -294,7 +309,7 @@ class ValidationOrchestrator:
         return OperationResult(
             run_id=run.id,
             operation_id=operation.id,
-            request_url=f"{operation.server_url or ''}{operation.path}",
+            request_url=operation.url,
             request_method=operation.method,
             request_headers=redact_headers({}),  # Already redacted
             status_code=runtime.status_code,
@@ -315,3 +330,67 @@ class OperationExecutionResult:
     """Result of executing a single operation."""
     runtime: RuntimeResult
     conformance: Optional[ConformanceResult] = None
+
+
+@dataclass
+class OperationScores:
+    """Policy inputs of one executed operation (QoE risk and critical type changes from its DiffResult)."""
+    operation_id: str
+    brittleness: float
+    qoe_risk: float
+    critical_type_changes: int
+    drift: DriftClassification
+
+
+def _score_operation(
+    operation: OperationPlan,
+    result: OperationExecutionResult,
+    resolve: CriticalityResolver,
+    environment_weight: float = 1.0,
+) -> OperationScores:
+    """Score an operation from its schema mismatches and runtime outcome."""
+    runtime = result.runtime
+    mismatches = result.conformance.mismatches if result.conformance else []
+    
+    # Schema mismatches are the changes of the response against its contract
+    changes = []
+    for m in mismatches:
+        rule = m.schema_path.rsplit(".", 1)[-1]
+        change_type = "type_changed" if rule == "type" else "removed" if rule == "required" else "value_changed"
+        changes.append(make_change(m.path, change_type, None, m.value, resolve(m.path)))
+    diff = score_changes(changes)
+    features = extract_features(diff)
+    
+    status_code = runtime.status_code if runtime else None
+    schema_key = operation.schema_key(status_code)
+    failed = runtime is None or not runtime.success or (status_code or 0) >= 500
+    brittleness = compute_brittleness_score(
+        contract_complexity=compute_contract_complexity(
+            operation.response_schemas.get(schema_key, {}) if schema_key else {}
+        ),
+        change_sensitivity=compute_change_sensitivity(
+            removed_fields=features.removed_fields,
+            type_changes=features.type_changes,
+        ),
+        runtime_fragility=compute_runtime_fragility(
+            timeout_rate=1.0 if runtime and runtime.error_type == "timeout" else 0.0,
+            error_rate=1.0 if failed else 0.0,
+        ),
+        blast_radius=compute_blast_radius(
+            criticality_score=operation.criticality,
+            environment_weight=environment_weight,
+        ),
+    )
+    
+    drift = classify_drift(
+        runtime_mismatches=[c.path for c in changes],
+        critical_paths={c.path for c in changes if c.is_critical},
+    )
+    
+    return OperationScores(
+        operation_id=operation.id,
+        brittleness=brittleness,
+        qoe_risk=diff.qoe_risk_score,
+        critical_type_changes=diff.critical_type_changes,
+        drift=drift,
+    )
@@ -0,0 +1,299 @@
+"""
+Compiled Validation Plans.
+
+Compiles the per-operation setup of a validation run once per spec snapshot:
+- Resolved request URLs (path parameters filled, required query parameters)
+- Synthesized request headers and bodies
+- Schema validators per response status code
+- Criticality per operation
+
+Plans are cached in-process and persisted per snapshot, so starting a run
+only loads the plan.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Iterable
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..ai.anomaly_baselines import endpoint_key
+from ..curl.synthesizer import _build_url, _generate_example_from_schema
+from ..db.models import Operation, SpecSnapshot, ValidationPlanRecord
+from ..scoring.criticality import get_criticality_for_tags
+from .conformance import SchemaValidator, ConformanceResult
+
+
+# Bump when compile_plan changes, so stored plans are recompiled
+PLAN_VERSION = 2
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+@dataclass
+class OperationPlan:
+    """Pre-resolved request and validation setup of one operation."""
+    id: str
+    method: str
+    path: str
+    url_template: str
+    url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: Any = None
+    response_schemas: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    criticality: float = 0.35
+    endpoint_key: str = ""  # Key of the endpoint's runtime baselines and latency state
+    _validators: Dict[str, SchemaValidator] = field(default_factory=dict, repr=False, compare=False)
+
+    def schema_key(self, status_code: Optional[int]) -> Optional[str]:
+        """Select the response schema for a status code (exact, default, then any 2xx)."""
+        if not self.response_schemas or not status_code:
+            return None
+        str_code = str(status_code)
+        if str_code in self.response_schemas:
+            return str_code
+        if "default" in self.response_schemas:
+            return "default"
+        if 200 <= status_code < 300:
+            for code in self.response_schemas:
+                if code.startswith("2"):
+                    return code
+        return None
+
+    def validator_for(self, status_code: Optional[int]) -> Optional[SchemaValidator]:
+        """Get the compiled validator for a status code, if a schema applies."""
+        key = self.schema_key(status_code)
+        if key is None or not self.response_schemas[key]:
+            return None
+        validator = self._validators.get(key)
+        if validator is None:
+            validator = self._validators[key] = SchemaValidator(self.response_schemas[key])
+        return validator
+
+    def validate(self, status_code: Optional[int], body: Any) -> Optional[ConformanceResult]:
+        """Validate a response body; None when no schema applies."""
+        validator = self.validator_for(status_code)
+        return validator.validate(body) if validator is not None else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "url_template": self.url_template,
+            "url": self.url,
+            "headers": self.headers,
+            "body": self.body,
+            "response_schemas": self.response_schemas,
+            "criticality": self.criticality,
+            "endpoint_key": self.endpoint_key,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OperationPlan":
+        return cls(**data)
+
+
+@dataclass
+class ValidationPlan:
+    """Compiled validation plan of a spec snapshot."""
+    spec_id: Optional[str]
+    spec_hash: Optional[str]
+    operations: Dict[str, OperationPlan]
+    version: int = PLAN_VERSION
+
+    def select(
+        self,
+        operation_ids: Iterable[str],
+        safe_methods_only: bool = False,
+    ) -> List[OperationPlan]:
+        """Get the plans of the selected operations, in selection order."""
+        selected = []
+        for op_id in operation_ids:
+            op = self.operations.get(op_id)
+            if op is None:
+                continue
+            if safe_methods_only and op.method not in SAFE_METHODS:
+                continue
+            selected.append(op)
+        return selected
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "spec_id": self.spec_id,
+            "spec_hash": self.spec_hash,
+            "version": self.version,
+            "operations": [op.to_dict() for op in self.operations.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ValidationPlan":
+        operations = [OperationPlan.from_dict(op) for op in data.get("operations", [])]
+        return cls(
+            spec_id=data.get("spec_id"),
+            spec_hash=data.get("spec_hash"),
+            operations={op.id: op for op in operations},
+            version=data.get("version", PLAN_VERSION),
+        )
+
+
+def compile_operation(operation: Operation) -> OperationPlan:
+    """Resolve the request and validation setup of one operation."""
+    parameters = operation.parameters or []
+    base_url = (operation.server_url or "http://localhost").rstrip("/")
+
+    param_values = {}
+    headers = {}
+    for param in parameters:
+        location = param.get("in")
+        if location != "path" and not param.get("required"):
+            continue
+        value = param.get("example")
+        if value is None:
+            value = _generate_example_from_schema(param.get("schema") or {})
+        if location == "header":
+            headers[param.get("name")] = str(value)
+        else:
+            param_values[param.get("name")] = value
+
+    body = None
+    if operation.method not in SAFE_METHODS and operation.request_body_schema:
+        body = _generate_example_from_schema(operation.request_body_schema)
+
+    segments = [s for s in operation.path.split("/") if s and not s.startswith("{")]
+
+    return OperationPlan(
+        id=operation.id,
+        method=operation.method,
+        path=operation.path,
+        url_template=f"{base_url}{operation.path}",
+        url=_build_url(base_url, operation.path, parameters, param_values),
+        headers=headers,
+        body=body,
+        response_schemas=operation.response_schemas or {},
+        criticality=get_criticality_for_tags(list(operation.tags or []) + segments),
+        endpoint_key=endpoint_key(operation.method, operation.path, operation.server_url),
+    )
+
+
+def compile_plan(
+    operations: Iterable[Operation],
+    spec_id: Optional[str] = None,
+    spec_hash: Optional[str] = None,
+) -> ValidationPlan:
+    """
+    Compile a validation plan.
+
+    Args:
+        operations: Operations to include
+        spec_id: ID of the spec snapshot the operations belong to
+        spec_hash: Hash of the spec snapshot
+
+    Returns:
+        ValidationPlan keyed by operation row ID
+    """
+    compiled = [compile_operation(op) for op in operations]
+    return ValidationPlan(
+        spec_id=spec_id,
+        spec_hash=spec_hash,
+        operations={op.id: op for op in compiled},
+    )
+
+
+class ValidationPlanCache:
+    """Process-wide LRU cache of compiled plans, keyed by spec snapshot ID."""
+
+    def __init__(self, max_specs: int = 32):
+        self.max_specs = max_specs
+        self._plans: "OrderedDict[str, ValidationPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, spec_id: str) -> Optional[ValidationPlan]:
+        with self._lock:
+            plan = self._plans.get(spec_id)
+            if plan is not None:
+                self._plans.move_to_end(spec_id)
+            return plan
+
+    def put(self, spec_id: str, plan: ValidationPlan) -> ValidationPlan:
+        with self._lock:
+            self._plans[spec_id] = plan
+            self._plans.move_to_end(spec_id)
+            while len(self._plans) > self.max_specs:
+                self._plans.popitem(last=False)
+        return plan
+
+    def evict(self, spec_id: str) -> None:
+        with self._lock:
+            self._plans.pop(spec_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+
+
+validation_plans = ValidationPlanCache()
+
+
+def get_validation_plan(db: Session, spec_id: str) -> Optional[ValidationPlan]:
+    """
+    Get the validation plan of a spec snapshot.
+
+    Looks in the process cache, then the stored plan, and compiles (and
+    stores) the plan only if neither is current. Does not commit; the
+    stored plan is written with the caller's transaction. If a concurrent
+    run stores the spec's plan first, that plan is used.
+
+    Args:
+        db: Database session
+        spec_id: Spec snapshot ID
+
+    Returns:
+        ValidationPlan, or None if the spec does not exist
+    """
+    plan = validation_plans.get(spec_id)
+    if plan is not None:
+        return plan
+
+    record = db.query(ValidationPlanRecord).filter(ValidationPlanRecord.spec_id == spec_id).first()
+    if record is not None and record.plan_version == PLAN_VERSION:
+        return validation_plans.put(spec_id, ValidationPlan.from_dict(record.plan))
+
+    spec = db.query(SpecSnapshot).filter(SpecSnapshot.id == spec_id).first()
+    if spec is None:
+        return None
+
+    operations = db.query(Operation).filter(Operation.spec_id == spec_id).all()
+    plan = compile_plan(operations, spec_id=spec_id, spec_hash=spec.spec_hash)
+
+    if record is None:
+        try:
+            # Savepoint: a concurrent first run may store the plan first,
+            # which must not roll back the caller's transaction
+            with db.begin_nested():
+                db.add(ValidationPlanRecord(
+                    spec_id=spec_id,
+                    spec_hash=spec.spec_hash,
+                    plan_version=PLAN_VERSION,
+                    plan=plan.to_dict(),
+                ))
+            return validation_plans.put(spec_id, plan)
+        except IntegrityError:
+            record = (
+                db.query(ValidationPlanRecord)
+                .filter(ValidationPlanRecord.spec_id == spec_id)
+                .populate_existing()
+                .one()
+            )
+            if record.plan_version == PLAN_VERSION:
+                return validation_plans.put(spec_id, ValidationPlan.from_dict(record.plan))
+
+    record.spec_hash = spec.spec_hash
+    record.plan_version = PLAN_VERSION
+    record.plan = plan.to_dict()
+    db.flush()
+
+    return validation_plans.put(spec_id, plan)
@@ -7,7 +7,9 @@ import pytest
 import json
 import sys
 import os
-from unittest.mock import Mock, patch, MagicMock
+import math
+import time
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -153,6 +155,422 @@ class TestAnomalyDetectorFullCoverage:
         assert isinstance(anomalies, list)
 
 
+def _runtime_metrics(count, seed=0, spike_every=50):
+    """Synthetic runtime metrics with a latency spike every ``spike_every`` calls."""
+    import random
+    from datetime import timedelta
+    
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    return [
+        RuntimeMetrics(
+            latency_ms=rng.gauss(120, 15) * (40 if i % spike_every == spike_every - 1 else 1),
+            status_code=500 if i % 97 == 0 else 200,
+            response_size_bytes=rng.randint(800, 1200),
+            timestamp=start + timedelta(minutes=i),
+            endpoint=f"/api/item/{i % 3}",
+            method="GET",
+        )
+        for i in range(count)
+    ]
+
+
+@allure.feature("Anomaly Batch Scoring - Full Coverage")
+class TestAnomalyBatchFullCoverage:
+    """Complete coverage for vectorized anomaly scoring."""
+    
+    @allure.title("Test feature matrix matches the feature names")
+    def test_feature_matrix(self):
+        detector = AnomalyDetector(algorithm="statistical")
+        metrics = _runtime_metrics(3)
+        
+        matrix = detector._feature_matrix(metrics)
+        
+        assert matrix.shape == (3, 6)
+        assert matrix[0, 4] == 1.0  # status 500 is an error
+        assert matrix[1, 5] == pytest.approx(math.log1p(metrics[1].latency_ms))
+    
+    @allure.title("Test batch scores equal single scores")
+    @pytest.mark.parametrize("algorithm", ["isolation_forest", "lof", "statistical"])
+    def test_batch_matches_single(self, algorithm):
+        detector = AnomalyDetector(algorithm=algorithm).fit(_runtime_metrics(500, seed=1))
+        metrics = _runtime_metrics(100, seed=2)
+        
+        batch = detector.score_batch(metrics)
+        
+        for metric, score in list(zip(metrics, batch))[::5]:
+            single = detector.detect(metric)
+            assert single.is_anomaly == score.is_anomaly
+            assert single.score == pytest.approx(score.score)
+            assert single.features_contribution == pytest.approx(score.features_contribution)
+        assert any(score.is_anomaly for score in batch)
+    
+    @allure.title("Test statistical batch flags latency spikes")
+    def test_statistical_batch(self):
+        detector = AnomalyDetector(algorithm="statistical").fit(_runtime_metrics(500, seed=1))
+        
+        report = detector.detect_batch(_runtime_metrics(200, seed=3))
+        
+        assert report.anomaly_count >= 4
+        assert all(m.latency_ms > 1000 or m.status_code == 500 for m, _ in report.top_anomalies)
+        assert any("high latency" in s.explanation for _, s in report.top_anomalies)
+    
+    @allure.title("Test unfitted model falls back to heuristics")
+    def test_unfitted_fallback(self):
+        scores = AnomalyDetector().score_batch(_runtime_metrics(100))
+        assert [s.is_anomaly for s in scores] == [m.status_code >= 500 or m.latency_ms > 5000 for m in _runtime_metrics(100)]
+
+
+from qoe_guard.ai.anomaly_baselines import AnomalyBaselineRegistry
+
+
+@allure.feature("Anomaly Baselines - Full Coverage")
+class TestAnomalyBaselinesFullCoverage:
+    """Complete coverage for stored per-endpoint anomaly baselines."""
+    
+    @pytest.fixture
+    def db(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from qoe_guard.db.database import Base
+        from qoe_guard.db.models import Operation, SpecSnapshot, ValidationRun
+        
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        session.add(SpecSnapshot(id="spec", source_url="https://example.com", spec_hash="h", normalized_openapi_json={}))
+        session.add(Operation(id="op", spec_id="spec", method="GET", path="/items"))
+        session.add(ValidationRun(id="run"))
+        session.commit()
+        yield session
+        session.close()
+    
+    def _add_results(self, db, count, start_minute=0):
+        from datetime import timedelta
+        from qoe_guard.db.models import OperationResult
+        
+        start = datetime(2024, 1, 1)
+        for i in range(count):
+            db.add(OperationResult(
+                run_id="run",
+                operation_id="op",
+                status_code=200,
+                response_time_ms=100.0 + (i % 7),
+                response_headers={"Content-Length": "1000"},
+                created_at=start + timedelta(minutes=start_minute + i),
+            ))
+        db.commit()
+    
+    @allure.title("Test baselines are trained only for endpoints with new results")
+    def test_refresh_incremental(self, db):
+        registry = AnomalyBaselineRegistry(keep_versions=2)
+        self._add_results(db, 50)
+        
+        assert registry.refresh(db) == {"GET /items": 1}
+        assert registry.refresh(db) == {}
+        
+        self._add_results(db, 1, start_minute=100)
+        assert registry.refresh(db) == {"GET /items": 2}
+        self._add_results(db, 1, start_minute=200)
+        assert registry.refresh(db) == {"GET /items": 3}
+        
+        from qoe_guard.db.models import AnomalyBaseline
+        assert sorted(v for (v,) in db.query(AnomalyBaseline.version).all()) == [2, 3]
+    
+    @allure.title("Test a refresh that loses a version race retries with the next version")
+    def test_refresh_version_conflict(self, db):
+        registry = AnomalyBaselineRegistry()
+        self._add_results(db, 50)
+        registry.refresh(db)
+        self._add_results(db, 1, start_minute=100)
+        
+        # A concurrent refresh stored version 1 after this one read the versions
+        with patch.object(registry, "latest_versions", side_effect=[{}, {"GET /items": 1}]):
+            assert registry.refresh(db) == {"GET /items": 2}
+        
+        from qoe_guard.db.models import AnomalyBaseline
+        assert sorted(v for (v,) in db.query(AnomalyBaseline.version).all()) == [1, 2]
+    
+    @allure.title("Test the same path on different servers gets separate baselines")
+    def test_endpoint_key_includes_server(self, db):
+        from qoe_guard.ai.anomaly_baselines import endpoint_key
+        from qoe_guard.db.models import Operation, OperationResult
+        
+        assert endpoint_key("get", "/items") == "GET /items"
+        assert endpoint_key("get", "/items", "https://api.example.com/v1/") == "GET api.example.com/v1/items"
+        assert endpoint_key("get", "/items", "api.example.com") == "GET api.example.com/items"
+        
+        db.add(Operation(id="op2", spec_id="spec", method="GET", path="/items", server_url="https://api.example.com"))
+        db.add_all([
+            OperationResult(run_id="run", operation_id="op2", status_code=200, response_time_ms=900.0 + (i % 30),
+                            response_headers={"Content-Length": "1000"}, created_at=datetime(2024, 1, 2, 0, i))
+            for i in range(60)
+        ])
+        self._add_results(db, 50)
+        
+        registry = AnomalyBaselineRegistry()
+        assert registry.refresh(db) == {"GET /items": 1, "GET api.example.com/items": 1}
+        assert registry.get_detector(db, "GET api.example.com/items").training_stats["latency_ms"]["mean"] > 900
+        
+        def metric(server_url=None):
+            return RuntimeMetrics(
+                latency_ms=915, status_code=200, response_size_bytes=1000, timestamp=datetime(2024, 1, 3),
+                endpoint="/items", method="GET", extra={"server_url": server_url} if server_url else {},
+            )
+        report = registry.detect(db, [metric(), metric("https://api.example.com")])
+        assert report.anomaly_count == 1
+        assert [m.extra for m, s in report.top_anomalies if s.is_anomaly] == [{}]
+    
+    @allure.title("Test endpoints with too few results get no baseline")
+    def test_min_samples(self, db):
+        self._add_results(db, 5)
+        assert AnomalyBaselineRegistry().refresh(db) == {}
+    
+    @allure.title("Test detection uses the stored baseline of each endpoint")
+    def test_detect_with_baseline(self, db):
+        registry = AnomalyBaselineRegistry()
+        self._add_results(db, 50)
+        registry.refresh(db)
+        
+        detector = registry.get_detector(db, "GET /items")
+        assert registry.get_detector(db, "GET /items") is detector
+        assert detector.training_stats["latency_ms"]["mean"] == pytest.approx(103, abs=1)
+        
+        def metric(latency, endpoint="/items"):
+            return RuntimeMetrics(
+                latency_ms=latency,
+                status_code=200,
+                response_size_bytes=1000,
+                timestamp=datetime(2024, 1, 1, 0),
+                endpoint=endpoint,
+                method="get",
+            )
+        
+        report = registry.detect(db, [metric(102), metric(900), metric(900, "/other"), metric(9000, "/other")])
+        
+        assert report.anomaly_count == 2
+        flagged = {(m.endpoint, m.latency_ms) for m, _ in report.top_anomalies}
+        assert flagged == {("/items", 900), ("/other", 9000)}
+
+
+from qoe_guard.ai.online_anomaly import (
+    EndpointLatencyState,
+    OnlineLatencyMonitor,
+    P2Quantile,
+    RunningMoments,
+)
+
+
+@allure.feature("Online Anomaly Detection - Full Coverage")
+class TestOnlineAnomalyFullCoverage:
+    """Complete coverage for streaming per-endpoint latency detection."""
+    
+    @allure.title("Test running moments match numpy")
+    def test_running_moments(self):
+        import numpy as np
+        
+        values = np.random.default_rng(1).normal(200, 30, 5000)
+        moments = RunningMoments()
+        for value in values:
+            moments.update(float(value))
+        
+        assert moments.mean == pytest.approx(values.mean())
+        assert moments.std == pytest.approx(values.std())
+        assert (moments.min, moments.max) == (values.min(), values.max())
+        assert RunningMoments.from_dict(moments.to_dict()).m2 == moments.m2
+    
+    @allure.title("Test P² quantile sketches approximate percentiles")
+    def test_p2_quantiles(self):
+        import numpy as np
+        
+        values = np.random.default_rng(2).lognormal(5, 0.4, 20000)
+        for p in (0.25, 0.75, 0.99):
+            sketch = P2Quantile(p)
+            for value in values:
+                sketch.update(float(value))
+            assert sketch.value == pytest.approx(np.percentile(values, p * 100), rel=0.02)
+        
+        small = P2Quantile(0.5)
+        for value in (3, 1, 2):
+            small.update(value)
+        assert small.value == 2
+        with pytest.raises(ValueError):
+            P2Quantile(1.0)
+    
+    @allure.title("Test state survives a JSON round trip")
+    def test_state_round_trip(self):
+        import json
+        
+        state = EndpointLatencyState()
+        for i in range(120):
+            state.update(100.0 + i % 10, datetime(2024, 1, 1))
+        restored = EndpointLatencyState.from_dict(json.loads(json.dumps(state.to_dict())), state.last_observed_at)
+        
+        assert restored.trend() == state.trend()
+        assert len(restored.window.values) == restored.window.size
+    
+    @allure.title("Test spikes and level shifts are flagged")
+    def test_anomaly_and_drift(self):
+        state = EndpointLatencyState()
+        assert not state.observe("GET /items", 5000).is_anomaly  # Insufficient history
+        for i in range(500):
+            state.observe("GET /items", 100.0 + i % 10)
+        
+        spike = state.observe("GET /items", 1000)
+        assert spike.is_anomaly and "unusual" in spike.explanation
+        
+        shifted = [state.observe("GET /items", 300.0 + i % 10) for i in range(20)]
+        assert any(o.is_drift for o in shifted)
+        assert state.trend()["overall_mean"] == pytest.approx(state.moments.mean)
+    
+    @allure.title("Test trend matches the batch trend detector")
+    def test_trend_matches_batch(self):
+        from qoe_guard.ai.anomaly_detector import TimeSeriesAnomalyDetector
+        
+        metrics = _runtime_metrics(400, seed=3)
+        for i, m in enumerate(metrics[-50:]):
+            m.latency_ms += 5 * i
+        state = EndpointLatencyState()
+        for m in sorted(metrics, key=lambda m: m.timestamp):
+            state.update(m.latency_ms)
+        
+        online = state.trend()
+        batch = TimeSeriesAnomalyDetector(window_size=50).detect_latency_trend(metrics)
+        assert online["trend"] == "increasing"
+        assert online["overall_mean"] == pytest.approx(batch["overall_mean"])
+        assert online["recent_mean"] == pytest.approx(batch["recent_mean"])
+        assert online["z_score"] == pytest.approx(batch["z_score"])
+        assert EndpointLatencyState().trend()["trend"] == "insufficient_data"
+    
+    @allure.title("Test the monitor keeps states in the database")
+    def test_monitor_persistence(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from qoe_guard.db.database import Base
+        from qoe_guard.db.models import LatencySketch
+        
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        monitor = OnlineLatencyMonitor(min_samples=10)
+        
+        monitor.observe(db, [("GET /items", 100.0 + i % 5, datetime(2024, 1, 1)) for i in range(30)])
+        db.commit()
+        observed = monitor.observe(db, [("GET /items", 2000.0, datetime(2024, 1, 2)), ("GET /other", 50.0, None)])
+        db.commit()
+        
+        assert observed[0].is_anomaly and not observed[1].is_anomaly
+        assert monitor.observe(db, []) == []
+        rows = {row.endpoint_key: row for row in db.query(LatencySketch).all()}
+        assert rows["GET /items"].sample_count == 31
+        assert rows["GET /items"].last_observed_at == datetime(2024, 1, 2)
+        assert monitor.states(db, ["GET /other"])["GET /other"].count == 1
+        db.close()
+    
+    @allure.title("Test a concurrent first observation is merged, not lost")
+    def test_monitor_concurrent_insert(self, tmp_path):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from qoe_guard.db.database import Base
+        from qoe_guard.db.models import LatencySketch, ValidationRun
+    
+        engine = create_engine(f"sqlite:///{tmp_path / 'sketches.db'}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        db, other = Session(), Session()
+        worker, monitor = OnlineLatencyMonitor(), OnlineLatencyMonitor()
+        load = monitor.load
+    
+        def stale_load(session, keys=None, for_update=False):
+            if not for_update:
+                # The other worker stores the endpoint after this one looked
+                worker.observe(other, [("GET /items", 100.0, None), ("GET /items", 120.0, None)])
+                other.commit()
+                return {}
+            return load(session, keys, for_update)
+    
+        db.add(ValidationRun(id="run"))
+        with patch.object(monitor, "load", side_effect=stale_load):
+            monitor.observe(db, [("GET /items", 140.0, datetime(2024, 1, 1))])
+        db.commit()
+    
+        rows = db.query(LatencySketch).all()
+        assert [row.sample_count for row in rows] == [3]
+        assert monitor.states(db)["GET /items"].moments.mean == pytest.approx(120.0)
+        assert db.get(ValidationRun, "run") is not None
+        db.close()
+        other.close()
+    
+    @allure.title("Test states are rebuilt from stored results")
+    def test_monitor_rebuild(self):
+        from datetime import timedelta
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from qoe_guard.db.database import Base
+        from qoe_guard.db.models import Operation, OperationResult, SpecSnapshot, ValidationRun
+        
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        db.add(SpecSnapshot(id="spec", source_url="https://example.com", spec_hash="h", normalized_openapi_json={}))
+        db.add(Operation(id="op", spec_id="spec", method="GET", path="/items"))
+        db.add(ValidationRun(id="run"))
+        for i in range(40):
+            db.add(OperationResult(
+                run_id="run",
+                operation_id="op",
+                response_time_ms=100.0 + i,
+                created_at=datetime(2024, 1, 1) + timedelta(minutes=i),
+            ))
+        db.add(OperationResult(run_id="run", response_time_ms=1.0))
+        db.commit()
+        
+        monitor = OnlineLatencyMonitor()
+        monitor.observe(db, [("GET /stale", 1.0, None)])
+        assert monitor.rebuild(db, batch_size=7) == {"GET /items": 40}
+        
+        states = monitor.states(db)
+        assert list(states) == ["GET /items"]
+        assert states["GET /items"].moments.mean == pytest.approx(119.5)
+        assert states["GET /items"].last_observed_at == datetime(2024, 1, 1, 0, 39)
+        db.close()
+    
+    @allure.title("Test validation runs persist latency states before scoring")
+    def test_orchestrator_persists_sketches(self):
+        import asyncio
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from qoe_guard.db.database import Base
+        from qoe_guard.db.models import LatencySketch, Operation, OperationResult, SpecSnapshot, ValidationRun
+        from qoe_guard.validation.orchestrator import OperationExecutionResult, ValidationOrchestrator
+        from qoe_guard.validation.plan import validation_plans
+        from qoe_guard.validation.runner import RuntimeResult
+        
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        db.add(SpecSnapshot(id="spec", source_url="https://example.com", spec_hash="h", normalized_openapi_json={}))
+        db.add(Operation(id="op", spec_id="spec", method="GET", path="/items", server_url="https://api.example.com"))
+        db.add(ValidationRun(id="run", spec_id="spec", selected_operations=["op"]))
+        db.commit()
+        validation_plans.clear()
+        
+        result = OperationExecutionResult(runtime=RuntimeResult(success=True, status_code=200, response_time_ms=120.0))
+        orchestrator = ValidationOrchestrator(db)
+        with patch.object(ValidationOrchestrator, "_execute_operation", AsyncMock(return_value=result)), \
+                patch("qoe_guard.validation.orchestrator.compute_brittleness_score", side_effect=RuntimeError("scoring failed")):
+            with pytest.raises(RuntimeError):
+                asyncio.run(orchestrator.execute("run"))
+        db.rollback()
+        
+        sketch = db.query(LatencySketch).one()
+        assert sketch.endpoint_key == "GET api.example.com/items"
+        assert sketch.sample_count == 1
+        assert db.query(OperationResult).count() == 1
+        validation_plans.clear()
+        db.close()
+
+
 # ============================================================================
 # Test qoe_guard.ai.llm_analyzer module
 # ============================================================================
@@ -234,6 +652,274 @@ class TestLLMAnalyzerFullCoverage:
         assert isinstance(result, DiffAnalysis)
 
 
+from qoe_guard.ai.llm_analyzer import FakeLLMClient
+from qoe_guard.ai.llm_cache import LLMResponseCache, cache_key, normalize_prompt
+
+
+@allure.feature("LLM Response Cache - Full Coverage")
+class TestLLMResponseCacheFullCoverage:
+    """Complete coverage for LLM response caching and request coalescing."""
+    
+    @allure.title("Test prompts differing only in layout share a key")
+    def test_cache_key_normalized(self):
+        assert normalize_prompt("\n    Analyze:\n\n      {}\n    ") == "Analyze:\n{}"
+        assert cache_key("fake", "m", "  Analyze:\n  {}") == cache_key("fake", "m", "Analyze:\n\n{}")
+        assert cache_key("fake", "m", "Analyze") != cache_key("fake", "other", "Analyze")
+        assert cache_key("groq", "m", "Analyze") != cache_key("openai", "m", "Analyze")
+    
+    @allure.title("Test identical analyses call the provider once")
+    def test_analyzer_reuses_response(self):
+        client = FakeLLMClient(default='{"summary": "Cached", "confidence": 0.9}')
+        analyzer = LLMAnalyzer(client=client, cache=LLMResponseCache(cache_dir=None))
+        changes = [{"path": "$.a", "change_type": "removed"}]
+        
+        first = analyzer.analyze_diff({"a": 1}, {}, changes)
+        second = analyzer.analyze_diff({"a": 1}, {}, changes)
+        
+        assert analyzer.provider == LLMProvider.FAKE
+        assert first.summary == second.summary == "Cached"
+        assert client.calls == 1
+        assert analyzer.cache.stats()["hits"] == 1
+    
+    @allure.title("Test expired responses are fetched again")
+    def test_ttl_expiry(self):
+        client = FakeLLMClient()
+        analyzer = LLMAnalyzer(client=client, cache=LLMResponseCache(ttl_sec=0.05, cache_dir=None))
+        
+        analyzer._call_llm("prompt")
+        analyzer._call_llm("prompt")
+        assert client.calls == 1
+        
+        time.sleep(0.1)
+        analyzer._call_llm("prompt")
+        assert client.calls == 2
+    
+    @allure.title("Test responses persist on disk across caches")
+    def test_disk_persistence(self, tmp_path):
+        first_client = FakeLLMClient(default="persisted")
+        LLMAnalyzer(client=first_client, cache=LLMResponseCache(cache_dir=tmp_path))._call_llm("prompt")
+        
+        second_client = FakeLLMClient(default="fresh")
+        response = LLMAnalyzer(client=second_client, cache=LLMResponseCache(cache_dir=tmp_path))._call_llm("prompt")
+        
+        assert response == "persisted"
+        assert second_client.calls == 0
+        assert len(list(tmp_path.glob("*/*.json"))) == 1
+        
+        LLMResponseCache(cache_dir=tmp_path).clear(remove_files=True)
+        assert not list(tmp_path.glob("*/*.json"))
+    
+    @allure.title("Test concurrent identical requests coalesce")
+    def test_concurrent_requests_coalesce(self):
+        from concurrent.futures import ThreadPoolExecutor
+        
+        client = FakeLLMClient(default="shared", delay_sec=0.2)
+        analyzer = LLMAnalyzer(client=client, cache=LLMResponseCache(cache_dir=None))
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(lambda _: analyzer._call_llm("same prompt"), range(8)))
+        
+        assert responses == ["shared"] * 8
+        assert client.calls == 1
+    
+    @allure.title("Test failed calls are not cached")
+    def test_failures_not_cached(self):
+        cache = LLMResponseCache(cache_dir=None)
+        
+        def fail():
+            raise RuntimeError("provider down")
+        
+        with pytest.raises(RuntimeError):
+            cache.get_or_call("key", fail)
+        assert cache.get("key") is None
+        assert cache.get_or_call("key", lambda: "ok") == "ok"
+
+
+from qoe_guard.ai.prompt_budget import (
+    PromptBudget,
+    aggregate_changes,
+    estimate_tokens,
+    rank_changes,
+    summarize_change_set,
+)
+
+
+@allure.feature("Prompt Budget - Full Coverage")
+class TestPromptBudgetFullCoverage:
+    """Complete coverage for prompt size budgeting."""
+    
+    @allure.title("Test changes are ranked by criticality")
+    def test_rank_changes(self):
+        ranked = rank_changes([
+            {"path": "$.analytics.id", "change_type": "value_changed"},
+            {"path": "$.playback.manifestUrl", "change_type": "value_changed"},
+            {"path": "$.other", "change_type": "value_changed", "criticality_score": 0.5},
+            {"path": "$.other2", "change_type": "removed", "criticality_score": 0.5},
+        ])
+        assert [c["path"] for c in ranked] == [
+            "$.playback.manifestUrl", "$.other2", "$.other", "$.analytics.id",
+        ]
+    
+    @allure.title("Test remaining changes are aggregated by prefix")
+    def test_aggregate_changes(self):
+        changes = [{"path": f"$.items[{i}].price", "change_type": "value_changed"} for i in range(5)]
+        changes.append({"path": "$.meta.etag", "change_type": "removed"})
+        
+        groups = aggregate_changes(changes, depth=2)
+        assert groups["$.items[*].price"]["count"] == 5
+        assert groups["$.meta.etag"]["by_type"] == {"removed": 1}
+        
+        merged = aggregate_changes(changes, depth=2, max_groups=1)
+        assert merged == {"*": {"count": 6, "by_type": {"value_changed": 5, "removed": 1}, "max_criticality": 0.35}}
+    
+    @allure.title("Test change sets are cut to the top-k with excerpts")
+    def test_summarize_change_set(self):
+        baseline = {"playback": {"manifestUrl": "a", "codec": "h264"}, "blob": "x" * 5000}
+        candidate = {"playback": {"manifestUrl": "b", "codec": "h264"}, "blob": "y" * 5000}
+        changes = [
+            {"path": "$.blob", "change_type": "value_changed", "old_value": "x" * 5000, "new_value": "y" * 5000},
+            {"path": "$.playback.manifestUrl", "change_type": "value_changed"},
+        ]
+        
+        summary = summarize_change_set(baseline, candidate, changes, PromptBudget(top_k_changes=1, value_chars=50))
+        
+        assert summary.total_changes == 2
+        assert summary.omitted_changes == 1
+        assert summary.top_changes[0]["path"] == "$.playback.manifestUrl"
+        assert summary.baseline_excerpt == {"$.playback": {"manifestUrl": "a", "codec": "h264"}}
+        assert "$.blob" in summary.omitted_by_prefix
+    
+    @allure.title("Test analysis prompts stay within budget for large payloads")
+    def test_analysis_prompt_bounded(self):
+        baseline = {"items": [{"id": i, "price": i, "name": "n" * 40} for i in range(5000)]}
+        candidate = {"items": [{"id": i, "price": i + 1, "name": "n" * 40} for i in range(5000)]}
+        changes = [
+            {"path": f"$.items[{i}].price", "change_type": "value_changed", "old_value": i, "new_value": i + 1}
+            for i in range(5000)
+        ]
+        analyzer = LLMAnalyzer(client=FakeLLMClient(), cache=None, budget=PromptBudget(max_prompt_tokens=1500))
+        
+        prompt = analyzer._build_analysis_prompt(baseline, candidate, changes, None)
+        
+        assert estimate_tokens(prompt) <= 1500
+        assert "of 5000" in prompt
+        assert "$.items[*].price" in prompt
+
+
+import asyncio
+
+from qoe_guard.ai.llm_client import AsyncLLMClient
+
+
+class _ConcurrencyTrackingClient(FakeLLMClient):
+    """Fake provider client recording the peak number of concurrent calls."""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.active = 0
+        self.peak = 0
+    
+    async def acomplete(self, prompt, system="", **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().acomplete(prompt, system)
+        finally:
+            self.active -= 1
+
+
+@allure.feature("Async LLM Client - Full Coverage")
+class TestAsyncLLMFullCoverage:
+    """Complete coverage for async LLM calls."""
+    
+    @allure.title("Test independent analysis steps run concurrently")
+    def test_change_set_steps_concurrent(self):
+        client = FakeLLMClient(delay_sec=0.2)
+        analyzer = LLMAnalyzer(client=client, cache=LLMResponseCache(cache_dir=None))
+        changes = [
+            {"path": "$.playback.manifestUrl", "change_type": "removed"},
+            {"path": "$.drm.licenseUrl", "change_type": "type_changed"},
+            {"path": "$.analytics.id", "change_type": "value_changed"},
+        ]
+        
+        start = time.monotonic()
+        result = asyncio.run(analyzer.aanalyze_change_set(
+            {}, {}, changes, audiences=["technical", "executive"], classify_top=2,
+        ))
+        elapsed = time.monotonic() - start
+        
+        assert client.calls == 5
+        assert elapsed < 0.8  # two rounds of 0.2s, not five
+        assert result["analysis"].summary == "Fake analysis"
+        assert [c["path"] for c in result["classifications"]] == ["$.playback.manifestUrl", "$.drm.licenseUrl"]
+        assert set(result["explanations"]) == {"technical", "executive"}
+    
+    @allure.title("Test concurrent calls per provider are limited")
+    def test_concurrency_limit(self):
+        client = _ConcurrencyTrackingClient(delay_sec=0.05)
+        async_client = AsyncLLMClient("fake", "fake", client=client, max_concurrency=2)
+        
+        async def run():
+            return await asyncio.gather(*(async_client.complete(f"prompt {i}") for i in range(6)))
+        
+        assert len(asyncio.run(run())) == 6
+        assert client.peak == 2
+    
+    @allure.title("Test slow providers time out and fall back")
+    def test_timeout_fallback(self):
+        client = FakeLLMClient(delay_sec=1.0)
+        analyzer = LLMAnalyzer(client=client, cache=None)
+        analyzer.async_client.timeout_sec = 0.05
+        analysis = DiffAnalysis(
+            summary="Fallback summary",
+            breaking_changes=[],
+            non_breaking_changes=[],
+            risk_assessment="low",
+            recommendations=[],
+            impact_prediction="none",
+            confidence=0.5,
+        )
+        
+        with pytest.raises(TimeoutError):
+            asyncio.run(analyzer.async_client.complete("prompt"))
+        assert asyncio.run(analyzer.aexplain_for_stakeholders(analysis)) == "Fallback summary"
+    
+    @allure.title("Test explanations stream and are cached when complete")
+    def test_stream_explanation(self):
+        client = FakeLLMClient(default="A fairly long explanation of the change.")
+        analyzer = LLMAnalyzer(client=client, cache=LLMResponseCache(cache_dir=None))
+        analysis = DiffAnalysis(
+            summary="s",
+            breaking_changes=[],
+            non_breaking_changes=[],
+            risk_assessment="low",
+            recommendations=[],
+            impact_prediction="none",
+            confidence=0.5,
+        )
+        
+        async def collect():
+            return [chunk async for chunk in analyzer.astream_explanation(analysis)]
+        
+        chunks = asyncio.run(collect())
+        assert len(chunks) > 1
+        assert "".join(chunks) == client.default
+        
+        assert asyncio.run(collect()) == [client.default]
+        assert client.calls == 1
+    
+    @allure.title("Test identical async requests coalesce")
+    def test_async_coalescing(self):
+        client = FakeLLMClient(delay_sec=0.1)
+        analyzer = LLMAnalyzer(client=client, cache=LLMResponseCache(cache_dir=None))
+        
+        async def run():
+            return await asyncio.gather(*(analyzer._acall_llm("same prompt") for _ in range(5)))
+        
+        assert len(set(asyncio.run(run()))) == 1
+        assert client.calls == 1
+
+
 # ============================================================================
 # Test qoe_guard.ai.semantic_drift module
 # ============================================================================
@@ -306,6 +992,208 @@ class TestSemanticDriftFullCoverage:
         assert isinstance(result, SemanticDriftReport)
 
 
+from qoe_guard.ai.embeddings import EmbeddingCache, embed_texts, similarity_matrix
+
+
+class _FakeEmbeddingModel:
+    """Bag-of-characters encoder that records every encoded text."""
+    
+    def __init__(self):
+        self.encoded = []
+        self.calls = 0
+    
+    def encode(self, texts, batch_size=32):
+        import numpy as np
+        self.calls += 1
+        self.encoded.extend(texts)
+        vectors = np.zeros((len(texts), 26), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for ch in text.lower():
+                if "a" <= ch <= "z":
+                    vectors[row, ord(ch) - ord("a")] += 1
+        return vectors
+
+
+@allure.feature("Embedding Cache - Full Coverage")
+class TestEmbeddingCacheFullCoverage:
+    """Complete coverage for batched embeddings and the embedding cache."""
+    
+    @allure.title("Test unique texts are encoded once in a batch")
+    def test_embed_texts_batched(self):
+        model = _FakeEmbeddingModel()
+        cache = EmbeddingCache("fake", cache_dir=None)
+        
+        vectors = embed_texts(model, ["user_id", "userId", "user_id"], cache=cache)
+        
+        assert vectors.shape == (3, 26)
+        assert model.calls == 1
+        assert model.encoded == ["user_id", "userId"]
+        assert similarity_matrix(vectors, vectors)[0, 2] == pytest.approx(1.0)
+        
+        embed_texts(model, ["userId"], cache=cache)
+        assert model.calls == 1
+    
+    @allure.title("Test embeddings persist across cache instances")
+    def test_persistent_cache(self, tmp_path):
+        model = _FakeEmbeddingModel()
+        first = EmbeddingCache("org/fake-model", cache_dir=tmp_path)
+        embed_texts(model, ["manifest_url", "playback_url"], cache=first)
+        
+        second = EmbeddingCache("org/fake-model", cache_dir=tmp_path)
+        assert len(second) == 2
+        embed_texts(model, ["playback_url"], cache=second)
+        assert model.calls == 1
+        
+        second.clear(remove_files=True)
+        assert len(EmbeddingCache("org/fake-model", cache_dir=tmp_path)) == 0
+    
+    @allure.title("Test small shards are compacted")
+    def test_compaction(self, tmp_path):
+        from qoe_guard.ai import embeddings
+        
+        model = _FakeEmbeddingModel()
+        cache = EmbeddingCache("fake", cache_dir=tmp_path)
+        for i in range(embeddings.MAX_SHARDS + 2):
+            embed_texts(model, [f"field_{'x' * i}"], cache=cache)
+        
+        # A long-lived cache compacts as it flushes, without a reload
+        assert len(list(cache.directory.glob("*.npz"))) <= embeddings.MAX_SHARDS
+        
+        reloaded = EmbeddingCache("fake", cache_dir=tmp_path)
+        assert len(reloaded) == embeddings.MAX_SHARDS + 2
+        assert len(list(reloaded.directory.glob("*.npz"))) <= embeddings.MAX_SHARDS
+    
+    @allure.title("Test compaction keeps shards written by other processes")
+    def test_compaction_keeps_foreign_shards(self, tmp_path):
+        from qoe_guard.ai import embeddings
+        
+        model = _FakeEmbeddingModel()
+        cache = EmbeddingCache("fake", cache_dir=tmp_path)
+        other = EmbeddingCache("fake", cache_dir=tmp_path)
+        embed_texts(model, ["cached_first"], cache=cache)
+        embed_texts(model, ["from_other_worker"], cache=other)
+        # The last flush pushes the directory past MAX_SHARDS
+        for i in range(embeddings.MAX_SHARDS - 1):
+            embed_texts(model, [f"field_{'x' * i}"], cache=cache)
+        assert len(list(cache.directory.glob("*.npz"))) == 1
+        
+        reloaded = EmbeddingCache("fake", cache_dir=tmp_path)
+        assert len(reloaded) == embeddings.MAX_SHARDS + 1
+    
+    @allure.title("Test detect_drift with batched embeddings")
+    def test_detect_drift_batched(self):
+        model = _FakeEmbeddingModel()
+        detector = SemanticDriftDetector(use_cache=False)
+        detector.model = model
+        
+        report = detector.detect_drift(
+            {"playbackUrl": "x", "quality": "HD", "bitrate": 1000},
+            {"playback_url": "x", "quality": "hd", "bitrate": 1000},
+        )
+        
+        assert model.calls == 1
+        assert [(m.source_key, m.target_key) for m in report.potential_renames] == [
+            ("playbackUrl", "playback_url")
+        ]
+        assert report.value_equivalences[0].source_key == "quality"
+        
+        similar = detector.find_similar_fields("playback", {"playback_url": 1, "zzz": 2}, top_k=1)
+        assert similar[0][0] == "playback_url"
+        assert len(detector.compute_batch_similarity(["a", "b"], ["a"])) == 2
+
+
+from qoe_guard.ai.ann import HNSWIndex, nearest_neighbors, top_k_exact
+from qoe_guard.ai.field_index import FieldIndex, schema_field_paths
+
+
+def _unit_vectors(n, dim=16, seed=0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@allure.feature("Field Rename Search - Full Coverage")
+class TestFieldRenameSearchFullCoverage:
+    """Complete coverage for the ANN index and the known field index."""
+    
+    @allure.title("Test HNSW search matches exact search")
+    def test_hnsw_recall(self):
+        vectors = _unit_vectors(600)
+        index = HNSWIndex(exact_threshold=0)
+        assert index.add(vectors, list(range(600))) == 600
+        assert index.add(vectors[:10], list(range(10))) == 0
+        
+        exact, _ = top_k_exact(vectors[:50], vectors, 5)
+        found = index.search_many(vectors[:50], k=5)
+        recall = sum(
+            len({label for label, _ in row} & set(expected))
+            for row, expected in zip(found, exact.tolist())
+        ) / 250
+        assert recall >= 0.9
+        assert index.search(vectors[7], k=1)[0][0] == 7
+    
+    @allure.title("Test exact top-k and one-off neighbor search")
+    def test_nearest_neighbors(self):
+        vectors = _unit_vectors(20)
+        neighbors = nearest_neighbors(vectors[:3], vectors, k=2)
+        assert [row[0][0] for row in neighbors] == [0, 1, 2]
+        assert neighbors[0][0][1] == pytest.approx(1.0)
+        assert len(nearest_neighbors(vectors[:3], vectors, k=2, exact_threshold=5)[0]) == 2
+        assert HNSWIndex().search(vectors[0]) == []
+    
+    @allure.title("Test schema field paths")
+    def test_schema_field_paths(self):
+        schema = {
+            "type": "object",
+            "properties": {
+                "items": {"type": "array", "items": {"properties": {"price": {"type": "number"}}}},
+                "user": {"allOf": [{"properties": {"id": {}}}]},
+            },
+        }
+        assert list(schema_field_paths(schema)) == ["items", "items[*].price", "user", "user.id"]
+    
+    @allure.title("Test known field index refreshes incrementally")
+    def test_field_index_refresh(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from qoe_guard.db.database import Base
+        from qoe_guard.db.models import Operation, OperationBody, SpecSnapshot
+        
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        db.add(OperationBody(id="a", response_schemas={"200": {"properties": {"playback_url": {}}}}))
+        db.commit()
+        
+        model = _FakeEmbeddingModel()
+        detector = SemanticDriftDetector(use_cache=False)
+        detector.model = model
+        field_index = FieldIndex("fake")
+        
+        assert field_index.refresh(db, detector.embed) == 1
+        assert field_index.refresh(db, detector.embed) == 0
+        db.add(OperationBody(id="b", request_body_schema={"properties": {"manifest_url": {}, "playback_url": {}}}))
+        db.commit()
+        assert field_index.refresh(db, detector.embed) == 1
+        assert model.encoded == ["playback_url", "manifest_url"]
+        
+        # Legacy operations keep their schemas inline, without a body row
+        db.add(SpecSnapshot(id="spec", source_url="https://example.com", spec_hash="h", normalized_openapi_json={}))
+        legacy = Operation(id="legacy", spec_id="spec", method="GET", path="/drm")
+        legacy.response_schemas = {"200": {"properties": {"license_url": {}, "manifest_url": {}}}}
+        db.add(legacy)
+        db.add(Operation(id="empty", spec_id="spec", method="GET", path="/health"))
+        db.commit()
+        assert field_index.refresh(db, detector.embed) == 1
+        assert field_index.refresh(db, detector.embed) == 0
+        assert model.encoded[-1] == "license_url"
+        
+        detector.field_index = field_index
+        assert detector.find_similar_fields("playbackUrl", top_k=1)[0][0] == "playback_url"
+        assert SemanticDriftDetector(use_cache=False).find_similar_fields("x") == []
+
+
 # ============================================================================
 # Test qoe_guard.ai.nlp_analyzer module
 # ============================================================================
@@ -395,6 +1283,190 @@ class TestNLPAnalyzerFullCoverage:
         assert isinstance(result, DocumentationQuality)
 
 
+from qoe_guard.ai.nlp_analyzer import ClassificationCache
+
+
+class _FakeSpacyDoc:
+    def __init__(self, text):
+        self.ents = [Mock(label_="PRODUCT", text=word) for word in text.split() if word == "netflix"]
+
+
+class _FakeSpacy:
+    def __init__(self):
+        self.pipe_calls = 0
+    
+    def __call__(self, text):
+        return _FakeSpacyDoc(text)
+    
+    def pipe(self, texts, batch_size=64):
+        self.pipe_calls += 1
+        return [_FakeSpacyDoc(text) for text in texts]
+
+
+class _FakeZeroShot:
+    def __init__(self):
+        self.calls = []
+    
+    def __call__(self, sequences, labels, batch_size=None):
+        self.calls.append(list(sequences))
+        outputs = [{"labels": ["ads"], "scores": [0.9]} for _ in sequences]
+        return outputs[0] if len(outputs) == 1 else outputs
+
+
+class _FakeKeyBERT:
+    def __init__(self):
+        self.calls = 0
+    
+    def extract_keywords(self, docs, **kwargs):
+        self.calls += 1
+        keywords = [[(doc.split()[-1], 0.5)] for doc in docs]
+        return keywords[0] if len(keywords) == 1 else keywords
+
+
+def _batch_analyzer(cache=None):
+    analyzer = NLPAnalyzer.__new__(NLPAnalyzer)
+    analyzer.spacy_model = "fake"
+    analyzer.use_transformers = True
+    analyzer.cache = cache if cache is not None else ClassificationCache(cache_dir=None)
+    analyzer.nlp = _FakeSpacy()
+    analyzer.classifier = _FakeZeroShot()
+    analyzer.keyword_extractor = _FakeKeyBERT()
+    return analyzer
+
+
+@allure.feature("NLP Batch Analysis - Full Coverage")
+class TestNLPBatchFullCoverage:
+    """Complete coverage for batched NLP analysis."""
+    
+    @allure.title("Test batch intents run each model once")
+    def test_extract_intents_batched(self):
+        analyzer = _batch_analyzer()
+        endpoints = [
+            {"path": "/v1/playback/{id}", "method": "GET", "description": "Start netflix playback"},
+            {"path": "/v1/ads", "method": "GET"},
+            {"path": "/v1/playback/{id}", "method": "GET", "description": "Start netflix playback"},
+        ]
+        
+        intents = analyzer.extract_intents(endpoints)
+        
+        assert analyzer.nlp.pipe_calls == 1
+        assert analyzer.classifier.calls == [["Start netflix playback"]]
+        assert analyzer.keyword_extractor.calls == 1
+        assert intents[0] is intents[2]
+        assert intents[0].extracted_entities["PATH_PARAM"] == ["id"]
+        assert intents[0].extracted_entities["PRODUCT"] == ["netflix"]
+        assert intents[0].keywords == ["playback"]
+        assert intents[1].primary_intent == "ads"
+    
+    @allure.title("Test classified endpoints are served from cache")
+    def test_cached_classification(self):
+        analyzer = _batch_analyzer()
+        endpoint = {"endpoint_path": "/drm/license", "method": "POST", "tags": ["drm"]}
+        
+        first = analyzer.classify_criticalities([endpoint])[0]
+        analyzer.extract_intents([endpoint])
+        analyzer.extract_intents([endpoint])
+        
+        assert analyzer.classify_criticality("/drm/license", "POST", tags=["drm"]) is first
+        assert first.criticality_level == "critical"
+        assert analyzer.nlp.pipe_calls == 1
+        assert analyzer.extract_intent("/drm/license", "POST") is not None
+        analyzer.cache.clear()
+        assert len(analyzer.cache) == 0
+    
+    @allure.title("Test classifications persist on disk across processes")
+    def test_persistent_classification(self, tmp_path, capsys):
+        endpoint = {"endpoint_path": "/drm/license", "method": "POST", "description": "Get a playback license"}
+        first = _batch_analyzer(ClassificationCache(cache_dir=tmp_path))
+        intent = first.extract_intents([endpoint])[0]
+        criticality = first.classify_criticalities([endpoint])[0]
+        
+        # A new process (empty memory) reads the stored results
+        second = _batch_analyzer(ClassificationCache(max_entries=1, cache_dir=tmp_path))
+        assert second.extract_intents([endpoint])[0] == intent
+        assert second.classify_criticalities([endpoint])[0] == criticality
+        assert second.nlp.pipe_calls == 0
+        assert len(second.cache) == 1
+        
+        for path in tmp_path.glob("v*/*/*.json"):
+            path.write_text("{broken")
+        assert ClassificationCache(cache_dir=tmp_path).get(path.stem) is None
+        assert "Skipping classification cache entry" in capsys.readouterr().out
+        
+        second.cache.clear(remove_files=True)
+        assert list(tmp_path.glob("v*/*/*.json")) == []
+    
+    @allure.title("Test keyword matcher matches naive substring scoring")
+    def test_keyword_matcher(self):
+        from qoe_guard.ai.nlp_analyzer import KeywordMatcher, STREAMING_INTENTS
+        
+        matcher = KeywordMatcher({"ads": ["ad", "advertisement"], "playback": ["play", "playback"], "user": ["profile"]})
+        assert matcher.counts("/v1/advertisements/replay") == {"ads": 2, "playback": 1}
+        assert matcher.matches("/v1/advertisements/replay") == {"ads": ["ad", "advertisement"], "playback": ["play"]}
+        assert matcher.counts("/health") == {}
+        
+        analyzer = _batch_analyzer()
+        text = "/api/v2/playback/{contentid}/manifest with drm license and ad tracking"
+        expected = {}
+        for intent, keywords in STREAMING_INTENTS.items():
+            hits = sum(0.25 for kw in keywords if kw in text)
+            if hits:
+                expected[intent] = hits
+        top = max(expected.values())
+        assert analyzer._compute_intent_scores(text) == {k: min(1.0, v / top) for k, v in expected.items()}
+        assert analyzer._suggest_tags(text) == ["playback", "entitlement", "analytics"]
+    
+    @allure.title("Test keyword automaton matches and outpaces per-keyword search on bulk texts")
+    def test_keyword_automaton_bulk(self):
+        import random
+        import time
+        from qoe_guard.ai import nlp_analyzer
+        from qoe_guard.ai.nlp_analyzer import CRITICAL_KEYWORDS, KeywordMatcher, STREAMING_INTENTS
+        
+        if nlp_analyzer.ahocorasick is None:
+            pytest.skip("pyahocorasick not installed")
+        rng = random.Random(3)
+        words = "returns the requested playback manifest for a user profile with ad tracking and search filters".split()
+        segments = ["users", "items", "playback", "catalog", "events", "profiles", "titles", "{id}", "v2"]
+        texts = [
+            "/api/" + "/".join(rng.choices(segments, k=3)) + " " + " ".join(rng.choices(words, k=rng.randint(10, 40)))
+            for _ in range(5000)
+        ]
+        
+        for table in (STREAMING_INTENTS, CRITICAL_KEYWORDS):
+            automaton = KeywordMatcher(table)
+            with patch.object(nlp_analyzer, "ahocorasick", None):
+                search = KeywordMatcher(table)
+            assert automaton._automaton is not None and search._automaton is None
+            assert [automaton.counts(t) for t in texts] == [
+                {c: n for c, n in ((c, sum(kw in t for kw in kws)) for c, kws in table.items()) if n} for t in texts
+            ]
+            assert [automaton.matches(t) for t in texts] == [search.matches(t) for t in texts]
+            
+            def best_of(matcher):
+                timings = []
+                for _ in range(3):
+                    start = time.perf_counter()
+                    for t in texts:
+                        matcher.mask(t)
+                    timings.append(time.perf_counter() - start)
+                return min(timings)
+            
+            assert best_of(automaton) < best_of(search)
+    
+    @allure.title("Test fallbacks without models")
+    def test_batch_fallbacks(self):
+        analyzer = _batch_analyzer()
+        analyzer.nlp = None
+        analyzer.classifier = None
+        analyzer.keyword_extractor.extract_keywords = Mock(side_effect=RuntimeError("boom"))
+        
+        intent = analyzer.extract_intents([{"path": "/stream/video/video", "method": "GET"}])[0]
+        
+        assert intent.primary_intent == "playback"
+        assert intent.keywords[0] == "video"
+
+
 # ============================================================================
 # Test qoe_guard.ai.ml_scorer module
 # ============================================================================
@@ -493,6 +1565,550 @@ class TestMLScorerFullCoverage:
         assert isinstance(explanation, SHAPExplanation)
 
 
+def _trained_scorer(count=300, seed=0):
+    """Random-forest scorer trained on synthetic change sets (label: breaking changes)."""
+    import random
+    
+    rng = random.Random(seed)
+    features = [
+        MLFeatureVector(
+            removed_fields=rng.randint(0, 4),
+            type_changes=rng.randint(0, 3),
+            value_changes=rng.randint(0, 10),
+            critical_path_changes=rng.randint(0, 2),
+            error_rate=rng.random() * 0.2,
+        )
+        for _ in range(count)
+    ]
+    labels = [int(f.removed_fields + f.type_changes + 2 * f.critical_path_changes > 4) for f in features]
+    scorer = MLRiskScorer(model_type="random_forest")
+    scorer.train(features, labels)
+    return scorer, features
+
+
+class _FakeTreeExplainer:
+    """SHAP TreeExplainer stand-in: per-class values of shape (rows, features, 2)."""
+    
+    def __init__(self, n_features):
+        import numpy as np
+        
+        self.weights = np.linspace(-1, 1, n_features)
+        self.expected_value = np.array([0.6, 0.4])
+        self.calls = 0
+    
+    def shap_values(self, X):
+        import numpy as np
+        
+        self.calls += 1
+        values = X * self.weights
+        return np.stack([-values, values], axis=2)
+
+
+@allure.feature("ML Batch Scoring - Full Coverage")
+class TestMLBatchScoringFullCoverage:
+    """Complete coverage for batch ML scoring and explanations."""
+    
+    @allure.title("Test batch predictions match single predictions")
+    def test_predict_batch_matches_predict(self):
+        scorer, features = _trained_scorer()
+        batch = scorer.predict_batch(features[:40])
+        
+        assert len(batch) == 40
+        for f, prediction in zip(features[:40:8], batch[::8]):
+            assert prediction == scorer.predict(f)
+        assert {p.decision for p in batch} <= {"PASS", "WARN", "FAIL"}
+        assert scorer.predict_batch([]) == []
+    
+    @allure.title("Test contributors skip zero features and are ranked by size")
+    def test_predict_batch_contributors(self):
+        scorer, _ = _trained_scorer()
+        prediction = scorer.predict_batch([MLFeatureVector(removed_fields=3, critical_path_changes=2)])[0]
+        
+        names = [name for name, _, _ in prediction.top_contributors]
+        assert set(names) <= {"removed_fields", "critical_path_changes"}
+        sizes = [abs(value) for _, value, _ in prediction.top_contributors]
+        assert sizes == sorted(sizes, reverse=True)
+        assert scorer._get_feature_importances() is prediction.feature_importances
+    
+    @allure.title("Test untrained scorer falls back to heuristics per row")
+    def test_predict_batch_fallback(self):
+        scorer = MLRiskScorer(model_type="random_forest")
+        features = [MLFeatureVector(), MLFeatureVector(removed_fields=5, type_changes=5, critical_path_changes=5)]
+        
+        assert scorer.predict_batch(features) == [scorer._fallback_predict(f) for f in features]
+    
+    @allure.title("Test explanations are computed with one explainer call")
+    def test_explain_batch(self):
+        scorer, features = _trained_scorer()
+        scorer.explainer = _FakeTreeExplainer(len(scorer.feature_names))
+        
+        explanations = scorer.explain_batch(features[:25])
+        
+        assert scorer.explainer.calls == 1
+        assert len(explanations) == 25
+        first = explanations[0]
+        assert first.base_value == 0.4
+        assert first.feature_values == features[0].to_list()
+        assert first.force_plot_html is None
+        assert all(v > 0 for _, v in first.top_positive)
+        assert all(v < 0 for _, v in first.top_negative)
+        assert scorer.explain(features[0]).shap_values == pytest.approx(first.shap_values)
+    
+    @allure.title("Test explanations without an explainer are empty")
+    def test_explain_batch_without_explainer(self):
+        scorer = MLRiskScorer(model_type="random_forest")
+        scorer.explainer = None
+        
+        explanation = scorer.explain_batch([MLFeatureVector(removed_fields=1)])[0]
+        
+        assert explanation.shap_values == {}
+        assert scorer.render_force_plot(explanation) is None
+    
+    @allure.title("Test the scoring endpoint scores batches in order")
+    def test_batch_endpoint(self):
+        from fastapi.testclient import TestClient
+        from qoe_guard.main import app
+        
+        items = [
+            {"changes": []},
+            {"changes": [{"path": "$.playback.url", "change_type": "removed"}] * 5},
+        ]
+        with TestClient(app) as client:
+            response = client.post("/ai/ml-score/batch", json={"items": items})
+            single = client.post("/ai/ml-score", json=items[1])
+        
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert len(results) == 2
+        assert results[0]["risk_score"] < results[1]["risk_score"]
+        assert single.json() == results[1]
+
+
+@allure.feature("ML Model Artifacts - Full Coverage")
+class TestModelArtifactsFullCoverage:
+    """Complete coverage for pickle-free ML model artifacts."""
+    
+    @pytest.fixture(autouse=True)
+    def _clear_cache(self):
+        from qoe_guard.ai.model_artifacts import clear_artifact_cache
+        
+        clear_artifact_cache()
+        yield
+        clear_artifact_cache()
+    
+    @allure.title("Test a saved forest predicts exactly like the trained one")
+    def test_round_trip(self, tmp_path):
+        import json
+        
+        scorer, features = _trained_scorer()
+        scorer.thresholds = {"warn": 0.2, "fail": 0.6}
+        version = scorer.save(str(tmp_path / "model"))
+        
+        manifest = json.loads((tmp_path / "model" / "manifest.json").read_text())
+        assert manifest["version"] == version
+        assert manifest["model_type"] == "random_forest"
+        assert sorted(p.name for p in (tmp_path / "model").iterdir()) == [
+            f"forest-{version}.npz", "manifest.json", f"scaler-{version}.npz",
+        ]
+        
+        loaded = MLRiskScorer(model_path=str(tmp_path / "model"))
+        assert loaded.version == version
+        assert loaded.thresholds == scorer.thresholds
+        assert loaded.predict_batch(features[:50]) == scorer.predict_batch(features[:50])
+    
+    @allure.title("Test forests of another scikit-learn release are refused")
+    def test_sklearn_version_mismatch(self, tmp_path):
+        import json
+        import sklearn
+        from qoe_guard.ai.model_artifacts import load_artifact
+    
+        scorer, _ = _trained_scorer()
+        path = tmp_path / "model"
+        scorer.save(str(path))
+        manifest_path = path / "manifest.json"
+        manifest = json.loads(manifest_path.read_text())
+        assert manifest["sklearn_version"] == sklearn.__version__
+    
+        manifest_path.write_text(json.dumps({**manifest, "sklearn_version": "0.1.0"}))
+        with pytest.raises(ValueError, match="scikit-learn 0.1.0"):
+            load_artifact(str(path))
+        del manifest["sklearn_version"]
+        manifest_path.write_text(json.dumps(manifest))
+        with pytest.raises(ValueError, match="scikit-learn unknown"):
+            load_artifact(str(path))
+    
+        # A patch release of the saving release loads
+        patched = ".".join(sklearn.__version__.split(".")[:2] + ["99"])
+        manifest_path.write_text(json.dumps({**manifest, "sklearn_version": patched}))
+        assert load_artifact(str(path)).model is not None
+    
+    @allure.title("Test malformed artifact files raise a clear error")
+    def test_malformed_artifact(self, tmp_path):
+        import json
+        import numpy as np
+        from qoe_guard.ai.model_artifacts import load_artifact
+    
+        scorer, _ = _trained_scorer()
+        path = tmp_path / "model"
+        scorer.save(str(path))
+        manifest = json.loads((path / "manifest.json").read_text())
+        with open(path / manifest["model_file"], "wb") as f:
+            np.savez(f, classes=np.array([0, 1]))
+    
+        with pytest.raises(ValueError, match="Malformed model artifact"):
+            load_artifact(str(path))
+    
+    @allure.title("Test loaded models are shared per version")
+    def test_cached_per_version(self, tmp_path):
+        scorer, features = _trained_scorer()
+        path = str(tmp_path / "model")
+        first_version = scorer.save(path)
+        
+        a = MLRiskScorer(model_path=path)
+        b = MLRiskScorer(model_path=path)
+        assert a.model is b.model and a.scaler is b.scaler
+        
+        retrained, _ = _trained_scorer(seed=1)
+        assert retrained.save(path) != first_version
+        c = MLRiskScorer(model_path=path)
+        assert c.model is not a.model
+        assert c.predict(features[0]) == retrained.predict(features[0])
+    
+    @allure.title("Test a new version never mixes with the files of the old one")
+    def test_save_replaces_versions_atomically(self, tmp_path):
+        from qoe_guard.ai import model_artifacts
+        
+        scorer, features = _trained_scorer()
+        path = tmp_path / "model"
+        first = model_artifacts.save_artifact(
+            str(path), "random_forest", scorer.model, scorer.scaler, scorer.feature_names, scorer.thresholds,
+        )
+        (path / "notes.txt").write_text("kept")
+        
+        # A reader reads the old manifest, then a new version replaces it
+        retrained, _ = _trained_scorer(seed=1)
+        second = model_artifacts.save_artifact(
+            str(path), "random_forest", retrained.model, retrained.scaler, retrained.feature_names, {"warn": 0.1},
+        )
+        assert sorted(p.name for p in path.iterdir()) == [
+            f"forest-{second['version']}.npz", "manifest.json", "notes.txt", f"scaler-{second['version']}.npz",
+        ]
+        
+        real_read = model_artifacts.read_manifest
+        with patch.object(model_artifacts, "read_manifest", side_effect=[first, real_read(path)]):
+            artifact = model_artifacts.load_artifact(str(path))
+        assert artifact.version == second["version"]
+        assert artifact.manifest["thresholds"] == {"warn": 0.1}
+        assert artifact.scaler.mean_.tolist() == retrained.scaler.mean_.tolist()
+    
+    @allure.title("Test training a loaded scorer leaves the shared model alone")
+    def test_train_copies_shared_model(self, tmp_path):
+        scorer, features = _trained_scorer()
+        path = str(tmp_path / "model")
+        scorer.save(path)
+        loaded = MLRiskScorer(model_path=path)
+        shared = loaded.model
+        expected = MLRiskScorer(model_path=path).predict(features[0])
+        
+        loaded.train(features, [1 - int(f.removed_fields > 1) for f in features])
+        
+        assert loaded.model is not shared and loaded.version is None
+        assert MLRiskScorer(model_path=path).predict(features[0]) == expected
+    
+    @allure.title("Test pickles are only loaded when allowed")
+    def test_pickle_opt_in(self, tmp_path):
+        import pickle
+        
+        scorer, features = _trained_scorer()
+        path = tmp_path / "legacy.pkl"
+        with open(path, "wb") as f:
+            pickle.dump({
+                "model": scorer.model,
+                "scaler": scorer.scaler,
+                "thresholds": scorer.thresholds,
+                "feature_names": scorer.feature_names,
+                "model_type": scorer.model_type,
+            }, f)
+        
+        with pytest.raises(ValueError, match="not a model artifact"):
+            MLRiskScorer(model_path=str(path))
+        legacy = MLRiskScorer(model_type="random_forest")
+        legacy.load(str(path), allow_pickle=True)
+        assert legacy.predict(features[0]) == scorer.predict(features[0])
+    
+    @allure.title("Test the deployed scorer falls back when no artifact exists")
+    def test_get_risk_scorer(self, tmp_path, capsys):
+        from qoe_guard.ai.ml_scorer import get_risk_scorer
+        
+        assert not get_risk_scorer(None).is_trained
+        assert not get_risk_scorer(str(tmp_path / "missing")).is_trained
+        assert "Could not load ML risk model" in capsys.readouterr().out
+        with pytest.raises(ValueError):
+            MLRiskScorer(model_type="random_forest").save(str(tmp_path / "untrained"))
+
+
+from qoe_guard.ai.training_data import (
+    FEATURE_NAMES as TRAINING_FEATURE_NAMES,
+    TrainingExample,
+    build_training_dataset,
+    feature_matrix,
+    iter_db_examples,
+    iter_legacy_examples,
+    load_training_dataset,
+)
+
+
+def _training_examples(count, seed=0):
+    """Synthetic runs with mixed change types, paths and numeric values."""
+    import random
+    
+    rng = random.Random(seed)
+    paths = ["$.playback.manifestUrl", "$.ads.adTag", "$.metadata.title", "$.analytics.beacon", "$.items[3].price", "$.other"]
+    types = ["added", "removed", "type_changed", "value_changed", "array_length_changed", "moved"]
+    values = [0, 1, 2.5, -4, True, "x", None]
+    return [
+        TrainingExample(
+            run_id=f"run-{i}",
+            changes=[
+                {
+                    "path": rng.choice(paths),
+                    "change_type": rng.choice(types),
+                    "old_value": rng.choice(values),
+                    "new_value": rng.choice(values),
+                }
+                for _ in range(rng.randint(0, 12))
+            ],
+            label=i % 3 == 0,
+            runtime_metrics={"error_rate": rng.random(), "latency_delta_pct": rng.random()} if i % 2 else None,
+        )
+        for i in range(count)
+    ]
+
+
+@allure.feature("ML Training Data - Full Coverage")
+class TestTrainingDataFullCoverage:
+    """Complete coverage for the bulk ML training-data pipeline."""
+    
+    @allure.title("Test bulk features match per-run feature extraction")
+    @pytest.mark.parametrize("profiles", [None, {"$.other": 0.95, "$.items": 0.1}])
+    def test_feature_matrix_matches_extract(self, profiles):
+        from qoe_guard.ai.ml_scorer import extract_features_from_changes
+        
+        examples = _training_examples(200)
+        X = feature_matrix(examples, profiles)
+        
+        for example, row in zip(examples, X):
+            expected = extract_features_from_changes(example.changes, profiles, example.runtime_metrics).to_list()
+            assert row.tolist() == pytest.approx(expected)
+        assert feature_matrix([], profiles).shape == (0, len(TRAINING_FEATURE_NAMES))
+    
+    @allure.title("Test datasets are written in parts and read back")
+    def test_build_and_load(self, tmp_path):
+        import json
+        
+        examples = _training_examples(250, seed=1)
+        (tmp_path / "part-00009.npz").write_bytes(b"stale")
+        
+        manifest = build_training_dataset(iter(examples), str(tmp_path), part_size=100)
+        
+        assert manifest["rows"] == 250
+        assert manifest["parts"] == ["part-00000.npz", "part-00001.npz", "part-00002.npz"]
+        assert manifest["positives"] == sum(e.label for e in examples)
+        assert json.loads((tmp_path / "manifest.json").read_text()) == manifest
+        assert not (tmp_path / "part-00009.npz").exists()
+        
+        X, y = load_training_dataset(str(tmp_path))
+        assert X.tolist() == feature_matrix(examples).tolist()
+        assert y.tolist() == [int(e.label) for e in examples]
+    
+    @allure.title("Test a model trains on a stored dataset")
+    def test_train_from_dataset(self, tmp_path):
+        build_training_dataset(_training_examples(300, seed=2), str(tmp_path))
+        X, y = load_training_dataset(str(tmp_path))
+        
+        scorer = MLRiskScorer(model_type="random_forest")
+        metrics = scorer.train_matrix(X, y)
+        
+        assert scorer.is_trained
+        assert metrics["train_size"] + metrics["val_size"] == 300
+    
+    @allure.title("Test legacy runs.json is read as examples")
+    def test_legacy_examples(self, tmp_path):
+        import json
+        
+        path = tmp_path / "runs.json"
+        path.write_text(json.dumps([
+            {"run_id": 1, "action": "FAIL", "changes": [{"path": "$.a", "change_type": "removed"}]},
+            {"run_id": 2, "action": "PASS"},
+        ]))
+        
+        examples = list(iter_legacy_examples(path))
+        
+        assert [(e.run_id, e.label, len(e.changes)) for e in examples] == [("1", 1, 1), ("2", 0, 0)]
+    
+    @allure.title("Test stored runs are streamed in pages")
+    def test_db_examples(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from qoe_guard.db.database import Base
+        from qoe_guard.db.models import DecisionType, OperationResult, ValidationRun
+        
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        for i in range(7):
+            db.add(ValidationRun(id=f"run-{i}", decision=DecisionType.FAIL if i % 2 else DecisionType.PASS))
+            db.add(OperationResult(run_id=f"run-{i}", status_code=200, schema_mismatches=[{"path": "$.playback.drm", "message": "m"}]))
+            db.add(OperationResult(run_id=f"run-{i}", status_code=503 if i == 3 else 200, schema_mismatches=[]))
+        db.add(ValidationRun(id="run-pending"))
+        db.commit()
+        
+        examples = list(iter_db_examples(db, chunk_size=3))
+        
+        assert [e.run_id for e in examples] == [f"run-{i}" for i in range(7)]
+        assert [e.label for e in examples] == [0, 1, 0, 1, 0, 1, 0]
+        assert examples[3].runtime_metrics == {"error_rate": 0.5}
+        assert examples[0].changes == [{"path": "$.playback.drm", "change_type": "value_changed"}]
+        row = feature_matrix(examples[:1])[0]
+        assert row[TRAINING_FEATURE_NAMES.index("critical_path_changes")] == 1
+        db.close()
+    
+    @allure.title("Test the CLI builds a dataset and trains a model")
+    def test_cli(self, tmp_path, monkeypatch, capsys):
+        import json
+        import sys
+        from qoe_guard.cli import main
+        
+        runs = [
+            {
+                "run_id": i,
+                "action": "FAIL" if i % 2 else "PASS",
+                "changes": [{"path": "$.playback.drm", "change_type": "removed"}] * (i % 2 * 3),
+            }
+            for i in range(40)
+        ]
+        (tmp_path / "runs.json").write_text(json.dumps(runs))
+        monkeypatch.setattr(sys, "argv", [
+            "qoe-guard", "build-training-data",
+            "--out", str(tmp_path / "dataset"),
+            "--runs-file", str(tmp_path / "runs.json"),
+            "--train-model", str(tmp_path / "model"),
+            "--model-type", "random_forest",
+        ])
+        
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+        
+        assert exit_info.value.code == 0
+        assert "Wrote 40 examples (20 positive)" in capsys.readouterr().out
+        assert MLRiskScorer(model_path=str(tmp_path / "model")).is_trained
+
+
+# ============================================================================
+# Test qoe_guard.ai.registry module
+# ============================================================================
+import threading
+
+from qoe_guard.ai.registry import (
+    ModelRegistry,
+    model_registry,
+    sentence_transformer,
+    warmup_models,
+)
+
+
+@allure.feature("Model Registry - Full Coverage")
+class TestModelRegistryFullCoverage:
+    """Complete coverage for the shared model registry."""
+    
+    @allure.title("Test model is loaded once across threads")
+    def test_load_once_across_threads(self):
+        registry = ModelRegistry(idle_ttl_sec=None)
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            return object()
+        
+        models = []
+        threads = [
+            threading.Thread(target=lambda: models.append(registry.get("m", loader)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert len(calls) == 1
+        assert all(m is models[0] for m in models)
+        assert registry.stats()[0]["hits"] == 8
+    
+    @allure.title("Test missing library is cached as unavailable")
+    def test_import_error_cached(self):
+        registry = ModelRegistry(idle_ttl_sec=None)
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            raise ImportError("No module named 'fake'")
+        
+        assert registry.get("fake", loader) is None
+        assert registry.get("fake", loader) is None
+        assert len(calls) == 1
+        assert registry.stats()[0]["available"] is False
+    
+    @allure.title("Test idle models are evicted")
+    def test_evict_idle(self):
+        registry = ModelRegistry(idle_ttl_sec=None)
+        registry.get("a", object)
+        registry.get("missing", lambda: None)
+        
+        assert registry.evict_idle(idle_ttl_sec=-1) == ["a"]
+        assert [s["key"] for s in registry.stats()] == ["missing"]
+        assert registry.evict("missing") is True
+        assert registry.evict("missing") is False
+    
+    @allure.title("Test idle models are evicted while other models are in use")
+    def test_evict_idle_on_access(self):
+        registry = ModelRegistry(idle_ttl_sec=10, idle_check_interval_sec=5)
+        with patch("qoe_guard.ai.registry.time.monotonic", return_value=1000.0):
+            registry._last_idle_check = 1000.0
+            registry.get("a", object)
+            registry.get("b", object)
+        
+        # Within the check interval nothing is scanned
+        with patch("qoe_guard.ai.registry.time.monotonic", return_value=1004.0):
+            registry.get("b", object)
+        assert len(registry.stats()) == 2
+        
+        # Once all models are loaded, use of "b" still evicts idle "a"
+        with patch("qoe_guard.ai.registry.time.monotonic", return_value=1012.0):
+            registry.get("b", object)
+        assert [s["key"] for s in registry.stats()] == ["b"]
+    
+    @allure.title("Test stats and memory accounting")
+    def test_stats(self):
+        registry = ModelRegistry(idle_ttl_sec=None)
+        registry.get("m", lambda: bytearray(1024))
+        
+        stats = registry.stats()[0]
+        assert stats["key"] == "m"
+        assert stats["available"] is True
+        assert stats["memory_mb"] >= 0
+        assert registry.memory_bytes >= 0
+        
+        registry.clear()
+        assert registry.stats() == []
+    
+    @allure.title("Test shared loaders without optional libraries")
+    def test_loaders_without_libraries(self):
+        with patch.dict(sys.modules, {"sentence_transformers": None}):
+            assert sentence_transformer("not-installed-model") is None
+        model_registry.evict("sentence-transformers/not-installed-model")
+        assert warmup_models(["unknown"]) == {}
+
+
 # ============================================================================
 # Test qoe_guard.cli module
 # ============================================================================
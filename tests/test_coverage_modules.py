@@ -370,6 +370,454 @@ class TestSwaggerModulesFullCoverage:
         assert result is not None or isinstance(result, DiscoveryError)
 
 
+# ============================================================================
+# Test qoe_guard.swagger.spec_diff module
+# ============================================================================
+import copy
+
+from qoe_guard.swagger.normalizer import compare_specs
+from qoe_guard.swagger.spec_diff import diff_specs, index_spec
+
+
+def _pet_spec():
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Pets", "version": "1.0.0"},
+        "paths": {
+            "/pets": {
+                "get": {
+                    "parameters": [
+                        {"name": "status", "in": "query", "schema": {"type": "string", "enum": ["available", "sold"]}},
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "OK",
+                            "content": {"application/json": {"schema": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "required": ["id", "name"],
+                                    "properties": {
+                                        "id": {"type": "integer"},
+                                        "name": {"type": "string"},
+                                        "tag": {"type": "string"},
+                                    },
+                                },
+                            }}},
+                        },
+                    },
+                },
+                "post": {
+                    "requestBody": {"content": {"application/json": {"schema": {
+                        "type": "object",
+                        "properties": {"name": {"type": "string"}, "tag": {"type": "string"}},
+                    }}}},
+                    "responses": {"201": {"description": "Created"}},
+                },
+            },
+            "/health": {"get": {"responses": {"200": {"description": "OK"}}}},
+        },
+    }
+
+
+@allure.feature("Spec Diff Engine - Full Coverage")
+class TestSpecDiffFullCoverage:
+    """Complete coverage for the hash-indexed spec diff."""
+    
+    @allure.title("Test identical specs skip all operations by hash")
+    def test_identical_specs(self):
+        diff = diff_specs(_pet_spec(), _pet_spec())
+        assert diff.changed_operations == {}
+        assert diff.unchanged_operations == 3
+        assert not diff.is_breaking
+    
+    @allure.title("Test documentation-only change is not reported")
+    def test_description_only_change(self):
+        new = _pet_spec()
+        new["paths"]["/pets"]["get"]["summary"] = "List pets"
+        diff = diff_specs(_pet_spec(), new)
+        assert diff.changed_operations == {}
+        assert diff.unchanged_operations == 3
+    
+    @allure.title("Test response field type change is breaking")
+    def test_response_type_change(self):
+        new = _pet_spec()
+        schema = new["paths"]["/pets"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        schema["items"]["properties"]["id"]["type"] = "string"
+        diff = diff_specs(_pet_spec(), new)
+        changes = diff.changed_operations["GET /pets"]
+        assert len(changes) == 1
+        assert changes[0].change_type == "type_changed"
+        assert changes[0].path == "$[].id"
+        assert changes[0].location == "response.200"
+        assert changes[0].is_breaking
+    
+    @allure.title("Test enum narrowing on request parameter is breaking")
+    def test_enum_narrowing(self):
+        new = _pet_spec()
+        new["paths"]["/pets"]["get"]["parameters"][0]["schema"]["enum"] = ["available"]
+        diff = diff_specs(_pet_spec(), new)
+        change = diff.changed_operations["GET /pets"][0]
+        assert change.change_type == "enum_narrowed"
+        assert change.before == ["sold"]
+        assert change.is_breaking
+    
+    @allure.title("Test required field added to request body is breaking")
+    def test_request_required_added(self):
+        new = _pet_spec()
+        body = new["paths"]["/pets"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+        body["required"] = ["name"]
+        diff = diff_specs(_pet_spec(), new)
+        change = diff.changed_operations["POST /pets"][0]
+        assert change.change_type == "required_added"
+        assert change.path == "$.name"
+        assert change.is_breaking
+    
+    @allure.title("Test response required removed and property added")
+    def test_response_required_removed(self):
+        new = _pet_spec()
+        items = new["paths"]["/pets"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]["items"]
+        items["required"] = ["id"]
+        items["properties"]["age"] = {"type": "integer"}
+        diff = diff_specs(_pet_spec(), new)
+        by_type = {c.change_type: c for c in diff.changed_operations["GET /pets"]}
+        assert by_type["required_removed"].is_breaking
+        assert not by_type["property_added"].is_breaking
+    
+    @allure.title("Test removed operation is breaking")
+    def test_removed_operation(self):
+        new = _pet_spec()
+        del new["paths"]["/health"]
+        diff = diff_specs(index_spec(_pet_spec()), index_spec(new))
+        assert diff.removed_operations == ["GET /health"]
+        assert diff.is_breaking
+    
+    @allure.title("Test compare_specs reports field-level breaking changes")
+    def test_compare_specs(self):
+        old = _pet_spec()
+        new = copy.deepcopy(old)
+        new["paths"]["/pets"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]["items"]["properties"].pop("tag")
+        new["paths"]["/owners"] = {"get": {"responses": {"200": {"description": "OK"}}}}
+        result = compare_specs(old, new)
+        assert result["added_paths"] == ["/owners"]
+        assert result["removed_paths"] == []
+        assert result["changed"][0]["type"] == "schema_changed"
+        assert result["breaking_changes"][0]["change_type"] == "property_removed"
+        assert result["is_breaking"] is True
+
+
+# ============================================================================
+# Test qoe_guard.db.ingest module
+# ============================================================================
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from qoe_guard.db.database import Base
+from qoe_guard.db.models import SpecSnapshot, Operation, OperationBody
+from qoe_guard.db.ingest import ingest_operations
+
+
+@allure.feature("Operation Ingestion - Full Coverage")
+class TestOperationIngestFullCoverage:
+    """Complete coverage for bulk operation ingestion."""
+    
+    @pytest.fixture
+    def db(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+    
+    def _snapshot(self, db, spec):
+        snapshot = SpecSnapshot(source_url="https://example.com/openapi.json", spec_hash="h", normalized_openapi_json=spec)
+        db.add(snapshot)
+        db.flush()
+        return snapshot
+    
+    @allure.title("Test bulk ingestion stores operations with shared bodies")
+    def test_ingest_operations(self, db):
+        spec = _pet_spec()
+        snapshot = self._snapshot(db, spec)
+        result = ingest_operations(db, snapshot, extract_operations(spec))
+        db.commit()
+        
+        assert result.operation_count == 3
+        assert result.new_bodies == 3
+        op = db.query(Operation).filter(Operation.method == "GET", Operation.path == "/pets").one()
+        assert op.body_hash is not None
+        assert "200" in op.response_schemas
+        assert op.parameters[0]["name"] == "status"
+    
+    @allure.title("Test re-import only writes changed bodies")
+    def test_reimport_dedupes_bodies(self, db):
+        spec = _pet_spec()
+        ingest_operations(db, self._snapshot(db, spec), extract_operations(spec))
+        
+        changed = _pet_spec()
+        changed["paths"]["/pets"]["get"]["parameters"][0]["schema"]["enum"] = ["available"]
+        result = ingest_operations(db, self._snapshot(db, changed), extract_operations(changed))
+        db.commit()
+        
+        assert result.operation_count == 3
+        assert result.new_bodies == 1
+        assert result.reused_bodies == 2
+        assert db.query(OperationBody).count() == 4
+        assert db.query(Operation).count() == 6
+    
+    @allure.title("Test inline operation bodies remain readable")
+    def test_inline_body_fallback(self, db):
+        snapshot = self._snapshot(db, {})
+        db.add(Operation(spec_id=snapshot.id, method="GET", path="/legacy", response_schemas={"200": {"type": "object"}}))
+        db.commit()
+        op = db.query(Operation).filter(Operation.path == "/legacy").one()
+        assert op.body is None
+        assert op.response_schemas == {"200": {"type": "object"}}
+    
+    @allure.title("Test bodies stored concurrently by another ingest are skipped")
+    def test_concurrent_body_insert(self, db):
+        spec = _pet_spec()
+        ingest_operations(db, self._snapshot(db, spec), extract_operations(spec))
+        db.commit()
+        
+        # Both ingests saw the bodies as new before either one committed
+        with patch("qoe_guard.db.ingest._existing_body_hashes", return_value=set()):
+            result = ingest_operations(db, self._snapshot(db, spec), extract_operations(spec))
+        db.commit()
+        
+        assert result.operation_count == 3
+        assert db.query(OperationBody).count() == 3
+        assert db.query(Operation).count() == 6
+    
+    @allure.title("Test schema upgrade adds the body hash column to existing databases")
+    def test_upgrade_schema(self):
+        from sqlalchemy import inspect, text
+        from qoe_guard.db.database import upgrade_schema
+        
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE operations (id VARCHAR(36) PRIMARY KEY, spec_id VARCHAR(36) NOT NULL, "
+                "operation_id VARCHAR(255), method VARCHAR(10) NOT NULL, path VARCHAR(2048) NOT NULL, "
+                "tags JSON, summary VARCHAR(500), description TEXT, security_profile JSON, parameters JSON, "
+                "request_body_schema JSON, response_schemas JSON, examples JSON, server_url VARCHAR(2048), "
+                "deprecated BOOLEAN, created_at DATETIME NOT NULL)"
+            ))
+            conn.execute(text(
+                "INSERT INTO operations (id, spec_id, method, path, response_schemas, created_at) "
+                "VALUES ('op-1', 'spec-1', 'GET', '/legacy', '{\"200\": {}}', '2024-01-01 00:00:00')"
+            ))
+        Base.metadata.create_all(bind=engine)
+        
+        assert "operations.body_hash" in upgrade_schema(engine)
+        assert upgrade_schema(engine) == []
+        assert "ix_operations_body_hash" in {i["name"] for i in inspect(engine).get_indexes("operations")}
+        db = sessionmaker(bind=engine)()
+        op = db.query(Operation).one()
+        assert op.body_hash is None
+        assert op.response_schemas == {"200": {}}
+        db.close()
+
+
+# ============================================================================
+# Test qoe_guard.swagger.search module
+# ============================================================================
+from qoe_guard.swagger.search import (
+    OperationIndex, IndexedOperation, OperationIndexCache, operation_indexes, tokenize,
+)
+
+
+def _indexed(n_extra=0):
+    ops = [
+        IndexedOperation("1", "listPets", "GET", "/pets", ("pets",), "List all pets", False),
+        IndexedOperation("2", "createPet", "POST", "/pets", ("pets",), "Create a pet", False),
+        IndexedOperation("3", "getUserOrders", "GET", "/users/{userId}/orders", ("users", "orders"), "Orders of a user", True),
+        IndexedOperation("4", None, "DELETE", "/health", (), None, False),
+    ]
+    ops += [
+        IndexedOperation(f"x{i}", f"op{i}", "GET", f"/bulk/item{i}", ("bulk",), f"Bulk item {i}", False)
+        for i in range(n_extra)
+    ]
+    return ops
+
+
+@allure.feature("Operation Search - Full Coverage")
+class TestOperationSearchFullCoverage:
+    """Complete coverage for the indexed operation search."""
+    
+    @allure.title("Test tokenization splits camelCase and path segments")
+    def test_tokenize(self):
+        assert tokenize("/users/{userId}/orders") == ["users", "userid", "user", "id", "orders"]
+        assert tokenize(None) == []
+    
+    @allure.title("Test prefix search across path, operationId, summary and tags")
+    def test_prefix_search(self):
+        index = OperationIndex(_indexed())
+        assert [op.id for op in index.search("pet").operations] == ["1", "2"]
+        assert [op.id for op in index.search("ord use").operations] == ["3"]
+        assert [op.id for op in index.search("creat").operations] == ["2"]
+        assert index.search("nomatch").total == 0
+    
+    @allure.title("Test fuzzy search tolerates one typo")
+    def test_fuzzy_search(self):
+        index = OperationIndex(_indexed())
+        assert index.search("ordres").total == 0
+        assert [op.id for op in index.search("ordres", fuzzy=True).operations] == ["3"]
+        assert [op.id for op in index.search("helth", fuzzy=True).operations] == ["4"]
+    
+    @allure.title("Test method, tag and deprecated filters")
+    def test_filters(self):
+        index = OperationIndex(_indexed())
+        assert [op.id for op in index.search(methods=["get"]).operations] == ["1", "3"]
+        assert [op.id for op in index.search(tags=["orders"]).operations] == ["3"]
+        assert [op.id for op in index.search(deprecated=False).operations] == ["1", "2", "4"]
+        assert [op.id for op in index.search("pets", methods=["POST"]).operations] == ["2"]
+    
+    @allure.title("Test pagination returns total and the requested page")
+    def test_pagination(self):
+        index = OperationIndex(_indexed(n_extra=50))
+        page = index.search("bulk", offset=10, limit=5)
+        assert page.total == 50
+        assert [op.id for op in page.operations] == ["x10", "x11", "x12", "x13", "x14"]
+    
+    @allure.title("Test group by tag")
+    def test_group_by_tag(self):
+        groups = OperationIndex(_indexed()).group_by_tag()
+        assert [op.id for op in groups["pets"]] == ["1", "2"]
+        assert [op.id for op in groups["untagged"]] == ["4"]
+    
+    @allure.title("Test rebuild reuses token analysis of unchanged operations")
+    def test_incremental_rebuild(self):
+        cache = OperationIndexCache(max_specs=2)
+        first = cache.build("spec-1", _indexed())
+        assert first.reused == 0
+        
+        changed = _indexed()
+        changed[1] = IndexedOperation("2b", "createPet", "POST", "/pets", ("pets",), "Create a new pet", False)
+        second = cache.build("spec-2", changed)
+        assert second.reused == 3
+        assert [op.id for op in second.search("new").operations] == ["2b"]
+        
+        cache.build("spec-3", [])
+        assert cache.get("spec-1") is None
+        cache.evict("spec-3")
+        assert cache.get("spec-3") is None
+    
+    @allure.title("Test ingestion indexes the new snapshot")
+    def test_ingest_builds_index(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        spec = _pet_spec()
+        snapshot = SpecSnapshot(source_url="https://example.com/openapi.json", spec_hash="h", normalized_openapi_json=spec)
+        db.add(snapshot)
+        db.flush()
+        result = ingest_operations(db, snapshot, extract_operations(spec))
+        assert operation_indexes.get(snapshot.id) is None
+        db.commit()
+        result.build_index(snapshot.id)
+        
+        index = operation_indexes.get(snapshot.id)
+        assert len(index) == 3
+        assert index.search(methods=["GET"]).total == 2
+        db.close()
+
+
+# ============================================================================
+# Test qoe_guard.swagger_analyzer concurrency
+# ============================================================================
+from qoe_guard.swagger_analyzer import (
+    iter_endpoint_tests, stream_swagger_analysis, HostRateLimiter, EndpointStatus,
+)
+
+
+class _FakeSession:
+    """Session stand-in that records requests instead of sending them."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.urls = []
+
+    def request(self, method, url, **kwargs):
+        import time
+        time.sleep(self.delay)
+        self.urls.append(url)
+        return Mock(status_code=200, content=b"{}")
+
+    def close(self):
+        pass
+
+
+def _endpoints(n):
+    return [
+        {"method": "GET", "path": f"/items/{i}", "full_url": f"https://api.test/items/{i}"}
+        for i in range(n)
+    ]
+
+
+@allure.feature("Swagger Analyzer Concurrency - Full Coverage")
+class TestSwaggerAnalyzerConcurrencyFullCoverage:
+    """Complete coverage for concurrent endpoint testing."""
+
+    @allure.title("Test all endpoints are tested exactly once")
+    def test_iter_endpoint_tests_all_indices(self):
+        session = _FakeSession()
+        results = dict(iter_endpoint_tests(_endpoints(12), max_workers=4, rate_limit_per_host=0, session=session))
+        assert sorted(results) == list(range(12))
+        assert all(t.status == EndpointStatus.HEALTHY for t in results.values())
+        assert len(session.urls) == 12
+
+    @allure.title("Test empty endpoint list yields nothing")
+    def test_iter_endpoint_tests_empty(self):
+        assert list(iter_endpoint_tests([], session=_FakeSession())) == []
+
+    @allure.title("Test time budget marks unstarted endpoints as skipped")
+    def test_time_budget_skips(self):
+        session = _FakeSession()
+        # 1 request/sec per host: only the first request fits in the budget
+        results = dict(iter_endpoint_tests(
+            _endpoints(5), max_workers=5, rate_limit_per_host=1, time_budget_sec=0.2, session=session,
+        ))
+        statuses = [results[i].status for i in range(5)]
+        assert statuses.count(EndpointStatus.HEALTHY) == 1
+        assert statuses.count(EndpointStatus.SKIPPED) == 4
+
+    @allure.title("Test host rate limiter buckets are per host")
+    def test_host_rate_limiter(self):
+        limiter = HostRateLimiter(rate=1)
+        assert limiter.acquire("a.test")
+        assert not limiter.acquire("a.test", deadline=0)
+        assert limiter.acquire("b.test")
+        assert HostRateLimiter(rate=0).acquire("a.test", deadline=0)
+
+    @allure.title("Test streaming analysis events for a provided spec")
+    def test_stream_swagger_analysis(self):
+        spec = {
+            "openapi": "3.0.0",
+            "servers": [{"url": "https://api.test"}],
+            "paths": {
+                "/a": {"get": {}, "post": {}},
+                "/b": {"get": {}},
+            },
+        }
+        with patch("qoe_guard.swagger_analyzer.create_session", return_value=_FakeSession()):
+            events = list(stream_swagger_analysis(spec=spec, rate_limit_per_host=0))
+
+        assert events[0] == {"event": "start", "total_endpoints": 2, "base_url": "https://api.test"}
+        endpoint_events = [e for e in events if e["event"] == "endpoint"]
+        assert sorted(e["index"] for e in endpoint_events) == [0, 1]
+        summary = events[-1]
+        assert summary["event"] == "summary"
+        assert summary["analysis"]["healthy_count"] == 2
+        assert [t["path"] for t in summary["analysis"]["endpoint_tests"]] == ["/a", "/b"]
+
+    @allure.title("Test streaming analysis reports fetch errors")
+    def test_stream_swagger_analysis_error(self):
+        with patch("qoe_guard.swagger_analyzer.load_swagger_spec", side_effect=ValueError("boom")):
+            events = list(stream_swagger_analysis(swagger_url="https://api.test/openapi.json"))
+        assert events == [{"event": "error", "error": "Failed to fetch/parse OpenAPI spec: boom"}]
+
+
 # ============================================================================
 # Test qoe_guard.curl module
 # ============================================================================
@@ -523,6 +971,383 @@ class TestPolicyEngineFullCoverage:
         assert decision.decision in ["WARN", "FAIL"]
 
 
+from qoe_guard.policy.compiled import CompiledPolicy, clear_compiled_policies, compile_policy
+
+
+def _legacy_path_in_allow_list(path, allow_list):
+    """Allow-list matching before policies were compiled (exact, prefix* and *suffix)."""
+    for pattern in allow_list:
+        if pattern == path:
+            return True
+        if pattern.endswith("*") and path.startswith(pattern[:-1]):
+            return True
+        if pattern.startswith("*") and path.endswith(pattern[1:]):
+            return True
+    return False
+
+
+@allure.feature("Compiled Policy - Full Coverage")
+class TestCompiledPolicyFullCoverage:
+    """Complete coverage for compiled policies."""
+    
+    @allure.title("Test prefix, suffix and exact patterns keep their meaning")
+    def test_legacy_patterns(self):
+        allow_list = ["$.ads*", "*.beacon", "$.metadata.title", "*"]
+        paths = ["$.ads", "$.adsConfig.x", "$.tracking.beacon", "$.metadata.title", "$.metadata.titles", "$.playback"]
+        for patterns in (allow_list[:3], allow_list):
+            compiled = compile_policy(PolicyConfig(name="legacy", allowed_drift_paths=patterns))
+            assert [compiled.is_allowed(p) for p in paths] == [_legacy_path_in_allow_list(p, patterns) for p in paths]
+    
+    @allure.title("Test index, segment and multi-segment wildcards")
+    def test_wildcards(self):
+        compiled = compile_policy(PolicyConfig(
+            name="wildcards",
+            allowed_drift_paths=["$.items[*].price", "$.ads.*.url", "$.analytics.**", "**.debug"],
+        ))
+        
+        assert compiled.is_allowed("$.items[12].price")
+        assert not compiled.is_allowed("$.items[x].price")
+        assert not compiled.is_allowed("$.items[1].price.amount")
+        assert compiled.is_allowed("$.ads.preroll.url")
+        assert not compiled.is_allowed("$.ads.preroll.vast.url")
+        assert compiled.is_allowed("$.analytics.beacons[3].id")
+        assert compiled.is_allowed("$.player.state.debug")
+        assert compiled.filter_paths(["$.items[0].price", "$.playback.url"]) == ["$.playback.url"]
+    
+    @allure.title("Test compiled policies are cached by version")
+    def test_cache(self):
+        clear_compiled_policies()
+        policy = PolicyConfig(name="cached", version="2.0.0", skip_operations=["op-1"])
+        
+        compiled = compile_policy(policy)
+        assert compile_policy(policy) is compiled
+        assert compile_policy(compiled) is compiled
+        assert compiled.is_skipped("op-1") and not compiled.is_skipped(None)
+        
+        policy.qoe_fail_threshold = 0.5
+        recompiled = compile_policy(policy)
+        assert recompiled is not compiled and recompiled.qoe_fail_threshold == 0.5
+        
+        # Equal contents share the compiled form; in-place list changes recompile
+        assert compile_policy(PolicyConfig.from_dict(policy.to_dict())) is recompiled
+        policy.skip_operations.append("op-2")
+        assert compile_policy(policy).is_skipped("op-2")
+    
+    @allure.title("Test stored policy rows compile")
+    def test_from_record(self):
+        from qoe_guard.db.models import PolicyConfig as PolicyRecord
+        
+        record = PolicyRecord(
+            name="stored",
+            version="3",
+            qoe_fail_threshold=0.6,
+            allowed_drift_paths=["$.ads*"],
+            skip_operations=None,
+        )
+        compiled = compile_policy(record)
+        
+        assert isinstance(compiled, CompiledPolicy)
+        assert compiled.qoe_fail_threshold == 0.6
+        assert compiled.brittleness_fail_threshold == 75.0
+        assert compiled.skip_operations == frozenset()
+        assert compiled.is_allowed("$.ads.tag")
+    
+    @allure.title("Test evaluation with a compiled policy")
+    def test_evaluate_compiled(self):
+        from types import SimpleNamespace
+        
+        compiled = compile_policy(PolicyConfig(name="eval", brittleness_warn_threshold=10.0, skip_operations=["skip-me"]))
+        brittleness = SimpleNamespace(score=20.0, top_contributors=[], signals={})
+        
+        assert evaluate_policy(brittleness=brittleness, policy=compiled, operation_id="skip-me").details["skipped"]
+        decision = evaluate_policy(brittleness=brittleness, policy=compiled, changed_paths=["$.a"])
+        assert decision.decision == "WARN"
+        assert decision.policy_version == compiled.version
+
+
+import random
+
+from qoe_guard.policy.batch import evaluate_policy_batch
+from qoe_guard.scoring.drift import DriftType as ScoringDriftType
+
+
+@allure.feature("Batch Policy - Full Coverage")
+class TestBatchPolicyFullCoverage:
+    """Complete coverage for batch policy evaluation."""
+
+    @allure.title("Test batch decisions match per-operation evaluation")
+    def test_parity(self):
+        from types import SimpleNamespace
+
+        rng = random.Random(7)
+        policy = PolicyConfig(name="batch-parity", skip_operations=["op-3"], require_approval_on_warn=True)
+        drift_types = list(ScoringDriftType) + [None]
+        rows = [
+            (
+                rng.choice([None, rng.uniform(0, 100)]),
+                rng.choice([None, rng.uniform(0, 1)]),
+                rng.choice([0, 0, 1, 2]),
+                rng.choice(drift_types),
+                f"op-{i}",
+            )
+            for i in range(300)
+        ]
+
+        batch = evaluate_policy_batch(
+            brittleness=[r[0] for r in rows],
+            qoe_risk=[r[1] for r in rows],
+            critical_type_changes=[r[2] for r in rows],
+            drift_types=[r[3] for r in rows],
+            operation_ids=[r[4] for r in rows],
+            policy=policy,
+        )
+
+        expected = []
+        for brittleness, qoe_risk, critical, drift_type, operation_id in rows:
+            decision = evaluate_policy(
+                brittleness=SimpleNamespace(score=brittleness, top_contributors=[], signals={}) if brittleness is not None else None,
+                qoe_risk=SimpleNamespace(
+                    risk_score=qoe_risk, top_signals=[], critical_type_changes=critical, reasons={}
+                ) if qoe_risk is not None else None,
+                drift=SimpleNamespace(
+                    drift_type=drift_type, severity="low", recommendations=[], evidence=[],
+                    critical_mismatches=0, runtime_mismatches=0, spec_changed=False,
+                ) if drift_type is not None else None,
+                policy=policy,
+                operation_id=operation_id,
+            )
+            expected.append(decision)
+
+        assert batch.labels == [d.decision for d in expected]
+        assert batch.ci_gate_block.tolist() == [d.ci_gate_block for d in expected]
+        assert batch.skipped.tolist() == [op == "op-3" for *_, op in rows]
+        assert batch.counts["skipped"] == 1
+        assert sum(batch.counts[k] for k in ("pass", "warn", "fail")) == len(rows) - 1
+        assert set(batch.recommendations()) == {
+            r for d, row in zip(expected, rows) if row[4] != "op-3" for r in d.recommendations
+        }
+        assert len(batch.recommendations()) == len(set(batch.recommendations()))
+
+    @allure.title("Test aggregate decision excludes skipped operations")
+    def test_aggregate(self):
+        policy = PolicyConfig(name="batch-aggregate", skip_operations=["noisy"], ci_hard_gate=False)
+        batch = evaluate_policy_batch(
+            brittleness=[10.0, 95.0, 60.0],
+            drift_types=["none", "undocumented", None],
+            drift_severity=["low", "critical", None],
+            operation_ids=["a", "noisy", "c"],
+            policy=policy,
+        )
+
+        assert batch.labels == ["PASS", "PASS", "WARN"]
+        assert batch.decision == "WARN"
+        assert not batch.aggregate_ci_gate_block
+        assert batch.failing() == []
+        assert batch.rules(1) == ["brittleness_threshold", "drift"]
+        assert batch.scores["drift_severity"][1] == 1.0
+
+        summary = batch.to_dict()
+        assert summary["operations"]["noisy"]["skipped"]
+        assert summary["operations"]["c"]["rules"] == ["brittleness_threshold"]
+
+    @allure.title("Test empty and mismatched batches")
+    def test_edges(self):
+        assert evaluate_policy_batch().decision == "PASS"
+        assert len(evaluate_policy_batch(qoe_risk=[])) == 0
+        with pytest.raises(ValueError):
+            evaluate_policy_batch(brittleness=[1.0, 2.0], qoe_risk=[0.1])
+
+
+from datetime import datetime
+
+from qoe_guard.db.models import DecisionType, DriftType as RunDriftType, ValidationRun
+from qoe_guard.policy.simulation import simulate_policy
+
+
+def _policy_inputs(operation_ids, brittleness, qoe_risk, critical, drift_types, severity):
+    return {
+        "operation_ids": operation_ids,
+        "brittleness": brittleness,
+        "qoe_risk": qoe_risk,
+        "critical_type_changes": critical,
+        "drift_types": drift_types,
+        "drift_severity": severity,
+    }
+
+
+def _simulation_runs(db):
+    """Stored runs decided by the default policy, plus an undecided run and runs without policy inputs."""
+    runs = [
+        # id, brittleness, qoe risk, drift, decision, critical type changes
+        ("run-00", 20.0, 0.10, RunDriftType.NONE, DecisionType.PASS, 0),
+        ("run-01", 55.0, 0.10, RunDriftType.NONE, DecisionType.WARN, 0),
+        ("run-02", 20.0, 0.50, RunDriftType.NONE, DecisionType.WARN, 0),
+        ("run-03", 20.0, 0.80, RunDriftType.NONE, DecisionType.FAIL, 0),
+        ("run-04", 20.0, 0.10, RunDriftType.UNDOCUMENTED, DecisionType.FAIL, 0),
+        ("run-05", 20.0, 0.10, RunDriftType.NONE, DecisionType.FAIL, 2),
+        ("run-06", 80.0, 0.30, RunDriftType.NONE, DecisionType.FAIL, 0),
+    ]
+    for i, (run_id, brittleness, qoe_risk, drift, decision, critical) in enumerate(runs):
+        db.add(ValidationRun(
+            id=run_id,
+            brittleness_score=brittleness,
+            qoe_risk_score=qoe_risk,
+            drift_type=drift,
+            decision=decision,
+            policy_inputs=_policy_inputs(
+                [f"{run_id}-op"], [brittleness], [qoe_risk], [critical], [drift.value], ["low"],
+            ),
+            started_at=datetime(2025, 1, 1 + i),
+        ))
+    db.add(ValidationRun(id="run-pending", brittleness_score=99.0))
+    # Scored before policy inputs were stored: replayed from the run-level scores
+    db.add(ValidationRun(
+        id="run-legacy", brittleness_score=20.0, qoe_risk_score=0.2, drift_type=RunDriftType.NONE,
+        decision=DecisionType.FAIL, reasons={"qoe_risk": {"critical_type_changes": 1}, "drift": {"severity": "low"}},
+        started_at=datetime(2025, 1, 8),
+    ))
+    # Decided without any scores: not replayable
+    db.add(ValidationRun(id="run-unscored", decision=DecisionType.PASS, started_at=datetime(2025, 1, 9)))
+    db.commit()
+
+
+@allure.feature("Policy Simulation - Full Coverage")
+class TestPolicySimulationFullCoverage:
+    """Complete coverage for what-if policy simulation."""
+
+    @pytest.fixture
+    def db(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        _simulation_runs(session)
+        yield session
+        session.close()
+
+    @allure.title("Test replaying the deciding policy changes nothing")
+    def test_same_policy(self, db):
+        simulation = simulate_policy(db, PolicyConfig(), chunk_size=2)
+
+        assert simulation.total_runs == 8
+        assert simulation.approximated_runs == 1 and simulation.skipped_runs == 1
+        assert simulation.before == {"PASS": 1, "WARN": 2, "FAIL": 5}
+        assert simulation.after == simulation.before
+        assert simulation.flipped_total == 0 and simulation.transitions == {}
+        assert simulation.compared_to == "stored"
+
+    @allure.title("Test looser thresholds flip stored decisions")
+    def test_flipped_runs(self, db):
+        candidate = PolicyConfig(
+            name="loose", version="2.0.0",
+            brittleness_warn_threshold=60.0, qoe_fail_threshold=0.9, fail_on_critical_type_changes=False,
+        )
+        simulation = simulate_policy(db, candidate, chunk_size=3, max_flipped=2)
+
+        assert simulation.transitions == {"WARN->PASS": 1, "FAIL->WARN": 1, "FAIL->PASS": 2}
+        assert simulation.deltas == {"PASS": 3, "WARN": 0, "FAIL": -3}
+        assert simulation.flipped_total == 4
+        assert [f.run_id for f in simulation.flipped] == ["run-01", "run-03"]
+        assert simulation.flipped[1].rules == ["qoe_risk_threshold"]
+
+        report = simulation.to_dict()
+        assert report["policy_version"] == "2.0.0"
+        assert report["flipped"][0]["started_at"] == "2025-01-02T00:00:00"
+
+    @allure.title("Test comparing with a baseline policy and a time window")
+    def test_baseline_and_window(self, db):
+        strict = PolicyConfig(name="strict-sim", brittleness_fail_threshold=50.0)
+        simulation = simulate_policy(
+            db, strict, baseline=PolicyConfig(), since=datetime(2025, 1, 2), until=datetime(2025, 1, 7),
+        )
+
+        assert simulation.total_runs == 5
+        assert simulation.approximated_runs == 0 and simulation.skipped_runs == 0
+        assert simulation.compared_to == "1.0.0"
+        assert simulation.transitions == {"WARN->FAIL": 1}
+        assert simulation.flipped[0].run_id == "run-01"
+
+    @allure.title("Test simulate-policy CLI command")
+    def test_cli(self, db, tmp_path, capsys):
+        import argparse
+        from qoe_guard.cli import simulate_policy_command
+
+        policy_file = tmp_path / "policy.json"
+        policy_file.write_text(json.dumps({"name": "cli", "version": "3.0.0", "qoe_fail_threshold": 0.9}))
+        args = argparse.Namespace(
+            policy=str(policy_file), compare_to="stored", since=None, until=None, max_flipped=5, format="json",
+        )
+
+        with patch("qoe_guard.db.database.SessionLocal", return_value=db), \
+                patch("qoe_guard.db.database.init_db") as init_db:
+            assert simulate_policy_command(args) == 0
+        init_db.assert_called_once()
+        report = json.loads(capsys.readouterr().out)
+        assert report["transitions"] == {"FAIL->WARN": 1}
+
+        args.format = "summary"
+        args.compare_to = "active"
+        with patch("qoe_guard.db.database.SessionLocal", return_value=db), patch("qoe_guard.db.database.init_db"):
+            assert simulate_policy_command(args) == 0
+        out = capsys.readouterr().out
+        assert "vs 1.0.0" in out and "FAIL->WARN: 1" in out
+        assert "Approximated 1 runs" in out and "Skipped 1 runs" in out
+
+    @allure.title("Test replaying the policy that decided multi-operation runs flips nothing")
+    def test_replay_matches_evaluate_policy(self):
+        from types import SimpleNamespace
+
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        rng = random.Random(11)
+        policy = PolicyConfig(name="replay", skip_operations=["op-noisy"])
+        drift_types = list(ScoringDriftType)
+        for r in range(60):
+            operations = [
+                (
+                    rng.choice(["op-a", "op-b", "op-noisy"]),
+                    rng.uniform(0, 100),
+                    rng.uniform(0, 1),
+                    rng.choice([0, 0, 0, 1]),
+                    rng.choice(drift_types),
+                    rng.choice(["low", "medium", "critical"]),
+                )
+                for _ in range(rng.randint(1, 4))
+            ]
+            decisions = [
+                evaluate_policy(
+                    brittleness=SimpleNamespace(score=brittleness, top_contributors=[], signals={}),
+                    qoe_risk=SimpleNamespace(
+                        risk_score=qoe_risk, top_signals=[], critical_type_changes=critical, reasons={}
+                    ),
+                    drift=SimpleNamespace(
+                        drift_type=drift_type, severity=severity, recommendations=[], evidence=[],
+                        critical_mismatches=0, runtime_mismatches=0, spec_changed=False,
+                    ),
+                    policy=policy,
+                    operation_id=operation_id,
+                ).decision
+                for operation_id, brittleness, qoe_risk, critical, drift_type, severity in operations
+            ]
+            worst = max(decisions, key=["PASS", "WARN", "FAIL"].index)
+            db.add(ValidationRun(
+                id=f"replay-{r:02d}",
+                decision=DecisionType(worst.lower()),
+                policy_inputs=_policy_inputs(
+                    [o[0] for o in operations], [o[1] for o in operations], [o[2] for o in operations],
+                    [o[3] for o in operations], [o[4].value for o in operations], [o[5] for o in operations],
+                ),
+            ))
+        db.commit()
+
+        simulation = simulate_policy(db, policy, chunk_size=7)
+
+        assert simulation.total_runs == 60
+        assert simulation.flipped_total == 0 and simulation.transitions == {}
+        assert sum(simulation.before.values()) == 60 and len(set(simulation.before.values())) > 1
+        db.close()
+
+
 # ============================================================================
 # Test qoe_guard.governance module
 # ============================================================================
@@ -634,3 +1459,449 @@ class TestValidationFullCoverage:
         )
         
         assert result is not None
+
+
+# ============================================================================
+# Test qoe_guard.validation.plan module
+# ============================================================================
+from qoe_guard.validation.plan import (
+    compile_operation, compile_plan, get_validation_plan, validation_plans,
+    ValidationPlan, OperationPlan,
+)
+from qoe_guard.db.models import ValidationPlanRecord
+
+
+def _plan_operation(**overrides):
+    fields = dict(
+        id="op-1",
+        method="GET",
+        path="/playback/{assetId}",
+        tags=["playback"],
+        server_url="https://api.example.com/",
+        parameters=[
+            {"name": "assetId", "in": "path", "required": True, "schema": {"type": "string", "example": "a1"}},
+            {"name": "region", "in": "query", "required": True, "schema": {"type": "string", "example": "eu"}},
+            {"name": "debug", "in": "query", "required": False, "schema": {"type": "boolean"}},
+            {"name": "X-Device", "in": "header", "required": True, "schema": {"type": "string", "example": "tv"}},
+        ],
+        response_schemas={
+            "200": {"type": "object", "required": ["url"], "properties": {"url": {"type": "string"}}},
+            "default": {"type": "object", "required": ["error"]},
+        },
+    )
+    fields.update(overrides)
+    return Operation(**fields)
+
+
+@allure.feature("Validation Plan - Full Coverage")
+class TestValidationPlanFullCoverage:
+    """Complete coverage for compiled validation plans."""
+    
+    @allure.title("Test operation compiles resolved URL, headers and criticality")
+    def test_compile_operation(self):
+        op_plan = compile_operation(_plan_operation())
+        assert op_plan.url_template == "https://api.example.com/playback/{assetId}"
+        assert op_plan.url == "https://api.example.com/playback/a1?region=eu"
+        assert op_plan.headers == {"X-Device": "tv"}
+        assert op_plan.body is None
+        assert op_plan.criticality == 1.0
+    
+    @allure.title("Test unsafe methods get a synthesized request body")
+    def test_compile_operation_body(self):
+        op_plan = compile_operation(_plan_operation(
+            method="POST", request_body_schema={"type": "object", "properties": {"name": {"type": "string"}}},
+        ))
+        assert op_plan.body == {"name": "string"}
+    
+    @allure.title("Test validators are selected by status code and reused")
+    def test_validator_selection(self):
+        op_plan = compile_operation(_plan_operation(response_schemas={
+            "201": {"type": "object", "required": ["id"]},
+            "404": {"type": "object", "required": ["error"]},
+        }))
+        assert op_plan.schema_key(201) == "201"
+        assert op_plan.schema_key(200) == "201"
+        assert op_plan.schema_key(500) is None
+        assert op_plan.validator_for(404) is op_plan.validator_for(404)
+        assert op_plan.validate(404, {}).valid is False
+        assert op_plan.validate(500, {}) is None
+    
+    @allure.title("Test plan select keeps selection order and filters unsafe methods")
+    def test_plan_select(self):
+        plan = compile_plan([
+            _plan_operation(id="a"),
+            _plan_operation(id="b", method="DELETE"),
+            _plan_operation(id="c"),
+        ])
+        assert [op.id for op in plan.select(["c", "b", "a", "missing"])] == ["c", "b", "a"]
+        assert [op.id for op in plan.select(["c", "b", "a"], safe_methods_only=True)] == ["c", "a"]
+    
+    @allure.title("Test plan round-trips through its stored form")
+    def test_plan_round_trip(self):
+        plan = compile_plan([_plan_operation()], spec_id="s", spec_hash="h")
+        restored = ValidationPlan.from_dict(json.loads(json.dumps(plan.to_dict())))
+        assert restored.spec_hash == "h"
+        assert restored.operations["op-1"].to_dict() == plan.operations["op-1"].to_dict()
+    
+    @allure.title("Test plan is compiled once, stored and reloaded")
+    def test_get_validation_plan(self):
+        from qoe_guard.db.models import ValidationRun
+        
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        snapshot = SpecSnapshot(source_url="https://example.com/openapi.json", spec_hash="h", normalized_openapi_json={})
+        db.add(snapshot)
+        db.flush()
+        db.add(_plan_operation(spec_id=snapshot.id))
+        db.commit()
+        
+        # Runs are stored before their plan is loaded
+        validation_plans.clear()
+        db.add(ValidationRun(id="run", spec_id=snapshot.id))
+        plan = get_validation_plan(db, snapshot.id)
+        assert list(plan.operations) == ["op-1"]
+        assert get_validation_plan(db, snapshot.id) is plan
+        assert db.query(ValidationPlanRecord).count() == 1
+        
+        # The stored plan is part of the caller's transaction
+        db.rollback()
+        assert db.query(ValidationPlanRecord).count() == 0
+        validation_plans.clear()
+        plan = get_validation_plan(db, snapshot.id)
+        db.commit()
+        
+        validation_plans.clear()
+        with patch("qoe_guard.validation.plan.compile_plan") as compile_mock:
+            reloaded = get_validation_plan(db, snapshot.id)
+        compile_mock.assert_not_called()
+        assert reloaded.operations["op-1"].url == plan.operations["op-1"].url
+        
+        assert get_validation_plan(db, "missing") is None
+        validation_plans.clear()
+        db.close()
+    
+    @allure.title("Test concurrent first runs share the plan stored first")
+    def test_get_validation_plan_concurrent(self, tmp_path):
+        from qoe_guard.db.models import ValidationRun
+        from qoe_guard.validation import plan as plan_module
+    
+        engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        db, other = Session(), Session()
+        snapshot = SpecSnapshot(source_url="https://example.com/openapi.json", spec_hash="h", normalized_openapi_json={})
+        db.add(snapshot)
+        db.flush()
+        db.add(_plan_operation(spec_id=snapshot.id))
+        db.commit()
+    
+        compile_plan_ = plan_module.compile_plan
+    
+        def racing_compile(*args, **kwargs):
+            # The other worker stores its plan while this one compiles
+            with patch("qoe_guard.validation.plan.compile_plan", compile_plan_):
+                get_validation_plan(other, snapshot.id)
+            other.commit()
+            validation_plans.clear()
+            # Pending work of this worker must survive the conflict
+            db.add(ValidationRun(id="run"))
+            return compile_plan_(*args, **kwargs)
+    
+        validation_plans.clear()
+        with patch("qoe_guard.validation.plan.compile_plan", side_effect=racing_compile):
+            plan = get_validation_plan(db, snapshot.id)
+        db.commit()
+    
+        assert list(plan.operations) == ["op-1"]
+        assert validation_plans.get(snapshot.id) is plan
+        assert db.query(ValidationPlanRecord).count() == 1
+        assert db.get(ValidationRun, "run") is not None
+        validation_plans.clear()
+        db.close()
+        other.close()
+
+
+# ============================================================================
+# Test qoe_guard.validation.orchestrator module
+# ============================================================================
+@allure.feature("Validation Orchestrator - Full Coverage")
+class TestValidationOrchestratorFullCoverage:
+    """Complete coverage for run scoring and gating."""
+    
+    @allure.title("Test run is gated per operation through the batch policy")
+    def test_execute_gates_operations(self):
+        import asyncio
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from qoe_guard.db.database import Base
+        from qoe_guard.db.models import DecisionType, DriftType, Operation, SpecSnapshot, ValidationRun
+        from qoe_guard.validation.orchestrator import OperationExecutionResult, ValidationOrchestrator
+        from qoe_guard.validation.plan import validation_plans
+        from qoe_guard.validation.runner import RuntimeResult
+        
+        schema = {
+            "type": "object",
+            "properties": {
+                "playback": {"type": "object", "properties": {"manifestUrl": {"type": "string"}}},
+            },
+        }
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        db.add(SpecSnapshot(id="spec", source_url="https://example.com", spec_hash="h", normalized_openapi_json={}))
+        for op_id in ("broken", "healthy"):
+            db.add(Operation(
+                id=op_id, spec_id="spec", method="GET", path=f"/{op_id}",
+                server_url="https://api.example.com", response_schemas={"200": schema},
+            ))
+        db.add(ValidationRun(id="run", spec_id="spec", selected_operations=["broken", "healthy"]))
+        db.commit()
+        validation_plans.clear()
+        
+        async def execute_operation(operation, auth_config, environment):
+            manifest_url = 42 if operation.id == "broken" else "https://cdn.example.com/a.m3u8"
+            body = {"playback": {"manifestUrl": manifest_url}}
+            return OperationExecutionResult(
+                runtime=RuntimeResult(success=True, status_code=200, body=body, response_time_ms=80.0),
+                conformance=operation.validate(200, body),
+            )
+        
+        with patch.object(ValidationOrchestrator, "_execute_operation", side_effect=execute_operation):
+            asyncio.run(ValidationOrchestrator(db).execute("run"))
+        
+        run = db.query(ValidationRun).one()
+        policy = run.reasons["policy"]
+        assert run.decision == DecisionType.FAIL
+        assert policy["decision"] == "FAIL"
+        assert policy["counts"]["fail"] == 1
+        assert "critical_type_changes" in policy["operations"]["broken"]["rules"]
+        assert policy["operations"]["healthy"] == {"decision": "PASS", "skipped": False, "rules": []}
+        assert run.reasons["qoe_risk"]["critical_type_changes"] == 1
+        assert run.drift_type == DriftType.UNDOCUMENTED
+        assert run.qoe_risk_score == max(run.reasons["qoe_risk"]["operations"].values())
+        assert run.policy_version == policy["policy_version"]
+        assert "Type changes on critical paths are high-risk; ensure backward compatibility" in run.recommendations
+        assert "URGENT: Investigate critical path changes immediately" in run.recommendations
+        assert set(policy["recommendations"]) <= set(run.recommendations)
+        
+        # The stored inputs replay to the same decision
+        from qoe_guard.policy.config import DEFAULT_POLICY
+        assert sorted(run.policy_inputs["operation_ids"]) == ["broken", "healthy"]
+        replay = simulate_policy(db, DEFAULT_POLICY)
+        assert replay.total_runs == 1 and replay.flipped_total == 0
+        validation_plans.clear()
+        db.close()
+
+
+# ============================================================================
+# Test qoe_guard.paths module
+# ============================================================================
+from qoe_guard.paths import flatten, iter_paths, is_leaf
+
+
+@allure.feature("Path Flattening - Full Coverage")
+class TestPathFlatteningFullCoverage:
+    """Complete coverage for JSON path flattening."""
+    
+    @allure.title("Test paths in document order")
+    def test_iter_paths_order(self):
+        doc = {"a": {"b": [1, {"c": 2}], "e": {}}, "f": 3}
+        
+        assert [path for path, _ in iter_paths(doc)] == [
+            "a", "a.b", "a.b[0]", "a.b[1]", "a.b[1].c", "a.e", "f",
+        ]
+        assert flatten(doc, "$", leaves_only=True) == {
+            "$.a.b[0]": 1, "$.a.b[1].c": 2, "$.a.e": {}, "$.f": 3,
+        }
+    
+    @allure.title("Test values are not copied")
+    def test_values_by_reference(self):
+        inner = {"c": 2}
+        assert flatten({"a": inner})["a"] is inner
+        assert flatten(5) == {}
+        assert is_leaf([]) and is_leaf("x") and not is_leaf([1])
+    
+    @allure.title("Test interned paths and deep documents")
+    def test_intern_and_depth(self):
+        doc = {}
+        node = doc
+        for _ in range(3000):
+            node["x"] = {}
+            node = node["x"]
+        
+        paths = flatten(doc, intern=True)
+        assert len(paths) == 3000
+        
+        path = next(iter_paths({"".join(["k", "ey"]): 1}, intern=True))[0]
+        assert path is sys.intern("key")
+
+
+# ============================================================================
+# Test qoe_guard.scoring.criticality resolver
+# ============================================================================
+from qoe_guard.diff import json_diff
+from qoe_guard.paths import normalize_path
+from qoe_guard.scoring.criticality import (
+    CriticalityResolver,
+    calculate_criticality_weighted_changes,
+    criticality_resolver,
+    get_criticality_for_path,
+)
+
+
+@allure.feature("Criticality Resolver - Full Coverage")
+class TestCriticalityResolverFullCoverage:
+    """Complete coverage for per-path criticality resolution."""
+    
+    @allure.title("Test array indices are normalized")
+    def test_normalize_path(self):
+        assert normalize_path("$.items[12].tags[0]") == "$.items[*].tags[*]"
+        assert normalize_path("$.playback.url") == "$.playback.url"
+    
+    @allure.title("Test criticality does not depend on array indices")
+    def test_index_invariant(self):
+        paths = ["$.items[3].price", "$.playback[0].manifestUrl", "$.drm.keys[1][2].url", "$[4].entitled", "$.ads[9]"]
+        for path in paths:
+            assert get_criticality_for_path(normalize_path(path)) == get_criticality_for_path(path)
+    
+    @allure.title("Test each normalized path is resolved once")
+    def test_resolved_once(self):
+        resolver = CriticalityResolver()
+        with patch("qoe_guard.scoring.criticality.get_criticality_for_path", wraps=get_criticality_for_path) as lookup:
+            scores = [resolver(f"$.items[{i}].manifestUrl") for i in range(1000)]
+            assert resolver.resolve(["$.items[5].manifestUrl", "$.status"]) == {
+                "$.items[*].manifestUrl": 1.0, "$.status": 0.10,
+            }
+        assert set(scores) == {1.0}
+        assert lookup.call_count == 2
+        assert len(resolver) == 2
+        assert criticality_resolver() is criticality_resolver()
+        assert criticality_resolver({"price": 0.9}) is not criticality_resolver({"price": 0.9})
+        assert calculate_criticality_weighted_changes(["$.items[0].price", "$.items[1].price"], {"price": 0.9}) == 1.8
+    
+    @allure.title("Test pluggable scoring function and the ML criticality scale")
+    def test_custom_score(self):
+        from qoe_guard.ai.ml_scorer import _get_path_criticality, criticality_lookup
+        
+        calls = []
+        resolver = CriticalityResolver({"price": 0.9}, score=lambda path, profiles: calls.append(path) or profiles["price"])
+        assert resolver.many(["$.items[0].price", "$.items[1].price"]).tolist() == [0.9, 0.9]
+        assert calls == ["$.items[*].price"]
+        
+        lookup = criticality_lookup()
+        assert isinstance(lookup, CriticalityResolver) and lookup is criticality_lookup()
+        assert lookup("$.events[2].beacon") == _get_path_criticality("$.events[*].beacon", {}) == 0.3
+        assert criticality_lookup({"$.events": 0.6})("$.events[0].beacon") == 0.6
+    
+    @allure.title("Test json_diff feeds the criticality-weighted sum into QoE risk")
+    def test_json_diff_weighted_sum(self):
+        baseline = {"items": [{"price": i, "manifestUrl": "a"} for i in range(500)]}
+        candidate = {"items": [{"price": i + 1, "manifestUrl": 1} for i in range(500)]}
+        resolver = CriticalityResolver()
+        
+        result = json_diff(baseline, candidate, criticality=resolver)
+        
+        assert len(result.changes) == 1000 and len(resolver) == 2
+        price = get_criticality_for_path("$.items[*].price")
+        assert result.criticality_weighted_sum == pytest.approx(500 * (0.1 * price + 0.4 * 1.0))
+        assert result.critical_type_changes == 500
+        assert all(c.criticality_score == 1.0 for c in result.changes if c.change_type == "type_changed")
+        assert json_diff({"a": 1}, {"a": 1}).criticality_weighted_sum == 0.0
+
+
+# ============================================================================
+# Test qoe_guard.aggregate module
+# ============================================================================
+from qoe_guard.aggregate import aggregate_changes, change_groups
+from qoe_guard.diff import extract_features as diff_extract_features
+from qoe_guard.features import extract_features as features_extract
+from qoe_guard.model import DiffResult
+from qoe_guard.paths import path_indices
+
+
+def _per_change_features(changes):
+    """Features counted change by change (as before aggregation)."""
+    deltas = [
+        abs(c.new_value - c.old_value) for c in changes
+        if c.change_type == "value_changed"
+        and isinstance(c.old_value, (int, float)) and isinstance(c.new_value, (int, float))
+    ]
+    return {
+        "total_changes": len(changes),
+        "value_changes": sum(c.change_type == "value_changed" for c in changes),
+        "type_changes": sum(c.change_type == "type_changed" for c in changes),
+        "added_fields": sum(c.change_type == "added" for c in changes),
+        "removed_fields": sum(c.change_type == "removed" for c in changes),
+        "critical_changes": sum(c.is_critical for c in changes),
+        "breaking_changes": sum(c.is_breaking for c in changes),
+        "array_length_changes": sum("[" in c.path for c in changes),
+        "max_numeric_delta": max(deltas, default=0),
+        "numeric_delta_sum": sum(deltas),
+    }
+
+
+@allure.feature("Change Aggregation - Full Coverage")
+class TestChangeAggregationFullCoverage:
+    """Complete coverage for change aggregation."""
+    
+    @allure.title("Test index-varying paths fold into one group")
+    def test_large_list(self):
+        baseline = {"items": [{"price": i, "manifestUrl": "u"} for i in range(10000)], "title": "a"}
+        candidate = {"items": [{"price": i * 2, "manifestUrl": "u"} for i in range(10000)], "title": "b"}
+        
+        result = json_diff(baseline, candidate)
+        
+        assert len(result.changes) == 10000
+        assert [(g.display_path, g.count) for g in result.change_groups] == [("$.items[*].price", 9999), ("$.title", 1)]
+        price = result.change_groups[0]
+        assert price.first_path == "$.items[1].price"
+        assert price.sample_indices == [[1], [2], [3], [4], [5]]
+        assert (price.min_delta, price.max_delta) == (1, 9999)
+        assert result.change_groups[1].sample_indices == []
+    
+    @allure.title("Test features and scores match per-change counting")
+    def test_features_match(self):
+        baseline = {"items": [{"id": i, "tags": [1, 2], "drm": {"url": "a"}} for i in range(50)], "n": 1.5}
+        candidate = {"items": [{"id": str(i) if i % 3 else i + 0.5, "tags": [1], "drm": {"url": 7}} for i in range(40)], "n": -2}
+        
+        result = json_diff(baseline, candidate)
+        expected = _per_change_features(result.changes)
+        
+        features = diff_extract_features(result)
+        assert {name: getattr(features, name) for name in expected} == pytest.approx(expected)
+        assert features_extract(result).total_changes == len(result.changes)
+        assert result.critical_type_changes == sum(c.is_critical and c.change_type == "type_changed" for c in result.changes)
+    
+    @allure.title("Test diff results without groups are aggregated on demand")
+    def test_change_groups_fallback(self):
+        changes = json_diff({"a": [1, 2]}, {"a": [3, 4]}).changes
+        
+        groups = change_groups(DiffResult(changes=changes))
+        assert [(g.path, g.count, g.abs_delta_sum) for g in groups] == [("$.a[*]", 2, 4)]
+        assert change_groups(DiffResult()) == []
+        assert len(aggregate_changes(changes, max_samples=1)[0].sample_indices) == 1
+        assert path_indices("$.a[2].b[10]") == [2, 10] and path_indices("$.a") == []
+    
+    @allure.title("Test stored change records")
+    def test_change_records(self):
+        from qoe_guard.server import _change_records
+        
+        result = json_diff({"items": [{"p": 1}, {"p": 2}], "o": {"x": 1}}, {"items": [{"p": 5}, {"p": 1}], "o": None})
+        records = _change_records(result)
+        
+        assert records[0] == {
+            "path": "$.items[*].p", "change_type": "value_changed", "before": "1", "after": "5",
+            "count": 2, "sample_indices": [[0], [1]], "min_delta": -1, "max_delta": 4,
+        }
+        assert records[1]["path"] == "$.o" and "count" not in records[1]
+        assert _change_records(result, keep_null=True)[1]["after"] is None
+    
+    @allure.title("Test ML features count aggregated changes")
+    def test_ml_features_weighted(self):
+        from qoe_guard.ai.ml_scorer import extract_features_from_changes
+        
+        grouped = [{"path": "$.items[*].price", "change_type": "value_changed", "count": 30}]
+        expanded = [{"path": f"$.items[{i}].price", "change_type": "value_changed"} for i in range(30)]
+        
+        assert extract_features_from_changes(grouped).to_dict() == extract_features_from_changes(expanded).to_dict()